@@ -44,12 +44,8 @@ class IMPATOMEXPORT Domain : public Hierarchy {
            Hierarchy::get_is_setup(m, pi);
   }
 
-  void set_index_range(IntRange ir) {
-    IMP_USAGE_CHECK(ir.first < ir.second,
-                    "Bad range passed: " << ir.first << "..." << ir.second);
-    get_particle()->set_value(get_data().begin, ir.first);
-    get_particle()->set_value(get_data().end, ir.second);
-  }
+  /** \note This removes any index added with add_selection_index(). */
+  void set_index_range(IntRange ir);
   /** Get the range of indexes in the domain `[begin...end)` */
   IntRange get_index_range() const {
     return IntRange(
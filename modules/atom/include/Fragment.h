@@ -49,6 +49,7 @@ class IMPATOMEXPORT Fragment : public Hierarchy {
   }
 
   //! Add the residues whose indexes are listed in the passed vector
+  /** \note This removes any index added with add_selection_index(). */
   void set_residue_indexes(Ints o) {
     set_residue_indexes(get_model(), get_particle_index(), o);
   }
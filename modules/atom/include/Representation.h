@@ -73,6 +73,7 @@ class IMPATOMEXPORT Representation : public Hierarchy {
       not given it is computed using get_resolution().
       Currently only 'BALLS' and 'DENSITIES' are supported; eventually,
       other types of representation may be supported.
+      \note This removes any index added with add_selection_index().
    */
   void add_representation(ParticleIndexAdaptor rep,
                           RepresentationType type = BALLS,
@@ -190,7 +190,13 @@ class IMPATOMEXPORT Residue : public Hierarchy {
   }
 
   //! The residues index in the chain
-  IMP_DECORATOR_GET_SET(index, get_index_key(), Int, Int);
+  Int get_index() const {
+    return get_model()->get_attribute(get_index_key(), get_particle_index());
+  }
+
+  //! Set the residues index in the chain
+  /** \note This removes any index added with add_selection_index(). */
+  void set_index(Int t);
 
   char get_insertion_code() const {
     return char(get_model()->get_attribute(get_insertion_code_key(),
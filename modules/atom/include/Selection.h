@@ -89,7 +89,8 @@ class IMPATOMEXPORT Selection :
   SearchResult search(Model *m, ParticleIndex pi,
                       boost::dynamic_bitset<> parent,
                       bool include_children,
-                      bool found_rep_node=false) const;
+                      bool found_rep_node=false,
+                      const internal::SelectionIndex *index=nullptr) const;
   void set_hierarchies(Model *m, const ParticleIndexes &pis);
   void add_predicate(internal::SelectionPredicate *p);
   void init_predicate();
@@ -240,6 +241,29 @@ class IMPATOMEXPORT Selection :
 
 IMP_VALUES(Selection, Selections);
 
+//! Index the hierarchy to speed up Selections on it.
+/** The index is stored in the Model and used automatically by every
+    Selection on the hierarchy (or on any part of it). Currently it lets
+    residue index queries skip the parts of the hierarchy that cannot
+    contain the requested residues.
+
+    The index is removed when children are added to or removed from any
+    hierarchy in the Model, when representations are added with
+    Representation::add_representation(), when residue indexes are changed
+    with Residue::set_index(), Fragment::set_residue_indexes() or
+    Domain::set_index_range(), and when an indexed particle is removed from
+    the Model. Call this function again afterwards to restore it. Changes
+    made in other ways (e.g. setting the attributes directly) need an
+    explicit remove_selection_index().
+    \see Selection
+*/
+IMPATOMEXPORT void add_selection_index(Hierarchy h);
+
+//! Remove the index added by add_selection_index(), if any.
+/** \see Selection
+ */
+IMPATOMEXPORT void remove_selection_index(Model *m);
+
 /** Create a distance restraint between the selections.
 
     This restraint applies a harmonic to the minimum distance
@@ -0,0 +1,69 @@
+/**
+ *  \file IMP/atom/internal/SelectionIndex.h
+ *  \brief Summaries of hierarchy subtrees used to speed up Selection.
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ */
+
+#ifndef IMPATOM_SELECTION_INDEX_H
+#define IMPATOM_SELECTION_INDEX_H
+
+#include <IMP/atom/atom_config.h>
+#include <IMP/Model.h>
+#include <IMP/Object.h>
+#include <boost/unordered_set.hpp>
+
+IMPATOM_BEGIN_INTERNAL_NAMESPACE
+
+//! Summaries of hierarchy subtrees used to speed up Selection.
+/** For each indexed node, the index keeps the range of residue indexes
+    found anywhere in the part of the hierarchy a Selection search can
+    reach from that node (its children and all of their representations).
+    This lets the search skip whole subtrees that cannot match a residue
+    index query. Nodes that were not indexed are never skipped.
+
+    The index is out of date once children are added to or removed from
+    any hierarchy in the model (see get_is_up_to_date()). Other changes
+    that affect it remove it from the model instead.
+    \see add_selection_index()
+*/
+class IMPATOMEXPORT SelectionIndex : public Object {
+  // by particle index: [first, second) residue range of the subtree;
+  // empty (first >= second) if the subtree has no residue information
+  IntPairs ranges_;
+  std::vector<bool> indexed_;
+  unsigned int hierarchy_edits_;
+  IntPair add_node(Model *m, ParticleIndex pi,
+                   boost::unordered_set<ParticleIndex> &seen);
+
+ public:
+  SelectionIndex(Model *m, std::string name = "SelectionIndex%1%");
+
+  //! Return false if hierarchies in m changed since the index was made
+  bool get_is_up_to_date(Model *m) const;
+
+  //! Index (or index again) the hierarchy rooted at pi
+  void add_hierarchy(Model *m, ParticleIndex pi);
+
+  bool get_is_indexed(ParticleIndex pi) const {
+    return static_cast<unsigned int>(pi.get_index()) < indexed_.size() &&
+           indexed_[pi.get_index()];
+  }
+
+  //! Return false if no index in the sorted list can be under pi
+  /** Unindexed nodes always return true. */
+  bool get_may_contain_residue_indexes(ParticleIndex pi,
+                                       const Ints &indexes) const;
+
+  IMP_OBJECT_METHODS(SelectionIndex);
+};
+
+IMPATOMEXPORT ModelKey get_selection_index_key();
+
+//! Return the SelectionIndex stored in the model, or nullptr
+/** An index that is no longer up to date is removed from the model. */
+IMPATOMEXPORT SelectionIndex *get_selection_index(Model *m);
+
+IMPATOM_END_INTERNAL_NAMESPACE
+
+#endif /* IMPATOM_SELECTION_INDEX_H */
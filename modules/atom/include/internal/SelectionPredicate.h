@@ -14,6 +14,8 @@
 
 IMPATOM_BEGIN_INTERNAL_NAMESPACE
 
+class SelectionIndex;
+
 //! Predicates for selecting a subset of a hierarchy.
 /** \see Selection */
 class SelectionPredicate : public ParticleInputs, public Object {
@@ -90,11 +92,32 @@ class SelectionPredicate : public ParticleInputs, public Object {
     }
   }
 
+  //! Return false if nothing in the subtree of the given particle can match.
+  /** The subtree is everything a Selection search can reach from the
+      particle. Calls do_get_may_match() unless a parent particle already
+      matched.
+   */
+  bool get_may_match(const SelectionIndex *index, ParticleIndex vt,
+                     const boost::dynamic_bitset<> &bs) const {
+    if (!bs[bitset_index_]) {
+      return true;
+    } else {
+      return do_get_may_match(index, vt, bs);
+    }
+  }
+
  protected:
   //! Do the actual match for get_value_index()
   /** Should be overridden in subclasses */
   virtual MatchType do_get_value_index(Model *m, ParticleIndex vt,
                                        boost::dynamic_bitset<> &bs) const = 0;
+
+  //! Do the actual check for get_may_match()
+  /** By default, anything may match. */
+  virtual bool do_get_may_match(const SelectionIndex *, ParticleIndex,
+                                const boost::dynamic_bitset<> &) const {
+    return true;
+  }
 };
 IMP_OBJECTS(SelectionPredicate, SelectionPredicates);
 
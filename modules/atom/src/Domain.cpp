@@ -7,6 +7,7 @@
  */
 
 #include "IMP/atom/Domain.h"
+#include "IMP/atom/Selection.h"
 
 IMPATOM_BEGIN_NAMESPACE
 
@@ -15,6 +16,14 @@ const Domain::Data& Domain::get_data() {
   return data;
 }
 
+void Domain::set_index_range(IntRange ir) {
+  IMP_USAGE_CHECK(ir.first < ir.second,
+                  "Bad range passed: " << ir.first << "..." << ir.second);
+  get_particle()->set_value(get_data().begin, ir.first);
+  get_particle()->set_value(get_data().end, ir.second);
+  remove_selection_index(get_model());
+}
+
 void Domain::show(std::ostream& out) const {
   IntRange range = get_index_range();
   out << "Domain: " << range.first << " to " << range.second;
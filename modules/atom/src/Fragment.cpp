@@ -7,6 +7,7 @@
  */
 
 #include "IMP/atom/Fragment.h"
+#include "IMP/atom/Selection.h"
 #include <algorithm>
 
 IMPATOM_BEGIN_NAMESPACE
@@ -95,6 +96,7 @@ void Fragment::set_residue_indexes(Model *m, ParticleIndex pi,
       m->remove_attribute(get_ends_key(), pi);
     }
   }
+  remove_selection_index(m);
 }
 
 void Fragment::set_residue_indexes(Model *m, ParticleIndex pi,
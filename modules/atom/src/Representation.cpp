@@ -8,6 +8,7 @@
 #include <IMP/atom/Representation.h>
 #include <IMP/atom/Atom.h>
 #include <IMP/atom/Mass.h>
+#include <IMP/atom/Selection.h>
 #include <IMP/core/Gaussian.h>
 #include <IMP/log.h>
 
@@ -190,6 +191,7 @@ void Representation::add_representation(ParticleIndexAdaptor rep,
     get_model()->add_attribute(get_resolution_key(index), get_particle_index(),
                                resolution);
   }
+  remove_selection_index(get_model());
 }
 
 Floats Representation::get_resolutions(RepresentationType type) const {
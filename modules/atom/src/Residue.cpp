@@ -8,6 +8,7 @@
 #include <IMP/atom/Residue.h>
 #include <IMP/atom/Atom.h>
 #include <IMP/atom/Chain.h>
+#include <IMP/atom/Selection.h>
 
 #include <IMP/base_types.h>
 #include <IMP/log.h>
@@ -83,6 +84,11 @@ void Residue::set_residue_type(ResidueType t) {
   get_particle()->set_value(get_residue_type_key(), t.get_index());
 }
 
+void Residue::set_index(Int t) {
+  get_model()->set_attribute(get_index_key(), get_particle_index(), t);
+  remove_selection_index(get_model());
+}
+
 IntKey Residue::get_index_key() {
   static IntKey k("residue_index");
   return k;
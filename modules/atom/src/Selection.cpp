@@ -22,6 +22,7 @@
 #include <IMP/atom/bond_decorators.h>
 #include <IMP/atom/distance.h>
 #include <IMP/atom/estimates.h>
+#include <IMP/atom/internal/SelectionIndex.h>
 #include <IMP/constants.h>
 #include <IMP/container/AllBipartitePairContainer.h>
 #include <IMP/container/ConnectingPairContainer.h>
@@ -156,6 +157,18 @@ namespace {
       }
     }
 
+    virtual bool do_get_may_match(const internal::SelectionIndex *index,
+                                  ParticleIndex pi,
+                                  const boost::dynamic_bitset<> &bs)
+                                      const IMP_OVERRIDE {
+      IMP_FOREACH(internal::SelectionPredicate *p, predicates_) {
+        if (!p->get_may_match(index, pi, bs)) {
+          return false;
+        }
+      }
+      return true;
+    }
+
     IMP_OBJECT_METHODS(AndSelectionPredicate);
   };
 
@@ -199,6 +212,21 @@ namespace {
       }
     }
 
+    virtual bool do_get_may_match(const internal::SelectionIndex *index,
+                                  ParticleIndex pi,
+                                  const boost::dynamic_bitset<> &bs)
+                                      const IMP_OVERRIDE {
+      if (predicates_.size() == 0) {
+        return true;
+      }
+      IMP_FOREACH(internal::SelectionPredicate *p, predicates_) {
+        if (p->get_may_match(index, pi, bs)) {
+          return true;
+        }
+      }
+      return false;
+    }
+
     IMP_OBJECT_METHODS(OrSelectionPredicate);
   };
 
@@ -356,11 +384,14 @@ bool get_is_residue_index_match(const Ints &data, Model *m,
                               Residue(m, pi).get_index());
   }
   if (Fragment::get_is_setup(m, pi)) {
-    Ints cur = Fragment(m, pi).get_residue_indexes();
-    Ints si;
-    std::set_intersection(data.begin(), data.end(), cur.begin(), cur.end(),
-                          std::back_inserter(si));
-    return !si.empty();
+    IntPairs ranges = Fragment(m, pi).get_residue_index_ranges();
+    for (unsigned int i = 0; i < ranges.size(); ++i) {
+      if (std::lower_bound(data.begin(), data.end(), ranges[i].first) !=
+          std::lower_bound(data.begin(), data.end(), ranges[i].second)) {
+        return true;
+      }
+    }
+    return false;
   } else if (Domain::get_is_setup(m, pi)) {
     IntRange ir = Domain(m, pi).get_index_range();
     return std::lower_bound(data.begin(), data.end(), ir.first) !=
@@ -369,24 +400,40 @@ bool get_is_residue_index_match(const Ints &data, Model *m,
   return false;
 }
 
-IMP_ATOM_SELECTION_PRED(ResidueIndex, Ints, {
-  bool this_matches = get_is_residue_index_match(data_, m, pi);
-  if (!this_matches)
-    return NO_MATCH;
-  if (Hierarchy(m, pi).get_number_of_children() > 0) {
+class ResidueIndexSelectionPredicate : public internal::SelectionPredicate {
+  Ints data_;
+
+ public:
+  ResidueIndexSelectionPredicate(
+      const Ints &data, std::string name = "ResidueIndexSelectionPredicate%1%")
+      : internal::SelectionPredicate(name), data_(data) {}
+  virtual MatchType do_get_value_index(Model *m, ParticleIndex pi,
+                                       boost::dynamic_bitset<> &)
+                                           const IMP_OVERRIDE {
+    bool this_matches = get_is_residue_index_match(data_, m, pi);
+    if (!this_matches)
+      return NO_MATCH;
+    Hierarchy h(m, pi);
     // if any children match, push it until then
-    for (unsigned int i = 0; i < Hierarchy(m, pi).get_number_of_children();
-         ++i) {
-      ParticleIndex cpi =
-          Hierarchy(m, pi).get_child(i).get_particle_index();
-      bool cur = get_is_residue_index_match(data_, m, cpi);
-      if (cur) {
+    for (unsigned int i = 0; i < h.get_number_of_children(); ++i) {
+      if (get_is_residue_index_match(data_, m, h.get_child_index(i))) {
         return NO_MATCH;
       }
     }
+    return MATCH_WITH_CHILDREN;
   }
-  return MATCH_WITH_CHILDREN;
-});
+  virtual bool do_get_may_match(const internal::SelectionIndex *index,
+                                ParticleIndex pi,
+                                const boost::dynamic_bitset<> &)
+                                    const IMP_OVERRIDE {
+    return index->get_may_contain_residue_indexes(pi, data_);
+  }
+  virtual ModelObjectsTemp do_get_inputs(
+      Model *m, const ParticleIndexes &pis) const IMP_OVERRIDE {
+    return IMP::get_particles(m, pis);
+  }
+  IMP_OBJECT_METHODS(ResidueIndexSelectionPredicate);
+};
 IMP_ATOM_SELECTION_PRED(MoleculeName, Strings, {
   if (Molecule::get_is_setup(m, pi)) {
     return get_match_return(std::binary_search(data_.begin(), data_.end(),
@@ -555,9 +602,13 @@ ExpandResults expand_children_search(Model *m,
 Selection::SearchResult Selection::search(
     Model *m, ParticleIndex pi,
     boost::dynamic_bitset<> parent, bool with_representation,
-    bool found_rep_node) const {
+    bool found_rep_node, const internal::SelectionIndex *index) const {
   IMP_FUNCTION_LOG;
   IMP_LOG_VERBOSE("Searching " << m->get_particle_name(pi) << std::endl);
+  if (index && !predicate_->get_may_match(index, pi, parent)) {
+    // nothing can match in this subtree
+    return SearchResult(false, ParticleIndexes());
+  }
   internal::SelectionPredicate::MatchType val
                  = predicate_->get_value_index(m, pi, parent);
   if (val == internal::SelectionPredicate::MISMATCH) {
@@ -582,7 +633,8 @@ Selection::SearchResult Selection::search(
   IMP_FOREACH(ExpandResult chlist, cur_children) {
     found_rep_node |= chlist.get_from_rep();
     IMP_FOREACH(ParticleIndex ch, chlist.get_indexes()) {
-      SearchResult curr = search(m, ch, parent, with_representation, found_rep_node);
+      SearchResult curr = search(m, ch, parent, with_representation,
+                                 found_rep_node, index);
       matched |= curr.get_match();
       if (curr.get_match()) {
         if (curr.get_indexes().empty()) {
@@ -629,16 +681,35 @@ Selection::get_selected_particle_indexes(bool with_representation) const {
   IMP_LOG_TERSE("Processing selection on " << h_ << " with predicates "
                 << std::endl);
   IMP_LOG_WRITE(VERBOSE, show_predicate(predicate_, IMP_STREAM));
+  const internal::SelectionIndex *index = internal::get_selection_index(m_);
   IMP_FOREACH(ParticleIndex pi, h_) {
     ExpandResult res = expand_search(m_, pi, resolution_,
                                      representation_type_);
     IMP_FOREACH(ParticleIndex rpi, res.get_indexes()) {
-      ret += search(m_, rpi, base, with_representation, res.get_from_rep()).get_indexes();
+      ret += search(m_, rpi, base, with_representation, res.get_from_rep(),
+                    index).get_indexes();
     }
   }
   return ret;
 }
 
+void add_selection_index(Hierarchy h) {
+  Model *m = h.get_model();
+  internal::SelectionIndex *index = internal::get_selection_index(m);
+  if (!index) {
+    IMP_NEW(internal::SelectionIndex, new_index, (m));
+    m->add_data(internal::get_selection_index_key(), new_index);
+    index = new_index;
+  }
+  index->add_hierarchy(m, h.get_particle_index());
+}
+
+void remove_selection_index(Model *m) {
+  if (m->get_has_data(internal::get_selection_index_key())) {
+    m->remove_data(internal::get_selection_index_key());
+  }
+}
+
 Hierarchies Selection::get_hierarchies() const {
   Hierarchies ret(h_.size());
   for (unsigned int i = 0; i < h_.size(); ++i) {
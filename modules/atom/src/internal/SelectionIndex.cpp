@@ -0,0 +1,169 @@
+/**
+ *  \file SelectionIndex.cpp
+ *  \brief Summaries of hierarchy subtrees used to speed up Selection.
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ *
+ */
+
+#include <IMP/atom/internal/SelectionIndex.h>
+#include <IMP/atom/Domain.h>
+#include <IMP/atom/Fragment.h>
+#include <IMP/atom/Hierarchy.h>
+#include <IMP/atom/Representation.h>
+#include <IMP/atom/Residue.h>
+#include <IMP/core/Hierarchy.h>
+#include <IMP/Undecorator.h>
+#include <algorithm>
+#include <limits>
+
+IMPATOM_BEGIN_INTERNAL_NAMESPACE
+
+namespace {
+const IntPair EMPTY_RANGE(std::numeric_limits<int>::max(),
+                          std::numeric_limits<int>::min());
+
+void add_to_range(IntPair &range, const IntPair &o) {
+  if (o.first >= o.second) return;
+  range.first = std::min(range.first, o.first);
+  range.second = std::max(range.second, o.second);
+}
+
+// residue indexes of the node itself, as checked by Selection
+IntPair get_own_range(Model *m, ParticleIndex pi) {
+  IntPair ret = EMPTY_RANGE;
+  if (Residue::get_is_setup(m, pi)) {
+    int i = Residue(m, pi).get_index();
+    add_to_range(ret, IntPair(i, i + 1));
+  } else if (Fragment::get_is_setup(m, pi)) {
+    IntPairs ranges = Fragment(m, pi).get_residue_index_ranges();
+    for (unsigned int i = 0; i < ranges.size(); ++i) {
+      add_to_range(ret, ranges[i]);
+    }
+  } else if (Domain::get_is_setup(m, pi)) {
+    IntRange ir = Domain(m, pi).get_index_range();
+    add_to_range(ret, IntPair(ir.first, ir.second));
+  }
+  return ret;
+}
+
+// A new particle can reuse the index of a removed one, so remove the
+// selection index when an indexed particle is removed from the model
+class SelectionIndexUndecorator : public Undecorator {
+  Model *m_;
+  mutable std::vector<bool> registered_;
+
+ public:
+  SelectionIndexUndecorator(Model *m)
+      : Undecorator(m, "SelectionIndexUndecorator%1%"), m_(m) {}
+  void add_particle(ParticleIndex pi) {
+    unsigned int index = pi.get_index();
+    if (index >= registered_.size()) registered_.resize(index + 1, false);
+    if (!registered_[index]) {
+      registered_[index] = true;
+      m_->add_undecorator(pi, this);
+    }
+  }
+  virtual void teardown(ParticleIndex pi) const IMP_OVERRIDE {
+    registered_[pi.get_index()] = false;
+    if (m_->get_has_data(get_selection_index_key())) {
+      m_->remove_data(get_selection_index_key());
+    }
+  }
+  IMP_OBJECT_METHODS(SelectionIndexUndecorator);
+};
+
+// The undecorator is kept for the life of the model, so that particles
+// indexed again are not registered twice
+SelectionIndexUndecorator *get_selection_index_undecorator(Model *m) {
+  static ModelKey key("selection index undecorator");
+  if (!m->get_has_data(key)) {
+    IMP_NEW(SelectionIndexUndecorator, undecorator, (m));
+    m->add_data(key, undecorator);
+  }
+  return static_cast<SelectionIndexUndecorator *>(m->get_data(key));
+}
+}
+
+SelectionIndex::SelectionIndex(Model *m, std::string name)
+    : Object(name),
+      hierarchy_edits_(core::internal::get_number_of_hierarchy_edits(m)) {}
+
+bool SelectionIndex::get_is_up_to_date(Model *m) const {
+  return core::internal::get_number_of_hierarchy_edits(m) == hierarchy_edits_;
+}
+
+IntPair SelectionIndex::add_node(Model *m, ParticleIndex pi,
+                                 boost::unordered_set<ParticleIndex> &seen) {
+  unsigned int index = pi.get_index();
+  if (index >= indexed_.size()) {
+    indexed_.resize(index + 1, false);
+    ranges_.resize(index + 1, EMPTY_RANGE);
+  }
+  // a node can be its own representation (e.g. self-density)
+  if (!seen.insert(pi).second) return ranges_[index];
+  indexed_[index] = true;
+  ranges_[index] = get_own_range(m, pi);
+  // the search reaches the children and every representation of them
+  Hierarchies children = Hierarchy(m, pi).get_children();
+  for (unsigned int i = 0; i < children.size(); ++i) {
+    ParticleIndex cpi = children[i].get_particle_index();
+    add_to_range(ranges_[index], add_node(m, cpi, seen));
+    if (Representation::get_is_setup(m, cpi)) {
+      Representation rep(m, cpi);
+      Hierarchies reps = rep.get_representations(BALLS);
+      reps += rep.get_representations(DENSITIES);
+      for (unsigned int j = 0; j < reps.size(); ++j) {
+        add_to_range(ranges_[index],
+                     add_node(m, reps[j].get_particle_index(), seen));
+      }
+    }
+  }
+  return ranges_[index];
+}
+
+void SelectionIndex::add_hierarchy(Model *m, ParticleIndex pi) {
+  boost::unordered_set<ParticleIndex> seen;
+  add_node(m, pi, seen);
+  // a Selection on pi starts from its representations
+  if (Representation::get_is_setup(m, pi)) {
+    Representation rep(m, pi);
+    Hierarchies reps = rep.get_representations(BALLS);
+    reps += rep.get_representations(DENSITIES);
+    for (unsigned int j = 0; j < reps.size(); ++j) {
+      add_node(m, reps[j].get_particle_index(), seen);
+    }
+  }
+  SelectionIndexUndecorator *undecorator = get_selection_index_undecorator(m);
+  for (boost::unordered_set<ParticleIndex>::const_iterator it = seen.begin();
+       it != seen.end(); ++it) {
+    undecorator->add_particle(*it);
+  }
+}
+
+bool SelectionIndex::get_may_contain_residue_indexes(
+    ParticleIndex pi, const Ints &indexes) const {
+  if (!get_is_indexed(pi)) return true;
+  const IntPair &range = ranges_[pi.get_index()];
+  Ints::const_iterator it =
+      std::lower_bound(indexes.begin(), indexes.end(), range.first);
+  return it != indexes.end() && *it < range.second;
+}
+
+ModelKey get_selection_index_key() {
+  static ModelKey key("selection index");
+  return key;
+}
+
+SelectionIndex *get_selection_index(Model *m) {
+  ModelKey mk = get_selection_index_key();
+  if (!m->get_has_data(mk)) return nullptr;
+  SelectionIndex *index = dynamic_cast<SelectionIndex *>(m->get_data(mk));
+  if (!index->get_is_up_to_date(m)) {
+    m->remove_data(mk);
+    return nullptr;
+  }
+  return index;
+}
+
+IMPATOM_END_INTERNAL_NAMESPACE
@@ -0,0 +1,146 @@
+import IMP
+import IMP.test
+import IMP.core
+import IMP.atom
+
+
+class Tests(IMP.test.TestCase):
+    """Test selections on indexed hierarchies"""
+
+    def _get_selections(self, h):
+        sels = [IMP.atom.Selection(h, residue_index=436),
+                IMP.atom.Selection(h, residue_indexes=range(430, 440)),
+                IMP.atom.Selection(h, residue_indexes=[1, 2, 5000]),
+                IMP.atom.Selection(h, residue_index=436,
+                                   atom_type=IMP.atom.AT_CA),
+                IMP.atom.Selection(h, residue_type=IMP.atom.ASP)]
+        sels.append(IMP.atom.Selection(h, residue_index=436)
+                    | IMP.atom.Selection(h, atom_type=IMP.atom.AT_CG))
+        sels.append(IMP.atom.Selection(h, residue_type=IMP.atom.ASP)
+                    - IMP.atom.Selection(h, residue_index=433))
+        return sels
+
+    def _get_selected(self, h):
+        return [(s.get_selected_particle_indexes(),
+                 s.get_selected_particle_indexes(False))
+                for s in self._get_selections(h)]
+
+    def test_same_selection(self):
+        """Test that indexing does not change what is selected"""
+        m = IMP.Model()
+        h = IMP.atom.read_pdb(self.open_input_file("mini.pdb"), m)
+        expected = self._get_selected(h)
+        IMP.atom.add_selection_index(h)
+        self.assertEqual(self._get_selected(h), expected)
+        # selections on part of the hierarchy
+        c = IMP.atom.get_by_type(h, IMP.atom.CHAIN_TYPE)[0]
+        self.assertEqual(
+            IMP.atom.Selection(c, residue_index=436)
+                   .get_selected_particle_indexes(),
+            expected[0][0])
+
+    def test_fragments(self):
+        """Test indexed selection of fragments"""
+        m = IMP.Model()
+        root = IMP.atom.Hierarchy.setup_particle(IMP.Particle(m))
+        h = IMP.atom.create_protein(m, "ProteinA", 300.,
+                                    [0, 820, 1065, 2075])
+        root.add_child(h)
+        IMP.atom.add_selection_index(root)
+        s = IMP.atom.Selection(root, molecule="ProteinA",
+                               residue_indexes=range(820, 1065))
+        self.assertEqual(s.get_selected_particles(), [h.get_child(1)])
+        s = IMP.atom.Selection(root, residue_index=5000)
+        self.assertEqual(s.get_selected_particles(), [])
+
+    def test_edits_remove_index(self):
+        """Test that adding children removes the index"""
+        m = IMP.Model()
+        h = IMP.atom.read_pdb(self.open_input_file("mini.pdb"), m)
+        IMP.atom.add_selection_index(h)
+        chain = IMP.atom.Chain.setup_particle(IMP.Particle(m), "Z")
+        r = IMP.atom.Residue.setup_particle(IMP.Particle(m),
+                                            IMP.atom.ALA, 5000)
+        chain.add_child(r)
+        h.add_child(chain)
+        s = IMP.atom.Selection(h, residue_index=5000)
+        self.assertEqual(s.get_selected_particle_indexes(),
+                         [r.get_particle_index()])
+        IMP.atom.add_selection_index(h)
+        self.assertEqual(s.get_selected_particle_indexes(),
+                         [r.get_particle_index()])
+        IMP.atom.remove_selection_index(m)
+        self.assertEqual(s.get_selected_particle_indexes(),
+                         [r.get_particle_index()])
+
+    def test_residue_index_edits(self):
+        """Test selections after residue indexes change"""
+        m = IMP.Model()
+        h = IMP.atom.read_pdb(self.open_input_file("mini.pdb"), m)
+        IMP.atom.add_selection_index(h)
+        r = IMP.atom.Residue(IMP.atom.get_by_type(h, IMP.atom.RESIDUE_TYPE)[0])
+        r.set_index(5000)
+        s = IMP.atom.Selection(h, residue_index=5000)
+        selected = s.get_selected_particle_indexes()
+        self.assertNotEqual(selected, [])
+        IMP.atom.remove_selection_index(m)
+        self.assertEqual(s.get_selected_particle_indexes(), selected)
+        # fragment ranges
+        root = IMP.atom.Hierarchy.setup_particle(IMP.Particle(m))
+        p = IMP.atom.create_protein(m, "ProteinA", 300., [0, 820, 1065])
+        root.add_child(p)
+        IMP.atom.add_selection_index(root)
+        f = IMP.atom.Fragment(p.get_child(0))
+        f.set_residue_indexes(list(range(2000, 2100)))
+        s = IMP.atom.Selection(root, residue_index=2050)
+        self.assertEqual(s.get_selected_particles(), [f.get_particle()])
+
+    def test_hierarchy_edits(self):
+        """Test selections after children are added or removed"""
+        m = IMP.Model()
+        h = IMP.atom.read_pdb(self.open_input_file("mini.pdb"), m)
+        IMP.atom.add_selection_index(h)
+        chain = IMP.atom.get_by_type(h, IMP.atom.CHAIN_TYPE)[0]
+        r = IMP.atom.Residue.setup_particle(IMP.Particle(m),
+                                            IMP.atom.ALA, 5000)
+        # through the core decorator, which atom::Hierarchy does not see
+        IMP.core.Hierarchy(chain).add_child(IMP.core.Hierarchy(r))
+        s = IMP.atom.Selection(h, residue_index=5000)
+        self.assertEqual(s.get_selected_particle_indexes(),
+                         [r.get_particle_index()])
+        IMP.atom.add_selection_index(h)
+        chain.remove_child(r)
+        self.assertEqual(s.get_selected_particle_indexes(), [])
+        IMP.core.Hierarchy(chain).add_child_at(IMP.core.Hierarchy(r), 0)
+        self.assertEqual(s.get_selected_particle_indexes(),
+                         [r.get_particle_index()])
+
+    def test_removed_particles(self):
+        """Test that removing indexed particles removes the index"""
+        m = IMP.Model()
+        root = IMP.atom.Hierarchy.setup_particle(IMP.Particle(m))
+        r = IMP.atom.Residue.setup_particle(IMP.Particle(m),
+                                            IMP.atom.ALA, 10)
+        root.add_child(r)
+        IMP.atom.add_selection_index(root)
+        IMP.atom.destroy(root)
+        # the new particles may reuse the old indexes
+        root = IMP.atom.Hierarchy.setup_particle(IMP.Particle(m))
+        r = IMP.atom.Residue.setup_particle(IMP.Particle(m),
+                                            IMP.atom.ALA, 20)
+        root.add_child(r)
+        s = IMP.atom.Selection(root, residue_index=20)
+        self.assertEqual(s.get_selected_particle_indexes(),
+                         [r.get_particle_index()])
+        # removing a particle without changing any hierarchy
+        IMP.atom.add_selection_index(root)
+        m.remove_particle(root.get_particle_index())
+        r = IMP.atom.Residue.setup_particle(IMP.Particle(m),
+                                            IMP.atom.ALA, 30)
+        s = IMP.atom.Selection(r, residue_index=30)
+        self.assertEqual(s.get_selected_particle_indexes(),
+                         [r.get_particle_index()])
+
+
+if __name__ == '__main__':
+    IMP.test.main()
@@ -0,0 +1,60 @@
+/**
+ * Copyright 2007-2016 IMP Inventors. All rights reserved.
+ */
+
+#include <IMP.h>
+#include <IMP/core.h>
+#include <IMP/algebra.h>
+#include <IMP/benchmark/utility.h>
+#include <boost/timer.hpp>
+#include <IMP/benchmark/benchmark_macros.h>
+#include <IMP/flags.h>
+#include <IMP/container.h>
+#include <cmath>
+
+using namespace IMP;
+using namespace IMP::core;
+using namespace IMP::algebra;
+using namespace IMP::benchmark;
+using namespace IMP::container;
+
+IMP_COMPILER_ENABLE_WARNINGS
+
+namespace {
+
+// Score a soft sphere excluded volume over a close pair list, with the
+// pairs in index order and in spatial order. The particles are created
+// in a random spatial order, as they are after building a large system.
+void test_one(unsigned int n, bool spatial_order) {
+  IMP_NEW(Model, m, ());
+  double side = std::pow(n / 0.1, 1.0 / 3.0);
+  BoundingBox3D bb(Vector3D(0, 0, 0), Vector3D(side, side, side));
+  ParticleIndexes pis;
+  for (unsigned int i = 0; i < n; ++i) {
+    IMP_NEW(Particle, p, (m));
+    XYZR::setup_particle(p, Sphere3D(get_random_vector_in(bb), 1.0));
+    pis.push_back(p->get_index());
+  }
+  IMP_NEW(ListSingletonContainer, lsc, (m, pis));
+  IMP_NEW(ClosePairContainer, cpc, (lsc, 0.0, 1.0));
+  cpc->set_use_spatial_order(spatial_order);
+  IMP_NEW(SoftSpherePairScore, ps, (1));
+  IMP_NEW(PairsRestraint, pr, (ps, cpc));
+  IMP_NEW(RestraintsScoringFunction, sf, (RestraintsTemp(1, pr)));
+  sf->evaluate(true);
+  double runtime, result = 0;
+  IMP_TIME({ result += sf->evaluate(true); }, runtime);
+  std::ostringstream oss;
+  oss << "excluded volume " << n;
+  report(oss.str(), spatial_order ? "spatial order" : "index order", runtime,
+         result);
+}
+}
+
+int main(int argc, char **argv) {
+  IMP::setup_from_argv(argc, argv, "Benchmark spatially sorted pair lists");
+  unsigned int n = IMP::run_quick_test ? 1000 : 200000;
+  test_one(n, false);
+  test_one(n, true);
+  return IMP::benchmark::get_return_value();
+}
@@ -76,6 +76,21 @@ class IMPCONTAINEREXPORT CloseBipartitePairContainer :
   void do_apply(const PairModifier *sm) const;
   ParticleIndexes get_all_possible_indexes() const;
 
+  void set_slack(double s);
+  double get_slack() const;
+  //! Adjust the slack automatically, keeping it within the given range
+  /** \see ClosePairContainer::set_adaptive_slack() */
+  void set_adaptive_slack(double min_slack, double max_slack,
+                          unsigned int window = 100);
+  /** Get the number of times this container has been asked to update its
+      contents. */
+  unsigned int get_number_of_update_calls() const;
+  /** Get the number of times this container has computed its contents from
+      scratch. */
+  unsigned int get_number_of_full_rebuilds() const;
+  /** Get the total time (in seconds) spent updating the contents. */
+  double get_update_time() const;
+
  private:
   virtual std::size_t do_get_contents_hash() const IMP_OVERRIDE;
 #endif
@@ -36,7 +36,9 @@ frequently. Also, too large a slack value generates many particle pairs
 whose score is zero, thereby unnecessarily slowing down the score
 calculation. As a result,
 it may be useful to experiment with the parameter. You may wish to use
-the get_slack_estimate() function to help with this experimentation.
+the get_slack_estimate() function to help with this experimentation,
+or call set_adaptive_slack() to have the container tune the slack itself
+while it is used.
 
 \note The non-bonded list will contain pairs that are further than
 `distance_cutoff` apart. If you use an IMP::PairScore with the generated
@@ -118,6 +120,25 @@ class IMPCONTAINEREXPORT ClosePairContainer :
       recomputation of its contents. */
   unsigned int get_number_of_partial_rebuilds() const;
 
+  //! Adjust the slack automatically, keeping it within the given range
+  /** Every `window` updates, the container compares the time it spent
+      updating the list, plus an estimate of the time taken to score the
+      pairs in it, with that of the previous window, and moves the slack
+      up or down accordingly. The current value is returned by get_slack().
+  */
+  void set_adaptive_slack(double min_slack, double max_slack,
+                          unsigned int window = 100);
+  /** Get the total time (in seconds) spent updating the contents. */
+  double get_update_time() const;
+
+  //! Keep the pairs in spatial order rather than index order
+  /** The list is sorted with core::get_spatially_sorted() when it is
+      rebuilt, and new pairs are added at the end on incremental updates.
+      Scores over a large list then make better use of the processor caches.
+  */
+  void set_use_spatial_order(bool tf);
+  bool get_use_spatial_order() const;
+
  private:
   virtual std::size_t do_get_contents_hash() const IMP_OVERRIDE;
 #endif
@@ -17,6 +17,7 @@
 #include <IMP/internal/ContainerScoreState.h>
 #include <IMP/internal/ListLikeContainer.h>
 #include <boost/unordered_map.hpp>
+#include "slack_tuner.h"
 
 IMPCONTAINER_BEGIN_INTERNAL_NAMESPACE
 
@@ -43,6 +44,9 @@ class IMPCONTAINEREXPORT CloseBipartitePairContainer
   boost::unordered_map<ParticleIndex, ParticleIndexes>
       constituents_;
   double slack_, distance_;
+  unsigned int updates_, rebuilds_;
+  double update_time_;
+  SlackTuner slack_tuner_;
   algebra::Sphere3Ds rbs_backup_sphere_[2];
   algebra::Rotation3Ds rbs_backup_rot_[2];
   algebra::Sphere3Ds xyzrs_backup_[2];
@@ -53,6 +57,7 @@ class IMPCONTAINEREXPORT CloseBipartitePairContainer
   void initialize(SingletonContainer *a, SingletonContainer *b,
                   ParticleIndex cover_a, ParticleIndex cover_b,
                   double distance, double slack, ObjectKey key);
+  void do_update();
 
  public:
   ModelObjectsTemp get_score_state_inputs() const;
@@ -91,6 +96,18 @@ class IMPCONTAINEREXPORT CloseBipartitePairContainer
   }, );
   /**@}*/
   void clear_caches() { reset_ = true; }
+  double get_slack() const { return slack_; }
+  void set_slack(double s) {
+    slack_ = s;
+    reset_ = true;
+  }
+  void set_adaptive_slack(double min_slack, double max_slack,
+                          unsigned int window = 100) {
+    slack_tuner_.set_range(min_slack, max_slack, window);
+  }
+  unsigned int get_number_of_update_calls() const { return updates_; }
+  unsigned int get_number_of_full_rebuilds() const { return rebuilds_; }
+  double get_update_time() const { return update_time_; }
   virtual ParticleIndexes get_all_possible_indexes() const IMP_OVERRIDE;
   virtual ModelObjectsTemp do_get_inputs() const IMP_OVERRIDE;
   void do_score_state_before_evaluate();
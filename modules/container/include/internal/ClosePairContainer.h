@@ -19,6 +19,7 @@
 #include <IMP/SingletonContainer.h>
 #include <IMP/internal/ContainerScoreState.h>
 #include <IMP/internal/ListLikeContainer.h>
+#include "slack_tuner.h"
 
 IMPCONTAINER_BEGIN_INTERNAL_NAMESPACE
 
@@ -29,8 +30,11 @@ class IMPCONTAINEREXPORT ClosePairContainer
   IMP::PointerMember<core::internal::MovedSingletonContainer> moved_;
   unsigned int moved_count_;
   bool first_call_;
+  bool spatial_order_;
   double distance_, slack_;
   unsigned int updates_, rebuilds_, partial_rebuilds_;
+  double update_time_;
+  SlackTuner slack_tuner_;
   typedef IMP::internal::ContainerScoreState<ClosePairContainer> SS;
   PointerMember<SS> score_state_;
 
@@ -42,6 +46,7 @@ class IMPCONTAINEREXPORT ClosePairContainer
   void do_first_call();
   void do_incremental();
   void do_rebuild();
+  void do_update();
 
  public:
   ModelObjectsTemp get_score_state_inputs() const;
@@ -70,6 +75,15 @@ class IMPCONTAINEREXPORT ClosePairContainer
   SingletonContainer *get_singleton_container() const { return c_; }
   core::ClosePairsFinder *get_close_pairs_finder() const { return cpf_; }
   void set_slack(double d);
+  void set_use_spatial_order(bool tf) {
+    spatial_order_ = tf;
+    first_call_ = true;
+  }
+  bool get_use_spatial_order() const { return spatial_order_; }
+  void set_adaptive_slack(double min_slack, double max_slack,
+                          unsigned int window = 100) {
+    slack_tuner_.set_range(min_slack, max_slack, window);
+  }
   Restraints create_decomposition(PairScore *ps) const {
     ParticleIndexPairs all = get_range_indexes();
     Restraints ret(all.size());
@@ -93,6 +107,7 @@ class IMPCONTAINEREXPORT ClosePairContainer
   unsigned int get_number_of_partial_rebuilds() const {
     return partial_rebuilds_;
   }
+  double get_update_time() const { return update_time_; }
 
   IMP_OBJECT_METHODS(ClosePairContainer);
 };
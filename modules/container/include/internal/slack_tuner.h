@@ -0,0 +1,99 @@
+/**
+ *  \file internal/slack_tuner.h
+ *  \brief Adjust the slack of a close pair container while it is used.
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ */
+
+#ifndef IMPCONTAINER_INTERNAL_SLACK_TUNER_H
+#define IMPCONTAINER_INTERNAL_SLACK_TUNER_H
+
+#include <IMP/container/container_config.h>
+#include <IMP/Model.h>
+#include <IMP/algebra/Sphere3D.h>
+#include <boost/timer.hpp>
+#include <algorithm>
+
+IMPCONTAINER_BEGIN_INTERNAL_NAMESPACE
+
+//! Estimate the time taken to score each pair in the list
+/** A sphere distance is computed for each pair, as a stand in for the
+    pair score (which the container does not know about). */
+inline double get_pair_time(Model *m, const ParticleIndexPairs &pairs) {
+  if (pairs.empty()) return 0;
+  boost::timer timer;
+  double sum = 0;
+  unsigned int passes = 0;
+  // the clock is coarse, so repeat short lists
+  do {
+    for (unsigned int i = 0; i < pairs.size(); ++i) {
+      sum += algebra::get_distance(m->get_sphere(pairs[i][0]),
+                                   m->get_sphere(pairs[i][1]));
+    }
+    ++passes;
+  } while (timer.elapsed() == 0 && passes < 1000);
+  IMP_UNUSED(sum);
+  return timer.elapsed() / (passes * pairs.size());
+}
+
+//! Pick the slack which minimizes the cost of updating and using the list
+/** The cost over a window of updates is the time spent updating the list
+    plus the estimated time to score the pairs in it. At the end of each
+    window the slack is moved a step, reversing direction whenever the cost
+    went up, so that it follows the optimum as the system changes.
+*/
+class SlackTuner {
+  double min_, max_;
+  unsigned int window_;
+  unsigned int count_;
+  double update_time_, pairs_, last_cost_;
+  int direction_;
+
+ public:
+  SlackTuner()
+      : min_(0),
+        max_(0),
+        window_(100),
+        count_(0),
+        update_time_(0),
+        pairs_(0),
+        last_cost_(-1),
+        direction_(1) {}
+  void set_range(double min_slack, double max_slack, unsigned int window) {
+    IMP_USAGE_CHECK(min_slack >= 0 && max_slack >= min_slack,
+                    "Bad slack range " << min_slack << " " << max_slack);
+    IMP_USAGE_CHECK(window > 0, "The window must contain some updates");
+    min_ = min_slack;
+    max_ = max_slack;
+    window_ = window;
+    count_ = 0;
+    update_time_ = 0;
+    pairs_ = 0;
+    last_cost_ = -1;
+  }
+  bool get_is_enabled() const { return max_ > min_; }
+  //! Record the time spent on one update and the resulting list size
+  void add_update(double time, unsigned int number_of_pairs) {
+    update_time_ += time;
+    pairs_ += number_of_pairs;
+    ++count_;
+  }
+  bool get_is_window_complete() const {
+    return get_is_enabled() && count_ >= window_;
+  }
+  //! Return the slack to use for the next window and start it
+  double get_new_slack(double slack, double pair_time) {
+    double cost = (update_time_ + pair_time * pairs_) / count_;
+    if (last_cost_ >= 0 && cost > last_cost_) direction_ = -direction_;
+    last_cost_ = cost;
+    count_ = 0;
+    update_time_ = 0;
+    pairs_ = 0;
+    double step = std::max(.2 * slack, .05 * (max_ - min_));
+    return std::max(min_, std::min(max_, slack + direction_ * step));
+  }
+};
+
+IMPCONTAINER_END_INTERNAL_NAMESPACE
+
+#endif /* IMPCONTAINER_INTERNAL_SLACK_TUNER_H */
@@ -53,6 +53,9 @@ void CloseBipartitePairContainer::initialize(SingletonContainer *a,
   IMP_OBJECT_LOG;
   slack_ = slack;
   distance_ = distance;
+  updates_ = 0;
+  rebuilds_ = 0;
+  update_time_ = 0;
   key_ = key;
   sc_[0] = a;
   sc_[1] = b;
@@ -91,6 +94,24 @@ ModelObjectsTemp CloseBipartitePairContainer::get_score_state_inputs()
 
 void CloseBipartitePairContainer::do_score_state_before_evaluate() {
   IMP_OBJECT_LOG;
+  ++updates_;
+  if (slack_tuner_.get_is_window_complete()) {
+    double slack = slack_tuner_.get_new_slack(
+        slack_, get_pair_time(get_model(), get_access()));
+    if (slack != slack_) {
+      IMP_LOG_TERSE("Changing slack from " << slack_ << " to " << slack
+                                           << std::endl);
+      set_slack(slack);
+    }
+  }
+  boost::timer timer;
+  do_update();
+  double elapsed = timer.elapsed();
+  update_time_ += elapsed;
+  slack_tuner_.add_update(elapsed, get_access().size());
+}
+
+void CloseBipartitePairContainer::do_update() {
   IMP_IF_LOG(VERBOSE) {
     algebra::Sphere3Ds coords[2];
     for (unsigned int i = 0; i < 2; ++i) {
@@ -126,6 +147,7 @@ void CloseBipartitePairContainer::do_score_state_before_evaluate() {
     } else {
       // rebuild
       IMP_LOG_TERSE("Recomputing bipartite close pairs list." << std::endl);
+      ++rebuilds_;
       core::internal::reset_moved(get_model(), xyzrs_[0], rbs_[0], constituents_,
                             rbs_backup_sphere_[0], rbs_backup_rot_[0],
                             xyzrs_backup_[0]);
@@ -8,6 +8,7 @@
 
 #include "IMP/container/internal/ClosePairContainer.h"
 #include <IMP/core/BoxSweepClosePairsFinder.h>
+#include <IMP/core/CellListClosePairsFinder.h>
 #include <IMP/core/GridClosePairsFinder.h>
 #include <IMP/core/internal/close_pairs_helpers.h>
 #include <IMP/core/pair_predicates.h>
@@ -19,6 +20,7 @@
 
 #include <IMP/core/RigidClosePairsFinder.h>
 #include <IMP/core/rigid_bodies.h>
+#include <IMP/core/utility.h>
 
 IMPCONTAINER_BEGIN_INTERNAL_NAMESPACE
 
@@ -40,6 +42,7 @@ ClosePairContainer::ClosePairContainer(SingletonContainer *c,
 void ClosePairContainer::initialize(SingletonContainer *c, double distance,
                                     double slack, core::ClosePairsFinder *cpf) {
   moved_count_ = 0;
+  spatial_order_ = false;
   slack_ = slack;
   distance_ = distance;
   c_ = c;
@@ -50,11 +53,13 @@ void ClosePairContainer::initialize(SingletonContainer *c, double distance,
   updates_ = 0;
   rebuilds_ = 0;
   partial_rebuilds_ = 0;
+  update_time_ = 0;
 }
 
 void ClosePairContainer::set_slack(double s) {
   slack_ = s;
   cpf_->set_distance(distance_ + 2 * slack_);
+  moved_->set_threshold(slack_);
   ParticleIndexPairs et;
   swap(et);
   first_call_ = true;
@@ -196,13 +201,25 @@ void ClosePairContainer::do_incremental() {
   IMP_LOG_TERSE("Found " << ret.size() << " pairs." << std::endl);
   {
     // now insert
-    std::sort(ret.begin(), ret.end());
     ParticleIndexPairs all;
     swap(all);
-    unsigned int osz = all.size();
-    all.insert(all.end(), ret.begin(), ret.end());
-    std::inplace_merge(all.begin(), all.begin() + osz, all.end());
-    all.erase(std::unique(all.begin(), all.end()), all.end());
+    if (spatial_order_) {
+      // keep the order of the existing pairs and append the new ones
+      boost::unordered_set<ParticleIndexPair> added(ret.begin(), ret.end());
+      for (unsigned int i = 0; i < all.size() && !added.empty(); ++i) {
+        added.erase(all[i]);
+      }
+      ret = core::get_spatially_sorted(get_model(), ret);
+      for (unsigned int i = 0; i < ret.size(); ++i) {
+        if (added.erase(ret[i])) all.push_back(ret[i]);
+      }
+    } else {
+      std::sort(ret.begin(), ret.end());
+      unsigned int osz = all.size();
+      all.insert(all.end(), ret.begin(), ret.end());
+      std::inplace_merge(all.begin(), all.begin() + osz, all.end());
+      all.erase(std::unique(all.begin(), all.end()), all.end());
+    }
     swap(all);
   }
   moved_->reset_moved();
@@ -220,7 +237,11 @@ void ClosePairContainer::do_rebuild() {
   IMP_LOG_TERSE("Found before filtering " << ret << " pairs." << std::endl);
   core::internal::filter_close_pairs(this, ret);
   IMP_LOG_TERSE("Found " << ret << " pairs." << std::endl);
-  std::sort(ret.begin(), ret.end());
+  if (spatial_order_) {
+    ret = core::get_spatially_sorted(get_model(), ret);
+  } else {
+    std::sort(ret.begin(), ret.end());
+  }
   swap(ret);
   moved_->reset();
 }
@@ -231,6 +252,23 @@ void ClosePairContainer::do_score_state_before_evaluate() {
   IMP_CHECK_OBJECT(cpf_);
   set_was_used(true);
   ++updates_;
+  if (slack_tuner_.get_is_window_complete()) {
+    double slack = slack_tuner_.get_new_slack(
+        slack_, get_pair_time(get_model(), get_access()));
+    if (slack != slack_) {
+      IMP_LOG_TERSE("Changing slack from " << slack_ << " to " << slack
+                                           << std::endl);
+      set_slack(slack);
+    }
+  }
+  boost::timer timer;
+  do_update();
+  double elapsed = timer.elapsed();
+  update_time_ += elapsed;
+  slack_tuner_.add_update(elapsed, get_access().size());
+}
+
+void ClosePairContainer::do_update() {
   try {
     IMP_LOG_TERSE("Moved count is " << moved_->get_access().size()
                                     << std::endl);
@@ -238,7 +276,10 @@ void ClosePairContainer::do_score_state_before_evaluate() {
       do_first_call();
       check_list(true);
     } else if (moved_->get_access().size() != 0) {
-      if (moved_->get_access().size() < 1000) {
+      // cell lists are kept between calls, so updates stay local however
+      // many particles move
+      if (moved_->get_access().size() < 1000 ||
+          dynamic_cast<core::CellListClosePairsFinder *>(cpf_.get())) {
         do_incremental();
         check_list(false);
       } else {
@@ -69,5 +69,85 @@ class Tests(IMP.test.TestCase):
             ) + cpss.get_number_of_partial_rebuilds(
             ),
             2)
+
+    def test_cell_list(self):
+        """Test ClosePairContainer with a cell list is updated in place"""
+        m = IMP.Model()
+        ps = IMP.get_indexes(self.create_particles_in_box(m, 50))
+        for p in ps:
+            IMP.core.XYZR.setup_particle(m, p, .5)
+        pc = IMP.container.ListSingletonContainer(m, ps)
+        cpf = IMP.core.CellListClosePairsFinder()
+        cpss = IMP.container.ClosePairContainer(pc, 1, cpf, .5)
+        gcpss = IMP.container.ClosePairContainer(
+            pc, 1, IMP.core.GridClosePairsFinder(), .5)
+        m.update()
+        for i in range(10):
+            for p in random.sample(ps, 5):
+                r = IMP.algebra.get_random_vector_in(
+                    IMP.algebra.Sphere3D(IMP.algebra.get_zero_vector_3d(), 3))
+                d = IMP.core.XYZ(m, p)
+                d.set_coordinates(d.get_coordinates() + r)
+            m.update()
+            close = [x for x in gcpss.get_indexes()
+                     if IMP.core.get_distance(IMP.core.XYZR(m, x[0]),
+                                              IMP.core.XYZR(m, x[1])) < 1]
+            found = set(cpss.get_indexes())
+            for x in close:
+                self.assertIn(x, found)
+        self.assertEqual(cpss.get_number_of_full_rebuilds(), 1)
+        self.assertEqual(cpf.get_number_of_cell_rebuilds(), 1)
+
+    def test_adaptive_slack(self):
+        """Test ClosePairContainers that tune their own slack"""
+        m = IMP.Model()
+        ps = IMP.get_indexes(self.create_particles_in_box(m, 40))
+        for p in ps:
+            IMP.core.XYZR.setup_particle(m, p, .5)
+        pca = IMP.container.ListSingletonContainer(m, ps[:20])
+        pcb = IMP.container.ListSingletonContainer(m, ps[20:])
+        cpc = IMP.container.ClosePairContainer(pca, 1, .1)
+        cbpc = IMP.container.CloseBipartitePairContainer(pca, pcb, 1, .1)
+        for c in (cpc, cbpc):
+            c.set_adaptive_slack(.1, 2., 5)
+        slacks = set()
+        for i in range(60):
+            for p in ps:
+                r = IMP.algebra.get_random_vector_in(
+                    IMP.algebra.Sphere3D(IMP.algebra.get_zero_vector_3d(), .3))
+                d = IMP.core.XYZ(m, p)
+                d.set_coordinates(d.get_coordinates() + r)
+            # internal checks make sure the lists are complete
+            m.update()
+            for c in (cpc, cbpc):
+                self.assertGreaterEqual(c.get_slack(), .1)
+                self.assertLessEqual(c.get_slack(), 2.)
+            slacks.add(cpc.get_slack())
+        self.assertGreater(len(slacks), 1)
+        self.assertEqual(cbpc.get_number_of_update_calls(), 60)
+        self.assertGreater(cpc.get_update_time(), 0)
+
+    def test_spatial_order(self):
+        """Test ClosePairContainer with pairs in spatial order"""
+        m = IMP.Model()
+        ps = IMP.get_indexes(self.create_particles_in_box(m, 100))
+        for p in ps:
+            IMP.core.XYZR.setup_particle(m, p, .5)
+        pc = IMP.container.ListSingletonContainer(m, ps)
+        cpc = IMP.container.ClosePairContainer(pc, 1, .5)
+        scpc = IMP.container.ClosePairContainer(pc, 1, .5)
+        scpc.set_use_spatial_order(True)
+        sorted_ps = IMP.core.get_spatially_sorted(m, ps)
+        self.assertEqual(sorted(sorted_ps), sorted(ps))
+        for i in range(10):
+            m.update()
+            self.assertEqual(sorted(cpc.get_indexes()),
+                             sorted(scpc.get_indexes()))
+            for p in random.sample(ps, 10):
+                r = IMP.algebra.get_random_vector_in(
+                    IMP.algebra.Sphere3D(IMP.algebra.get_zero_vector_3d(), 2))
+                d = IMP.core.XYZ(m, p)
+                d.set_coordinates(d.get_coordinates() + r)
+
 if __name__ == '__main__':
     IMP.test.main()
@@ -0,0 +1,59 @@
+/**
+ *  \file IMP/core/CellListClosePairsFinder.h
+ *  \brief Use a persistent linked-cell list to find close pairs.
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ */
+
+#ifndef IMPCORE_CELL_LIST_CLOSE_PAIRS_FINDER_H
+#define IMPCORE_CELL_LIST_CLOSE_PAIRS_FINDER_H
+
+#include "ClosePairsFinder.h"
+#include <IMP/object_macros.h>
+#include <IMP/core/core_config.h>
+#include "internal/cell_list.h"
+
+IMPCORE_BEGIN_NAMESPACE
+
+//! Find all nearby pairs using a linked-cell list kept between calls
+/** Particles are binned into cubic cells at least as wide as the
+    distance threshold plus twice the largest radius, so that close pairs
+    are only found in neighboring cells. Unlike GridClosePairsFinder, the
+    cells are kept between calls made with the same set of particles, and
+    only particles that have crossed into a different cell are moved. This
+    makes it a good choice for a ClosePairContainer on a large system where
+    only a few particles move between evaluations, which then updates
+    its pair list incrementally rather than rebuilding it.
+
+    The cells are rebuilt if the set of particles, or their largest radius,
+    changes. This finder works best when the radii are similar.
+   \see ClosePairsScoreState
+ */
+class IMPCOREEXPORT CellListClosePairsFinder : public ClosePairsFinder {
+  mutable internal::CellList cells_;
+  mutable unsigned int rebuilds_;
+
+ public:
+  CellListClosePairsFinder();
+  virtual IntPairs get_close_pairs(const algebra::BoundingBox3Ds &bbs) const
+      IMP_OVERRIDE;
+  virtual IntPairs get_close_pairs(const algebra::BoundingBox3Ds &bas,
+                                   const algebra::BoundingBox3Ds &bbs) const
+      IMP_OVERRIDE;
+  virtual ParticleIndexPairs get_close_pairs(
+      Model *m, const ParticleIndexes &pc) const IMP_OVERRIDE;
+  virtual ParticleIndexPairs get_close_pairs(
+      Model *m, const ParticleIndexes &pca,
+      const ParticleIndexes &pcb) const IMP_OVERRIDE;
+  virtual ModelObjectsTemp do_get_inputs(
+      Model *m, const ParticleIndexes &pis) const IMP_OVERRIDE;
+
+  //! Return the number of times the cells were built from scratch
+  unsigned int get_number_of_cell_rebuilds() const { return rebuilds_; }
+
+  IMP_OBJECT_METHODS(CellListClosePairsFinder);
+};
+
+IMPCORE_END_NAMESPACE
+
+#endif /* IMPCORE_CELL_LIST_CLOSE_PAIRS_FINDER_H */
@@ -11,6 +11,7 @@
 #include <IMP/core/core_config.h>
 
 #include "internal/remove_pointers.h"
+#include "internal/rigid_body_pair_cache.h"
 #include "rigid_bodies.h"
 #include <IMP/PairContainer.h>
 #include <IMP/SingletonContainer.h>
@@ -53,6 +54,8 @@ class IMPCOREEXPORT ExcludedVolumeRestraint : public Restraint {
   mutable algebra::Sphere3Ds rbs_backup_sphere_;
   mutable algebra::Rotation3Ds rbs_backup_rot_;
   mutable algebra::Sphere3Ds xyzrs_backup_;
+  bool use_body_pair_cache_;
+  mutable internal::RigidBodyPairCache body_pairs_;
 
   void reset_moved() const;
   void initialize() const;
@@ -78,6 +81,21 @@ class IMPCOREEXPORT ExcludedVolumeRestraint : public Restraint {
 
   void clear_caches();
 
+  //! Keep the close pairs and score of each pair of rigid bodies
+  /** When on, the close member pairs between two rigid bodies, and their
+      score, are kept until one of the two bodies moves (its reference
+      frame changes). Moving only a few of many rigid bodies, as
+      IMP::core::MonteCarlo does, then only rescores the pairs of bodies
+      involving those that moved. The members of each rigid body must not
+      move relative to it, or change radius, while this is on.
+  */
+  void set_use_rigid_body_pair_cache(bool tf);
+  bool get_use_rigid_body_pair_cache() const { return use_body_pair_cache_; }
+  //! Return the number of rigid body pairs whose close pairs were found
+  unsigned int get_number_of_recomputed_rigid_body_pairs() const {
+    return body_pairs_.get_number_of_recomputed_pairs();
+  }
+
 #if !defined(IMP_DOXYGEN) && !defined(SWIG)
   double unprotected_evaluate_if_good(DerivativeAccumulator *da,
                                       double max) const;
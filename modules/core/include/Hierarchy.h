@@ -167,6 +167,7 @@ class IMPCOREEXPORT Hierarchy : public Decorator {
     pis.erase(pis.begin() + i);
     get_model()->remove_attribute(get_decorator_traits().get_parent_key(),
                                   c.get_particle_index());
+    internal::add_hierarchy_edit(get_model());
   }
   void remove_child(Hierarchy h) { remove_child(h.get_child_index()); }
   void clear_children() {
@@ -178,6 +179,7 @@ class IMPCOREEXPORT Hierarchy : public Decorator {
     }
     get_model()->remove_attribute(get_decorator_traits().get_children_key(),
                                   get_particle_index());
+    internal::add_hierarchy_edit(get_model());
   }
   void add_child(Hierarchy h) const {
     if (get_model()->get_has_attribute(
@@ -193,6 +195,7 @@ class IMPCOREEXPORT Hierarchy : public Decorator {
     }
     get_model()->add_attribute(get_decorator_traits().get_parent_key(),
                                h.get_particle_index(), get_particle_index());
+    internal::add_hierarchy_edit(get_model());
   }
   void add_child_at(Hierarchy h, unsigned int pos) {
     IMP_USAGE_CHECK(get_number_of_children() >= pos, "Invalid position");
@@ -208,6 +211,7 @@ class IMPCOREEXPORT Hierarchy : public Decorator {
     }
     get_model()->add_attribute(get_decorator_traits().get_parent_key(),
                                h.get_particle_index(), get_particle_index());
+    internal::add_hierarchy_edit(get_model());
   }
   //! Return i such that `get_parent().get_child(i) == this`
   int get_child_index() const;
@@ -159,6 +159,13 @@ class IMPCOREEXPORT MonteCarlo : public Optimizer {
     return do_accept_or_reject_move(score, get_last_accepted_energy(),
                                     proposal_ratio);
   }
+  //! Keep the current state of the model with the given probability
+  /** This is for steps built from several moves, whose movers have already
+      been told the outcome of each move. If the state is rejected, it is up
+      to the caller to restore the previous one.
+      \return whether the state was accepted
+  */
+  bool do_accept_or_reject_state(double score, double probability);
 
   MonteCarloMoverResult do_move();
   //! a class that inherits from this should override this method
@@ -240,6 +247,45 @@ class IMPCOREEXPORT MonteCarloWithBasinHopping
   IMP_OBJECT_METHODS(MonteCarloWithBasinHopping);
 };
 
+//! This variant of Monte Carlo tries several moves at each step
+/** Multiple-try Metropolis (Liu, Liang and Wong, J. Am. Stat. Assoc. 95,
+    121-134, 2000) proposes a number of moves from the current state and
+    picks one of them, with probability proportional to its Boltzmann
+    weight. The same number of moves, less one, are then proposed from the
+    picked state to form a reference set along with the current state, and
+    the picked state is accepted with probability given by the ratio of the
+    total weights of the two sets. This satisfies detailed balance while
+    looking much further around the current state at each step, so it
+    accepts many more steps when each move is unlikely to succeed. Each move
+    is scored with the scoring function in turn, which can itself use
+    several threads (see IMP::set_number_of_threads()).
+
+    All moves in a step are made with the same proposal kernel: a
+    SerialMover uses the same one of its movers for every move in the step,
+    and moves on to the next one at the next step. The movers' statistics
+    count each step as a single move, accepted if the picked state was.
+
+    The movers must make symmetric proposals (with a proposal ratio of 1),
+    and incremental scoring is not supported.
+ */
+class IMPCOREEXPORT MonteCarloWithMultipleTries : public MonteCarlo {
+  unsigned int number_of_tries_;
+
+ public:
+  MonteCarloWithMultipleTries(Model *m, unsigned int number_of_tries = 4);
+
+  //! Set the number of moves to try at each step
+  void set_number_of_tries(unsigned int n) {
+    IMP_USAGE_CHECK(n > 0, "Must try at least one move");
+    number_of_tries_ = n;
+  }
+  unsigned int get_number_of_tries() const { return number_of_tries_; }
+
+ protected:
+  virtual void do_step() IMP_OVERRIDE;
+  IMP_OBJECT_METHODS(MonteCarloWithMultipleTries);
+};
+
 IMPCORE_END_NAMESPACE
 
 #endif /* IMPCORE_MONTE_CARLO_H */
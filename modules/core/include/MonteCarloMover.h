@@ -92,6 +92,15 @@ class IMPCOREEXPORT MonteCarloMover : public ModelObject {
     num_proposed_ = 0;
     num_rejected_ = 0;
   }
+  //! Set the statistics, e.g. to count several tried moves as one
+  /** MonteCarloWithMultipleTries uses this so that each of its steps
+      counts as a single move of the movers used, accepted or not. */
+  void set_statistics(unsigned int num_proposed, unsigned int num_accepted) {
+    IMP_USAGE_CHECK(num_accepted <= num_proposed,
+                    "Can't accept more moves than were proposed");
+    num_proposed_ = num_proposed;
+    num_rejected_ = num_proposed - num_accepted;
+  }
   /** @} */
  protected:
   //! Implement propose_move()
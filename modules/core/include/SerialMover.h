@@ -32,6 +32,17 @@ class IMPCOREEXPORT SerialMover : public MonteCarloMover {
 
   const MonteCarloMovers& get_movers() const { return movers_; }
 
+  //! Get the index of the mover used for the last proposal (-1 if none)
+  int get_mover_index() const { return imov_; }
+
+  //! Set the index of the mover used for the last proposal
+  /** The next proposal uses the mover after this one. */
+  void set_mover_index(int i) {
+    IMP_USAGE_CHECK(i >= -1 && i < static_cast<int>(movers_.size()),
+                    "Mover index out of range: " << i);
+    imov_ = i;
+  }
+
  protected:
   virtual ModelObjectsTemp do_get_inputs() const IMP_OVERRIDE;
   virtual MonteCarloMoverResult do_propose() IMP_OVERRIDE;
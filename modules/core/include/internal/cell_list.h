@@ -0,0 +1,61 @@
+/**
+ *  \file internal/cell_list.h
+ *  \brief A linked-cell list of particles which can be updated in place.
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ */
+
+#ifndef IMPCORE_INTERNAL_CELL_LIST_H
+#define IMPCORE_INTERNAL_CELL_LIST_H
+
+#include <IMP/core/core_config.h>
+#include <IMP/Model.h>
+#include <IMP/PairPredicate.h>
+#include <IMP/algebra/grid_indexes.h>
+#include <boost/unordered_map.hpp>
+
+IMPCORE_BEGIN_INTERNAL_NAMESPACE
+
+//! Particles binned into cubic cells, keyed by the cell index
+/** The cells are kept between calls to update(), which only moves the
+    particles that are now in a different cell.
+*/
+class IMPCOREEXPORT CellList {
+  typedef algebra::ExtendedGridIndex3D Cell;
+  typedef boost::unordered_map<Cell, ParticleIndexes> Cells;
+  Model *model_;
+  double width_;
+  ParticleIndexes indexes_;
+  Cells cells_;
+  boost::unordered_map<ParticleIndex, Cell> particle_cells_;
+  double max_radius_;
+
+  Cell get_cell(const algebra::Vector3D &v) const;
+  void rebuild(Model *m, const ParticleIndexes &pis, double width);
+
+ public:
+  CellList() : model_(nullptr), width_(0), max_radius_(0) {}
+
+  //! Make the cells hold the particles at their current positions
+  /** The cells are rebuilt if the particles or the needed cell width
+      (the distance plus twice the largest radius) have changed.
+      \return whether the cells were rebuilt.
+  */
+  bool update(Model *m, const ParticleIndexes &pis, double distance);
+
+  //! Add all pairs of binned particles closer than distance to out
+  void fill_close_pairs(double distance, const PairPredicates &filters,
+                        ParticleIndexPairs &out) const;
+
+  //! Add pairs (binned particle, particle in pis) closer than distance
+  void fill_close_pairs(double distance, const ParticleIndexes &pis,
+                        const PairPredicates &filters,
+                        ParticleIndexPairs &out) const;
+
+  //! Return the number of particles binned
+  unsigned int get_number_of_particles() const { return indexes_.size(); }
+};
+
+IMPCORE_END_INTERNAL_NAMESPACE
+
+#endif /* IMPCORE_INTERNAL_CELL_LIST_H */
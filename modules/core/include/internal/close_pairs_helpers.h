@@ -308,7 +308,7 @@ inline void fill_list(
     ParticleIndexes &rbs_,
     boost::unordered_map<ParticleIndex, ParticleIndexes> &
         constituents_,
-    ParticleIndexPairs &cur_list_) {
+    ParticleIndexPairs &cur_list_, bool rigid_body_pairs = true) {
   IMP_INTERNAL_CHECK(slack_ >= 0, "Slack must not be negative");
   /*IMP_LOG_VERBOSE( "filling particle list with slack " << slack_
     << " on " << sc_->get_name());*/
@@ -326,6 +326,10 @@ inline void fill_list(
       internal::ParticleIndexTraits(m, slack_),
       internal::RigidBodyParticleParticleIndexPairSink(
           m, filters, cur_list_, key_, slack_, constituents_));
+  if (!rigid_body_pairs) {
+    IMP_LOG_VERBOSE("found " << cur_list_.size() << std::endl);
+    return;
+  }
   internal::ParticleIndexHelper::fill_close_pairs(
       internal::ParticleIndexHelper::get_particle_set(rbs_.begin(), rbs_.end(),
                                                       0),
@@ -60,6 +60,18 @@ struct HierarchyData {
   ObjectKey cache_key_;
 };
 
+//! Record a change to the children of a hierarchy node in the model
+/** This is a no-op until get_number_of_hierarchy_edits() has been called
+    for the model. */
+IMPCOREEXPORT void add_hierarchy_edit(Model *m);
+
+//! Return the number of changes made to hierarchies in the model
+/** Data derived from the structure of the model's hierarchies can store
+    this and check it later to see if it is out of date. Only changes made
+    after the first call for the model are counted.
+ */
+IMPCOREEXPORT unsigned int get_number_of_hierarchy_edits(Model *m);
+
 IMPCORE_END_INTERNAL_NAMESPACE
 
 #endif /* IMPCORE_INTERNAL_HIERARCHY_HELPERS_H */
@@ -0,0 +1,66 @@
+/**
+ *  \file internal/rigid_body_pair_cache.h
+ *  \brief Close member pairs and scores for each pair of rigid bodies.
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ */
+
+#ifndef IMPCORE_INTERNAL_RIGID_BODY_PAIR_CACHE_H
+#define IMPCORE_INTERNAL_RIGID_BODY_PAIR_CACHE_H
+
+#include <IMP/core/core_config.h>
+#include <IMP/Model.h>
+#include <IMP/PairPredicate.h>
+#include <IMP/PairScore.h>
+#include <IMP/algebra/Transformation3D.h>
+#include <boost/unordered_map.hpp>
+#include <utility>
+
+IMPCORE_BEGIN_INTERNAL_NAMESPACE
+
+//! Keep the close member pairs and their score for each pair of rigid bodies
+/** A body pair is only looked at again when one of the two bodies has a
+    different reference frame from the last evaluation, so moving a few
+    bodies only costs the pairs involving those bodies. Each body's members
+    are assumed to be fixed in its frame, with fixed radii.
+*/
+class IMPCOREEXPORT RigidBodyPairCache {
+  struct Entry {
+    ParticleIndexPairs pairs;
+    double score;
+  };
+  typedef std::pair<unsigned int, unsigned int> Key;
+  typedef boost::unordered_map<Key, Entry> Entries;
+  Entries entries_;
+  algebra::Transformation3Ds frames_;
+  unsigned int recomputed_;
+
+ public:
+  RigidBodyPairCache() : recomputed_(0) {}
+
+  //! Return the total score of the close member pairs of all body pairs
+  /** The pairs of any body whose reference frame has changed are found
+      again; the scores of the others are reused, unless derivatives are
+      requested.
+  */
+  double evaluate(Model *m, const ParticleIndexes &rbs,
+                  const boost::unordered_map<ParticleIndex, ParticleIndexes> &
+                      constituents,
+                  ObjectKey key, const PairPredicates &filters, PairScore *ps,
+                  DerivativeAccumulator *da);
+
+  //! Add all the cached close member pairs to out
+  void fill_pairs(ParticleIndexPairs &out) const;
+
+  //! Return the number of body pairs whose member pairs have been found
+  unsigned int get_number_of_recomputed_pairs() const { return recomputed_; }
+
+  void clear() {
+    entries_.clear();
+    frames_.clear();
+  }
+};
+
+IMPCORE_END_INTERNAL_NAMESPACE
+
+#endif /* IMPCORE_INTERNAL_RIGID_BODY_PAIR_CACHE_H */
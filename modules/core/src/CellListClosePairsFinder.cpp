@@ -0,0 +1,97 @@
+/**
+ *  \file CellListClosePairsFinder.cpp
+ *  \brief Use a persistent linked-cell list to find close pairs.
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ *
+ */
+
+#include "IMP/core/CellListClosePairsFinder.h"
+#include "IMP/core/internal/grid_close_pairs_impl.h"
+
+IMPCORE_BEGIN_NAMESPACE
+
+CellListClosePairsFinder::CellListClosePairsFinder()
+    : ClosePairsFinder("CellListCPF"), rebuilds_(0) {}
+
+IntPairs CellListClosePairsFinder::get_close_pairs(
+    const algebra::BoundingBox3Ds &bas,
+    const algebra::BoundingBox3Ds &bbs) const {
+  IMP_OBJECT_LOG;
+  set_was_used(true);
+  IntPairs out;
+  internal::BBHelper::fill_close_pairs(
+      internal::BBHelper::get_particle_set(bas.begin(), bas.end(), 0),
+      internal::BBHelper::get_particle_set(bbs.begin(), bbs.end(), 1),
+      internal::BoundingBoxTraits(bas.begin(), bbs.begin(), get_distance()),
+      internal::BBPairSink(out));
+  return out;
+}
+
+IntPairs CellListClosePairsFinder::get_close_pairs(
+    const algebra::BoundingBox3Ds &bas) const {
+  IMP_OBJECT_LOG;
+  set_was_used(true);
+  IntPairs out;
+  internal::BBHelper::fill_close_pairs(
+      internal::BBHelper::get_particle_set(bas.begin(), bas.end(), 0),
+      internal::BoundingBoxTraits(bas.begin(), bas.begin(), get_distance()),
+      internal::BBPairSink(out));
+  return out;
+}
+
+ParticleIndexPairs CellListClosePairsFinder::get_close_pairs(
+    Model *m, const ParticleIndexes &c) const {
+  IMP_OBJECT_LOG;
+  set_was_used(true);
+  ParticleIndexPairs out;
+  // The kept cells hold the largest set of particles seen; smaller sets,
+  // such as the moved particles in an incremental update, are binned anew.
+  if (c.size() >= cells_.get_number_of_particles()) {
+    if (cells_.update(m, c, get_distance())) {
+      ++rebuilds_;
+      IMP_LOG_TERSE("Rebuilding cells with cutoff " << get_distance()
+                                                    << std::endl);
+    }
+    cells_.fill_close_pairs(get_distance(), access_pair_filters(), out);
+  } else {
+    internal::CellList cells;
+    cells.update(m, c, get_distance());
+    cells.fill_close_pairs(get_distance(), access_pair_filters(), out);
+  }
+  return out;
+}
+
+ParticleIndexPairs CellListClosePairsFinder::get_close_pairs(
+    Model *m, const ParticleIndexes &ca,
+    const ParticleIndexes &cb) const {
+  IMP_OBJECT_LOG;
+  set_was_used(true);
+  ParticleIndexPairs out;
+  if (ca.size() >= cells_.get_number_of_particles()) {
+    if (cells_.update(m, ca, get_distance())) {
+      ++rebuilds_;
+      IMP_LOG_TERSE("Rebuilding cells with cutoff " << get_distance()
+                                                    << std::endl);
+    }
+    cells_.fill_close_pairs(get_distance(), cb, access_pair_filters(), out);
+  } else {
+    internal::CellList cells;
+    cells.update(m, ca, get_distance());
+    cells.fill_close_pairs(get_distance(), cb, access_pair_filters(), out);
+  }
+  return out;
+}
+
+ModelObjectsTemp CellListClosePairsFinder::do_get_inputs(
+    Model *m, const ParticleIndexes &pis) const {
+  ModelObjectsTemp ret;
+  ret += IMP::get_particles(m, pis);
+  for (PairFilterConstIterator it = pair_filters_begin();
+       it != pair_filters_end(); ++it) {
+    ret += (*it)->get_inputs(m, pis);
+  }
+  return ret;
+}
+
+IMPCORE_END_NAMESPACE
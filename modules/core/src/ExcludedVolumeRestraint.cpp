@@ -32,7 +32,8 @@ ExcludedVolumeRestraint::ExcludedVolumeRestraint(SingletonContainerAdaptor sc,
     : Restraint(sc->get_model(), name),
       sc_(sc),
       initialized_(false),
-      ssps_(new SoftSpherePairScore(k)) {
+      ssps_(new SoftSpherePairScore(k)),
+      use_body_pair_cache_(false) {
   sc.set_name_if_default("EVRInput%1%");
   slack_ = s;
   std::ostringstream oss;
@@ -46,13 +47,23 @@ ExcludedVolumeRestraint::ExcludedVolumeRestraint(SingletonContainerAdaptor sc,
     : Restraint(sc->get_model(), "ExcludedVolumeRestraint %1%"),
       sc_(sc),
       initialized_(false),
-      ssps_(ssps) {
+      ssps_(ssps),
+      use_body_pair_cache_(false) {
   sc.set_name_if_default("EVRInput%1%");
   slack_ = s;
   key_ = ok;
 }
 
-void ExcludedVolumeRestraint::clear_caches() { was_bad_ = true; }
+void ExcludedVolumeRestraint::clear_caches() {
+  was_bad_ = true;
+  body_pairs_.clear();
+}
+
+void ExcludedVolumeRestraint::set_use_rigid_body_pair_cache(bool tf) {
+  use_body_pair_cache_ = tf;
+  // the pairs between rigid bodies move in or out of the list
+  clear_caches();
+}
 
 void ExcludedVolumeRestraint::initialize() const {
   IMP_OBJECT_LOG;
@@ -61,6 +72,7 @@ void ExcludedVolumeRestraint::initialize() const {
   internal::initialize_particles(sc_, key_, xyzrs_, rbs_, constituents_,
                                  rbs_backup_sphere_, rbs_backup_rot_,
                                  xyzrs_backup_);
+  body_pairs_.clear();
   was_bad_ = true;
   initialized_ = true;
 }
@@ -113,7 +125,8 @@ double ExcludedVolumeRestraint::fill_list_if_good(double max) const {
 void ExcludedVolumeRestraint::fill_list() const {
   IMP_OBJECT_LOG;
   internal::fill_list(get_model(), access_pair_filters(), key_, 2 * slack_,
-                      xyzrs_, rbs_, constituents_, cur_list_);
+                      xyzrs_, rbs_, constituents_, cur_list_,
+                      !use_body_pair_cache_);
   was_bad_ = false;
 }
 
@@ -169,7 +182,13 @@ double ExcludedVolumeRestraint::unprotected_evaluate(DerivativeAccumulator *da)
   IMP_FOREACH(ParticleIndexPair pi, cur_list_) {
     ret += ssps_->evaluate_index(get_model(), pi, da);
   }
+  if (use_body_pair_cache_) {
+    ret += body_pairs_.evaluate(get_model(), rbs_, constituents_, key_,
+                                access_pair_filters(), ssps_.get(), da);
+  }
 #if IMP_HAS_CHECKS >= IMP_INTERNAL
+  ParticleIndexPairs checked_list = cur_list_;
+  if (use_body_pair_cache_) body_pairs_.fill_pairs(checked_list);
   ParticleIndexes all = sc_->get_indexes();
   if (all.size() < 3000) {
     double check = 0;
@@ -191,11 +210,11 @@ double ExcludedVolumeRestraint::unprotected_evaluate(DerivativeAccumulator *da)
           if (cur == 0) continue;
           ++found;
           bool cur_found =
-              std::find(cur_list_.begin(), cur_list_.end(), curp) !=
-                  cur_list_.end() ||
-              std::find(cur_list_.begin(), cur_list_.end(),
+              std::find(checked_list.begin(), checked_list.end(), curp) !=
+                  checked_list.end() ||
+              std::find(checked_list.begin(), checked_list.end(),
                         ParticleIndexPair(all[j], all[i])) !=
-                  cur_list_.end();
+                  checked_list.end();
           IMP_CHECK_VARIABLE(cur_found);
           IMP_INTERNAL_CHECK(
               cur_found,
@@ -222,6 +241,8 @@ double ExcludedVolumeRestraint::unprotected_evaluate(DerivativeAccumulator *da)
 double ExcludedVolumeRestraint::unprotected_evaluate_if_good(
     DerivativeAccumulator *da, double max) const {
   IMP_OBJECT_LOG;
+  // only the moved rigid bodies are rescored anyway
+  if (use_body_pair_cache_) return unprotected_evaluate(da);
   if (!initialized_) initialize();
   IMP_USAGE_CHECK(!da, "Can't do derivatives");
   IMP_CHECK_CODE(double check = 0);
@@ -338,9 +359,11 @@ Restraints ExcludedVolumeRestraint::do_create_decomposition() const {
 
 Restraints ExcludedVolumeRestraint::do_create_current_decomposition() const {
   Restraints ret;
-  for (unsigned int i = 0; i < cur_list_.size(); ++i) {
+  ParticleIndexPairs pairs = cur_list_;
+  if (use_body_pair_cache_) body_pairs_.fill_pairs(pairs);
+  for (unsigned int i = 0; i < pairs.size(); ++i) {
     Pointer<Restraint> rc = create_restraint(
-        ssps_.get(), IMP::internal::get_particle(get_model(), cur_list_[i]));
+        ssps_.get(), IMP::internal::get_particle(get_model(), pairs[i]));
     rc->set_was_used(true);
     double score = rc->unprotected_evaluate(nullptr);
     if (score != 0) {
@@ -10,6 +10,40 @@
 
 #include <sstream>
 
+IMPCORE_BEGIN_INTERNAL_NAMESPACE
+
+namespace {
+class HierarchyEdits : public Object {
+ public:
+  unsigned int number;
+  HierarchyEdits() : Object("HierarchyEdits%1%"), number(0) {}
+  IMP_OBJECT_METHODS(HierarchyEdits);
+};
+
+ModelKey get_hierarchy_edits_key() {
+  static ModelKey key("hierarchy edits");
+  return key;
+}
+}
+
+void add_hierarchy_edit(Model *m) {
+  ModelKey mk = get_hierarchy_edits_key();
+  if (m->get_has_data(mk)) {
+    ++static_cast<HierarchyEdits *>(m->get_data(mk))->number;
+  }
+}
+
+unsigned int get_number_of_hierarchy_edits(Model *m) {
+  ModelKey mk = get_hierarchy_edits_key();
+  if (!m->get_has_data(mk)) {
+    IMP_NEW(HierarchyEdits, edits, ());
+    m->add_data(mk, edits);
+  }
+  return static_cast<HierarchyEdits *>(m->get_data(mk))->number;
+}
+
+IMPCORE_END_INTERNAL_NAMESPACE
+
 IMPCORE_BEGIN_NAMESPACE
 
 const HierarchyTraits &Hierarchy::get_default_traits() {
@@ -6,6 +6,7 @@
  */
 
 #include <IMP/core/MonteCarlo.h>
+#include <IMP/core/SerialMover.h>
 
 #include <IMP/random.h>
 #include <IMP/Model.h>
@@ -13,6 +14,7 @@
 #include <IMP/core/GridClosePairsFinder.h>
 #include <IMP/dependency_graph.h>
 
+#include <algorithm>
 #include <limits>
 #include <cmath>
 #include <boost/scoped_ptr.hpp>
@@ -78,6 +80,29 @@ bool MonteCarlo::do_accept_or_reject_move(double score, double last,
   }
 }
 
+bool MonteCarlo::do_accept_or_reject_state(double score, double probability) {
+  if (probability < 1 && rand_(random_number_generator) >= probability) {
+    IMP_LOG_TERSE("Reject: " << score << " current score stays "
+                             << last_energy_ << std::endl);
+    ++stat_num_failures_;
+    return false;
+  }
+  IMP_LOG_TERSE("Accept: " << score << " previous score was " << last_energy_
+                           << std::endl);
+  if (score < last_energy_) {
+    ++stat_downward_steps_taken_;
+  } else {
+    ++stat_upward_steps_taken_;
+  }
+  if (score < best_energy_ && return_best_) {
+    best_ = new Configuration(get_model());
+    best_energy_ = score;
+  }
+  last_energy_ = score;
+  update_states();
+  return true;
+}
+
 MonteCarloMoverResult MonteCarlo::do_move() {
   ParticleIndexes ret;
   double prob = 1.0;
@@ -229,4 +254,142 @@ void MonteCarloWithBasinHopping::do_step() {
   cleanup.reset();
 }
 
+MonteCarloWithMultipleTries::MonteCarloWithMultipleTries(
+    Model *m, unsigned int number_of_tries)
+    : MonteCarlo(m), number_of_tries_(number_of_tries) {
+  IMP_USAGE_CHECK(number_of_tries > 0, "Must try at least one move");
+}
+
+namespace {
+// log(exp(a) + exp(b)) without overflow
+double get_log_sum(double a, double b) {
+  if (a < b) std::swap(a, b);
+  if (b == -std::numeric_limits<double>::infinity()) return a;
+  return a + std::log(1.0 + std::exp(b - a));
+}
+
+// Get the movers and, recursively, those inside any SerialMovers
+void add_movers(MonteCarloMover *m, MonteCarloMoversTemp &out) {
+  out.push_back(m);
+  SerialMover *sm = dynamic_cast<SerialMover *>(m);
+  if (sm) {
+    for (unsigned int i = 0; i < sm->get_movers().size(); ++i) {
+      add_movers(sm->get_movers()[i], out);
+    }
+  }
+}
+
+// SerialMover uses the next of its movers for each proposal, but all of
+// the moves tried in a step must come from the same proposal kernel. So
+// note which mover each one used for the first try and reuse it.
+Ints get_mover_indexes(const MonteCarloMoversTemp &movers) {
+  Ints ret(movers.size(), -1);
+  for (unsigned int i = 0; i < movers.size(); ++i) {
+    SerialMover *sm = dynamic_cast<SerialMover *>(movers[i].get());
+    if (sm) ret[i] = sm->get_mover_index();
+  }
+  return ret;
+}
+
+// Make the next proposal use the noted movers (if repeat is true) or
+// leave the movers as if a single proposal had been made
+void set_mover_indexes(const MonteCarloMoversTemp &movers,
+                       const Ints &indexes, bool repeat) {
+  for (unsigned int i = 0; i < movers.size(); ++i) {
+    if (indexes[i] < 0) continue;
+    SerialMover *sm = dynamic_cast<SerialMover *>(movers[i].get());
+    sm->set_mover_index(repeat ? indexes[i] - 1 : indexes[i]);
+  }
+}
+
+typedef std::pair<unsigned int, unsigned int> MoverStatistics;
+
+// Count the step as one move of each of the movers used, so that the
+// acceptance rate of each mover is that of the steps it took part in
+void set_step_statistics(const MonteCarloMoversTemp &movers,
+                         const Vector<MoverStatistics> &before,
+                         bool accepted) {
+  for (unsigned int i = 0; i < movers.size(); ++i) {
+    if (movers[i]->get_number_of_proposed() == before[i].first) continue;
+    movers[i]->set_statistics(before[i].first + 1,
+                              before[i].second + (accepted ? 1 : 0));
+  }
+}
+}
+
+void MonteCarloWithMultipleTries::do_step() {
+  IMP_USAGE_CHECK(!get_use_incremental_scoring_function(),
+                  "Incremental scoring is not supported with multiple tries");
+  const double kt = get_kt();
+  ::boost::uniform_real<> rand(0, 1);
+  MonteCarloMoversTemp movers;
+  for (unsigned int i = 0; i < get_number_of_movers(); ++i) {
+    add_movers(get_mover(i), movers);
+  }
+  Vector<MoverStatistics> statistics;
+  for (unsigned int i = 0; i < movers.size(); ++i) {
+    statistics.push_back(MoverStatistics(
+        movers[i]->get_number_of_proposed(),
+        movers[i]->get_number_of_accepted()));
+  }
+  Ints indexes;
+  IMP_NEW(Configuration, current, (get_model()));
+  Pointer<Configuration> picked;
+  double picked_energy = 0;
+  double log_weight = -std::numeric_limits<double>::infinity();
+  for (unsigned int i = 0; i < number_of_tries_; ++i) {
+    if (i > 0) set_mover_indexes(movers, indexes, true);
+    MonteCarloMoverResult moved = do_move();
+    MoverCleanup cleanup(this);
+    if (i == 0) indexes = get_mover_indexes(movers);
+    IMP_USAGE_CHECK(moved.get_proposal_ratio() == 1,
+                    "Multiple tries need movers with symmetric proposals");
+    double energy = do_evaluate(moved.get_moved_particles());
+    double cur = -energy / kt;
+    log_weight = get_log_sum(log_weight, cur);
+    // pick each move with probability proportional to its weight
+    if (rand(random_number_generator) < std::exp(cur - log_weight)) {
+      picked = new Configuration(get_model());
+      picked_energy = energy;
+    }
+    for (int j = get_number_of_movers() - 1; j >= 0; --j) {
+      get_mover(j)->reject();
+    }
+    cleanup.reset();
+  }
+  bool accepted = false;
+  if (picked) {
+    // the reference set is the current state plus moves from the picked one
+    picked->load_configuration();
+    double reference_log_weight = -get_last_accepted_energy() / kt;
+    for (unsigned int i = 1; i < number_of_tries_; ++i) {
+      set_mover_indexes(movers, indexes, true);
+      MonteCarloMoverResult moved = do_move();
+      MoverCleanup cleanup(this);
+      IMP_USAGE_CHECK(moved.get_proposal_ratio() == 1,
+                      "Multiple tries need movers with symmetric proposals");
+      double energy = do_evaluate(moved.get_moved_particles());
+      reference_log_weight = get_log_sum(reference_log_weight, -energy / kt);
+      for (int j = get_number_of_movers() - 1; j >= 0; --j) {
+        get_mover(j)->reject();
+      }
+      cleanup.reset();
+    }
+    accepted = do_accept_or_reject_state(
+        picked_energy, std::exp(log_weight - reference_log_weight));
+    if (!accepted) current->load_configuration();
+  } else {
+    do_accept_or_reject_state(get_last_accepted_energy(), 0);
+  }
+  set_mover_indexes(movers, indexes, false);
+  if (accepted) {
+    // the picked move is restored from its configuration; let the movers
+    // that made it know it was accepted
+    for (int j = get_number_of_movers() - 1; j >= 0; --j) {
+      get_mover(j)->accept();
+    }
+  }
+  set_step_statistics(movers, statistics, accepted);
+}
+
 IMPCORE_END_NAMESPACE
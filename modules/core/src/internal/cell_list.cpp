@@ -0,0 +1,141 @@
+/**
+ *  \file cell_list.cpp
+ *  \brief A linked-cell list of particles which can be updated in place.
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ *
+ */
+
+#include <IMP/core/internal/cell_list.h>
+#include <IMP/core/internal/grid_close_pairs_impl.h>
+#include <IMP/core/internal/sinks.h>
+#include <algorithm>
+#include <cmath>
+
+IMPCORE_BEGIN_INTERNAL_NAMESPACE
+
+namespace {
+bool get_is_close(Model *m, ParticleIndex a, ParticleIndex b,
+                  double distance) {
+  const algebra::Sphere3D &sa = m->get_sphere(a);
+  const algebra::Sphere3D &sb = m->get_sphere(b);
+  return get_interiors_intersect(sa.get_center() - sb.get_center(),
+                                 sa.get_radius() + distance, sb.get_radius());
+}
+
+void add_if_close(Model *m, ParticleIndex a, ParticleIndex b, double distance,
+                  const PairPredicates &filters, ParticleIndexPairs &out) {
+  if (get_is_close(m, a, b, distance) &&
+      !get_filters_contains(m, filters, ParticleIndexPair(a, b))) {
+    out.push_back(ParticleIndexPair(a, b));
+  }
+}
+}
+
+CellList::Cell CellList::get_cell(const algebra::Vector3D &v) const {
+  return Cell(static_cast<int>(std::floor(v[0] / width_)),
+              static_cast<int>(std::floor(v[1] / width_)),
+              static_cast<int>(std::floor(v[2] / width_)));
+}
+
+void CellList::rebuild(Model *m, const ParticleIndexes &pis, double width) {
+  model_ = m;
+  width_ = width;
+  indexes_ = pis;
+  cells_.clear();
+  particle_cells_.clear();
+  for (unsigned int i = 0; i < pis.size(); ++i) {
+    Cell c = get_cell(m->get_sphere(pis[i]).get_center());
+    cells_[c].push_back(pis[i]);
+    particle_cells_[pis[i]] = c;
+  }
+}
+
+bool CellList::update(Model *m, const ParticleIndexes &pis, double distance) {
+  double max_radius = 0;
+  for (unsigned int i = 0; i < pis.size(); ++i) {
+    max_radius = std::max(max_radius, m->get_sphere(pis[i]).get_radius());
+  }
+  max_radius_ = max_radius;
+  double width = distance + 2 * max_radius;
+  // points with a zero distance; any width will do
+  if (width <= 0) width = 1;
+  // wider cells than needed are still correct, just slower
+  if (m != model_ || width > width_ || width < .5 * width_ ||
+      pis != indexes_) {
+    rebuild(m, pis, width);
+    return true;
+  }
+  for (unsigned int i = 0; i < pis.size(); ++i) {
+    Cell c = get_cell(m->get_sphere(pis[i]).get_center());
+    Cell &old = particle_cells_[pis[i]];
+    if (c == old) continue;
+    ParticleIndexes &oc = cells_[old];
+    ParticleIndexes::iterator it = std::find(oc.begin(), oc.end(), pis[i]);
+    IMP_INTERNAL_CHECK(it != oc.end(), "Particle not found in its cell");
+    *it = oc.back();
+    oc.pop_back();
+    if (oc.empty()) cells_.erase(old);
+    cells_[c].push_back(pis[i]);
+    old = c;
+  }
+  return false;
+}
+
+void CellList::fill_close_pairs(double distance, const PairPredicates &filters,
+                                ParticleIndexPairs &out) const {
+  IMP_INTERNAL_CHECK(distance + 2 * max_radius_ <= width_ * 1.0001,
+                     "Cells are too narrow for distance " << distance);
+  for (Cells::const_iterator it = cells_.begin(); it != cells_.end(); ++it) {
+    const ParticleIndexes &cur = it->second;
+    for (unsigned int i = 0; i < cur.size(); ++i) {
+      for (unsigned int j = 0; j < i; ++j) {
+        add_if_close(model_, cur[i], cur[j], distance, filters, out);
+      }
+    }
+    // only look at the half of the neighbors which come after this cell
+    for (int dx = 0; dx <= 1; ++dx) {
+      for (int dy = (dx == 0 ? 0 : -1); dy <= 1; ++dy) {
+        for (int dz = (dx == 0 && dy == 0 ? 1 : -1); dz <= 1; ++dz) {
+          Cells::const_iterator nit = cells_.find(it->first.get_offset(dx, dy,
+                                                                       dz));
+          if (nit == cells_.end()) continue;
+          const ParticleIndexes &ncur = nit->second;
+          for (unsigned int i = 0; i < cur.size(); ++i) {
+            for (unsigned int j = 0; j < ncur.size(); ++j) {
+              add_if_close(model_, cur[i], ncur[j], distance, filters, out);
+            }
+          }
+        }
+      }
+    }
+  }
+}
+
+void CellList::fill_close_pairs(double distance, const ParticleIndexes &pis,
+                                const PairPredicates &filters,
+                                ParticleIndexPairs &out) const {
+  if (cells_.empty()) return;
+  for (unsigned int i = 0; i < pis.size(); ++i) {
+    const algebra::Sphere3D &s = model_->get_sphere(pis[i]);
+    int reach = std::max(1, static_cast<int>(std::ceil(
+                                (distance + max_radius_ + s.get_radius()) /
+                                width_)));
+    Cell c = get_cell(s.get_center());
+    for (int dx = -reach; dx <= reach; ++dx) {
+      for (int dy = -reach; dy <= reach; ++dy) {
+        for (int dz = -reach; dz <= reach; ++dz) {
+          Cells::const_iterator it = cells_.find(c.get_offset(dx, dy, dz));
+          if (it == cells_.end()) continue;
+          const ParticleIndexes &cur = it->second;
+          for (unsigned int j = 0; j < cur.size(); ++j) {
+            if (cur[j] == pis[i]) continue;
+            add_if_close(model_, cur[j], pis[i], distance, filters, out);
+          }
+        }
+      }
+    }
+  }
+}
+
+IMPCORE_END_INTERNAL_NAMESPACE
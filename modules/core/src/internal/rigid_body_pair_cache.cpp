@@ -0,0 +1,86 @@
+/**
+ *  \file rigid_body_pair_cache.cpp
+ *  \brief Close member pairs and scores for each pair of rigid bodies.
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ *
+ */
+
+#include <IMP/core/internal/rigid_body_pair_cache.h>
+#include <IMP/core/internal/sinks.h>
+#include <IMP/core/rigid_bodies.h>
+#include <algorithm>
+
+IMPCORE_BEGIN_INTERNAL_NAMESPACE
+
+namespace {
+bool get_is_same(const algebra::Transformation3D &a,
+                 const algebra::Transformation3D &b) {
+  return algebra::get_squared_distance(a.get_translation(),
+                                       b.get_translation()) == 0 &&
+         (a.get_rotation().get_quaternion() -
+          b.get_rotation().get_quaternion()).get_squared_magnitude() == 0;
+}
+}
+
+double RigidBodyPairCache::evaluate(
+    Model *m, const ParticleIndexes &rbs,
+    const boost::unordered_map<ParticleIndex, ParticleIndexes> &constituents,
+    ObjectKey key, const PairPredicates &filters, PairScore *ps,
+    DerivativeAccumulator *da) {
+  bool all_moved = frames_.size() != rbs.size();
+  if (all_moved) {
+    entries_.clear();
+    frames_.resize(rbs.size());
+  }
+  std::vector<bool> moved(rbs.size(), all_moved);
+  for (unsigned int i = 0; i < rbs.size(); ++i) {
+    algebra::Transformation3D tr =
+        RigidBody(m, rbs[i]).get_reference_frame().get_transformation_to();
+    if (all_moved || !get_is_same(tr, frames_[i])) {
+      moved[i] = true;
+      frames_[i] = tr;
+    }
+  }
+  double ret = 0;
+  for (Entries::iterator it = entries_.begin(); it != entries_.end();) {
+    if (moved[it->first.first] || moved[it->first.second]) {
+      it = entries_.erase(it);
+    } else {
+      if (da) {
+        it->second.score = ps->evaluate_indexes(m, it->second.pairs, da, 0,
+                                                it->second.pairs.size());
+      }
+      ret += it->second.score;
+      ++it;
+    }
+  }
+  ParticleIndexPairs pairs;
+  RigidBodyRigidBodyParticleIndexPairSink sink(m, filters, pairs, key, 0,
+                                               constituents);
+  for (unsigned int i = 0; i < rbs.size(); ++i) {
+    if (!moved[i]) continue;
+    for (unsigned int j = 0; j < rbs.size(); ++j) {
+      // pairs of moved bodies are only done once
+      if (j == i || (moved[j] && j > i)) continue;
+      pairs.clear();
+      sink(rbs[i], rbs[j]);
+      ++recomputed_;
+      if (pairs.empty()) continue;
+      Entry &e = entries_[Key(std::max(i, j), std::min(i, j))];
+      e.score = ps->evaluate_indexes(m, pairs, da, 0, pairs.size());
+      e.pairs.swap(pairs);
+      ret += e.score;
+    }
+  }
+  return ret;
+}
+
+void RigidBodyPairCache::fill_pairs(ParticleIndexPairs &out) const {
+  for (Entries::const_iterator it = entries_.begin(); it != entries_.end();
+       ++it) {
+    out.insert(out.end(), it->second.pairs.begin(), it->second.pairs.end());
+  }
+}
+
+IMPCORE_END_INTERNAL_NAMESPACE
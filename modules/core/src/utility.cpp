@@ -8,6 +8,8 @@
 #include "IMP/core/utility.h"
 #include <IMP/algebra/Vector3D.h>
 #include <IMP/core/XYZ.h>
+#include <algorithm>
+#include <utility>
 IMPCORE_BEGIN_NAMESPACE
 
 algebra::Vector3D get_centroid(const XYZs &ps) {
@@ -27,4 +29,72 @@ algebra::BoundingBoxD<3> get_bounding_box(const XYZRs &ps) {
   return bb;
 }
 
+namespace {
+// spread the low 10 bits of v so there are two zero bits between each
+unsigned int spread_bits(unsigned int v) {
+  v &= 0x3ff;
+  v = (v | (v << 16)) & 0x030000ff;
+  v = (v | (v << 8)) & 0x0300f00f;
+  v = (v | (v << 4)) & 0x030c30c3;
+  v = (v | (v << 2)) & 0x09249249;
+  return v;
+}
+
+// Return the Morton code of each particle's center in their bounding box
+Vector<unsigned int> get_morton_codes(Model *m, const ParticleIndexes &pis) {
+  algebra::BoundingBox3D bb;
+  for (unsigned int i = 0; i < pis.size(); ++i) {
+    bb += m->get_sphere(pis[i]).get_center();
+  }
+  Vector<unsigned int> ret(pis.size());
+  if (pis.empty()) return ret;
+  double scale[3];
+  for (unsigned int i = 0; i < 3; ++i) {
+    double w = bb.get_corner(1)[i] - bb.get_corner(0)[i];
+    scale[i] = w > 0 ? 1023. / w : 0.;
+  }
+  for (unsigned int i = 0; i < pis.size(); ++i) {
+    algebra::Vector3D v =
+        m->get_sphere(pis[i]).get_center() - bb.get_corner(0);
+    ret[i] = spread_bits(static_cast<unsigned int>(v[0] * scale[0])) |
+             (spread_bits(static_cast<unsigned int>(v[1] * scale[1])) << 1) |
+             (spread_bits(static_cast<unsigned int>(v[2] * scale[2])) << 2);
+  }
+  return ret;
+}
+}
+
+ParticleIndexes get_spatially_sorted(Model *m, const ParticleIndexes &pis) {
+  Vector<unsigned int> codes = get_morton_codes(m, pis);
+  Vector<std::pair<unsigned int, ParticleIndex> > keyed(pis.size());
+  for (unsigned int i = 0; i < pis.size(); ++i) {
+    keyed[i] = std::make_pair(codes[i], pis[i]);
+  }
+  std::sort(keyed.begin(), keyed.end());
+  ParticleIndexes ret(pis.size());
+  for (unsigned int i = 0; i < keyed.size(); ++i) {
+    ret[i] = keyed[i].second;
+  }
+  return ret;
+}
+
+ParticleIndexPairs get_spatially_sorted(Model *m,
+                                        const ParticleIndexPairs &pips) {
+  ParticleIndexes firsts(pips.size());
+  for (unsigned int i = 0; i < pips.size(); ++i) {
+    firsts[i] = pips[i][0];
+  }
+  Vector<unsigned int> codes = get_morton_codes(m, firsts);
+  Vector<std::pair<unsigned int, unsigned int> > keyed(pips.size());
+  for (unsigned int i = 0; i < pips.size(); ++i) {
+    keyed[i] = std::make_pair(codes[i], i);
+  }
+  std::sort(keyed.begin(), keyed.end());
+  ParticleIndexPairs ret(pips.size());
+  for (unsigned int i = 0; i < keyed.size(); ++i) {
+    ret[i] = pips[keyed[i].second];
+  }
+  return ret;
+}
+
 IMPCORE_END_NAMESPACE
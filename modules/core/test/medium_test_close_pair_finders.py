@@ -135,6 +135,32 @@ class Tests(IMP.test.TestCase):
         # IMP.set_log_level(IMP.VERBOSE)
         self.do_test_one(IMP.core.GridClosePairsFinder())
 
+    def test_cell_list(self):
+        """Testing CellListClosePairsFinder"""
+        self.do_test_one(IMP.core.CellListClosePairsFinder())
+
+    def test_cell_list_moved(self):
+        """Testing CellListClosePairsFinder keeps cells when particles move"""
+        cpf = IMP.core.CellListClosePairsFinder()
+        dist = .5
+        cpf.set_distance(dist)
+        m = IMP.Model()
+        ps = IMP.get_indexes(self.create_particles_in_box(m, 100))
+        for p in ps:
+            IMP.core.XYZR.setup_particle(m, p, random.uniform(.1, .5))
+        self._check_close_pairs(m, ps, dist, cpf.get_close_pairs(m, ps))
+        bb = IMP.algebra.BoundingBox3D(IMP.algebra.Vector3D(0, 0, 0),
+                                       IMP.algebra.Vector3D(10, 10, 10))
+        for i in range(5):
+            for p in random.sample(ps, 10):
+                IMP.core.XYZ(m, p).set_coordinates(
+                    IMP.algebra.get_random_vector_in(bb))
+            self._check_close_pairs(m, ps, dist, cpf.get_close_pairs(m, ps))
+            moved = random.sample(ps, 5)
+            self._check_biclose_pairs(m, ps, moved, dist,
+                                      cpf.get_close_pairs(m, ps, moved))
+        self.assertEqual(cpf.get_number_of_cell_rebuilds(), 1)
+
     def test_rigid(self):
         "Testing RigidClosePairsFinder"""
         IMP.set_log_level(IMP.VERBOSE)
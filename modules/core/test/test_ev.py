@@ -6,6 +6,7 @@ import IMP.core
 import IMP.container
 import os
 import time
+import random
 
 
 class Tests(IMP.test.TestCase):
@@ -47,5 +48,56 @@ class Tests(IMP.test.TestCase):
         print("pairs are", pp)
         self.assertAlmostEqual(r.evaluate(False), cr.evaluate(False),
                                delta=.1)
+
+    def test_rigid_body_pair_cache(self):
+        """Test excluded volume with cached rigid body pairs"""
+        m = IMP.Model()
+        bb = IMP.algebra.BoundingBox3D(IMP.algebra.Vector3D(0, 0, 0),
+                                       IMP.algebra.Vector3D(12, 12, 12))
+        ps = []
+        rbs = []
+        for i in range(10):
+            members = []
+            c = IMP.algebra.get_random_vector_in(bb)
+            for j in range(5):
+                s = IMP.algebra.Sphere3D(c, 2)
+                d = IMP.core.XYZR.setup_particle(
+                    IMP.Particle(m),
+                    IMP.algebra.Sphere3D(IMP.algebra.get_random_vector_in(s),
+                                         1))
+                members.append(d.get_particle())
+            rbs.append(IMP.core.RigidBody.setup_particle(IMP.Particle(m),
+                                                         members))
+            ps.extend(members)
+        for i in range(5):
+            d = IMP.core.XYZR.setup_particle(
+                IMP.Particle(m),
+                IMP.algebra.Sphere3D(IMP.algebra.get_random_vector_in(bb), 1))
+            ps.append(d.get_particle())
+        r = IMP.core.ExcludedVolumeRestraint(ps, 1, 1)
+        cr = IMP.core.ExcludedVolumeRestraint(ps, 1, 1)
+        cr.set_use_rigid_body_pair_cache(True)
+        self.assertAlmostEqual(cr.evaluate(False), r.evaluate(False),
+                               delta=1e-6)
+        self.assertEqual(cr.get_number_of_recomputed_rigid_body_pairs(), 45)
+        for i in range(20):
+            rb = random.choice(rbs)
+            s = IMP.algebra.Sphere3D(IMP.algebra.get_zero_vector_3d(), 2)
+            tr = IMP.algebra.Transformation3D(
+                IMP.algebra.get_random_rotation_3d(),
+                IMP.algebra.get_random_vector_in(s))
+            IMP.core.transform(rb, tr)
+            derivs = i % 2 == 0
+            score = cr.evaluate(derivs)
+            cached = [IMP.core.XYZ(p).get_derivatives() for p in ps]
+            self.assertAlmostEqual(score, r.evaluate(derivs), delta=1e-6)
+            for p, d in zip(ps, cached):
+                self.assertLess(
+                    IMP.algebra.get_distance(
+                        d, IMP.core.XYZ(p).get_derivatives()), 1e-6)
+            # only the pairs involving the moved body are found again
+            self.assertEqual(cr.get_number_of_recomputed_rigid_body_pairs(),
+                             45 + 9 * (i + 1))
+
 if __name__ == '__main__':
     IMP.test.main()
@@ -39,5 +39,71 @@ class Tests(IMP.test.TestCase):
                              mc.get_number_of_downward_steps())
             self.assertEqual(mc.get_number_of_proposed_steps(), 100)
 
+    def test_multiple_tries(self):
+        """Test MonteCarloWithMultipleTries samples the Boltzmann distribution"""
+        m = IMP.Model()
+        p = IMP.Particle(m)
+        d = IMP.core.XYZ.setup_particle(p, IMP.algebra.Vector3D(1, 0, 0))
+        d.set_coordinates_are_optimized(True)
+        ss = IMP.core.DistanceToSingletonScore(IMP.core.Harmonic(0, 1),
+                                               IMP.algebra.Vector3D(0, 0, 0))
+        r = IMP.core.SingletonRestraint(m, ss, p)
+        mc = IMP.core.MonteCarloWithMultipleTries(m, 4)
+        self.assertEqual(mc.get_number_of_tries(), 4)
+        mc.set_scoring_function([r])
+        mc.set_return_best(False)
+        mc.set_kt(1.0)
+        mc.add_mover(IMP.core.BallMover([p], 1.))
+        mc.optimize(100)
+        self.assertEqual(mc.get_number_of_accepted_steps(),
+                         mc.get_number_of_upward_steps() +
+                         mc.get_number_of_downward_steps())
+        self.assertEqual(mc.get_number_of_proposed_steps(), 100)
+        energies = []
+        for i in range(4000):
+            mc.optimize(1)
+            energies.append(mc.get_last_accepted_energy())
+            self.assertAlmostEqual(energies[-1], r.evaluate(False), delta=1e-6)
+        # mean of a 3D harmonic potential is 3/2 kT
+        self.assertAlmostEqual(sum(energies) / len(energies), 1.5, delta=.3)
+
+    def test_multiple_tries_serial_mover(self):
+        """Test MonteCarloWithMultipleTries with a SerialMover"""
+        m = IMP.Model()
+        ds = []
+        for i in range(3):
+            d = IMP.core.XYZ.setup_particle(IMP.Particle(m),
+                                            IMP.algebra.Vector3D(i, 0, 0))
+            d.set_coordinates_are_optimized(True)
+            ds.append(d)
+        ss = IMP.core.DistanceToSingletonScore(IMP.core.Harmonic(0, 1),
+                                               IMP.algebra.Vector3D(0, 0, 0))
+        rs = [IMP.core.SingletonRestraint(m, ss, d) for d in ds]
+        mc = IMP.core.MonteCarloWithMultipleTries(m, 4)
+        mc.set_scoring_function(rs)
+        mc.set_return_best(False)
+        ms = [IMP.core.BallMover([d], .5) for d in ds]
+        smv = IMP.core.SerialMover(ms)
+        mc.add_mover(smv)
+        accepted = 0
+        for i in range(30):
+            old = [d.get_coordinates() for d in ds]
+            mc.optimize(1)
+            accepted += mc.get_number_of_accepted_steps()
+            # all tries in a step use the same mover
+            self.assertEqual(smv.get_mover_index(), i % 3)
+            for j, d in enumerate(ds):
+                if j != i % 3:
+                    self.assertLess(IMP.algebra.get_distance(
+                        old[j], d.get_coordinates()), 1e-6)
+        # each step counts as one move of the mover used
+        self.assertEqual(smv.get_number_of_proposed(), 30)
+        self.assertEqual(smv.get_number_of_accepted(), accepted)
+        self.assertGreater(accepted, 0)
+        for mv in ms:
+            self.assertEqual(mv.get_number_of_proposed(), 10)
+        self.assertEqual(sum(mv.get_number_of_accepted() for mv in ms),
+                         accepted)
+
 if __name__ == '__main__':
     IMP.test.main()
@@ -42,5 +42,34 @@ class Tests(IMP.test.TestCase):
         sfda = IMP.core.RestraintsScoringFunction(rda)
         self.assertEqual(sf.evaluate(False), sfda.evaluate(False))
 
+    def test_threads(self):
+        """Test that evaluation with threads matches serial evaluation"""
+        m = IMP.Model()
+        ds = [IMP.core.XYZ.setup_particle(
+                  IMP.Particle(m), IMP.algebra.get_random_vector_in(
+                      IMP.algebra.get_unit_bounding_box_3d()))
+              for i in range(10)]
+        for d in ds:
+            d.set_coordinates_are_optimized(True)
+        rs = IMP.RestraintSet(m, .5, "RS")
+        rs.add_restraints([IMP.core.DistanceRestraint(
+            m, IMP.core.Harmonic(0.3, 1.0), ds[i], ds[i + 1])
+            for i in range(5)])
+        rs2 = [IMP.core.DistanceRestraint(
+            m, IMP.core.Harmonic(0.1, 2.0), ds[i], ds[i + 2])
+            for i in range(4, 8)]
+        sf = IMP.core.RestraintsScoringFunction([rs] + rs2)
+        score = sf.evaluate(True)
+        derivs = [d.get_derivatives() for d in ds]
+        for n in (2, 3, 8):
+            with IMP.SetNumberOfThreads(n):
+                for i in range(2):
+                    self.assertAlmostEqual(sf.evaluate(True), score,
+                                           delta=1e-6)
+                    for d, deriv in zip(ds, derivs):
+                        self.assertLess(
+                            (d.get_derivatives() - deriv).get_magnitude(),
+                            1e-6)
+
 if __name__ == '__main__':
     IMP.test.main()
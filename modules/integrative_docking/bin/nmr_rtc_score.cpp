@@ -10,6 +10,7 @@
 #include <IMP/integrative_docking/internal/helpers.h>
 #include <IMP/integrative_docking/internal/ResidueContent.h>
 #include <IMP/integrative_docking/internal/NMR_RTCResult.h>
+#include <IMP/integrative_docking/internal/batch_scoring.h>
 
 #include <IMP/algebra/standard_grids.h>
 #include <IMP/algebra/Transformation3D.h>
@@ -18,6 +19,7 @@
 
 #include <fstream>
 #include <vector>
+#include <algorithm>
 #include <string>
 
 #include <boost/program_options.hpp>
@@ -112,15 +114,6 @@ put '-' if there is no file for one of the molecules.")(
   std::vector<IMP::algebra::Transformation3D> transforms;
   read_trans_file(trans_file, transforms);
 
-  // save receptor_pdb in grid for faster interface finding
-  typedef IMP::algebra::DenseGrid3D<IMP::Ints> Grid;
-  IMP::algebra::BoundingBox3D bb(coordinates1);
-  Grid grid(2.0, bb);
-  for (unsigned int i = 0; i < coordinates1.size(); i++) {
-    Grid::Index grid_index = grid.get_nearest_index(coordinates1[i]);
-    grid[grid_index].push_back(i);
-  }
-
   // read residue content files
   ResidueContent receptor_rc, ligand_rc;
   if (receptor_pdb_residue_content.length() > 0)
@@ -142,37 +135,40 @@ put '-' if there is no file for one of the molecules.")(
   out_file.precision(3);
 
   float radius = 6.0;
-  float radius2 = radius * radius;
+
+  // save receptor_pdb in grid for faster interface finding
+  ReceptorGrid grid(coordinates1, radius);
+
+  // residue types are looked up once
+  std::vector<IMP::atom::ResidueType> residue_types1, residue_types2;
+  for (unsigned int j = 0; j < residue_particles1.size(); j++)
+    residue_types1.push_back(
+        IMP::atom::Residue(residue_particles1[j]).get_residue_type());
+  for (unsigned int j = 0; j < residue_particles2.size(); j++)
+    residue_types2.push_back(
+        IMP::atom::Residue(residue_particles2[j]).get_residue_type());
+
+  // find interface residues for blocks of transformations
+  const unsigned int block_size = 1000;
+  std::vector<std::vector<bool> > receptor_interfaces, ligand_interfaces;
 
   // iterate transformations
   std::vector<NMR_RTCResult> results;
   for (unsigned int i = 0; i < transforms.size(); i++) {
-    // apply transformation on each particle
-    std::vector<int> receptor_counters(residue_particles1.size(), 0),
-        ligand_counters(residue_particles2.size(), 0);
-    for (unsigned int ligand_atom_index = 0;
-         ligand_atom_index < coordinates2.size(); ligand_atom_index++) {
-      // access grid to see if interface atom
-      IMP::algebra::Vector3D v =
-          transforms[i] * coordinates2[ligand_atom_index];
-      IMP::algebra::BoundingBox3D bb(v);
-      bb += radius;
-      Grid::ExtendedIndex lb = grid.get_extended_index(bb.get_corner(0)),
-                          ub = grid.get_extended_index(bb.get_corner(1));
-      // std::vector<int> neighbours1, neighbours2;
-      for (Grid::IndexIterator it = grid.indexes_begin(lb, ub);
-           it != grid.indexes_end(lb, ub); ++it) {
-        for (unsigned int vIndex = 0; vIndex < grid[*it].size(); vIndex++) {
-          int receptor_atom_index = grid[*it][vIndex];
-          float dist2 = IMP::algebra::get_squared_distance(
-              coordinates1[receptor_atom_index], v);
-          if (dist2 < radius2) {
-            receptor_counters[atom_2_residue_map1[receptor_atom_index]]++;
-            ligand_counters[atom_2_residue_map2[ligand_atom_index]]++;
-          }
-        }
-      }
+    if (i % block_size == 0) {
+      std::vector<IMP::algebra::Transformation3D> block(
+          transforms.begin() + i,
+          transforms.begin() + std::min<std::size_t>(i + block_size,
+                                                     transforms.size()));
+      get_interface_residues(grid, coordinates2, atom_2_residue_map1,
+                             atom_2_residue_map2, residue_particles1.size(),
+                             residue_particles2.size(), block,
+                             receptor_interfaces, ligand_interfaces);
     }
+    const std::vector<bool>& receptor_interface =
+        receptor_interfaces[i % block_size];
+    const std::vector<bool>& ligand_interface =
+        ligand_interfaces[i % block_size];
     // score
     int score = 0;
     // receptor interface
@@ -180,10 +176,8 @@ put '-' if there is no file for one of the molecules.")(
       ResidueContent model_receptor_rc;
       // generate interface residue content
       for (unsigned int j = 0; j < residue_particles1.size(); j++) {
-        if (receptor_counters[j] > 0) {
-          IMP::atom::ResidueType residue_type =
-              IMP::atom::Residue(residue_particles1[j]).get_residue_type();
-          model_receptor_rc.add_residue(residue_type);
+        if (receptor_interface[j]) {
+          model_receptor_rc.add_residue(residue_types1[j]);
         }
       }
       score += receptor_rc.score(model_receptor_rc);
@@ -193,10 +187,8 @@ put '-' if there is no file for one of the molecules.")(
       ResidueContent model_ligand_rc;
       // generate interface residue content
       for (unsigned int j = 0; j < residue_particles2.size(); j++) {
-        if (ligand_counters[j] > 0) {
-          IMP::atom::ResidueType residue_type =
-              IMP::atom::Residue(residue_particles2[j]).get_residue_type();
-          model_ligand_rc.add_residue(residue_type);
+        if (ligand_interface[j]) {
+          model_ligand_rc.add_residue(residue_types2[j]);
         }
       }
       score += ligand_rc.score(model_ligand_rc);
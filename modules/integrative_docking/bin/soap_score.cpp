@@ -8,6 +8,7 @@
 
 #include <IMP/integrative_docking/internal/SOAPResult.h>
 #include <IMP/integrative_docking/internal/soap_score.h>
+#include <IMP/integrative_docking/internal/batch_scoring.h>
 #include <IMP/integrative_docking/internal/Normalization.h>
 #include <IMP/integrative_docking/internal/helpers.h>
 
@@ -25,6 +26,7 @@
 
 #include <fstream>
 #include <vector>
+#include <algorithm>
 #include <string>
 
 #include <boost/algorithm/string.hpp>
@@ -268,26 +270,43 @@ each pair of PDB file names in the input file filenames.txt.")
     else
       transforms.push_back(IMP::algebra::get_identity_transformation_3d());
 
-    // iterate transformations
-    for (unsigned int t = 0; t < transforms.size(); t++) {
-      // apply transformation
-      transform(model, pis2, transforms[t]);
-      // score
-      double score = 0.0;
-      if (oriented_potentials) {
-        score = oriented_soap_score(soap_oriented_score, model, pis1, pis2);
-      } else {
-        score = soap_score(soap_distance_score, model, pis1, pis2,
-                           distance_threshold);
+    if (oriented_potentials) {
+      // oriented potentials need the transformed ligand in the model
+      // iterate transformations
+      for (unsigned int t = 0; t < transforms.size(); t++) {
+        // apply transformation
+        transform(model, pis2, transforms[t]);
+        // score
+        double score =
+          oriented_soap_score(soap_oriented_score, model, pis1, pis2);
+        // save
+        results.push_back(
+            SOAPResult(t + 1, score, false, 0, score, transforms[t]));
+        if ((t + 1) % 1000 == 0)
+          std::cerr << t + 1 << " transforms processed " << std::endl;
+        // return back
+        for (unsigned int ip = 0; ip < pis2.size(); ip++) {
+          IMP::core::XYZ(model, pis2[ip]).set_coordinates(coordinates2[ip]);
+        }
       }
-      // save
-      results.push_back(
-          SOAPResult(t + 1, score, false, 0, score, transforms[t]));
-      if ((t + 1) % 1000 == 0)
-        std::cerr << t + 1 << " transforms processed " << std::endl;
-      // return back
-      for (unsigned int ip = 0; ip < pis2.size(); ip++) {
-        IMP::core::XYZ(model, pis2[ip]).set_coordinates(coordinates2[ip]);
+    } else {
+      // score blocks of transformations on a shared receptor grid
+      const unsigned int block_size = 1000;
+      for (unsigned int t = 0; t < transforms.size(); t += block_size) {
+        std::vector<IMP::algebra::Transformation3D> block(
+            transforms.begin() + t,
+            transforms.begin() + std::min<std::size_t>(t + block_size,
+                                                       transforms.size()));
+        std::vector<double> scores;
+        get_soap_scores(soap_distance_score, model, pis1, pis2,
+                        distance_threshold, block, scores);
+        // save
+        for (unsigned int i = 0; i < block.size(); i++) {
+          results.push_back(SOAPResult(t + i + 1, scores[i], false, 0,
+                                       scores[i], block[i]));
+        }
+        std::cerr << t + block.size() << " transforms processed "
+                  << std::endl;
       }
     }
 
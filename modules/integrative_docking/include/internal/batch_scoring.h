@@ -0,0 +1,96 @@
+/**
+ * \file IMP/integrative_docking/batch_scoring.h
+ * \brief Scoring of blocks of docking transformations
+ *
+ * \authors Dina Schneidman
+ * Copyright 2007-2016 IMP Inventors. All rights reserved.
+ *
+ */
+
+#ifndef IMPINTEGRATIVE_DOCKING_BATCH_SCORING_H
+#define IMPINTEGRATIVE_DOCKING_BATCH_SCORING_H
+
+#include <IMP/integrative_docking/integrative_docking_config.h>
+#include <IMP/score_functor/Soap.h>
+
+#include <IMP/Model.h>
+
+#include <IMP/algebra/standard_grids.h>
+#include <IMP/algebra/Transformation3D.h>
+
+#include <vector>
+
+IMPINTEGRATIVEDOCKING_BEGIN_INTERNAL_NAMESPACE
+
+// Receptor atoms stored once in a grid for fast interface finding.
+// The receptor is kept in place, so the grid is shared by all
+// transformations of the ligand.
+class IMPINTEGRATIVEDOCKINGEXPORT ReceptorGrid {
+ public:
+  ReceptorGrid(const IMP::algebra::Vector3Ds& coordinates,
+               float distance_threshold, float cell_size = 2.0);
+
+  // call f(receptor_atom_index, squared_distance) for each receptor atom
+  // closer than the distance threshold to v
+  template <class F>
+  void apply(const IMP::algebra::Vector3D& v, F& f) const {
+    IMP::algebra::BoundingBox3D bb(v);
+    bb += distance_threshold_;
+    Grid::ExtendedIndex lb = grid_.get_extended_index(bb.get_corner(0)),
+                        ub = grid_.get_extended_index(bb.get_corner(1));
+    for (Grid::IndexIterator it = grid_.indexes_begin(lb, ub);
+         it != grid_.indexes_end(lb, ub); ++it) {
+      const IMP::Ints& cell = grid_[*it];
+      for (unsigned int i = 0; i < cell.size(); i++) {
+        float dist2 =
+            IMP::algebra::get_squared_distance(coordinates_[cell[i]], v);
+        if (dist2 < distance_threshold2_) f(cell[i], dist2);
+      }
+    }
+  }
+
+  float get_distance_threshold() const { return distance_threshold_; }
+
+  unsigned int get_number_of_atoms() const { return coordinates_.size(); }
+
+ private:
+  typedef IMP::algebra::DenseGrid3D<IMP::Ints> Grid;
+  IMP::algebra::Vector3Ds coordinates_;
+  Grid grid_;
+  float distance_threshold_, distance_threshold2_;
+};
+
+// apply the transformation on coordinates, storing the result in
+// a contiguous out array (resized if needed) instead of the Model
+IMPINTEGRATIVEDOCKINGEXPORT
+void transform_coordinates(const IMP::algebra::Vector3Ds& coordinates,
+                           const IMP::algebra::Transformation3D& t,
+                           IMP::algebra::Vector3Ds& out);
+
+// SOAP interface score for each transformation of the ligand (pis2),
+// the receptor (pis1) and the model are not modified.
+// Transformations are scored in parallel if more than one thread is set.
+IMPINTEGRATIVEDOCKINGEXPORT
+void get_soap_scores(const IMP::score_functor::Soap* soap_score,
+                     IMP::Model* model, const IMP::ParticleIndexes& pis1,
+                     const IMP::ParticleIndexes& pis2,
+                     float distance_threshold,
+                     const std::vector<IMP::algebra::Transformation3D>& transforms,
+                     std::vector<double>& scores);
+
+// for each transformation, mark the receptor and ligand residues
+// that have atoms within the grid distance threshold;
+// receptor_interfaces[i][j] is true if residue j is in the interface
+IMPINTEGRATIVEDOCKINGEXPORT
+void get_interface_residues(
+    const ReceptorGrid& grid, const IMP::algebra::Vector3Ds& ligand_coordinates,
+    const std::vector<int>& atom_2_residue_map1,
+    const std::vector<int>& atom_2_residue_map2,
+    unsigned int receptor_residue_number, unsigned int ligand_residue_number,
+    const std::vector<IMP::algebra::Transformation3D>& transforms,
+    std::vector<std::vector<bool> >& receptor_interfaces,
+    std::vector<std::vector<bool> >& ligand_interfaces);
+
+IMPINTEGRATIVEDOCKING_END_INTERNAL_NAMESPACE
+
+#endif /* IMPINTEGRATIVE_DOCKING_BATCH_SCORING_H */
@@ -0,0 +1,153 @@
+/**
+ * \file IMP/integrative_docking/batch_scoring.cpp
+ * \brief Scoring of blocks of docking transformations
+ *
+ * Copyright 2007-2016 IMP Inventors. All rights reserved.
+ *
+ */
+
+#include <IMP/integrative_docking/internal/batch_scoring.h>
+#include <IMP/core/XYZ.h>
+#include <IMP/thread_macros.h>
+
+IMPINTEGRATIVEDOCKING_BEGIN_INTERNAL_NAMESPACE
+
+ReceptorGrid::ReceptorGrid(const IMP::algebra::Vector3Ds& coordinates,
+                           float distance_threshold, float cell_size)
+    : coordinates_(coordinates),
+      grid_(cell_size, IMP::algebra::BoundingBox3D(coordinates)),
+      distance_threshold_(distance_threshold),
+      distance_threshold2_(distance_threshold * distance_threshold) {
+  for (unsigned int i = 0; i < coordinates_.size(); i++) {
+    Grid::Index grid_index = grid_.get_nearest_index(coordinates_[i]);
+    grid_[grid_index].push_back(i);
+  }
+}
+
+void transform_coordinates(const IMP::algebra::Vector3Ds& coordinates,
+                           const IMP::algebra::Transformation3D& t,
+                           IMP::algebra::Vector3Ds& out) {
+  out.resize(coordinates.size());
+  for (unsigned int i = 0; i < coordinates.size(); i++) {
+    out[i] = t.get_transformed(coordinates[i]);
+  }
+}
+
+namespace {
+
+class SoapAccumulator {
+ public:
+  SoapAccumulator(const IMP::score_functor::Soap* soap_score,
+                  IMP::Model* model, const IMP::ParticleIndexes& pis1,
+                  IMP::ParticleIndex pi2)
+      : soap_score_(soap_score), model_(model), pis1_(pis1), pi2_(pi2),
+        score_(0.0) {}
+
+  void operator()(int r_index, float dist2) {
+    score_ += soap_score_->get_score(
+        model_, IMP::ParticleIndexPair(pis1_[r_index], pi2_), sqrt(dist2));
+  }
+
+  double get_score() const { return score_; }
+
+ private:
+  const IMP::score_functor::Soap* soap_score_;
+  IMP::Model* model_;
+  const IMP::ParticleIndexes& pis1_;
+  IMP::ParticleIndex pi2_;
+  double score_;
+};
+
+class InterfaceMarker {
+ public:
+  InterfaceMarker(const std::vector<int>& atom_2_residue_map1,
+                  std::vector<bool>& receptor_interface)
+      : atom_2_residue_map1_(atom_2_residue_map1),
+        receptor_interface_(receptor_interface), found_(false) {}
+
+  void operator()(int r_index, float) {
+    receptor_interface_[atom_2_residue_map1_[r_index]] = true;
+    found_ = true;
+  }
+
+  bool get_found() const { return found_; }
+
+ private:
+  const std::vector<int>& atom_2_residue_map1_;
+  std::vector<bool>& receptor_interface_;
+  bool found_;
+};
+}
+
+void get_soap_scores(const IMP::score_functor::Soap* soap_score,
+                     IMP::Model* model, const IMP::ParticleIndexes& pis1,
+                     const IMP::ParticleIndexes& pis2,
+                     float distance_threshold,
+                     const std::vector<IMP::algebra::Transformation3D>& transforms,
+                     std::vector<double>& scores) {
+  // receptor grid and ligand coordinates are extracted once for all
+  // transformations
+  IMP::algebra::Vector3Ds coordinates1(pis1.size()), coordinates2(pis2.size());
+  for (unsigned int i = 0; i < pis1.size(); i++) {
+    coordinates1[i] = IMP::core::XYZ(model, pis1[i]).get_coordinates();
+  }
+  for (unsigned int i = 0; i < pis2.size(); i++) {
+    coordinates2[i] = IMP::core::XYZ(model, pis2[i]).get_coordinates();
+  }
+  ReceptorGrid grid(coordinates1, distance_threshold);
+
+  scores.resize(transforms.size());
+  int transforms_number = transforms.size();
+  IMP_OMP_PRAGMA(parallel num_threads(IMP::get_number_of_threads())
+                 if (IMP::get_number_of_threads() > 1))
+  {
+    // per thread buffer for the transformed ligand
+    IMP::algebra::Vector3Ds transformed2;
+    IMP_OMP_PRAGMA(for schedule(dynamic, 16))
+    for (int t = 0; t < transforms_number; t++) {
+      transform_coordinates(coordinates2, transforms[t], transformed2);
+      double score = 0.0;
+      for (unsigned int l_index = 0; l_index < transformed2.size();
+           l_index++) {
+        SoapAccumulator acc(soap_score, model, pis1, pis2[l_index]);
+        grid.apply(transformed2[l_index], acc);
+        score += acc.get_score();
+      }
+      scores[t] = score;
+    }
+  }
+}
+
+void get_interface_residues(
+    const ReceptorGrid& grid, const IMP::algebra::Vector3Ds& ligand_coordinates,
+    const std::vector<int>& atom_2_residue_map1,
+    const std::vector<int>& atom_2_residue_map2,
+    unsigned int receptor_residue_number, unsigned int ligand_residue_number,
+    const std::vector<IMP::algebra::Transformation3D>& transforms,
+    std::vector<std::vector<bool> >& receptor_interfaces,
+    std::vector<std::vector<bool> >& ligand_interfaces) {
+  receptor_interfaces.resize(transforms.size());
+  ligand_interfaces.resize(transforms.size());
+  int transforms_number = transforms.size();
+  IMP_OMP_PRAGMA(parallel num_threads(IMP::get_number_of_threads())
+                 if (IMP::get_number_of_threads() > 1))
+  {
+    IMP::algebra::Vector3Ds transformed2;
+    IMP_OMP_PRAGMA(for schedule(dynamic, 16))
+    for (int t = 0; t < transforms_number; t++) {
+      transform_coordinates(ligand_coordinates, transforms[t], transformed2);
+      receptor_interfaces[t].assign(receptor_residue_number, false);
+      ligand_interfaces[t].assign(ligand_residue_number, false);
+      for (unsigned int l_index = 0; l_index < transformed2.size();
+           l_index++) {
+        InterfaceMarker marker(atom_2_residue_map1, receptor_interfaces[t]);
+        grid.apply(transformed2[l_index], marker);
+        if (marker.get_found()) {
+          ligand_interfaces[t][atom_2_residue_map2[l_index]] = true;
+        }
+      }
+    }
+  }
+}
+
+IMPINTEGRATIVEDOCKING_END_INTERNAL_NAMESPACE
@@ -0,0 +1,244 @@
+/**
+ *  \file test_batch_scoring.cpp
+ *  \brief Compare batch scoring of transformations with scoring one by one.
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ *
+ */
+#include <IMP/integrative_docking/internal/batch_scoring.h>
+#include <IMP/integrative_docking/internal/soap_score.h>
+#include <IMP/integrative_docking/internal/helpers.h>
+#include <IMP/atom/pdb.h>
+#include <IMP/atom/Atom.h>
+#include <IMP/atom/Residue.h>
+#include <IMP/atom/DopePairScore.h>
+#include <IMP/core/XYZ.h>
+#include <IMP/algebra/vector_generators.h>
+#include <IMP/algebra/Rotation3D.h>
+#include <IMP/threads.h>
+#include <IMP/flags.h>
+#include <IMP/exception.h>
+#include <boost/unordered_map.hpp>
+#include <sstream>
+#include <algorithm>
+#include <cmath>
+
+namespace {
+
+using namespace IMP::integrative_docking::internal;
+
+// two neighboring fragments of test/input/static.pdb
+const char *receptor_pdb =
+    "ATOM      1  N   ILE    16      16.666  13.100   4.864  1.00  9.66\n"
+    "ATOM      2  CA  ILE    16      17.231  14.261   5.515  1.00 14.60\n"
+    "ATOM      3  C   ILE    16      17.119  15.289   4.391  1.00 14.01\n"
+    "ATOM      4  O   ILE    16      17.495  14.915   3.273  1.00 14.28\n"
+    "ATOM      5  CB  ILE    16      18.723  14.012   5.911  1.00 14.24\n"
+    "ATOM      6  CG1 ILE    16      18.816  12.800   6.842  1.00 15.26\n"
+    "ATOM      7  CG2 ILE    16      19.302  15.262   6.595  1.00 12.59\n"
+    "ATOM      8  CD1 ILE    16      18.361  12.928   8.319  1.00 15.07\n"
+    "ATOM      9  N   VAL    17      16.543  16.469   4.679  1.00 11.97\n"
+    "ATOM     10  CA  VAL    17      16.417  17.612   3.779  1.00  9.69\n"
+    "ATOM     11  C   VAL    17      17.496  18.530   4.310  1.00 11.56\n"
+    "ATOM     12  O   VAL    17      17.605  18.720   5.522  1.00  8.77\n"
+    "ATOM     13  CB  VAL    17      15.062  18.351   3.923  1.00 12.83\n"
+    "ATOM     14  CG1 VAL    17      14.987  19.435   2.921  1.00  5.23\n"
+    "ATOM     15  CG2 VAL    17      13.894  17.425   3.665  1.00 13.01\n"
+    "ATOM     16  N   GLY    18      18.349  19.055   3.434  1.00 15.82\n"
+    "ATOM     17  CA  GLY    18      19.385  20.007   3.822  1.00 14.90\n"
+    "ATOM     18  C   GLY    18      20.563  19.396   4.527  1.00 16.15\n"
+    "ATOM     19  O   GLY    18      21.295  20.102   5.209  1.00 20.80\n"
+    "ATOM     20  N   GLY    19      20.786  18.102   4.389  1.00 16.96\n"
+    "ATOM     21  CA  GLY    19      21.895  17.475   5.091  1.00 17.82\n"
+    "ATOM     22  C   GLY    19      23.113  17.341   4.194  1.00 17.75\n"
+    "ATOM     23  O   GLY    19      23.195  17.982   3.142  1.00 17.63\n"
+    "ATOM     24  N   TYR    20      24.040  16.468   4.567  1.00 14.78\n"
+    "ATOM     25  CA  TYR    20      25.236  16.292   3.772  1.00 13.45\n"
+    "ATOM     26  C   TYR    20      25.503  14.811   3.708  1.00 15.43\n"
+    "ATOM     27  O   TYR    20      24.953  14.083   4.537  1.00 15.81\n"
+    "ATOM     28  CB  TYR    20      26.413  17.039   4.425  1.00 12.43\n"
+    "ATOM     29  CG  TYR    20      26.702  16.738   5.901  1.00 11.58\n"
+    "ATOM     30  CD1 TYR    20      25.965  17.328   6.923  1.00  9.62\n"
+    "ATOM     31  CD2 TYR    20      27.720  15.856   6.222  1.00  9.64\n"
+    "ATOM     32  CE1 TYR    20      26.253  17.033   8.252  1.00 11.01\n"
+    "ATOM     33  CE2 TYR    20      28.009  15.551   7.538  1.00 10.16\n"
+    "ATOM     34  CZ  TYR    20      27.283  16.137   8.562  1.00 11.76\n"
+    "ATOM     35  OH  TYR    20      27.596  15.810   9.888  1.00 16.88\n"
+    "ATOM     36  N   THR    21      26.275  14.323   2.739  1.00 14.90\n"
+    "ATOM     37  CA  THR    21      26.671  12.928   2.682  1.00 14.38\n"
+    "ATOM     38  C   THR    21      27.505  12.597   3.916  1.00 13.70\n"
+    "ATOM     39  O   THR    21      28.499  13.267   4.180  1.00 16.56\n"
+    "ATOM     40  CB  THR    21      27.475  12.699   1.380  1.00 15.31\n"
+    "ATOM     41  OG1 THR    21      26.598  12.892   0.267  1.00 15.79\n"
+    "ATOM     42  CG2 THR    21      28.038  11.299   1.291  1.00 11.73\n";
+
+const char *ligand_pdb =
+    "ATOM     43  N   CYS    22      27.186  11.552   4.679  1.00 13.85\n"
+    "ATOM     44  CA  CYS    22      27.936  11.274   5.894  1.00  9.60\n"
+    "ATOM     45  C   CYS    22      29.395  10.914   5.697  1.00 10.15\n"
+    "ATOM     46  O   CYS    22      30.268  11.358   6.434  1.00 11.45\n"
+    "ATOM     47  CB  CYS    22      27.256  10.144   6.648  1.00  7.94\n"
+    "ATOM     48  SG  CYS    22      25.547  10.450   7.173  1.00  6.83\n"
+    "ATOM     49  N   GLY    23      29.621  10.087   4.671  1.00 11.29\n"
+    "ATOM     50  CA  GLY    23      30.880   9.428   4.433  1.00 11.11\n"
+    "ATOM     51  C   GLY    23      30.742   7.969   4.830  1.00 11.91\n"
+    "ATOM     52  O   GLY    23      30.099   7.690   5.845  1.00 11.94\n"
+    "ATOM     53  N   ALA    24      31.278   7.007   4.062  1.00 12.19\n"
+    "ATOM     54  CA  ALA    24      31.011   5.624   4.366  1.00 12.85\n"
+    "ATOM     55  C   ALA    24      31.485   5.136   5.705  1.00 16.87\n"
+    "ATOM     56  O   ALA    24      32.584   5.378   6.185  1.00 19.84\n"
+    "ATOM     57  CB  ALA    24      31.600   4.694   3.331  1.00 12.50\n"
+    "ATOM     58  N   ASN    25      30.528   4.488   6.341  1.00 19.69\n"
+    "ATOM     59  CA  ASN    25      30.671   3.869   7.649  1.00 19.08\n"
+    "ATOM     60  C   ASN    25      31.105   4.765   8.794  1.00 19.73\n"
+    "ATOM     61  O   ASN    25      31.485   4.287   9.861  1.00 18.85\n"
+    "ATOM     62  CB  ASN    25      31.613   2.693   7.536  1.00 21.17\n"
+    "ATOM     63  CG  ASN    25      31.146   1.729   6.451  1.00 19.96\n"
+    "ATOM     64  OD1 ASN    25      30.140   1.035   6.521  1.00 21.57\n"
+    "ATOM     65  ND2 ASN    25      31.855   1.703   5.354  1.00 17.23\n"
+    "ATOM     66  N   THR    26      30.861   6.076   8.632  1.00 17.51\n"
+    "ATOM     67  CA  THR    26      31.130   7.053   9.672  1.00 17.21\n"
+    "ATOM     68  C   THR    26      30.118   7.071  10.813  1.00 15.30\n"
+    "ATOM     69  O   THR    26      30.334   7.674  11.872  1.00 12.70\n"
+    "ATOM     70  CB  THR    26      31.220   8.433   9.004  1.00 16.14\n"
+    "ATOM     71  OG1 THR    26      30.044   8.707   8.246  1.00 14.25\n"
+    "ATOM     72  CG2 THR    26      32.412   8.444   8.054  1.00 19.86\n"
+    "ATOM     73  N   VAL    27      28.946   6.459  10.581  1.00 17.35\n"
+    "ATOM     74  CA  VAL    27      27.869   6.417  11.575  1.00 16.22\n"
+    "ATOM     75  C   VAL    27      27.695   4.908  11.756  1.00 17.69\n"
+    "ATOM     76  O   VAL    27      26.732   4.306  11.279  1.00 18.89\n"
+    "ATOM     77  CB  VAL    27      26.585   7.140  10.988  1.00 15.67\n"
+    "ATOM     78  CG1 VAL    27      25.461   7.108  12.005  1.00  8.37\n"
+    "ATOM     79  CG2 VAL    27      26.896   8.621  10.615  1.00 11.51\n";
+
+IMP::ParticleIndexes read_atoms(const char *data, IMP::Model *m,
+                                std::vector<int> &atom_2_residue_map,
+                                unsigned int &residue_number) {
+  std::istringstream in(data);
+  IMP::atom::Hierarchy mhd = IMP::atom::read_pdb(
+      in, m, new IMP::atom::NonWaterNonHydrogenPDBSelector(), true, true);
+  IMP::atom::add_dope_score_data(mhd);
+  IMP::ParticleIndexes pis = IMP::get_as<IMP::ParticleIndexes>(
+      IMP::atom::get_by_type(mhd, IMP::atom::ATOM_TYPE));
+  boost::unordered_map<IMP::ParticleIndex, int> residues;
+  for (unsigned int i = 0; i < pis.size(); i++) {
+    IMP::ParticleIndex rpi =
+        IMP::atom::get_residue(IMP::atom::Atom(m, pis[i])).get_particle_index();
+    if (residues.find(rpi) == residues.end()) {
+      int n = residues.size();
+      residues[rpi] = n;
+    }
+    atom_2_residue_map.push_back(residues[rpi]);
+  }
+  residue_number = residues.size();
+  return pis;
+}
+
+IMP::algebra::Vector3Ds get_coordinates(IMP::Model *m,
+                                        const IMP::ParticleIndexes &pis) {
+  IMP::algebra::Vector3Ds ret;
+  for (unsigned int i = 0; i < pis.size(); i++) {
+    ret.push_back(IMP::core::XYZ(m, pis[i]).get_coordinates());
+  }
+  return ret;
+}
+
+void check_soap(IMP::Model *m, IMP::ParticleIndexes &pis1,
+                IMP::ParticleIndexes &pis2,
+                const std::vector<IMP::algebra::Transformation3D> &transforms) {
+  float distance_threshold = 15.0;
+  IMP::score_functor::Soap soap(distance_threshold);
+  std::vector<double> scores;
+  get_soap_scores(&soap, m, pis1, pis2, distance_threshold, transforms,
+                  scores);
+  IMP::algebra::Vector3Ds coordinates2 = get_coordinates(m, pis2);
+  for (unsigned int t = 0; t < transforms.size(); t++) {
+    transform(m, pis2, transforms[t]);
+    double score = soap_score(&soap, m, pis1, pis2, distance_threshold);
+    for (unsigned int i = 0; i < pis2.size(); i++) {
+      IMP::core::XYZ(m, pis2[i]).set_coordinates(coordinates2[i]);
+    }
+    if (std::abs(score - scores[t]) > 1e-4 * (1 + std::abs(score))) {
+      IMP_THROW("SOAP scores do not match for transformation "
+                    << t << ": " << score << " " << scores[t],
+                IMP::ValueException);
+    }
+  }
+}
+
+void check_interface(
+    IMP::Model *m, const IMP::ParticleIndexes &pis1,
+    const IMP::ParticleIndexes &pis2, const std::vector<int> &map1,
+    const std::vector<int> &map2, unsigned int residue_number1,
+    unsigned int residue_number2,
+    const std::vector<IMP::algebra::Transformation3D> &transforms) {
+  float radius = 6.0;
+  IMP::algebra::Vector3Ds coordinates1 = get_coordinates(m, pis1);
+  IMP::algebra::Vector3Ds coordinates2 = get_coordinates(m, pis2);
+  ReceptorGrid grid(coordinates1, radius);
+  std::vector<std::vector<bool> > receptor_interfaces, ligand_interfaces;
+  get_interface_residues(grid, coordinates2, map1, map2, residue_number1,
+                         residue_number2, transforms, receptor_interfaces,
+                         ligand_interfaces);
+  unsigned int found = 0;
+  for (unsigned int t = 0; t < transforms.size(); t++) {
+    // all against all
+    std::vector<bool> receptor(residue_number1, false),
+        ligand(residue_number2, false);
+    for (unsigned int j = 0; j < coordinates2.size(); j++) {
+      IMP::algebra::Vector3D v = transforms[t].get_transformed(coordinates2[j]);
+      for (unsigned int i = 0; i < coordinates1.size(); i++) {
+        if (IMP::algebra::get_squared_distance(coordinates1[i], v) <
+            radius * radius) {
+          receptor[map1[i]] = true;
+          ligand[map2[j]] = true;
+        }
+      }
+    }
+    if (receptor != receptor_interfaces[t] || ligand != ligand_interfaces[t]) {
+      IMP_THROW("Interface residues do not match for transformation " << t,
+                IMP::ValueException);
+    }
+    found += std::count(receptor.begin(), receptor.end(), true);
+  }
+  if (found == 0) {
+    IMP_THROW("No interface residues found", IMP::ValueException);
+  }
+}
+}
+
+int main(int argc, char *argv[]) {
+  IMP::setup_from_argv(argc, argv,
+                       "Compare batch scoring of transformations with "
+                       "scoring one by one.");
+  IMP_NEW(IMP::Model, m, ());
+  std::vector<int> map1, map2;
+  unsigned int residue_number1, residue_number2;
+  IMP::ParticleIndexes pis1 =
+      read_atoms(receptor_pdb, m, map1, residue_number1);
+  IMP::ParticleIndexes pis2 = read_atoms(ligand_pdb, m, map2, residue_number2);
+
+  // small rigid moves of the ligand around its starting position
+  IMP::algebra::Vector3D center =
+      IMP::algebra::get_centroid(get_coordinates(m, pis2));
+  std::vector<IMP::algebra::Transformation3D> transforms;
+  transforms.push_back(IMP::algebra::get_identity_transformation_3d());
+  for (unsigned int i = 0; i < 20; i++) {
+    IMP::algebra::Rotation3D rot = IMP::algebra::get_rotation_about_axis(
+        IMP::algebra::get_random_vector_on_unit_sphere(), 0.05 * i);
+    IMP::algebra::Vector3D shift = IMP::algebra::get_random_vector_in(
+        IMP::algebra::Sphere3D(IMP::algebra::get_zero_vector_d<3>(), 4.0));
+    transforms.push_back(IMP::algebra::Transformation3D(shift) *
+                         IMP::algebra::get_rotation_about_point(center, rot));
+  }
+
+  check_soap(m, pis1, pis2, transforms);
+  check_interface(m, pis1, pis2, map1, map2, residue_number1, residue_number2,
+                  transforms);
+  // the same with several threads
+  IMP::set_number_of_threads(4);
+  check_soap(m, pis1, pis2, transforms);
+  check_interface(m, pis1, pis2, map1, map2, residue_number1, residue_number2,
+                  transforms);
+  return 0;
+}
@@ -531,6 +531,89 @@ ligandPdb (str) antibody_cut.pdb
                          (None, 'cross_links_score', ['testrecep', 'testlig',
                           'trans_pd', 'test.cxms', '-o', 'cxms_score.res']))
 
+    def test_split_merge_transformations(self):
+        """Test splitting transformations and merging chunked scores"""
+        app = self.import_python_application('idock')
+        d = IMP.test.TempDir()
+        tmpdir = d.tmpdir
+        trans = os.path.join(tmpdir, 'trans_pd')
+        with open(trans, 'w') as fh:
+            for i in range(5):
+                fh.write("%d 0 0 0 %d 0 0\n" % (i + 1, i))
+        chunks = app._split_transformations_file(trans, 2, tmpdir)
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual([len(open(c).readlines()) for c in chunks],
+                         [3, 2])
+        # Fake score binary output for each chunk
+        outs = []
+        for c in chunks:
+            out = c + '.res'
+            with open(out, 'w') as fh:
+                fh.write("receptorPdb (str) testrecep\n")
+                fh.write("transFile (str) %s\n" % c)
+                fh.write("     # | Score  |filter| Zscore | "
+                         "Transformation\n")
+                for i, line in enumerate(open(c)):
+                    num = int(line.split()[0])
+                    filt = '-' if num == 5 else '+'
+                    fh.write("%6d | %6.3f |  %s   |  0.000 | %s\n"
+                             % (i + 1, float(num), filt,
+                                ' '.join(line.split()[1:])))
+            outs.append(out)
+        merged = os.path.join(tmpdir, 'merged.res')
+        app._merge_score_files(outs, merged, trans)
+        lines = open(merged).readlines()
+        self.assertEqual(len(lines), 8)
+        self.assertEqual(lines[0], "receptorPdb (str) testrecep\n")
+        # the header names the full transformations file, not a chunk
+        self.assertEqual(lines[1], "transFile (str) %s\n" % trans)
+        spl = [line.split('|') for line in lines[3:]]
+        self.assertEqual([int(x[0]) for x in spl], [1, 2, 3, 4, 5])
+        # z-scores computed over scores 1-4 from both chunks
+        zscores = [float(x[3]) for x in spl]
+        self.assertAlmostEqual(zscores[0], -1.342, delta=1e-3)
+        self.assertAlmostEqual(zscores[3], 1.342, delta=1e-3)
+        self.assertAlmostEqual(zscores[4], 0., delta=1e-3)
+        self.assertEqual(spl[3][-1].strip(), '0 0 0 3 0 0')
+
+    def test_score_transformations_parallel(self):
+        """Test IDock.score_transformations() with multiple jobs"""
+        tmpdir = IMP.test.RunInTempDir()
+        app, idock = self.get_dummy_idock_for_scorer()
+        idock.opts.jobs = 4
+        idock.opts.cross_links_file = 'test.cxms'
+        idock.opts.map_file = 'test.mrc'
+        s1 = app.CXMSScorer(idock)
+        s2 = app.EM3DScorer(idock)
+        with open('trans_pd', 'w') as fh:
+            for i in range(10):
+                fh.write("%d 0 0 0 %d 0 0\n" % (i + 1, i))
+        calls = []
+
+        def _run_binary(path, binary, args, out_file=None):
+            calls.append(binary)
+            out = args[args.index('-o') + 1]
+            trans = args[2]
+            with open(out, 'w') as fh:
+                for i, line in enumerate(open(trans)):
+                    fh.write("%6d | %6.3f |  +   |  0.000 | %s\n"
+                             % (i + 1, float(line.split()[0]),
+                                ' '.join(line.split()[1:])))
+        old_run_binary = app._run_binary
+        app._run_binary = _run_binary
+        try:
+            idock.score_transformations([s1, s2], 10)
+        finally:
+            app._run_binary = old_run_binary
+        # EM3D cannot be split; CXMS is split into 2 chunks
+        self.assertEqual(sorted(calls), ['cross_links_score',
+                                         'cross_links_score', 'em3d_score'])
+        for s in (s1, s2):
+            lines = open(s.output_file).readlines()
+            self.assertEqual([int(x.split('|')[0]) for x in lines],
+                             list(range(1, 11)))
+        del tmpdir
+
     def test_get_all_scores_filename(self):
         """Test IDock.get_all_scores_filename()"""
         app, idock = self.get_dummy_idock_for_scorer()
@@ -10,6 +10,7 @@
 #define IMPISD_GAUSSIAN_EM_RESTRAINT_H
 
 #include "isd_config.h"
+#include "internal/gaussian_overlap.h"
 #include <IMP/PairContainer.h>
 #include <IMP/container/ListSingletonContainer.h>
 #include <IMP/container_macros.h>
@@ -118,6 +119,18 @@ class IMPISDEXPORT GaussianEMRestraint : public Restraint
 
   //! Get restraint slope
   Float get_slope(){return slope_;}
+
+  //! Only apply the slope between particles closer than the density cutoff
+  /** By default the slope acts between every model and density particle,
+      which is slow with many of each. With this set, it uses only the
+      model-density pairs within density_cutoff_dist (the distance between
+      the particles' spheres, as for the model-density overlaps), which
+      changes the score but keeps the pull towards nearby density.
+  */
+  void set_slope_cutoff(bool tf){slope_cutoff_=tf;}
+
+  //! Get whether the slope is limited to the density cutoff
+  bool get_slope_cutoff() const {return slope_cutoff_;}
   virtual double
     unprotected_evaluate(IMP::DerivativeAccumulator *accum)
     const IMP_OVERRIDE;
@@ -129,9 +142,13 @@ class IMPISDEXPORT GaussianEMRestraint : public Restraint
   ParticleIndexes model_ps_;
   ParticleIndexes density_ps_;
   ParticleIndex global_sigma_;
+  Float density_cutoff_dist_;
   Float slope_;
-  bool update_model_,local_;
+  bool update_model_,local_,slope_cutoff_;
   int msize_,dsize_;
+  // position of each particle in model_ps_ or density_ps_, by particle index
+  Ints model_index_,density_index_;
+  Ints is_slope_; //by model index
   Float normalization_;
   Float dd_score_;
   Float self_mm_score_;
@@ -139,6 +156,15 @@ class IMPISDEXPORT GaussianEMRestraint : public Restraint
   Pointer<container::ClosePairContainer> mm_container_;
   ParticleIndexes slope_ps_; //experiment
 
+  // local mode: the density particles last used and their DD score
+  mutable std::vector<bool> local_dens_;
+  mutable Float local_dd_score_;
+
+  // copies of the Gaussians, updated at each evaluation
+  mutable internal::GaussianOverlapKernel kernel_;
+
+  void update_local_dd_score(const std::vector<bool> &local_dens) const;
+
   //variables needed to tabulate the exponential
   Floats exp_grid_;
   double invdx_;
@@ -44,6 +44,18 @@ class IMPISDEXPORT HybridMonteCarlo : public core::MonteCarlo {
   void set_persistence(unsigned persistence = 1);
   unsigned get_persistence() const;
 
+  //! Use a multiple time step integrator for the md
+  /** The get_number_of_md_steps() md steps of each Monte Carlo step become
+      inner steps of get_timestep() each, and the slow restraints are only
+      evaluated once every inner_steps of them.
+      The acceptance test still uses the full scoring function, so the
+      sampling stays exact.
+      \see MolecularDynamics::set_multiple_time_step()
+   */
+  void set_multiple_time_step(const RestraintsTemp &fast,
+                              const RestraintsTemp &slow,
+                              unsigned inner_steps);
+
   // return pointer to isd::MolecularDynamics instance
   // useful if you want to set other stuff that is not exposed here
   MolecularDynamics *get_md() const;
@@ -57,6 +69,8 @@ class IMPISDEXPORT HybridMonteCarlo : public core::MonteCarlo {
  private:
   unsigned num_md_steps_, persistence_;
   unsigned persistence_counter_;
+  // potential energy of the current configuration
+  mutable double potential_;
   IMP::PointerMember<MolecularDynamicsMover> mv_;
   Pointer<MolecularDynamics> md_;
 };
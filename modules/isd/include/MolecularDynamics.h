@@ -12,6 +12,7 @@
 #include <IMP/isd/isd_config.h>
 #include <IMP/Particle.h>
 #include <IMP/Optimizer.h>
+#include <IMP/ScoringFunction.h>
 #include <IMP/atom/MolecularDynamics.h>
 #include <IMP/isd/Nuisance.h>
 
@@ -20,6 +21,11 @@ IMPISD_BEGIN_NAMESPACE
 //! Molecular dynamics optimizer on 1-D and 3-D particles
 /** The particles to be optimized must be XYZs or Nuisances, and should have a
  * non-optimizable mass.
+ *
+ * The restraints can be split into fast (cheap) and slow (expensive) groups
+ * with set_multiple_time_step(). The dynamics then use the reversible
+ * multiple time step (r-RESPA) integrator, in which the slow forces are only
+ * evaluated once every few time steps.
  * \see atom::MolecularDynamics for more details
  */
 class IMPISDEXPORT MolecularDynamics : public atom::MolecularDynamics {
@@ -33,6 +39,40 @@ class IMPISDEXPORT MolecularDynamics : public atom::MolecularDynamics {
   //! Assign velocities representative of the given temperature
   void assign_velocities(Float temperature);
 
+  //! Integrate fast and slow restraints with different time steps
+  /** The time steps of get_maximum_time_step() become inner steps, which
+      are grouped into outer steps of inner_steps each. The fast restraints
+      are evaluated at every inner step; the slow ones only once per outer
+      step, and their forces are applied as half kicks at its start and end.
+      The simulated time does not change, so optimize(n) runs n inner steps
+      (rounded up to whole outer steps), or n / inner_steps outer steps.
+
+      Every restraint of the scoring function must be in exactly one of the
+      two groups; this is checked when the simulation starts.
+
+      Pass an empty list of slow restraints to go back to plain velocity
+      Verlet.
+   */
+  void set_multiple_time_step(const RestraintsTemp &fast,
+                              const RestraintsTemp &slow,
+                              unsigned inner_steps);
+
+  //! Return the number of inner time steps per outer step (1 if not in use)
+  unsigned get_number_of_inner_steps() const { return inner_steps_; }
+
+  //! Return how many times the forces have been evaluated
+  /** With multiple time steps, only the fast forces are counted. */
+  unsigned get_number_of_force_evaluations() const { return force_evals_; }
+
+  //! Return how many times the slow forces have been evaluated
+  unsigned get_number_of_slow_force_evaluations() const {
+    return slow_force_evals_;
+  }
+
+  virtual void setup(const ParticleIndexes &ps) IMP_OVERRIDE;
+  virtual double do_step(const ParticleIndexes &ps,
+                         double dt) IMP_OVERRIDE;
+
  protected:
   bool get_is_simulation_particle(ParticleIndex pi) const;
 
@@ -48,6 +88,17 @@ class IMPISDEXPORT MolecularDynamics : public atom::MolecularDynamics {
 
   //! Keys of the xyz velocities
   FloatKey vnuis_;
+
+ private:
+  void update_slow_derivatives(const ParticleIndexes &ps);
+  void propagate_slow_velocities(const ParticleIndexes &ps, double step_size);
+
+  PointerMember<ScoringFunction> fast_sf_, slow_sf_;
+  unsigned inner_steps_;
+  // slow force derivatives of each simulation particle
+  // (nuisances only use the first component)
+  algebra::Vector3Ds slow_derivatives_;
+  unsigned force_evals_, slow_force_evals_;
 };
 
 IMPISD_END_NAMESPACE
@@ -15,6 +15,7 @@
 #include <IMP/constants.h>
 #include <IMP/Object.h>
 #include <math.h>
+#include <deque>
 #include <IMP/algebra/eigen3/Eigen/Dense>
 #include <IMP/algebra/eigen3/Eigen/Cholesky>
 #include <IMP/isd/internal/cg_eigen.h>
@@ -65,6 +66,10 @@ IMPISD_BEGIN_NAMESPACE
  *  \note For now, F must be monotonically increasing, so that J(F) > 0. The
  *  program will not check for that. Uses a Cholesky (\f$LDL^T\f$)
  *  decomposition of \f$\Sigma\f$, which is recomputed when needed.
+ *  The decompositions of the last few matrices are kept, so that setting
+ *  \f$\Sigma\f$ back to one of them (e.g. after a rejected Monte Carlo
+ *  move) does not trigger a new decomposition, and rank-one changes to
+ *  \f$\Sigma\f$ update the decomposition rather than recomputing it.
  *
  *  \note All observations must be given, so if you have missing data you might
  *  want to do some imputation on it first.
@@ -102,6 +107,14 @@ class IMPISDEXPORT MultivariateFNormalSufficient : public Object {
   double cg_tol_;
   double factor_;
   Pointer<internal::ConjugateGradientEigen> cg_;
+  // factorizations of previous Sigma matrices, most recent first
+  struct Factorization {
+    IMP_Eigen::MatrixXd Sigma, P;
+    IMP_Eigen::LDLT<IMP_Eigen::MatrixXd, IMP_Eigen::Upper> ldlt;
+    bool has_P;
+  };
+  std::deque<Factorization> factorizations_;
+  unsigned factorization_cache_size_, factorization_cache_hits_;
 
   internal::CallTimer<IMP_MVN_TIMER_NFUNCS> timer_;
 
@@ -185,10 +198,32 @@ class IMPISDEXPORT MultivariateFNormalSufficient : public Object {
   void set_Sigma(const IMP_Eigen::MatrixXd& f);
   IMP_Eigen::MatrixXd get_Sigma() const;
 
+  //! Add \f$\alpha w {}^tw\f$ to Sigma
+  /** If Sigma was already factorized, the factorization is updated in
+      \f$O(M^2)\f$ rather than recomputed in \f$O(M^3)\f$. Use a negative
+      alpha to downdate; Sigma must stay positive semidefinite.
+   */
+  void update_Sigma(const IMP_Eigen::VectorXd& w, double alpha = 1);
+
+  //! Set how many previous factorizations of Sigma to keep (default 1)
+  /** When Sigma is set to one of these matrices again, its factorization
+      (and inverse, if it was computed) is reused. Use 0 to keep none.
+   */
+  void set_factorization_cache_size(unsigned n);
+  unsigned get_factorization_cache_size() const {
+    return factorization_cache_size_;
+  }
+
+  //! Return how many times set_Sigma() reused a cached factorization
+  unsigned get_number_of_factorization_cache_hits() const {
+    return factorization_cache_hits_;
+  }
+
   void set_factor(double f);
   double get_factor() const;
 
   //! if you want to force a recomputation of all stored variables
+  /** This also empties the cache of previous factorizations. */
   void reset_flags();
 
   //! use conjugate gradients (default false)
@@ -254,6 +289,11 @@ class IMPISDEXPORT MultivariateFNormalSufficient : public Object {
   void set_ldlt(
       const IMP_Eigen::LDLT<IMP_Eigen::MatrixXd, IMP_Eigen::Upper>& ldlt);
 
+  // keep the current factorization of Sigma in the cache
+  void push_factorization();
+  // remove the cached factorization of Sigma, if any, and return it in f
+  bool pop_factorization(const IMP_Eigen::MatrixXd& Sigma, Factorization& f);
+
   // compute determinant and norm
   void set_norms(double norm, double lnorm);
   std::vector<double> get_norms() const;
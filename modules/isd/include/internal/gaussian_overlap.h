@@ -0,0 +1,74 @@
+/**
+ *  \file internal/gaussian_overlap.h
+ *  \brief Fast overlaps between many pairs of Gaussian particles.
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ */
+
+#ifndef IMPISD_INTERNAL_GAUSSIAN_OVERLAP_H
+#define IMPISD_INTERNAL_GAUSSIAN_OVERLAP_H
+
+#include <IMP/isd/isd_config.h>
+#include <IMP/Model.h>
+#include <IMP/algebra/eigen3/Eigen/Dense>
+
+IMPISD_BEGIN_INTERNAL_NAMESPACE
+
+//! Compute the overlaps of pairs of Gaussian particles from cached data
+/** The center, mass and global covariance of each Gaussian are copied
+    into flat arrays by update(). The covariance is only rotated again when
+    the particle's orientation or local variances have changed, so
+    Gaussians moving with a rigid body only pay for it when the body turns.
+    Pairs of spherical Gaussians (equal local variances) use a closed form
+    for the determinant and inverse of the summed covariance; other pairs
+    use explicit 3x3 cofactors. The values are the same as those of
+    score_gaussian_overlap().
+*/
+class IMPISDEXPORT GaussianOverlapKernel {
+  // position of each particle in the arrays, by particle index
+  Ints slots_;
+  // per slot: center, mass, covariance (xx, yy, zz, xy, xz, yz) and the
+  // variance if the Gaussian is spherical (-1 if not)
+  Floats x_, y_, z_, mass_, cov_, iso_;
+  // per slot: quaternion and local variances the covariance was made from
+  Floats frame_;
+
+  unsigned int get_slot(ParticleIndex pi) const {
+    IMP_USAGE_CHECK(static_cast<unsigned int>(pi.get_index()) <
+                            slots_.size() &&
+                        slots_[pi.get_index()] >= 0,
+                    "Particle " << pi << " was not added with update()");
+    return slots_[pi.get_index()];
+  }
+  void update_covariance(Model *m, ParticleIndex pi, unsigned int slot);
+
+ public:
+  //! Load the current state of the given Gaussian particles
+  /** Particles not seen before are added; the others are updated. */
+  void update(Model *m, const ParticleIndexes &ps);
+
+  //! Return the overlap of two particles and its derivative
+  /** As for score_gaussian_overlap(), the derivative is with respect to
+      the first particle's center, negated. */
+  double get_overlap(ParticleIndex a, ParticleIndex b,
+                     IMP_Eigen::Vector3d *deriv) const;
+
+  //! Compute the overlaps of n pairs into scores (and derivs if not null)
+  void get_overlaps(const ParticleIndexPair *pairs, unsigned int n,
+                    double *scores, IMP_Eigen::Vector3d *derivs) const;
+
+  void clear() {
+    slots_.clear();
+    x_.clear();
+    y_.clear();
+    z_.clear();
+    mass_.clear();
+    cov_.clear();
+    iso_.clear();
+    frame_.clear();
+  }
+};
+
+IMPISD_END_INTERNAL_NAMESPACE
+
+#endif /* IMPISD_INTERNAL_GAUSSIAN_OVERLAP_H */
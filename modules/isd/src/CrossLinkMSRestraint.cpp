@@ -183,4 +183,27 @@ ModelObjectsTemp CrossLinkMSRestraint::do_get_inputs() const {
     return ret;
 }
 
+Floats get_cross_link_ms_scores(const CrossLinkMSRestraints &rs) {
+    Floats ret(rs.size());
+    for (unsigned int i = 0; i < rs.size(); ++i) {
+        ret[i] = -std::log(rs[i]->get_probability());
+    }
+    return ret;
+}
+
+Floats get_cross_link_ms_distances(const CrossLinkMSRestraints &rs) {
+    Floats ret;
+    for (unsigned int i = 0; i < rs.size(); ++i) {
+        Model *m = rs[i]->get_model();
+        for (unsigned int k = 0; k < rs[i]->get_number_of_contributions();
+             ++k) {
+            IMP::ParticleIndexPair ppi = rs[i]->get_contribution(k);
+            ret.push_back(algebra::get_distance(
+                core::XYZ(m, ppi[0]).get_coordinates(),
+                core::XYZ(m, ppi[1]).get_coordinates()));
+        }
+    }
+    return ret;
+}
+
 IMPISD_END_NAMESPACE
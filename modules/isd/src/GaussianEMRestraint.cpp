@@ -9,13 +9,123 @@
 #include <IMP/isd/GaussianEMRestraint.h>
 #include <IMP/math.h>
 #include <IMP/atom/Atom.h>
+#include <IMP/core/XYZR.h>
 #include <IMP/algebra/eigen3/Eigen/LU>
 #include <IMP/algebra/BoundingBoxD.h>
 #include <IMP/algebra/vector_generators.h>
 #include <IMP/isd/em_utilities.h>
+#include <IMP/isd/internal/gaussian_overlap.h>
+#include <IMP/thread_macros.h>
+#include <algorithm>
 
 IMPISD_BEGIN_NAMESPACE
 
+namespace {
+typedef Vector<KahanVectorAccumulation> KahanVectorAccumulations;
+
+// The position of each particle in ps, by particle index (-1 if absent)
+Ints get_index_map(const ParticleIndexes &ps) {
+  int max_index = -1;
+  for (unsigned int i = 0; i < ps.size(); ++i) {
+    max_index = std::max(max_index, ps[i].get_index());
+  }
+  Ints ret(max_index + 1, -1);
+  for (unsigned int i = 0; i < ps.size(); ++i) {
+    ret[ps[i].get_index()] = i;
+  }
+  return ret;
+}
+
+// Work is split into one contiguous block per thread, so that the sums
+// are the same from run to run
+int get_number_of_blocks(int n) {
+  // not worth starting threads for small amounts of work
+  return std::max(1, std::min<int>(get_number_of_threads(), n / 1000));
+}
+
+int get_block_begin(int n, int blocks, int b) {
+  return static_cast<int>(static_cast<double>(n) * b / blocks);
+}
+
+// The pair container also holds pairs up to its slack beyond the cutoff,
+// and which of those it holds depends on the history of moves
+ParticleIndexPairs get_pairs_within(Model *m, const ParticleIndexPairs &pairs,
+                                    double cutoff) {
+  ParticleIndexPairs ret;
+  for (unsigned int i = 0; i < pairs.size(); ++i) {
+    if (core::get_distance(core::XYZR(m, pairs[i][0]),
+                           core::XYZR(m, pairs[i][1])) < cutoff) {
+      ret.push_back(pairs[i]);
+    }
+  }
+  return ret;
+}
+
+// Add the slope between a model and a density particle to the model
+// particle's derivative and return its score
+Float add_slope(Model *m, ParticleIndex mp, ParticleIndex dp, Float slope,
+                KahanVectorAccumulation &deriv) {
+  IMP_Eigen::Vector3d v = IMP_Eigen::Vector3d(core::XYZ(m,mp).
+                                          get_coordinates().get_data()) -
+                          IMP_Eigen::Vector3d(core::XYZ(m,dp).
+                                          get_coordinates().get_data());
+  Float sd = v.norm();
+  deriv = KahanVectorSum(deriv,v*slope/sd);
+  return slope*sd;
+}
+
+// Sum the overlaps of the pairs, times factor. If derivs is given, add the
+// derivatives to the first (model) particle of each pair, and to the second
+// one too if both is true, using each particle's position in the model list
+Float add_overlaps(const internal::GaussianOverlapKernel &kernel,
+                   const ParticleIndexPairs &pairs, Float factor,
+                   bool both, const Ints &model_index,
+                   KahanVectorAccumulations *derivs) {
+  static const int CHUNK_SIZE = 128;
+  int n = pairs.size();
+  int blocks = get_number_of_blocks(n);
+  Vector<KahanAccumulation> scores(blocks);
+  Vector<KahanVectorAccumulations> buffers(
+      derivs ? blocks : 0,
+      KahanVectorAccumulations(derivs ? derivs->size() : 0));
+  IMP_OMP_PRAGMA(parallel for num_threads(blocks) schedule(static, 1)
+                 if (blocks > 1))
+  for (int b = 0; b < blocks; ++b) {
+    double chunk_scores[CHUNK_SIZE];
+    IMP_Eigen::Vector3d chunk_derivs[CHUNK_SIZE];
+    int end = get_block_begin(n, blocks, b + 1);
+    for (int c = get_block_begin(n, blocks, b); c < end; c += CHUNK_SIZE) {
+      int cn = std::min(CHUNK_SIZE, end - c);
+      kernel.get_overlaps(&pairs[c], cn, chunk_scores,
+                          derivs ? chunk_derivs : nullptr);
+      for (int j = 0; j < cn; ++j) {
+        scores[b] = KahanSum(scores[b], factor * chunk_scores[j]);
+        if (derivs) {
+          const ParticleIndexPair &pp = pairs[c + j];
+          KahanVectorAccumulations &buffer = buffers[b];
+          int i0 = model_index[pp[0].get_index()];
+          buffer[i0] = KahanVectorSum(buffer[i0], -factor * chunk_derivs[j]);
+          if (both) {
+            int i1 = model_index[pp[1].get_index()];
+            buffer[i1] = KahanVectorSum(buffer[i1], factor * chunk_derivs[j]);
+          }
+        }
+      }
+    }
+  }
+  KahanAccumulation ret;
+  for (int b = 0; b < blocks; ++b) {
+    ret = KahanSum(ret, scores[b].sum);
+    if (derivs) {
+      for (unsigned int i = 0; i < derivs->size(); ++i) {
+        (*derivs)[i] = KahanVectorSum((*derivs)[i], buffers[b][i].sum);
+      }
+    }
+  }
+  return ret.sum;
+}
+}
+
 GaussianEMRestraint::GaussianEMRestraint(
                          Model *mdl,
                          ParticleIndexes model_ps, ParticleIndexes density_ps,
@@ -29,12 +139,17 @@ GaussianEMRestraint::GaussianEMRestraint(
   model_ps_(model_ps),
   density_ps_(density_ps),
   global_sigma_(global_sigma),
+  density_cutoff_dist_(density_cutoff_dist),
   slope_(slope),
   update_model_(update_model),
-  local_(local){
+  local_(local),
+  slope_cutoff_(false),
+  local_dd_score_(0.0){
 
     msize_=model_ps.size();
     dsize_=density_ps.size();
+    model_index_=get_index_map(model_ps_);
+    density_index_=get_index_map(density_ps_);
 
     // check to make sure all particles are Gaussian and Mass
     for (int i=0;i<msize_;i++){
@@ -73,6 +188,10 @@ GaussianEMRestraint::GaussianEMRestraint(
                <<model_ps_.size()<<std::endl;
     }
     else slope_ps_ = model_ps_;
+    is_slope_.resize(msize_, 0);
+    for (size_t i=0;i<slope_ps_.size();i++){
+      is_slope_[model_index_[slope_ps_[i].get_index()]] = 1;
+    }
   }
 
 void GaussianEMRestraint::compute_initial_scores() {
@@ -81,6 +200,8 @@ void GaussianEMRestraint::compute_initial_scores() {
   IMP_Eigen::Vector3d deriv;
   dd_score_=0.0;
   self_mm_score_=0.0;
+  // the variances may have changed
+  local_dens_.clear();
   for (int i1=0;i1<dsize_;i1++){
     for (int i2=0;i2<dsize_;i2++){
       Float score = score_gaussian_overlap(get_model(),
@@ -104,106 +225,149 @@ double GaussianEMRestraint::unprotected_evaluate(DerivativeAccumulator *accum)
   const {
   //score is the square difference between two GMMs
   //Float scale=isd::Scale(get_model(),global_sigma_).get_scale();
+  Model *m = get_model();
+  // the threads only read the kernel's copies of the Gaussians
+  kernel_.update(m, model_ps_);
+  kernel_.update(m, density_ps_);
   KahanAccumulation md_score,mm_score;
   mm_score = KahanSum(mm_score,self_mm_score_);
-  IMP_Eigen::Vector3d deriv;
-  //std::cout<<"\neval"<<std::endl;
-  boost::unordered_map<ParticleIndex,KahanVectorAccumulation> derivs_mm,derivs_md,slope_md;
-  std::set<ParticleIndex> local_dens;
-  //boost::unordered_map<ParticleIndexPair,Float> md_dists(msize_*dsize_);
+  KahanVectorAccumulations derivs_mm(accum ? msize_ : 0);
+  KahanVectorAccumulations derivs_md(accum ? msize_ : 0);
+  KahanVectorAccumulations slope_md(msize_);
 
   Float slope_score=0.0;
+  const ParticleIndexPairs md_pairs =
+      get_pairs_within(m, md_container_->get_contents(), density_cutoff_dist_);
 
   if (slope_>0.0){
-    for (ParticleIndexes::const_iterator mit=slope_ps_.begin();
-         mit!=slope_ps_.end();++mit){
-      for (ParticleIndexes::const_iterator dit=density_ps_.begin();
-           dit!=density_ps_.end();++dit){
-        IMP_Eigen::Vector3d v = IMP_Eigen::Vector3d(core::XYZ(get_model(),*mit).
-                                                get_coordinates().get_data()) -
-                                IMP_Eigen::Vector3d(core::XYZ(get_model(),*dit).
-                                                get_coordinates().get_data());
-        Float sd = v.norm();
-        //md_dists[ParticleIndexPair(*mit,*dit)]=dist;
-        slope_md[*mit] = KahanVectorSum(slope_md[*mit],v*slope_/sd);
-        slope_score+=slope_*sd;
+    if (slope_cutoff_) {
+      for (unsigned int i = 0; i < md_pairs.size(); ++i) {
+        int mi = model_index_[md_pairs[i][0].get_index()];
+        if (is_slope_[mi]) {
+          slope_score += add_slope(m, md_pairs[i][0], md_pairs[i][1], slope_,
+                                   slope_md[mi]);
+        }
+      }
+    } else {
+      // each model particle is only touched by one thread
+      int nslope = slope_ps_.size();
+      int blocks = std::min<int>(get_number_of_blocks(nslope * dsize_), nslope);
+      Floats slope_scores(blocks, 0.0);
+      IMP_OMP_PRAGMA(parallel for num_threads(blocks) schedule(static, 1)
+                     if (blocks > 1))
+      for (int b = 0; b < blocks; ++b) {
+        int end = get_block_begin(nslope, blocks, b + 1);
+        for (int i = get_block_begin(nslope, blocks, b); i < end; ++i) {
+          int mi = model_index_[slope_ps_[i].get_index()];
+          for (int j = 0; j < dsize_; ++j) {
+            slope_scores[b] += add_slope(m, slope_ps_[i], density_ps_[j],
+                                         slope_, slope_md[mi]);
+          }
+        }
       }
+      for (int b = 0; b < blocks; ++b) slope_score += slope_scores[b];
     }
   }
 
-  IMP_CONTAINER_FOREACH(container::ClosePairContainer,
-                          mm_container_,{
-      Float score = score_gaussian_overlap(get_model(),_1,&deriv);
-      mm_score = KahanSum(mm_score,2*score);
-      if (accum) {
-        //multiply by 2 because...
-        derivs_mm[_1[0]] = KahanVectorSum(derivs_mm[_1[0]],-2.0*deriv);
-        derivs_mm[_1[1]] = KahanVectorSum(derivs_mm[_1[1]],2.0*deriv);
-      }
-  });
-
-  //std::cout<<"calculating MD score"<<std::endl;
-  IMP_CONTAINER_FOREACH(container::CloseBipartitePairContainer,
-                        md_container_,{
-    Float score = score_gaussian_overlap(get_model(),_1,&deriv);
-    md_score = KahanSum(md_score,score);
-    if (local_) local_dens.insert(_1[1]);
-    if (accum) {
-      derivs_md[_1[0]] = KahanVectorSum(derivs_md[_1[0]],-deriv);
-    }
-  });
+  //multiply by 2 because each model-model pair appears once in the list
+  mm_score = KahanSum(mm_score,
+                      add_overlaps(kernel_, mm_container_->get_contents(), 2.0,
+                                   true, model_index_,
+                                   accum ? &derivs_mm : nullptr));
 
+  md_score = KahanSum(md_score,
+                      add_overlaps(kernel_, md_pairs, 1.0, false, model_index_,
+                                   accum ? &derivs_md : nullptr));
 
   //local gets new DD score each time
   Float dd_score = 0.0;
   if (local_){
-    for(std::set<ParticleIndex>::const_iterator it1=local_dens.begin();
-        it1!=local_dens.end();++it1){
-      for(std::set<ParticleIndex>::const_iterator it2=local_dens.begin();
-          it2!=local_dens.end();++it2){
-        Float score = score_gaussian_overlap(get_model(),
-                                             ParticleIndexPair(*it1,*it2),
-                                             &deriv);
-        dd_score+=score;
-      }
+    std::vector<bool> local_dens(dsize_, false);
+    for (unsigned int i = 0; i < md_pairs.size(); ++i) {
+      local_dens[density_index_[md_pairs[i][1].get_index()]] = true;
     }
+    update_local_dd_score(local_dens);
+    dd_score = local_dd_score_;
   }
   else dd_score = dd_score_;
 
   /* distance calculation */
   double cc=2*md_score.sum/(mm_score.sum+dd_score);
-  //double cc=2*md_score/(dd_score_);
   double log_score=-std::log(cc) + slope_score;
-  //double dist=-std::log(cc+std::numeric_limits<float>::min()*(1-cc));
-  //double dist=mm_score+dd_score_-2*md_score;
-
-  /* energy calculation */
-  //double log_score=std::log(2)+std::log(dist);
-  //double log_score=dist;
-
-  //std::cout<<"\ndd: "<<dd_score_<<" mm: "<<mm_score.sum<<" md: "<<md_score.sum<<" dist: "<<dist<<" slope score: "<<slope_score<<std::endl;
 
   if (accum){
-    for (ParticleIndexes::const_iterator it=model_ps_.begin();
-         it!=model_ps_.end();++it){
+    for (int i=0;i<msize_;++i){
+      ParticleIndex pi = model_ps_[i];
       if (IMP::isinf(log_score) || log_score==0.0) {
-        core::XYZ(get_model(),*it).add_to_derivatives(algebra::Vector3D(0,0,0),
-                                                      *accum);
+        core::XYZ(m,pi).add_to_derivatives(algebra::Vector3D(0,0,0),*accum);
       }
       else{
-        algebra::Vector3D d_mm(derivs_mm[*it].sum[0],derivs_mm[*it].sum[1],derivs_mm[*it].sum[2]);
-        algebra::Vector3D d_md(derivs_md[*it].sum[0],derivs_md[*it].sum[1],derivs_md[*it].sum[2]);
+        algebra::Vector3D d_mm(derivs_mm[i].sum[0],derivs_mm[i].sum[1],derivs_mm[i].sum[2]);
+        algebra::Vector3D d_md(derivs_md[i].sum[0],derivs_md[i].sum[1],derivs_md[i].sum[2]);
         Float mmdd=mm_score.sum+dd_score;
         algebra::Vector3D d = -2.0 / cc * (mmdd*d_md - md_score.sum*d_mm) / (mmdd * mmdd);
-        //std::cout<<"deriv calc-> d_mm: "<<d_mm<<" d_md: "<<d_md<<" mmdd: "<<mmdd<<" d: "<<d<<std::endl;
-        d += algebra::Vector3D(slope_md[*it].sum[0],slope_md[*it].sum[1],slope_md[*it].sum[2]);
-        core::XYZ(get_model(),*it).add_to_derivatives(d,*accum);
+        d += algebra::Vector3D(slope_md[i].sum[0],slope_md[i].sum[1],slope_md[i].sum[2]);
+        core::XYZ(m,pi).add_to_derivatives(d,*accum);
       }
     }
   }
   return log_score;
 }
 
+void GaussianEMRestraint::update_local_dd_score(
+                                const std::vector<bool> &local_dens) const {
+  IMP_Eigen::Vector3d deriv;
+  if (local_dens_.size() != local_dens.size()) {
+    local_dens_.assign(local_dens.size(), false);
+    local_dd_score_ = 0.0;
+  }
+  Ints removed, added;
+  unsigned int count = 0;
+  for (unsigned int i = 0; i < local_dens.size(); ++i) {
+    if (local_dens_[i] && !local_dens[i]) removed.push_back(i);
+    else if (!local_dens_[i] && local_dens[i]) added.push_back(i);
+    if (local_dens[i]) ++count;
+  }
+  if (2 * (removed.size() + added.size()) > count) {
+    // cheaper (and more accurate) to start again
+    local_dens_ = local_dens;
+    Ints dens;
+    for (unsigned int i = 0; i < local_dens.size(); ++i) {
+      if (local_dens[i]) dens.push_back(i);
+    }
+    local_dd_score_ = 0.0;
+    for (unsigned int i1 = 0; i1 < dens.size(); ++i1) {
+      for (unsigned int i2 = 0; i2 < dens.size(); ++i2) {
+        local_dd_score_ += kernel_.get_overlap(
+            density_ps_[dens[i1]], density_ps_[dens[i2]], &deriv);
+      }
+    }
+    return;
+  }
+  // the score is over all ordered pairs, so each density particle adds
+  // twice its overlaps with the others plus its self overlap
+  for (unsigned int i = 0; i < removed.size(); ++i) {
+    local_dens_[removed[i]] = false;
+    local_dd_score_ -= kernel_.get_overlap(
+        density_ps_[removed[i]], density_ps_[removed[i]], &deriv);
+    for (int j = 0; j < dsize_; ++j) {
+      if (!local_dens_[j]) continue;
+      local_dd_score_ -= 2 * kernel_.get_overlap(
+          density_ps_[removed[i]], density_ps_[j], &deriv);
+    }
+  }
+  for (unsigned int i = 0; i < added.size(); ++i) {
+    local_dd_score_ += kernel_.get_overlap(
+        density_ps_[added[i]], density_ps_[added[i]], &deriv);
+    for (int j = 0; j < dsize_; ++j) {
+      if (!local_dens_[j]) continue;
+      local_dd_score_ += 2 * kernel_.get_overlap(
+          density_ps_[added[i]], density_ps_[j], &deriv);
+    }
+    local_dens_[added[i]] = true;
+  }
+}
+
 /* Return all particles whose attributes are read by the restraints. To
    do this, ask the pair score what particles it uses.*/
 ModelObjectsTemp GaussianEMRestraint::do_get_inputs() const {
@@ -23,14 +23,15 @@ HybridMonteCarlo::HybridMonteCarlo(Model *m, Float kT, unsigned steps,
   set_persistence(persistence);
   set_return_best(false);
   persistence_counter_ = 0;
+  potential_ = 0;
 }
 
 double HybridMonteCarlo::do_evaluate(const ParticleIndexes &) const {
   if (get_use_incremental_scoring_function())
     IMP_THROW("Incremental scoring not supported", ModelException);
   double ekin = md_->get_kinetic_energy();
-  double epot = get_scoring_function()->evaluate(false);
-  return ekin + epot;
+  potential_ = get_scoring_function()->evaluate(false);
+  return ekin + potential_;
 }
 
 void HybridMonteCarlo::do_step() {
@@ -49,13 +50,20 @@ void HybridMonteCarlo::do_step() {
     static const double kB = 8.31441 / 4186.6;
     md_->assign_velocities(get_kt() / kB);
   }
-  ParticleIndexes unused;
-  double last = do_evaluate(unused);
+  // the coordinates have not changed since the last evaluation
+  // (MonteCarlo::do_optimize() evaluates before the first step)
+  double last_potential = potential_;
+  double last = md_->get_kinetic_energy() + last_potential;
   core::MonteCarloMoverResult moved = do_move();
 
+  ParticleIndexes unused;
   double energy = do_evaluate(unused);
   bool accepted =
       do_accept_or_reject_move(energy, last, moved.get_proposal_ratio());
+  if (!accepted) {
+    // the mover has put back the old coordinates
+    potential_ = last_potential;
+  }
   while ((!accepted) && (persistence_counter_ < persistence_ - 1)) {
     persistence_counter_ += 1;
     accepted =
@@ -107,6 +115,12 @@ void HybridMonteCarlo::set_persistence(unsigned persistence) {
 
 unsigned HybridMonteCarlo::get_persistence() const { return persistence_; }
 
+void HybridMonteCarlo::set_multiple_time_step(const RestraintsTemp &fast,
+                                              const RestraintsTemp &slow,
+                                              unsigned inner_steps) {
+  md_->set_multiple_time_step(fast, slow, inner_steps);
+}
+
 // return pointer to isd::MolecularDynamics instance
 // useful if you want to set other stuff that is not exposed here
 MolecularDynamics *HybridMonteCarlo::get_md() const { return md_; }
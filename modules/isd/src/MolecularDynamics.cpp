@@ -8,12 +8,15 @@
 #include <IMP/isd/MolecularDynamics.h>
 #include <IMP/atom/MolecularDynamics.h>
 #include <IMP/core/XYZ.h>
+#include <IMP/core/RestraintsScoringFunction.h>
 #include <IMP/atom/Mass.h>
+#include <IMP/RestraintSet.h>
 
 #include <IMP/log.h>
 #include <IMP/random.h>
 #include <boost/random/normal_distribution.hpp>
 
+#include <algorithm>
 #include <cmath>
 
 IMPISD_BEGIN_NAMESPACE
@@ -23,13 +26,118 @@ namespace {
 // and mass is in g/mol, conversion factor necessary to get accelerations
 // in angstrom/fs/fs from raw derivatives
 static const double deriv_to_acceleration = -4.1868e-4;
+
+// the restraints scored by sf, sorted, without any RestraintSets
+RestraintsTemp get_scored_restraints(ScoringFunction *sf) {
+  Restraints rs = sf->create_restraints();
+  return get_restraints(RestraintsTemp(rs.begin(), rs.end()));
+}
 }
 
 MolecularDynamics::MolecularDynamics(Model *m)
-    : atom::MolecularDynamics(m) {
+    : atom::MolecularDynamics(m), inner_steps_(1), force_evals_(0),
+      slow_force_evals_(0) {
   vnuis_ = FloatKey("vel");
 }
 
+void MolecularDynamics::set_multiple_time_step(const RestraintsTemp &fast,
+                                               const RestraintsTemp &slow,
+                                               unsigned inner_steps) {
+  IMP_USAGE_CHECK(inner_steps >= 1, "inner_steps must be positive!");
+  if (slow.empty()) {
+    fast_sf_ = nullptr;
+    slow_sf_ = nullptr;
+    inner_steps_ = 1;
+  } else {
+    fast_sf_ = new core::RestraintsScoringFunction(fast, "FastForces%1%");
+    slow_sf_ = new core::RestraintsScoringFunction(slow, "SlowForces%1%");
+    inner_steps_ = inner_steps;
+  }
+}
+
+void MolecularDynamics::setup(const ParticleIndexes &ps) {
+  if (slow_sf_) {
+    IMP_IF_CHECK(USAGE) {
+      RestraintsTemp all = get_scored_restraints(get_scoring_function());
+      RestraintsTemp split = get_scored_restraints(fast_sf_);
+      RestraintsTemp slow = get_scored_restraints(slow_sf_);
+      split.insert(split.end(), slow.begin(), slow.end());
+      std::sort(split.begin(), split.end());
+      IMP_USAGE_CHECK(split.size() == all.size() &&
+                          std::equal(split.begin(), split.end(), all.begin()),
+                      "Each restraint of the scoring function must be in "
+                      "exactly one of the fast and slow groups");
+    }
+    // Get starting forces; the fast ones last, so they are left in
+    // the particles for the first inner step
+    update_slow_derivatives(ps);
+    fast_sf_->evaluate(true);
+    ++force_evals_;
+    setup_degrees_of_freedom(ps);
+  } else {
+    atom::MolecularDynamics::setup(ps);
+    ++force_evals_;
+  }
+}
+
+double MolecularDynamics::do_step(const ParticleIndexes &ps, double ts) {
+  IMP_OBJECT_LOG;
+  if (!slow_sf_) {
+    ++force_evals_;
+    return atom::MolecularDynamics::do_step(ps, ts);
+  }
+  // r-RESPA: half kick from the slow forces at t, velocity Verlet with the
+  // fast forces for inner_steps_ steps, then the other slow half kick
+  double outer_ts = ts * inner_steps_;
+  propagate_slow_velocities(ps, outer_ts);
+  for (unsigned i = 0; i < inner_steps_; ++i) {
+    propagate_coordinates(ps, ts);
+    if (i + 1 == inner_steps_) {
+      update_slow_derivatives(ps);
+    }
+    fast_sf_->evaluate(true);
+    ++force_evals_;
+    propagate_velocities(ps, ts);
+  }
+  propagate_slow_velocities(ps, outer_ts);
+  return outer_ts;
+}
+
+void MolecularDynamics::update_slow_derivatives(const ParticleIndexes &ps) {
+  slow_sf_->evaluate(true);
+  ++slow_force_evals_;
+  slow_derivatives_.resize(ps.size());
+  for (unsigned int i = 0; i < ps.size(); ++i) {
+    if (Nuisance::get_is_setup(get_model(), ps[i])) {
+      slow_derivatives_[i][0] =
+          Nuisance(get_model(), ps[i]).get_nuisance_derivative();
+    } else {
+      slow_derivatives_[i] = core::XYZ(get_model(), ps[i]).get_derivatives();
+    }
+  }
+}
+
+void MolecularDynamics::propagate_slow_velocities(const ParticleIndexes &ps,
+                                                  double ts) {
+  IMP_INTERNAL_CHECK(slow_derivatives_.size() == ps.size(),
+                     "Slow forces were not computed for all particles");
+  for (unsigned int i = 0; i < ps.size(); ++i) {
+    Float invmass = 1.0 / atom::Mass(get_model(), ps[i]).get_mass();
+    if (Nuisance::get_is_setup(get_model(), ps[i])) {
+      Float velocity = get_model()->get_attribute(vnuis_, ps[i]);
+      velocity +=
+          0.5 * slow_derivatives_[i][0] * deriv_to_acceleration * invmass * ts;
+      get_model()->set_attribute(vnuis_, ps[i], velocity);
+    } else {
+      atom::LinearVelocity v(get_model(), ps[i]);
+      algebra::Vector3D velocity = v.get_velocity();
+      velocity += 0.5 * slow_derivatives_[i] * deriv_to_acceleration *
+                  invmass * ts;
+      v.set_velocity(velocity);
+    }
+  }
+}
+
 bool MolecularDynamics::get_is_simulation_particle(ParticleIndex pi)
     const {
   Particle *p = get_model()->get_particle(pi);
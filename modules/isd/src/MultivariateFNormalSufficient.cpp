@@ -30,7 +30,9 @@ enum func_names {
 MultivariateFNormalSufficient::MultivariateFNormalSufficient(
     const IMP_Eigen::MatrixXd& FX, double JF, const IMP_Eigen::VectorXd& FM,
     const IMP_Eigen::MatrixXd& Sigma, double factor)
-    : Object("Multivariate Normal distribution %1%") {
+    : Object("Multivariate Normal distribution %1%"),
+      factorization_cache_size_(1),
+      factorization_cache_hits_(0) {
   // O(1)
   reset_flags();
   N_ = FX.rows();
@@ -52,7 +54,9 @@ MultivariateFNormalSufficient::MultivariateFNormalSufficient(
     const IMP_Eigen::VectorXd& Fbar, double JF, const IMP_Eigen::VectorXd& FM,
     int Nobs, const IMP_Eigen::MatrixXd& W, const IMP_Eigen::MatrixXd& Sigma,
     double factor)
-    : Object("Multivariate Normal distribution %1%") {
+    : Object("Multivariate Normal distribution %1%"),
+      factorization_cache_size_(1),
+      factorization_cache_hits_(0) {
   reset_flags();
   N_ = Nobs;
   M_ = Fbar.rows();
@@ -108,6 +112,7 @@ void MultivariateFNormalSufficient::reset_flags() {
   flag_ldlt_ = false;
   flag_norms_ = false;
   flag_Peps_ = false;
+  factorizations_.clear();
 }
 
 /* probability density function */
@@ -403,6 +408,11 @@ void MultivariateFNormalSufficient::set_Sigma(
     if (Sigma.cols() != Sigma.rows()) {
       IMP_THROW("need a square matrix!", ModelException);
     }
+    // look up the new matrix before the current one is cached, since that
+    // can evict it
+    Factorization cached;
+    bool found = pop_factorization(Sigma, cached);
+    push_factorization();
     Sigma_ = Sigma;
     // std::cout << "Sigma: " << Sigma_ << std::endl << std::endl;
     IMP_LOG_TERSE("MVN:   set Sigma to new matrix" << std::endl);
@@ -411,10 +421,76 @@ void MultivariateFNormalSufficient::set_Sigma(
     flag_PW_ = false;
     flag_norms_ = false;
     flag_Peps_ = false;
+    if (found) {
+      set_ldlt(cached.ldlt);
+      if (cached.has_P) set_P(cached.P);
+    }
   }
   flag_Sigma_ = true;
 }
 
+void MultivariateFNormalSufficient::update_Sigma(const IMP_Eigen::VectorXd& w,
+                                                 double alpha) {
+  if (w.rows() != M_) {
+    IMP_THROW("size mismatch for w: got " << w.rows() << " instead of " << M_,
+              ModelException);
+  }
+  IMP_Eigen::MatrixXd Sigma(get_Sigma() + alpha * w * w.transpose());
+  if (!flag_ldlt_) {
+    set_Sigma(Sigma);
+    return;
+  }
+  // O(M^2)
+  timer_.start(CHOLESKY);
+  IMP_LOG_TERSE("MVN:   updating Cholesky decomposition" << std::endl);
+  IMP_Eigen::LDLT<IMP_Eigen::MatrixXd, IMP_Eigen::Upper> ldlt(ldlt_);
+  ldlt.rankUpdate(w, alpha);
+  // rankUpdate does not keep track of the sign
+  if ((ldlt.vectorD().array() < 0).any()) {
+    IMP_THROW("Sigma matrix is not positive semidefinite!", ModelException);
+  }
+  push_factorization();
+  Sigma_ = Sigma;
+  IMP_LOG_TERSE("MVN:   set Sigma to updated matrix" << std::endl);
+  set_ldlt(ldlt);
+  timer_.stop(CHOLESKY);
+}
+
+void MultivariateFNormalSufficient::set_factorization_cache_size(unsigned n) {
+  factorization_cache_size_ = n;
+  if (factorizations_.size() > n) factorizations_.resize(n);
+}
+
+void MultivariateFNormalSufficient::push_factorization() {
+  if (!flag_ldlt_ || factorization_cache_size_ == 0) return;
+  Factorization f;
+  f.Sigma = Sigma_;
+  f.ldlt = ldlt_;
+  f.has_P = flag_P_;
+  if (flag_P_) f.P = P_;
+  factorizations_.push_front(f);
+  if (factorizations_.size() > factorization_cache_size_) {
+    factorizations_.pop_back();
+  }
+}
+
+bool MultivariateFNormalSufficient::pop_factorization(
+    const IMP_Eigen::MatrixXd& Sigma, Factorization& f) {
+  // O(M^2) per cached matrix
+  for (std::deque<Factorization>::iterator it = factorizations_.begin();
+       it != factorizations_.end(); ++it) {
+    if (it->Sigma.rows() == Sigma.rows() && it->Sigma == Sigma) {
+      IMP_LOG_TERSE("MVN:   reusing cached Cholesky decomposition"
+                    << std::endl);
+      f = *it;
+      factorizations_.erase(it);
+      ++factorization_cache_hits_;
+      return true;
+    }
+  }
+  return false;
+}
+
 double MultivariateFNormalSufficient::get_factor() const { return factor_; }
 
 void MultivariateFNormalSufficient::set_factor(double f) {
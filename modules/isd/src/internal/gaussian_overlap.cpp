@@ -0,0 +1,160 @@
+/**
+ *  \file gaussian_overlap.cpp
+ *  \brief Fast overlaps between many pairs of Gaussian particles.
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ *
+ */
+
+#include <IMP/isd/internal/gaussian_overlap.h>
+#include <IMP/atom/Mass.h>
+#include <IMP/core/Gaussian.h>
+#include <algorithm>
+#include <cmath>
+#include <limits>
+
+IMPISD_BEGIN_INTERNAL_NAMESPACE
+
+namespace {
+// 1/(2 pi)^(3/2)
+const double OVERLAP_NORM = 0.06349363593424097;
+}
+
+void GaussianOverlapKernel::update_covariance(Model *m, ParticleIndex pi,
+                                              unsigned int slot) {
+  core::Gaussian g(m, pi);
+  const algebra::Vector4D &q = g.get_reference_frame().get_transformation_to()
+                                   .get_rotation().get_quaternion();
+  algebra::Vector3D var = g.get_variances();
+  double *frame = &frame_[7 * slot];
+  if (std::equal(q.begin(), q.end(), frame) &&
+      std::equal(var.begin(), var.end(), frame + 4)) {
+    return;
+  }
+  std::copy(q.begin(), q.end(), frame);
+  std::copy(var.begin(), var.end(), frame + 4);
+  double *cov = &cov_[6 * slot];
+  if (var[0] == var[1] && var[0] == var[2]) {
+    // the rotation does not change a spherical Gaussian
+    iso_[slot] = var[0];
+    std::fill(cov, cov + 3, var[0]);
+    std::fill(cov + 3, cov + 6, 0.);
+    return;
+  }
+  iso_[slot] = -1;
+  IMP_Eigen::Matrix3d rot =
+      IMP_Eigen::Quaterniond(q[0], q[1], q[2], q[3]).toRotationMatrix();
+  IMP_Eigen::Matrix3d c =
+      rot * (IMP_Eigen::Vector3d(var.get_data()).asDiagonal() *
+             rot.transpose());
+  cov[0] = c(0, 0);
+  cov[1] = c(1, 1);
+  cov[2] = c(2, 2);
+  cov[3] = c(0, 1);
+  cov[4] = c(0, 2);
+  cov[5] = c(1, 2);
+}
+
+void GaussianOverlapKernel::update(Model *m, const ParticleIndexes &ps) {
+  for (unsigned int i = 0; i < ps.size(); ++i) {
+    unsigned int index = ps[i].get_index();
+    if (index >= slots_.size()) slots_.resize(index + 1, -1);
+    if (slots_[index] < 0) {
+      slots_[index] = x_.size();
+      x_.push_back(0);
+      y_.push_back(0);
+      z_.push_back(0);
+      mass_.push_back(0);
+      cov_.resize(cov_.size() + 6);
+      iso_.push_back(-1);
+      // NaN never compares equal, so the covariance is computed below
+      frame_.resize(frame_.size() + 7,
+                    std::numeric_limits<double>::quiet_NaN());
+    }
+    unsigned int slot = slots_[index];
+    const algebra::Vector3D &c = m->get_sphere(ps[i]).get_center();
+    x_[slot] = c[0];
+    y_[slot] = c[1];
+    z_[slot] = c[2];
+    mass_[slot] = atom::Mass(m, ps[i]).get_mass();
+    update_covariance(m, ps[i], slot);
+  }
+}
+
+double GaussianOverlapKernel::get_overlap(ParticleIndex a, ParticleIndex b,
+                                          IMP_Eigen::Vector3d *deriv) const {
+  ParticleIndexPair pp(a, b);
+  double score;
+  get_overlaps(&pp, 1, &score, deriv);
+  return score;
+}
+
+void GaussianOverlapKernel::get_overlaps(const ParticleIndexPair *pairs,
+                                         unsigned int n, double *scores,
+                                         IMP_Eigen::Vector3d *derivs) const {
+  static const unsigned int BLOCK_SIZE = 128;
+  double vx[BLOCK_SIZE], vy[BLOCK_SIZE], vz[BLOCK_SIZE];
+  double tx[BLOCK_SIZE], ty[BLOCK_SIZE], tz[BLOCK_SIZE];
+  double pre[BLOCK_SIZE], iso[BLOCK_SIZE];
+  double a[BLOCK_SIZE], b[BLOCK_SIZE], c[BLOCK_SIZE];
+  double d[BLOCK_SIZE], e[BLOCK_SIZE], f[BLOCK_SIZE];
+  for (unsigned int start = 0; start < n; start += BLOCK_SIZE) {
+    const unsigned int bn = std::min(BLOCK_SIZE, n - start);
+    const ParticleIndexPair *block = pairs + start;
+    // gather
+    for (unsigned int i = 0; i < bn; ++i) {
+      unsigned int s0 = get_slot(block[i][0]);
+      unsigned int s1 = get_slot(block[i][1]);
+      vx[i] = x_[s1] - x_[s0];
+      vy[i] = y_[s1] - y_[s0];
+      vz[i] = z_[s1] - z_[s0];
+      pre[i] = mass_[s0] * mass_[s1] * OVERLAP_NORM;
+      iso[i] = (iso_[s0] >= 0 && iso_[s1] >= 0) ? iso_[s0] + iso_[s1] : -1;
+      const double *c0 = &cov_[6 * s0], *c1 = &cov_[6 * s1];
+      a[i] = c0[0] + c1[0];
+      b[i] = c0[1] + c1[1];
+      c[i] = c0[2] + c1[2];
+      d[i] = c0[3] + c1[3];
+      e[i] = c0[4] + c1[4];
+      f[i] = c0[5] + c1[5];
+    }
+    // solve (covariance sum) t = v and get the determinant
+    for (unsigned int i = 0; i < bn; ++i) {
+      double det;
+      if (iso[i] > 0) {
+        double inv = 1. / iso[i];
+        det = iso[i] * iso[i] * iso[i];
+        tx[i] = vx[i] * inv;
+        ty[i] = vy[i] * inv;
+        tz[i] = vz[i] * inv;
+      } else {
+        double ca = b[i] * c[i] - f[i] * f[i];
+        double cb = a[i] * c[i] - e[i] * e[i];
+        double cc = a[i] * b[i] - d[i] * d[i];
+        double cd = e[i] * f[i] - d[i] * c[i];
+        double ce = d[i] * f[i] - b[i] * e[i];
+        double cf = d[i] * e[i] - a[i] * f[i];
+        det = a[i] * ca + d[i] * cd + e[i] * ce;
+        double inv = 1. / det;
+        tx[i] = (ca * vx[i] + cd * vy[i] + ce * vz[i]) * inv;
+        ty[i] = (cd * vx[i] + cb * vy[i] + cf * vz[i]) * inv;
+        tz[i] = (ce * vx[i] + cf * vy[i] + cc * vz[i]) * inv;
+      }
+      pre[i] /= std::sqrt(det);
+    }
+    for (unsigned int i = 0; i < bn; ++i) {
+      scores[start + i] =
+          pre[i] * std::exp(-.5 * (vx[i] * tx[i] + vy[i] * ty[i] +
+                                   vz[i] * tz[i]));
+    }
+    if (derivs) {
+      for (unsigned int i = 0; i < bn; ++i) {
+        double s = scores[start + i];
+        derivs[start + i] = IMP_Eigen::Vector3d(-s * tx[i], -s * ty[i],
+                                                -s * tz[i]);
+      }
+    }
+  }
+}
+
+IMPISD_END_INTERNAL_NAMESPACE
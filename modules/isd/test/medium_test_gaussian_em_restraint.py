@@ -44,27 +44,39 @@ def score_gaussian_overlap(p0, p1):
     return score
 
 
-def gem_score(model_ps, density_ps,slope=0.0):
+def get_is_close(p0, p1, cutoff):
+    return IMP.core.get_distance(IMP.core.XYZR(p0),
+                                 IMP.core.XYZR(p1)) < cutoff
+
+def gem_score(model_ps, density_ps, slope=0.0, cutoff=None,
+              slope_cutoff=False, local=False):
     mm_score = 0.0
     md_score = 0.0
     dd_score = 0.0
 
-    nm = len(model_ps)
-    nd = len(density_ps)
     slope_score=0.0
-    for nd1 in range(len(density_ps)):
-        for nd2 in range(len(density_ps)):
-            dd_score += score_gaussian_overlap(density_ps[nd1], density_ps[nd2])
-
+    local_dens = set()
     for nm1 in range(len(model_ps)):
         for nm2 in range(len(model_ps)):
             mm_score += score_gaussian_overlap(model_ps[nm1], model_ps[nm2])
 
         for nd in range(len(density_ps)):
-            md_score += score_gaussian_overlap(model_ps[nm1], density_ps[nd])
-            dist = IMP.algebra.get_distance(IMP.core.XYZ(model_ps[nm1]).get_coordinates(),
-                                            IMP.core.XYZ(density_ps[nd]).get_coordinates())
-            slope_score+=dist*slope
+            close = cutoff is None or get_is_close(model_ps[nm1],
+                                                   density_ps[nd], cutoff)
+            if close:
+                md_score += score_gaussian_overlap(model_ps[nm1],
+                                                   density_ps[nd])
+                local_dens.add(nd)
+            if close or not slope_cutoff:
+                dist = IMP.algebra.get_distance(
+                           IMP.core.XYZ(model_ps[nm1]).get_coordinates(),
+                           IMP.core.XYZ(density_ps[nd]).get_coordinates())
+                slope_score+=dist*slope
+    for nd1 in range(len(density_ps)):
+        for nd2 in range(len(density_ps)):
+            if not local or (nd1 in local_dens and nd2 in local_dens):
+                dd_score += score_gaussian_overlap(density_ps[nd1],
+                                                   density_ps[nd2])
     cc = 2*md_score/(mm_score+dd_score)
     dist = -log(cc) + slope_score
     return dist
@@ -148,6 +160,35 @@ class Tests(IMP.test.TestCase):
             self.assertAlmostEqual(score, pyscore, delta=0.02)
         self.gem.set_slope(0.0)
 
+    def test_gem_score_with_slope_cutoff(self):
+        """test GMM score using slope limited to the density cutoff"""
+        reset_coords(self.model_ps,self.orig_coords)
+        psigma=IMP.Particle(self.m)
+        IMP.isd.Scale.setup_particle(psigma,1.0)
+        slope=0.1
+        cutoff=2.0
+        gem=IMP.isd.GaussianEMRestraint(self.m,self.model_ps,
+                                        self.density_ps,psigma,
+                                        1e8,cutoff,slope,True,False)
+        gem.set_slope_cutoff(True)
+        self.assertTrue(gem.get_slope_cutoff())
+        sf = IMP.core.RestraintsScoringFunction([gem])
+        # move one density particle well away from the model
+        far = IMP.core.XYZ(self.density_ps[0])
+        far_coords = far.get_coordinates()
+        far.set_coordinates(far_coords + IMP.algebra.Vector3D(50, 0, 0))
+        for nt in range(10):
+            reset_coords(self.model_ps,self.orig_coords)
+            shuffle_particles(self.model_ps)
+            score = sf.evaluate(False)
+            pyscore = gem_score(self.model_ps, self.density_ps, slope=slope,
+                                cutoff=cutoff, slope_cutoff=True)
+            self.assertAlmostEqual(score, pyscore, delta=0.02)
+            # the far particle is excluded from the slope
+            full = gem_score(self.model_ps, self.density_ps, slope=slope,
+                             cutoff=cutoff)
+            self.assertGreater(full - score, 10.)
+        far.set_coordinates(far_coords)
 
     def test_gem_derivatives(self):
         """test accuracy of GMM derivatives"""
@@ -177,37 +218,55 @@ class Tests(IMP.test.TestCase):
         dmap = IMP.isd.gmm_tools.gmm2map(self.model_ps,1.0,fast=False)
 
 class LocalTests(IMP.test.TestCase):
-    def test_local_score(self):
-        ndensity=10
-        nmodel=10
-        rs=np.random.RandomState()
-
-        self.m = IMP.Model()
-        itrans = IMP.algebra.get_identity_transformation_3d()
-        self.density_ps=create_random_gaussians(self.m,rs,ndensity,spherical=False)
-        self.model_ps=create_random_gaussians(self.m,rs,nmodel,spherical=False)
-
+    def make_restraint(self, density_cutoff_dist):
         psigma=IMP.Particle(self.m)
-        si = IMP.isd.Scale.setup_particle(psigma,1.0)
+        IMP.isd.Scale.setup_particle(psigma,1.0)
         slope=0.0
         model_cutoff_dist = 1e8
-        density_cutoff_dist = 0.0
         update_model=True
         backbone_slope=False
         local=True
-        self.gem=IMP.isd.GaussianEMRestraint(self.m,self.model_ps,
-                                             self.density_ps,psigma,
-                                             model_cutoff_dist,density_cutoff_dist,
-                                             slope,
-                                             update_model,backbone_slope,local)
-        self.sf = IMP.core.RestraintsScoringFunction([self.gem])
-        self.orig_coords=[IMP.core.XYZ(p).get_coordinates() for p in self.model_ps]
+        return IMP.isd.GaussianEMRestraint(self.m,self.model_ps,
+                                           self.density_ps,psigma,
+                                           model_cutoff_dist,
+                                           density_cutoff_dist,
+                                           slope,
+                                           update_model,backbone_slope,local)
 
-        for nt in range(10):
-            shuffle_particles(self.model_ps,5.0,1.5)
-            score = self.sf.evaluate(False)
-            pyscore = gem_score(self.model_ps, self.density_ps)
-            print(score,pyscore)
+    def test_local_score(self):
+        """test GMM score using only local density particles"""
+        ndensity=10
+        nmodel=10
+        cutoff=1.0
+        rs=np.random.RandomState()
+
+        self.m = IMP.Model()
+        self.density_ps=create_random_gaussians(self.m,rs,ndensity,
+                                                spherical=False,rad_scale=0.2)
+        self.model_ps=create_random_gaussians(self.m,rs,nmodel,
+                                              spherical=False,rad_scale=0.2)
+        gem = self.make_restraint(cutoff)
+        orig_coords=[IMP.core.XYZ(p).get_coordinates() for p in self.model_ps]
+
+        for nt in range(20):
+            # move a few particles at a time, so that density particles
+            # join and leave the local set a few at a time
+            if nt % 5 == 0:
+                reset_coords(self.model_ps, orig_coords)
+            shuffle_particles([self.model_ps[rs.randint(nmodel)]], 3.0, 0.5)
+            ndens = len([d for d in self.density_ps
+                         if any(get_is_close(p, d, cutoff)
+                                for p in self.model_ps)])
+            if ndens == 0:
+                continue
+            score = gem.evaluate(False)
+            pyscore = gem_score(self.model_ps, self.density_ps,
+                                cutoff=cutoff, local=True)
+            self.assertAlmostEqual(score, pyscore, delta=0.02)
+            # the local DD score is updated incrementally, so check it
+            # against a restraint that computes it from scratch
+            fresh = self.make_restraint(cutoff)
+            self.assertAlmostEqual(score, fresh.evaluate(False), delta=1e-6)
 
 if __name__ == '__main__':
     IMP.test.main()
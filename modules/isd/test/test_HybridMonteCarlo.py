@@ -0,0 +1,111 @@
+from __future__ import print_function
+import math
+
+import IMP
+import IMP.core
+import IMP.atom
+import IMP.isd
+import IMP.test
+
+# boltzmann constant in kcal/mol, as used by HybridMonteCarlo
+kB = 8.31441 / 4186.6
+
+
+class Tests(IMP.test.TestCase):
+
+    def setUp(self):
+        IMP.test.TestCase.setUp(self)
+        self.m = IMP.Model()
+        a = self.setup_xyz(IMP.algebra.Vector3D(0, 0, 0))
+        b = self.setup_xyz(IMP.algebra.Vector3D(1, 1, 1))
+        si = self.setup_scale(1.0)
+        ga = self.setup_scale(1.0)
+        self.noe = IMP.isd.NOERestraint(self.m, a, b, si, ga, 1.0)
+        self.dist = IMP.core.DistanceRestraint(
+            self.m, IMP.core.Harmonic(2.0, 1.0), a, b)
+        self.sf = IMP.core.RestraintsScoringFunction([self.noe, self.dist])
+        self.kT = 1.0
+        self.nsteps = 10
+        self.hmc = IMP.isd.HybridMonteCarlo(self.m, self.kT, self.nsteps,
+                                            1.0, 1)
+        self.hmc.set_scoring_function(self.sf)
+        self.hmc.get_md().set_scoring_function(self.sf)
+
+    def setup_xyz(self, coords):
+        p = IMP.Particle(self.m)
+        IMP.core.XYZ.setup_particle(p, coords)
+        IMP.core.XYZ(p).set_coordinates_are_optimized(True)
+        IMP.atom.Mass.setup_particle(p, 1.0)
+        return p
+
+    def setup_scale(self, value):
+        p = IMP.Particle(self.m)
+        IMP.isd.Scale.setup_particle(p, value)
+        IMP.isd.Scale(p).set_scale_is_optimized(True)
+        IMP.atom.Mass.setup_particle(p, 1.0)
+        return p
+
+    def get_state(self):
+        ret = []
+        for pi in self.m.get_particle_indexes():
+            p = self.m.get_particle(pi)
+            ret.extend(p.get_value(k) for k in p.get_float_keys())
+        return ret
+
+    def run_reference(self, steps):
+        """Run HMC steps with the full energy recomputed every time"""
+        md = self.hmc.get_md()
+        accepted = 0
+        last_accepted = None
+        for i in range(steps):
+            md.assign_velocities(self.kT / kB)
+            last = md.get_kinetic_energy() + self.sf.evaluate(False)
+            old = IMP.Configuration(self.m)
+            md.optimize(self.nsteps)
+            energy = md.get_kinetic_energy() + self.sf.evaluate(False)
+            # a random number is only drawn for upward moves
+            if energy < last or \
+               math.exp(-(energy - last) / self.kT) \
+                    > IMP.get_random_double_uniform():
+                accepted += 1
+                last_accepted = energy
+            else:
+                old.load_configuration()
+        return accepted, last_accepted
+
+    def check_against_reference(self, steps=20):
+        start = IMP.Configuration(self.m)
+        IMP.random_number_generator.seed(42)
+        self.hmc.optimize(steps)
+        accepted = self.hmc.get_number_of_accepted_steps()
+        energy = self.hmc.get_last_accepted_energy()
+        state = self.get_state()
+
+        start.load_configuration()
+        IMP.random_number_generator.seed(42)
+        ref_accepted, ref_energy = self.run_reference(steps)
+        self.assertGreater(ref_accepted, 0)
+        self.assertEqual(accepted, ref_accepted)
+        self.assertAlmostEqual(energy, ref_energy, delta=1e-6)
+        for x, ref_x in zip(state, self.get_state()):
+            self.assertAlmostEqual(x, ref_x, delta=1e-6)
+
+    def test_cached_energy(self):
+        """Check HMC with cached energies against full evaluation"""
+        self.check_against_reference()
+
+    def test_cached_energy_multiple_time_step(self):
+        """Check multiple time step HMC against full evaluation"""
+        self.hmc.set_multiple_time_step([self.noe], [self.dist], 2)
+        self.check_against_reference()
+
+    def test_multiple_time_step_split(self):
+        """Check that the fast and slow groups must cover the restraints"""
+        self.hmc.set_multiple_time_step([self.noe], [self.noe], 2)
+        self.assertRaisesUsageException(self.hmc.optimize, 1)
+        self.hmc.set_multiple_time_step([self.noe, self.dist], [self.dist], 2)
+        self.assertRaisesUsageException(self.hmc.optimize, 1)
+
+
+if __name__ == '__main__':
+    IMP.test.main()
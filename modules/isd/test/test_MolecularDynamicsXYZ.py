@@ -137,6 +137,28 @@ class Tests(IMP.test.TestCase):
         self._check_trajectory(start, traj, timestep,
                                lambda a: a + strength * delttm)
 
+    def test_multiple_time_step(self):
+        """Check multiple time step MD translation on XYZs"""
+        timestep = 4.0
+        fast = XTransRestraint(self.model, 30.0)
+        slow = XTransRestraint(self.model, 20.0)
+        self.md.set_scoring_function([fast, slow])
+        self.md.set_multiple_time_step([fast], [slow], 2)
+        self.assertEqual(self.md.get_number_of_inner_steps(), 2)
+        # With constant forces the positions at each outer step are exact
+        (start, traj) = self._optimize_model(timestep / 2.)
+        delttm = -timestep * kcal2mod / cmass
+        self._check_trajectory(start, traj, timestep,
+                               lambda a: a + 50.0 * delttm)
+        # The 50 inner steps make 25 outer steps; the slow forces are only
+        # evaluated once per outer step (plus once each at the start)
+        self.assertEqual(len(traj), 26)
+        self.assertEqual(self.md.get_number_of_force_evaluations(), 51)
+        self.assertEqual(self.md.get_number_of_slow_force_evaluations(), 26)
+        # Go back to plain velocity Verlet
+        self.md.set_multiple_time_step([fast, slow], [], 1)
+        self.assertEqual(self.md.get_number_of_inner_steps(), 1)
+
     def test_velocity_cap(self):
         """Check that velocity capping works on XYZs"""
         timestep = 4.0
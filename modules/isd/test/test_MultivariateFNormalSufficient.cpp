@@ -517,6 +517,83 @@ bool test_100D() {
   return true;
 }
 
+// random positive definite matrix
+IMP_Eigen::MatrixXd get_random_Sigma(int M) {
+  IMP_Eigen::MatrixXd A(M, M);
+  for (int i = 0; i < M; i++) {
+    for (int j = 0; j < M; j++) {
+      A(i, j) = rand() - 0.5;
+    }
+  }
+  return A * A.transpose() + IMP_Eigen::MatrixXd::Identity(M, M);
+}
+
+bool check_same(IMP::isd::MultivariateFNormalSufficient *observed,
+                IMP::isd::MultivariateFNormalSufficient *expected) {
+  if (naeq(observed->evaluate(), expected->evaluate(), 1e-6)) return false;
+  IMP_Eigen::MatrixXd dobs = observed->evaluate_derivative_Sigma();
+  IMP_Eigen::MatrixXd dexp = expected->evaluate_derivative_Sigma();
+  if ((dobs - dexp).norm() > 1e-6 * (1 + dexp.norm())) {
+    std::cout << "derivative_Sigma differs by " << (dobs - dexp).norm()
+              << std::endl;
+    return false;
+  }
+  return true;
+}
+
+bool test_factorization_cache() {
+  int M = 20;
+  int N = 5;
+  IMP_Eigen::MatrixXd FA(N, M);
+  for (int i = 0; i < N; i++) {
+    for (int j = 0; j < M; j++) {
+      FA(i, j) = rand() * 10 - 5;
+    }
+  }
+  IMP_Eigen::VectorXd FM(M);
+  for (int j = 0; j < M; j++) {
+    FM(j) = rand() * 10 - 5;
+  }
+  IMP_Eigen::MatrixXd S1(get_random_Sigma(M));
+  IMP_Eigen::MatrixXd S2(get_random_Sigma(M));
+  IMP_NEW(IMP::isd::MultivariateFNormalSufficient, mv, (FA, 1.0, FM, S1));
+  IMP_NEW(IMP::isd::MultivariateFNormalSufficient, mv1, (FA, 1.0, FM, S1));
+  IMP_NEW(IMP::isd::MultivariateFNormalSufficient, mv2, (FA, 1.0, FM, S2));
+  if (!check_same(mv, mv1)) FAIL("initial Sigma");
+  // move and come back, as after a rejected move
+  mv->set_Sigma(S2);
+  if (!check_same(mv, mv2)) FAIL("new Sigma");
+  if (mv->get_number_of_factorization_cache_hits() != 0) FAIL("cache hit");
+  mv->set_Sigma(S1);
+  if (!check_same(mv, mv1)) FAIL("cached Sigma");
+  if (mv->get_number_of_factorization_cache_hits() != 1) FAIL("cache miss");
+  mv->set_Sigma(S2);
+  if (!check_same(mv, mv2)) FAIL("cached new Sigma");
+  if (mv->get_number_of_factorization_cache_hits() != 2) FAIL("cache miss");
+  mv->set_factorization_cache_size(0);
+  mv->set_Sigma(S1);
+  mv->set_Sigma(S2);
+  mv->set_Sigma(S1);
+  if (!check_same(mv, mv1)) FAIL("Sigma without cache");
+  if (mv->get_number_of_factorization_cache_hits() != 2) FAIL("cache hit");
+
+  // rank one update and downdate
+  IMP_Eigen::VectorXd w(M);
+  for (int j = 0; j < M; j++) {
+    w(j) = rand() - 0.5;
+  }
+  IMP_NEW(IMP::isd::MultivariateFNormalSufficient, mvu,
+          (FA, 1.0, FM, S1 + 2.0 * w * w.transpose()));
+  mv->update_Sigma(w, 2.0);
+  if ((mv->get_Sigma() - mvu->get_Sigma()).norm() > 1e-10) {
+    FAIL("updated Sigma");
+  }
+  if (!check_same(mv, mvu)) FAIL("rank one update");
+  mv->update_Sigma(w, -2.0);
+  if (!check_same(mv, mv1)) FAIL("rank one downdate");
+  return true;
+}
+
 // test factor when M=100 and N=10
 bool test_factor() {
   // observation matrix
@@ -982,6 +1059,8 @@ int main(int argc, char *argv[]) {
     RUNTEST(test_100D, 1);
     PRINT("factor");
     RUNTEST(test_factor, 3);
+    PRINT("factorization cache");
+    RUNTEST(test_factorization_cache, 10);
     // PRINT("sparseness");
     // RUNTEST(test_sparseness,1);
     // TODO
@@ -3,7 +3,7 @@ import IMP
 import IMP.core
 import IMP.isd
 import IMP.test
-from random import sample
+import random
 from math import pi, log, exp
 
 
@@ -128,9 +128,9 @@ class TestXLRestraintSimple(IMP.test.TestCase):
         maxdist = 40.0
         npoints = 100
 
-        sigmas1=sample([0.01,0.1,0.5,1.0,5.0,10.0,50.0,100.0],5)
-        sigmas2=sample([0.01,0.1,0.5,1.0,5.0,10.0,50.0,100.0],5)
-        psis=sample([0.01,0.05,0.1,0.15,0.2,0.25,0.3,0.35,0.4,0.45,0.49],5)
+        sigmas1=random.sample([0.01,0.1,0.5,1.0,5.0,10.0,50.0,100.0],5)
+        sigmas2=random.sample([0.01,0.1,0.5,1.0,5.0,10.0,50.0,100.0],5)
+        psis=random.sample([0.01,0.05,0.1,0.15,0.2,0.25,0.3,0.35,0.4,0.45,0.49],5)
 
         for s1 in sigmas1:
             sigma1.set_scale(s1)
@@ -154,7 +154,6 @@ class TestXLRestraintSimple(IMP.test.TestCase):
         """Intensive random test, it tests manifold ambiguity, sameparticle, particle positions
         totality of the score, individual scores, get_log_prob=True, multiple radii, multiple sigma,
         multiple psi"""
-        import random
 
         m = IMP.Model()
 
@@ -264,8 +263,8 @@ class TestXLRestraintSimple(IMP.test.TestCase):
         maxradius = 40.0
         npoints = 100
 
-        sigmas1=sample([0.01,0.1,0.5,1.0,5.0,10.0,50.0,100.0],5)
-        psis=sample([0.01,0.05,0.1,0.15,0.2,0.25,0.3,0.35,0.4,0.45,0.49],5)
+        sigmas1=random.sample([0.01,0.1,0.5,1.0,5.0,10.0,50.0,100.0],5)
+        psis=random.sample([0.01,0.05,0.1,0.15,0.2,0.25,0.3,0.35,0.4,0.45,0.49],5)
 
         for s1 in sigmas1:
             sigma1.set_scale(s1)
@@ -323,10 +322,10 @@ class TestXLRestraintSimple(IMP.test.TestCase):
         maxdist = 40.0
         npoints = 30
 
-        sigmas1=sample([0.01,0.1,0.5,1.0,5.0,10.0,50.0,100.0],5)
-        sigmas2=sample([0.01,0.1,0.5,1.0,5.0,10.0,50.0,100.0],5)
-        sigmas3=sample([0.01,0.1,0.5,1.0,5.0,10.0,50.0,100.0],5)
-        psis=sample([0.01,0.05,0.1,0.15,0.2,0.25,0.3,0.35,0.4,0.45,0.49],5)
+        sigmas1=random.sample([0.01,0.1,0.5,1.0,5.0,10.0,50.0,100.0],5)
+        sigmas2=random.sample([0.01,0.1,0.5,1.0,5.0,10.0,50.0,100.0],5)
+        sigmas3=random.sample([0.01,0.1,0.5,1.0,5.0,10.0,50.0,100.0],5)
+        psis=random.sample([0.01,0.05,0.1,0.15,0.2,0.25,0.3,0.35,0.4,0.45,0.49],5)
 
         for s1 in sigmas1:
             sigma1.set_scale(s1)
@@ -347,5 +346,38 @@ class TestXLRestraintSimple(IMP.test.TestCase):
                             self.assertAlmostEqual(score,scoretest,places=4)
                             self.assertAlmostEqual(score_lp,scoretest,places=4)
 
+    def test_scores_and_distances(self):
+        """Test getting the scores and distances of many restraints at once"""
+        m = IMP.Model()
+        bb = IMP.algebra.BoundingBox3D(IMP.algebra.Vector3D(0, 0, 0),
+                                       IMP.algebra.Vector3D(30, 30, 30))
+        restraints = []
+        pairs = []
+        for n in range(10):
+            dr = IMP.isd.CrossLinkMSRestraint(m, 21.0, 0.01)
+            for a in range(random.randint(1, 3)):
+                ps = []
+                for i in range(2):
+                    d = IMP.core.XYZR.setup_particle(IMP.Particle(m))
+                    d.set_radius(2.0)
+                    d.set_coordinates(IMP.algebra.get_random_vector_in(bb))
+                    ps.append(d)
+                s = setupnuisance(m, random.uniform(1.0, 11.0), 0, 100, False)
+                psi = setupnuisance(m, 0.1, 0.0, 0.5, False)
+                dr.add_contribution((ps[0], ps[1]), (s, s), psi)
+                pairs.append(ps)
+            restraints.append(dr)
+        scores = IMP.isd.get_cross_link_ms_scores(restraints)
+        self.assertEqual(len(scores), len(restraints))
+        for r, score in zip(restraints, scores):
+            self.assertAlmostEqual(score, -log(r.unprotected_evaluate(None)),
+                                   delta=1e-6)
+        distances = IMP.isd.get_cross_link_ms_distances(restraints)
+        self.assertEqual(len(distances), len(pairs))
+        for (d0, d1), distance in zip(pairs, distances):
+            self.assertAlmostEqual(distance, IMP.core.get_distance(
+                IMP.core.XYZ(d0), IMP.core.XYZ(d1)), delta=1e-6)
+
+
 if __name__ == '__main__':
     IMP.test.main()
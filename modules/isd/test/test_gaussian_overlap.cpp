@@ -0,0 +1,85 @@
+/**
+ *  \file test_gaussian_overlap.cpp
+ *  \brief Check the cached Gaussian overlaps against score_gaussian_overlap.
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ *
+ */
+#include <IMP/isd/internal/gaussian_overlap.h>
+#include <IMP/isd/em_utilities.h>
+#include <IMP/atom/Mass.h>
+#include <IMP/core/Gaussian.h>
+#include <IMP/algebra/vector_generators.h>
+#include <IMP/Model.h>
+#include <IMP/flags.h>
+#include <IMP/exception.h>
+#include <cmath>
+
+namespace {
+
+void check(IMP::Model *m, const IMP::isd::internal::GaussianOverlapKernel &k,
+           const IMP::ParticleIndexes &pis) {
+  IMP::ParticleIndexPairs pairs;
+  for (unsigned int i = 0; i < pis.size(); ++i) {
+    for (unsigned int j = 0; j < pis.size(); ++j) {
+      pairs.push_back(IMP::ParticleIndexPair(pis[i], pis[j]));
+    }
+  }
+  IMP::Floats scores(pairs.size());
+  IMP::Vector<IMP_Eigen::Vector3d> derivs(pairs.size());
+  k.get_overlaps(&pairs[0], pairs.size(), &scores[0], &derivs[0]);
+  for (unsigned int i = 0; i < pairs.size(); ++i) {
+    IMP_Eigen::Vector3d deriv;
+    double score = IMP::isd::score_gaussian_overlap(m, pairs[i], &deriv);
+    if (std::abs(score - scores[i]) > 1e-6 * (1 + std::abs(score))) {
+      IMP_THROW("Scores do not match: " << score << " " << scores[i],
+                IMP::ValueException);
+    }
+    if ((deriv - derivs[i]).norm() > 1e-6 * (1 + deriv.norm())) {
+      IMP_THROW("Derivatives do not match for pair " << i,
+                IMP::ValueException);
+    }
+  }
+}
+}
+
+int main(int argc, char *argv[]) {
+  IMP::setup_from_argv(argc, argv,
+                       "Check the cached Gaussian overlaps against "
+                       "score_gaussian_overlap.");
+  IMP_NEW(IMP::Model, m, ());
+  IMP::algebra::BoundingBox3D bb(IMP::algebra::Vector3D(-5, -5, -5),
+                                 IMP::algebra::Vector3D(5, 5, 5));
+  IMP::ParticleIndexes pis;
+  for (unsigned int i = 0; i < 20; ++i) {
+    IMP::ParticleIndex pi = m->add_particle("g");
+    IMP::algebra::Vector3D var(1, 1, 1);
+    // half are spherical
+    if (i % 2) {
+      var = IMP::algebra::get_random_vector_in(
+          IMP::algebra::BoundingBox3D(IMP::algebra::Vector3D(.5, .5, .5),
+                                      IMP::algebra::Vector3D(4, 4, 4)));
+    }
+    IMP::algebra::ReferenceFrame3D rf(IMP::algebra::Transformation3D(
+        IMP::algebra::get_random_rotation_3d(),
+        IMP::algebra::get_random_vector_in(bb)));
+    IMP::core::Gaussian::setup_particle(m, pi,
+                                        IMP::algebra::Gaussian3D(rf, var));
+    IMP::atom::Mass::setup_particle(m, pi, 1. + i);
+    pis.push_back(pi);
+  }
+  IMP::isd::internal::GaussianOverlapKernel k;
+  k.update(m, pis);
+  check(m, k, pis);
+  // turn and move some of them; the kernel must notice
+  for (unsigned int i = 0; i < pis.size(); i += 3) {
+    IMP::core::Gaussian g(m, pis[i]);
+    g.set_reference_frame(IMP::algebra::ReferenceFrame3D(
+        IMP::algebra::Transformation3D(IMP::algebra::get_random_rotation_3d(),
+                                       IMP::algebra::get_random_vector_in(bb))));
+    g.update_global_covariance();
+  }
+  k.update(m, pis);
+  check(m, k, pis);
+  return 0;
+}
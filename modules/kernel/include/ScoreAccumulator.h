@@ -75,6 +75,20 @@ class IMPKERNELEXPORT ScoreAccumulator : public Value {
     local_max_ = std::min(local_max, o.local_max_);
   }
 
+#ifndef SWIG
+  /** Accumulate into a different evaluation state, eg one per thread. */
+  ScoreAccumulator(ScoreAccumulator o, EvaluationState *s) {
+    operator=(o);
+    score_ = s;
+  }
+
+  /** Add the result of evaluating with a separate state. */
+  void add_evaluation_state(const EvaluationState &s) {
+    score_->score += s.score;
+    if (!s.good) score_->good = false;
+  }
+#endif
+
   /** Add to the total score. It will be weighted appropriately
       internally. */
   void add_score(double score) {
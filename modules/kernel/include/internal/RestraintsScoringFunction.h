@@ -15,6 +15,7 @@
 #include "../container_macros.h"
 #include "restraint_evaluation.h"
 #include "container_helpers.h"
+#include "../threads.h"
 
 IMPKERNEL_BEGIN_INTERNAL_NAMESPACE
 
@@ -28,8 +29,16 @@ class GenericRestraintsScoringFunction : public ScoringFunction {
   double weight_;
   double max_;
   Storage restraints_;
+  // restraints split up for evaluation in parallel
+  RestraintGroups groups_;
 
  protected:
+  virtual void handle_set_has_required_score_states(bool tf) IMP_OVERRIDE {
+    // restraint sets may have changed
+    if (!tf) groups_.clear();
+    ScoringFunction::handle_set_has_required_score_states(tf);
+  }
+
   GenericRestraintsScoringFunction(Model *m, double weight = 1.0,
                                    double max = NO_MAX,
                                    std::string name =
@@ -49,7 +58,16 @@ class GenericRestraintsScoringFunction : public ScoringFunction {
   void do_add_score_and_derivatives(IMP::ScoreAccumulator sa,
                                     const ScoreStatesTemp &ss) IMP_OVERRIDE {
     IMP_OBJECT_LOG;
-    protected_evaluate(sa, restraints_, ss, get_model());
+    unsigned int n = get_number_of_threads();
+    if (n > 1 && !get_model()->first_call_) {
+      if (groups_.size() != n) {
+        groups_ = create_restraint_groups(
+            RestraintsTemp(restraints_.begin(), restraints_.end()), n);
+      }
+      protected_evaluate(sa, groups_, ss, get_model());
+    } else {
+      protected_evaluate(sa, restraints_, ss, get_model());
+    }
   }
   Restraints create_restraints() const IMP_OVERRIDE {
     IMP_OBJECT_LOG;
@@ -62,6 +80,7 @@ class GenericRestraintsScoringFunction : public ScoringFunction {
   const Storage &get_restraints() const { return restraints_; }
   void set_restraints(const RestraintsTemp &s) {
     set_has_dependencies(false);
+    groups_.clear();
     restraints_ = s;
   }
   IMP_OBJECT_METHODS(GenericRestraintsScoringFunction);
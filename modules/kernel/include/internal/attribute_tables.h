@@ -19,6 +19,7 @@
 #include <IMP/check_macros.h>
 #include <IMP/log.h>
 #include <IMP/set_map_macros.h>
+#include <IMP/thread_macros.h>
 #include <IMP/algebra/Sphere3D.h>
 
 #define IMP_ATTRIBUTE_CHECKED_PARAM checked
@@ -258,6 +259,16 @@ class FloatAttributeTable {
   Mask *read_mask_, *write_mask_, *add_remove_mask_, *read_derivatives_mask_,
       *write_derivatives_mask_;
 #endif
+  // Derivatives added by one group of restraints during parallel evaluation
+  struct DerivativeBuffer {
+    IndexVector<ParticleIndexTag, algebra::Sphere3D> sphere_derivatives;
+    IndexVector<ParticleIndexTag, algebra::Vector3D>
+        internal_coordinate_derivatives;
+    BasicAttributeTable<internal::FloatAttributeTableTraits> derivatives;
+  };
+  Vector<DerivativeBuffer> derivative_buffers_;
+  // The buffer each thread is adding to, or -1 for the tables above
+  Vector<int> thread_derivative_buffers_;
   algebra::Sphere3D get_invalid_sphere() const {
     double iv = internal::FloatAttributeTableTraits::get_invalid();
     algebra::Sphere3D ivs(algebra::Vector3D(iv, iv, iv), iv);
@@ -327,6 +338,13 @@ class FloatAttributeTable {
                    DERIVATIVE);
     IMP_USAGE_CHECK(get_has_attribute(FloatKey(0), particle),
                     "Particle does not have coordinates: " << particle);
+    DerivativeBuffer *b = get_thread_derivative_buffer();
+    if (b) {
+      for (unsigned int i = 0; i < 3; ++i) {
+        b->sphere_derivatives[particle][i] += da(v[i]);
+      }
+      return;
+    }
     IMP_ACCUMULATE(sphere_derivatives_[particle][0], da(v[0]));
     IMP_ACCUMULATE(sphere_derivatives_[particle][1], da(v[1]));
     IMP_ACCUMULATE(sphere_derivatives_[particle][2], da(v[2]));
@@ -339,6 +357,13 @@ class FloatAttributeTable {
                    DERIVATIVE);
     IMP_USAGE_CHECK(get_has_attribute(FloatKey(0), particle),
                     "Particle does not have coordinates");
+    DerivativeBuffer *b = get_thread_derivative_buffer();
+    if (b) {
+      for (unsigned int i = 0; i < 3; ++i) {
+        b->internal_coordinate_derivatives[particle][i] += da(v[i]);
+      }
+      return;
+    }
     IMP_ACCUMULATE(internal_coordinate_derivatives_[particle][0], da(v[0]));
     IMP_ACCUMULATE(internal_coordinate_derivatives_[particle][1], da(v[1]));
     IMP_ACCUMULATE(internal_coordinate_derivatives_[particle][2], da(v[2]));
@@ -363,6 +388,68 @@ class FloatAttributeTable {
               algebra::Vector3D(0, 0, 0));
     derivatives_.fill(0);
   }
+
+  /** \name Derivative buffers
+      During parallel restraint evaluation, each group of restraints adds
+      its derivatives to a separate buffer, selected by the thread that is
+      evaluating the group. The buffers are then summed in a fixed order,
+      so that the result does not depend on how the groups were scheduled.
+      @{
+  */
+  //! Create n zeroed buffers, to be used by up to the given number of threads
+  void create_derivative_buffers(unsigned int n, unsigned int threads) {
+    derivative_buffers_.resize(n);
+    for (unsigned int i = 0; i < n; ++i) {
+      // the main tables have just been zeroed
+      derivative_buffers_[i].sphere_derivatives = sphere_derivatives_;
+      derivative_buffers_[i].internal_coordinate_derivatives =
+          internal_coordinate_derivatives_;
+      derivative_buffers_[i].derivatives = derivatives_;
+    }
+    thread_derivative_buffers_.clear();
+    thread_derivative_buffers_.resize(threads, -1);
+  }
+  //! Make the current thread add to buffer i (or -1 for none)
+  /** \return the buffer it was previously adding to */
+  int set_thread_derivative_buffer(int i) {
+#ifdef _OPENMP
+    int &cur = thread_derivative_buffers_[omp_get_thread_num()];
+    int ret = cur;
+    cur = i;
+    return ret;
+#else
+    IMP_UNUSED(i);
+    return -1;
+#endif
+  }
+  //! Add the buffers to the derivatives, in order, and stop buffering
+  void merge_derivative_buffers() {
+    thread_derivative_buffers_.clear();
+    for (unsigned int i = 0; i < derivative_buffers_.size(); ++i) {
+      const DerivativeBuffer &b = derivative_buffers_[i];
+      for (unsigned int j = 0; j < b.sphere_derivatives.size(); ++j) {
+        ParticleIndex pi(j);
+        for (unsigned int k = 0; k < 4; ++k) {
+          sphere_derivatives_[pi][k] += b.sphere_derivatives[pi][k];
+        }
+      }
+      for (unsigned int j = 0; j < b.internal_coordinate_derivatives.size();
+           ++j) {
+        ParticleIndex pi(j);
+        internal_coordinate_derivatives_[pi] +=
+            b.internal_coordinate_derivatives[pi];
+      }
+      for (unsigned int k = 0; k < b.derivatives.size(); ++k) {
+        for (unsigned int j = 0; j < b.derivatives.size(k); ++j) {
+          ParticleIndex pi(j);
+          derivatives_.access_data()[k][pi] +=
+              b.derivatives.access_data()[k][pi];
+        }
+      }
+    }
+  }
+  /** @} */
+
   void clear_caches(ParticleIndex) {}
   void add_cache_attribute(FloatKey, ParticleIndex, double) {
     IMP_NOT_IMPLEMENTED;
@@ -400,6 +487,18 @@ class FloatAttributeTable {
       optimizeds_.remove_attribute(k, particle);
     }
   }
+  DerivativeBuffer *get_thread_derivative_buffer() {
+#ifdef _OPENMP
+    if (!thread_derivative_buffers_.empty()) {
+      unsigned int t = omp_get_thread_num();
+      if (t < thread_derivative_buffers_.size() &&
+          thread_derivative_buffers_[t] >= 0) {
+        return &derivative_buffers_[thread_derivative_buffers_[t]];
+      }
+    }
+#endif
+    return nullptr;
+  }
   // check AFTER_EVALUATE, NOT_EVALUATING
   double get_derivative
     (FloatKey k, ParticleIndex particle,
@@ -425,6 +524,19 @@ class FloatAttributeTable {
     IMP_USAGE_CHECK(get_has_attribute(k, particle),
                     "Can't get derivative that isn't there: "
                         << k.get_string() << " on particle " << particle);
+    DerivativeBuffer *b = get_thread_derivative_buffer();
+    if (b) {
+      IMP_CHECK_MASK(write_derivatives_mask_, particle, k, SET, DERIVATIVE);
+      if (k.get_index() < 4) {
+        b->sphere_derivatives[particle][k.get_index()] += da(v);
+      } else if (k.get_index() < 7) {
+        b->internal_coordinate_derivatives[particle][k.get_index() - 4] +=
+            da(v);
+      } else {
+        b->derivatives.access_data()[k.get_index() - 7][particle] += da(v);
+      }
+      return;
+    }
     if (k.get_index() < 4) {
       IMP_CHECK_MASK(write_derivatives_mask_, particle, k, SET, DERIVATIVE);
       sphere_derivatives_[particle][k.get_index()] += da(v);
@@ -28,6 +28,32 @@ IMPKERNELEXPORT void protected_evaluate(IMP::ScoreAccumulator sa,
                                         const ScoreStatesTemp &states,
                                         Model *m);
 
+//! A restraint and the RestraintSets it is in, outermost first
+struct FlattenedRestraint {
+  Restraint *restraint;
+  RestraintsTemp sets;
+};
+typedef Vector<Vector<FlattenedRestraint> > RestraintGroups;
+
+//! Split the restraints into n groups of similar cost
+/** RestraintSets are expanded, and the cost of each restraint is estimated
+    from the number of its inputs. Restraints keep their relative order
+    within each group. Some groups are empty if there are fewer than n
+    restraints.
+*/
+IMPKERNELEXPORT RestraintGroups
+    create_restraint_groups(const RestraintsTemp &restraints, unsigned int n);
+
+//! Evaluate each group of restraints in a separate thread
+/** Each group adds its derivatives to a separate buffer, and the scores
+    and derivatives are summed in group order, so the result does not
+    depend on the thread scheduling.
+*/
+IMPKERNELEXPORT void protected_evaluate(IMP::ScoreAccumulator sa,
+                                        const RestraintGroups &groups,
+                                        const ScoreStatesTemp &states,
+                                        Model *m);
+
 IMPKERNEL_END_INTERNAL_NAMESPACE
 
 #endif /* IMPKERNEL_INTERNAL_RESTRAINT_EVALUATION_H */
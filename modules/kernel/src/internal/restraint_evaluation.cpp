@@ -15,9 +15,11 @@
 #include <boost/timer.hpp>
 #include <IMP/threads.h>
 #include "IMP/ModelObject.h"
+#include "IMP/RestraintSet.h"
 
 #include "IMP/internal/evaluate_utility.h"
 #include "IMP/internal/utility.h"
+#include <algorithm>
 #include <numeric>
 
 IMPKERNEL_BEGIN_INTERNAL_NAMESPACE
@@ -123,6 +125,154 @@ void protected_evaluate_one(IMP::ScoreAccumulator sa, RS *restraint,
 }
 }
 
+namespace {
+
+void flatten_restraints(Restraint *r, const RestraintsTemp &sets,
+                        Vector<FlattenedRestraint> &out) {
+  RestraintSet *rs = dynamic_cast<RestraintSet *>(r);
+  if (rs) {
+    rs->set_was_used(true);
+    RestraintsTemp inner = sets;
+    inner.push_back(rs);
+    for (unsigned int i = 0; i < rs->get_number_of_restraints(); ++i) {
+      flatten_restraints(rs->get_restraint(i), inner, out);
+    }
+  } else {
+    FlattenedRestraint fr;
+    fr.restraint = r;
+    fr.sets = sets;
+    out.push_back(fr);
+  }
+}
+
+struct CostCompare {
+  const Vector<double> &costs_;
+  CostCompare(const Vector<double> &costs) : costs_(costs) {}
+  bool operator()(unsigned int a, unsigned int b) const {
+    return costs_[a] > costs_[b];
+  }
+};
+
+void evaluate_flattened(IMP::ScoreAccumulator sa, const FlattenedRestraint &fr,
+                        Model *m) {
+  for (unsigned int i = 0; i < fr.sets.size(); ++i) {
+    sa = IMP::ScoreAccumulator(sa, fr.sets[i]);
+  }
+  do_evaluate_one(sa, fr.restraint, m);
+}
+
+void evaluate_group(IMP::ScoreAccumulator sa,
+                    const Vector<FlattenedRestraint> &group,
+                    EvaluationState *state, int buffer, bool derivative,
+                    Model *m) {
+  IMP::ScoreAccumulator gsa(sa, state);
+  int old = -1;
+  if (derivative) old = m->set_thread_derivative_buffer(buffer);
+  for (unsigned int i = 0; i < group.size(); ++i) {
+    evaluate_flattened(gsa, group[i], m);
+  }
+  IMP_OMP_PRAGMA(taskwait)
+  if (derivative) m->set_thread_derivative_buffer(old);
+}
+
+void evaluate_groups(IMP::ScoreAccumulator sa, const RestraintGroups &groups,
+                     EvaluationStates &states, bool derivative, Model *m) {
+  for (unsigned int i = 0; i < groups.size(); ++i) {
+    // the first group adds to the model's own derivative tables
+    IMP_OMP_PRAGMA(task firstprivate(i) shared(groups, states))
+    evaluate_group(sa, groups[i], &states[i], static_cast<int>(i) - 1,
+                   derivative, m);
+  }
+  IMP_OMP_PRAGMA(taskwait)
+  IMP_OMP_PRAGMA(flush)
+}
+}
+
+RestraintGroups create_restraint_groups(const RestraintsTemp &restraints,
+                                        unsigned int n) {
+  Vector<FlattenedRestraint> flat;
+  for (unsigned int i = 0; i < restraints.size(); ++i) {
+    flatten_restraints(restraints[i], RestraintsTemp(), flat);
+  }
+  Vector<double> costs(flat.size());
+  Vector<unsigned int> order(flat.size());
+  for (unsigned int i = 0; i < flat.size(); ++i) {
+    costs[i] = std::max<std::size_t>(1, flat[i].restraint->get_inputs().size());
+    order[i] = i;
+  }
+  // most expensive first, each to the least loaded group
+  std::stable_sort(order.begin(), order.end(), CostCompare(costs));
+  n = std::max(1U, n);
+  Vector<double> loads(n, 0.);
+  Vector<Vector<unsigned int> > members(n);
+  for (unsigned int i = 0; i < order.size(); ++i) {
+    unsigned int g =
+        std::min_element(loads.begin(), loads.end()) - loads.begin();
+    loads[g] += costs[order[i]];
+    members[g].push_back(order[i]);
+  }
+  RestraintGroups ret(n);
+  for (unsigned int g = 0; g < n; ++g) {
+    std::sort(members[g].begin(), members[g].end());
+    for (unsigned int i = 0; i < members[g].size(); ++i) {
+      ret[g].push_back(flat[members[g][i]]);
+    }
+  }
+  return ret;
+}
+
+void protected_evaluate(IMP::ScoreAccumulator sa, const RestraintGroups &groups,
+                        const ScoreStatesTemp &states, Model *m) {
+  bool derivative = sa.get_derivative_accumulator();
+  before_protected_evaluate(m, states, derivative);
+  {
+    internal::SFSetIt<IMP::internal::Stage> reset(&m->cur_stage_,
+                                                  internal::EVALUATING);
+#ifdef _OPENMP
+    // the first call checks each restraint's inputs, which is not thread safe
+    bool parallel = groups.size() > 1 && !m->first_call_;
+#else
+    bool parallel = false;
+#endif
+    if (!parallel) {
+      for (unsigned int i = 0; i < groups.size(); ++i) {
+        for (unsigned int j = 0; j < groups[i].size(); ++j) {
+          evaluate_flattened(sa, groups[i][j], m);
+        }
+      }
+      IMP_OMP_PRAGMA(taskwait)
+      IMP_OMP_PRAGMA(flush)
+    } else {
+#ifdef _OPENMP
+      unsigned int n = groups.size();
+      EvaluationStates scores(n, EvaluationState(0, true));
+      if (derivative) {
+        m->create_derivative_buffers(
+            n - 1, std::max<unsigned int>(n, omp_get_num_threads()));
+      }
+      {
+        // restraints run in their group's thread
+        SetNumberOfThreads no(1);
+        if (omp_in_parallel()) {
+          evaluate_groups(sa, groups, scores, derivative, m);
+        } else {
+          IMP_OMP_PRAGMA(parallel num_threads(n))
+          {
+            IMP_OMP_PRAGMA(single)
+            evaluate_groups(sa, groups, scores, derivative, m);
+          }
+        }
+      }
+      if (derivative) m->merge_derivative_buffers();
+      for (unsigned int i = 0; i < n; ++i) {
+        sa.add_evaluation_state(scores[i]);
+      }
+#endif
+    }
+  }
+  after_protected_evaluate(m, states, derivative);
+}
+
 void protected_evaluate(IMP::ScoreAccumulator sa, Restraint *restraint,
                         const ScoreStatesTemp &states, Model *m) {
   protected_evaluate_one<Restraint>(sa, restraint, states, m);
@@ -6,6 +6,7 @@
 #include <IMP/kinematics/RMSDClustering.h>
 
 #include <IMP/atom/pdb.h>
+#include <IMP/threads.h>
 #include <IMP/saxs/utility.h>
 
 #include <boost/algorithm/string.hpp>
@@ -108,6 +109,8 @@ int main(int argc, char* argv[]) {
 
   float rmsd_threshold = 2.0;
   bool transformation = true;
+  bool streaming = false;
+  int number_of_threads = 1;
   po::options_description
     desc("Usage: <filenames> <pdb_file1> <pdb_file2> ...");
   desc.add_options()
@@ -118,6 +121,12 @@ int main(int argc, char* argv[]) {
      "rmsd threshold for structure similarity (default = 2.0)")
     ("transformation,t",
      "calculate transformation that minimizes RMSD (default = true)")
+    ("streaming,s",
+     "compare each structure only to cluster representatives and skip \
+RMSD calculations with a centroid/radius of gyration lower bound above the \
+threshold, scales to large numbers of structures (default = false)")
+    ("threads,n", po::value<int>(&number_of_threads)->default_value(1),
+     "number of threads for streaming clustering (default = 1)")
     ;
 
    po::positional_options_description p;
@@ -136,6 +145,9 @@ int main(int argc, char* argv[]) {
     return 0;
   }
   if (vm.count("transformation")) transformation = false;
+  if (vm.count("streaming")) streaming = true;
+  if (number_of_threads < 1) number_of_threads = 1;
+  IMP::set_number_of_threads(number_of_threads);
 
   // read the scores
   std::vector<std::pair<double, std::string> > file_name_score_pairs;
@@ -162,22 +174,43 @@ int main(int argc, char* argv[]) {
     pdb_to_index[pdb_file_names[i]] = i;
   }
 
-  // sort the structures
-  std::vector<IMP::algebra::Vector3Ds> sorted_coords_vec(coords_vec.size());
-  for (unsigned int i=0; i<file_name_score_pairs.size(); i++) {
-    int index = pdb_to_index[file_name_score_pairs[i].second];
-    sorted_coords_vec[i] = coords_vec[index];
-  }
-
-  coords_vec.clear();
-
   // cluster
   std::vector<int> out_cluster_numbers;
-  unsigned int number_of_clusters =
-    IMP::kinematics::rmsd_clustering(sorted_coords_vec,
-                                     out_cluster_numbers,
-                                     rmsd_threshold,
-                                     transformation);
+  unsigned int number_of_clusters = 0;
+  if (streaming) {
+    // add the structures in score order, no need to copy the coordinates
+    IMP::kinematics::RMSDClustering clustering(rmsd_threshold, transformation);
+    for (unsigned int i=0; i<file_name_score_pairs.size(); i++) {
+      int index = pdb_to_index[file_name_score_pairs[i].second];
+      clustering.add_structure(coords_vec[index]);
+      if(i%1000 == 0) {
+        std::cerr << "clustering structure " << i << " # clusters "
+                  << clustering.get_number_of_clusters() << std::endl;
+      }
+    }
+    coords_vec.clear();
+    out_cluster_numbers = clustering.get_cluster_numbers();
+    number_of_clusters = clustering.get_number_of_clusters();
+    std::cerr << clustering.get_number_of_rmsd_calculations()
+              << " RMSD calculations, "
+              << clustering.get_number_of_filtered_comparisons()
+              << " skipped by the lower bound" << std::endl;
+  } else {
+    // sort the structures
+    std::vector<IMP::algebra::Vector3Ds> sorted_coords_vec(coords_vec.size());
+    for (unsigned int i=0; i<file_name_score_pairs.size(); i++) {
+      int index = pdb_to_index[file_name_score_pairs[i].second];
+      sorted_coords_vec[i] = coords_vec[index];
+    }
+
+    coords_vec.clear();
+
+    number_of_clusters =
+      IMP::kinematics::rmsd_clustering(sorted_coords_vec,
+                                       out_cluster_numbers,
+                                       rmsd_threshold,
+                                       transformation);
+  }
 
   std::cout << "Number of clusters with RMSD " << rmsd_threshold << ": "
             << number_of_clusters << std::endl;
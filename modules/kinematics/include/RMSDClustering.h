@@ -24,6 +24,86 @@ unsigned int rmsd_clustering(const std::vector<IMP::algebra::Vector3Ds>& coords_
                              std::vector<int>& out_cluster_numbers,
                              float rmsd_thr, bool compute_trans);
 
+//! Leader clustering of structures that are streamed in one at a time
+/** Each added structure is compared only to the current cluster
+    representatives (the first member of each cluster), so memory is
+    proportional to the number of clusters rather than the number of
+    structures. Before computing the full RMSD, a cheap lower bound on the
+    RMSD is evaluated from the centroids and radii of gyration of the two
+    structures, and the representative is skipped if the bound already
+    exceeds the threshold. When IMP::get_number_of_threads() is greater
+    than one and OpenMP is available, the representatives are scanned in
+    parallel.
+
+    Structures should be added in order of decreasing quality (for example,
+    sorted by score) so that the best structure of each cluster becomes its
+    representative. A structure joins the lowest-numbered cluster whose
+    representative is within the RMSD threshold.
+ */
+class IMPKINEMATICSEXPORT RMSDClustering {
+ public:
+  /** \param[in] rmsd_thr RMSD threshold for cluster membership
+      \param[in] compute_trans if true, superimpose the structures
+                 before computing the RMSD
+  */
+  RMSDClustering(float rmsd_thr, bool compute_trans);
+
+  //! Add a structure and return the number of the cluster it joined
+  unsigned int add_structure(const IMP::algebra::Vector3Ds& coords);
+
+  unsigned int get_number_of_clusters() const { return reps_.size(); }
+
+  unsigned int get_number_of_structures() const {
+    return cluster_numbers_.size();
+  }
+
+  //! Cluster numbers of all added structures, in order of addition
+  const std::vector<int>& get_cluster_numbers() const {
+    return cluster_numbers_;
+  }
+
+  //! Number of full RMSD calculations skipped by the lower bound prefilter
+  unsigned int get_number_of_filtered_comparisons() const {
+    return filtered_counter_;
+  }
+
+  //! Number of full RMSD calculations performed
+  unsigned int get_number_of_rmsd_calculations() const {
+    return rmsd_counter_;
+  }
+
+ private:
+  struct Representative {
+    IMP::algebra::Vector3Ds coords_;
+    IMP::algebra::Vector3D centroid_;
+    double radius_of_gyration_;
+  };
+
+  double get_rmsd_lower_bound(const Representative& rep,
+                              const IMP::algebra::Vector3D& centroid,
+                              double radius_of_gyration) const;
+
+  double get_rmsd(const Representative& rep,
+                  const IMP::algebra::Vector3Ds& coords) const;
+
+  float rmsd_thr_;
+  bool compute_trans_;
+  std::vector<Representative> reps_;
+  std::vector<int> cluster_numbers_;
+  unsigned int filtered_counter_;
+  unsigned int rmsd_counter_;
+};
+
+//! Cluster structures with RMSDClustering
+/** Same interface as rmsd_clustering(), but the structures are streamed into
+    an RMSDClustering object, so only cluster representatives are compared
+    and a lower bound prefilter avoids most full RMSD calculations.
+ */
+IMPKINEMATICSEXPORT
+unsigned int rmsd_clustering_streaming(
+    const std::vector<IMP::algebra::Vector3Ds>& coords_vec,
+    std::vector<int>& out_cluster_numbers, float rmsd_thr, bool compute_trans);
+
 IMPKINEMATICS_END_NAMESPACE
 
 #endif /* IMPKINEMATICS_RMSD_CLUSTERING_H */
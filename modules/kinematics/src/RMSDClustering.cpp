@@ -8,6 +8,7 @@
  */
 
 #include  <IMP/kinematics/RMSDClustering.h>
+#include <IMP/thread_macros.h>
 
 IMPKINEMATICS_BEGIN_NAMESPACE
 
@@ -46,4 +47,93 @@ unsigned int rmsd_clustering(const std::vector<IMP::algebra::Vector3Ds>& coords_
   return cluster_counter;
 }
 
+RMSDClustering::RMSDClustering(float rmsd_thr, bool compute_trans)
+    : rmsd_thr_(rmsd_thr),
+      compute_trans_(compute_trans),
+      filtered_counter_(0),
+      rmsd_counter_(0) {}
+
+double RMSDClustering::get_rmsd_lower_bound(
+    const Representative& rep, const IMP::algebra::Vector3D& centroid,
+    double radius_of_gyration) const {
+  // RMSD^2 = |c1-c2|^2 + RMSD^2 of the centered coordinates, and the
+  // RMSD of the centered coordinates (superimposed or not) is at least
+  // the difference of the radii of gyration (triangle inequality)
+  double rg_diff2 = IMP::square(rep.radius_of_gyration_ - radius_of_gyration);
+  if (compute_trans_) return std::sqrt(rg_diff2);
+  return std::sqrt(IMP::algebra::get_squared_distance(rep.centroid_, centroid)
+                   + rg_diff2);
+}
+
+double RMSDClustering::get_rmsd(const Representative& rep,
+                                const IMP::algebra::Vector3Ds& coords) const {
+  if (compute_trans_) {
+    IMP::algebra::Transformation3D tr =
+      IMP::algebra::get_transformation_aligning_first_to_second(rep.coords_,
+                                                                coords);
+    return IMP::algebra::get_rmsd_transforming_first(tr, rep.coords_, coords);
+  }
+  return IMP::algebra::get_rmsd(rep.coords_, coords);
+}
+
+unsigned int RMSDClustering::add_structure(
+    const IMP::algebra::Vector3Ds& coords) {
+  IMP_USAGE_CHECK(reps_.empty() || reps_[0].coords_.size() == coords.size(),
+                  "All structures must have the same number of points: "
+                  << coords.size() << " vs " << reps_[0].coords_.size());
+  IMP::algebra::Vector3D centroid = IMP::algebra::get_centroid(coords);
+  double rg = IMP::algebra::get_radius_of_gyration(coords);
+
+  // find the first representative within the threshold
+  int num_reps = reps_.size();
+  int found = num_reps;
+  unsigned int filtered = 0, computed = 0;
+  IMP_OMP_PRAGMA(parallel for schedule(dynamic, 16)
+                 num_threads(IMP::get_number_of_threads())
+                 if (IMP::get_number_of_threads() > 1 && num_reps > 64)
+                 reduction(min : found) reduction(+ : filtered, computed))
+  for (int r = 0; r < num_reps; r++) {
+    // a match with a lower index was already found by this thread
+    if (r >= found) continue;
+    if (get_rmsd_lower_bound(reps_[r], centroid, rg) > rmsd_thr_) {
+      filtered++;
+      continue;
+    }
+    computed++;
+    if (get_rmsd(reps_[r], coords) <= rmsd_thr_) found = r;
+  }
+  filtered_counter_ += filtered;
+  rmsd_counter_ += computed;
+
+  if (found == num_reps) { // new cluster
+    Representative rep;
+    rep.coords_ = coords;
+    rep.centroid_ = centroid;
+    rep.radius_of_gyration_ = rg;
+    reps_.push_back(rep);
+  }
+  cluster_numbers_.push_back(found);
+  return found;
+}
+
+unsigned int rmsd_clustering_streaming(
+    const std::vector<IMP::algebra::Vector3Ds>& coords_vec,
+    std::vector<int>& out_cluster_numbers, float rmsd_thr,
+    bool compute_trans) {
+  RMSDClustering clustering(rmsd_thr, compute_trans);
+  for (unsigned int i = 0; i < coords_vec.size(); i++) {
+    clustering.add_structure(coords_vec[i]);
+    if (i % 1000 == 0) {
+      std::cerr << "clustering structure " << i << " # clusters "
+                << clustering.get_number_of_clusters() << std::endl;
+    }
+  }
+  out_cluster_numbers = clustering.get_cluster_numbers();
+  std::cerr << clustering.get_number_of_rmsd_calculations()
+            << " RMSD calculations, "
+            << clustering.get_number_of_filtered_comparisons()
+            << " skipped by the lower bound" << std::endl;
+  return clustering.get_number_of_clusters();
+}
+
 IMPKINEMATICS_END_NAMESPACE
@@ -0,0 +1,88 @@
+/**
+ *  \file test_rmsd_clustering.cpp
+ *  \brief Test streaming RMSD clustering.
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ *
+ */
+#include <IMP/kinematics/RMSDClustering.h>
+#include <IMP/algebra/vector_generators.h>
+#include <IMP/algebra/Transformation3D.h>
+#include <IMP/algebra/Rotation3D.h>
+#include <IMP/threads.h>
+#include <IMP/flags.h>
+
+namespace {
+
+std::vector<IMP::algebra::Vector3Ds> make_structures(unsigned int n_centers,
+                                                     unsigned int n_copies) {
+  IMP::algebra::BoundingBox3D bb(IMP::algebra::Vector3D(-20, -20, -20),
+                                 IMP::algebra::Vector3D(20, 20, 20));
+  std::vector<IMP::algebra::Vector3Ds> ret;
+  for (unsigned int i = 0; i < n_centers; ++i) {
+    IMP::algebra::Vector3Ds center;
+    for (unsigned int k = 0; k < 30; ++k) {
+      center.push_back(IMP::algebra::get_random_vector_in(bb));
+    }
+    for (unsigned int j = 0; j < n_copies; ++j) {
+      // rigidly moved copy with small noise
+      IMP::algebra::Transformation3D tr(
+          IMP::algebra::get_random_rotation_3d(),
+          IMP::algebra::get_random_vector_in(bb));
+      IMP::algebra::Vector3Ds copy;
+      for (unsigned int k = 0; k < center.size(); ++k) {
+        copy.push_back(tr.get_transformed(center[k]) +
+                       IMP::algebra::get_random_vector_in(
+                           IMP::algebra::Sphere3D(
+                               IMP::algebra::get_zero_vector_d<3>(), .1)));
+      }
+      ret.push_back(copy);
+    }
+  }
+  return ret;
+}
+
+void check_clustering(const std::vector<IMP::algebra::Vector3Ds> &structs,
+                      unsigned int n_centers, unsigned int n_copies) {
+  std::vector<int> streaming, brute;
+  unsigned int ns = IMP::kinematics::rmsd_clustering_streaming(
+      structs, streaming, 2.0, true);
+  unsigned int nb = IMP::kinematics::rmsd_clustering(structs, brute, 2.0,
+                                                     true);
+  if (ns != n_centers || nb != n_centers) {
+    IMP_THROW("Wrong number of clusters: " << ns << " " << nb << " vs "
+              << n_centers, IMP::ValueException);
+  }
+  for (unsigned int i = 0; i < structs.size(); ++i) {
+    if (streaming[i] != static_cast<int>(i / n_copies) ||
+        brute[i] != streaming[i]) {
+      IMP_THROW("Wrong cluster for structure " << i << ": " << streaming[i]
+                << " " << brute[i], IMP::ValueException);
+    }
+  }
+}
+}
+
+int main(int argc, char *argv[]) {
+  IMP::setup_from_argv(argc, argv, "Test streaming RMSD clustering.");
+  std::vector<IMP::algebra::Vector3Ds> structs = make_structures(4, 5);
+  check_clustering(structs, 4, 5);
+  {
+    IMP::SetNumberOfThreads no(4);
+    check_clustering(structs, 4, 5);
+  }
+
+  // without superposition, the rigidly moved copies are all different
+  IMP::kinematics::RMSDClustering clustering(2.0, false);
+  for (unsigned int i = 0; i < structs.size(); ++i) {
+    clustering.add_structure(structs[i]);
+  }
+  if (clustering.get_number_of_clusters() != structs.size()) {
+    IMP_THROW("Expected every structure in its own cluster, got "
+              << clustering.get_number_of_clusters(), IMP::ValueException);
+  }
+  if (clustering.get_number_of_filtered_comparisons() == 0) {
+    IMP_THROW("Lower bound prefilter never used", IMP::ValueException);
+  }
+  return 0;
+}
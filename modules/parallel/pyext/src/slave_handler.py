@@ -6,6 +6,7 @@ import threading
 from IMP.parallel import NetworkError
 from IMP.parallel.master_communicator import MasterCommunicator
 from IMP.parallel.util import _TaskWrapper, _ContextWrapper
+from IMP.parallel.util import _CachedContextWrapper
 from IMP.parallel.util import _ErrorWrapper, _HeartBeat, _SlaveAction
 
 
@@ -61,6 +62,9 @@ class SlaveHandler(object):
 
     def _handle_network_io(self, master):
         setup_args = ()
+        # Startup state of each context, so switching back to a context
+        # does not rerun its startup
+        context_setup_args = {}
         while True:
             try:
                 obj = master._recv()
@@ -72,8 +76,12 @@ class SlaveHandler(object):
                         setup_args = ()
                     else:
                         setup_args = obj.obj()
+                    context_setup_args[obj.context_id] = setup_args
+                elif isinstance(obj, _CachedContextWrapper):
+                    setup_args = context_setup_args[obj.context_id]
                 elif isinstance(obj, _TaskWrapper):
-                    master._send(obj.obj(*setup_args))
+                    # Run a batch of tasks and send back all results together
+                    master._send([task(*setup_args) for task in obj.obj])
                 elif isinstance(obj, _SlaveAction):
                     obj.execute()
             except NetworkError:
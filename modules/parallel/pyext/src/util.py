@@ -4,6 +4,10 @@ import socket
 import select
 import sys
 import random
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
 
 
 class _ListenSocket(socket.socket):
@@ -36,8 +40,16 @@ class _ListenSocket(socket.socket):
 
 class _ContextWrapper(object):
 
-    def __init__(self, obj):
+    def __init__(self, obj, context_id=None):
         self.obj = obj
+        self.context_id = context_id
+
+
+class _CachedContextWrapper(object):
+    """Switch to a context whose startup state the slave already has"""
+
+    def __init__(self, context_id):
+        self.context_id = context_id
 
 
 class _TaskWrapper(object):
@@ -70,6 +82,46 @@ class _SetPathAction(_SlaveAction):
         sys.path.insert(0, self.path)
 
 
+# Data shared via files that have already been loaded by this process
+_shared_cache = {}
+
+
+def _load_shared_data(filename, is_array):
+    """Load shared data from a file, only once per process. Arrays are
+       memory-mapped read-only rather than read, so the operating system
+       shares the pages between all processes on the same host."""
+    obj = _shared_cache.get(filename, None)
+    if obj is None:
+        if is_array:
+            import numpy
+            obj = numpy.load(filename, mmap_mode='r')
+        else:
+            with open(filename, 'rb') as fh:
+                obj = pickle.load(fh)
+        _shared_cache[filename] = obj
+    return obj
+
+
+class _SharedData(object):
+    """Handle to data written once to a file by the master.
+       When pickled, only the filename is sent; when unpickled (e.g. on a
+       slave) the handle is replaced by the data itself."""
+
+    def __init__(self, filename, is_array):
+        self._filename = filename
+        self._is_array = is_array
+
+    def get(self):
+        """Get the shared data in this process"""
+        return _load_shared_data(self._filename, self._is_array)
+
+    def __reduce__(self):
+        return (_load_shared_data, (self._filename, self._is_array))
+
+    def __repr__(self):
+        return "<shared data in %s>" % self._filename
+
+
 if hasattr(select, 'poll'):
     def _poll_events(listen_sock, slaves, timeout):
         fileno = listen_sock.fileno()
@@ -16,3 +16,42 @@ def error_task():
 
 def simple_func(*args):
     return args
+
+
+class SharedTask(object):
+
+    """Return the sum of a slice of shared data"""
+
+    def __init__(self, shared, start, end):
+        self.shared, self.start, self.end = shared, start, end
+
+    def __call__(self):
+        return self.start, sum(self.shared[self.start:self.end])
+
+
+_startup_count = 0
+
+
+def counting_startup():
+    """Return the number of times startup has been run on this slave"""
+    global _startup_count
+    _startup_count += 1
+    return (_startup_count,)
+
+
+class SlowOnceTask(object):
+
+    """Run slowly the first time, and quickly for any copy run afterwards"""
+
+    def __init__(self, marker):
+        self.marker = marker
+
+    def __call__(self):
+        import os
+        import time
+        if os.path.exists(self.marker):
+            return 'fast'
+        else:
+            open(self.marker, 'w').close()
+            time.sleep(20)
+            return 'slow'
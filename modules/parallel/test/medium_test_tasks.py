@@ -0,0 +1,26 @@
+import IMP
+import IMP.test
+import IMP.parallel
+import os
+import _util
+import _tasks
+
+
+class Tests(IMP.test.TestCase):
+
+    """Test slow tasks in parallel jobs"""
+
+    def test_speculative(self):
+        """Test speculative re-execution of slow tasks"""
+        m = _util.Manager(output='spec%d.out', speculative=True)
+        m.add_slave(IMP.parallel.LocalSlave())
+        m.add_slave(IMP.parallel.LocalSlave())
+        c = m.get_context()
+        d = IMP.test.TempDir()
+        c.add_task(_tasks.SlowOnceTask(os.path.join(d.tmpdir, 'marker')))
+        self.assertEqual(list(c.get_results_unordered()), ['fast'])
+        _util.unlink("spec0.out")
+        _util.unlink("spec1.out")
+
+if __name__ == '__main__':
+    IMP.test.main()
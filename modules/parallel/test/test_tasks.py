@@ -53,6 +53,82 @@ class Tests(IMP.test.TestCase):
         results = list(c.get_results_unordered())
         _util.unlink("floats0.out")
 
+    def test_shared_data(self):
+        """Test passing shared data to tasks"""
+        m = _util.Manager(output='shared%d.out')
+        m.add_slave(IMP.parallel.LocalSlave())
+        data = list(range(100))
+        shared = m.share(data)
+        self.assertEqual(shared.get(), data)
+        c = m.get_context()
+        for i in range(0, 100, 10):
+            c.add_task(_tasks.SharedTask(shared, i, i + 10))
+        results = sorted(c.get_results_unordered())
+        self.assertEqual(results, [(i, sum(range(i, i + 10)))
+                                   for i in range(0, 100, 10)])
+        _util.unlink("shared0.out")
+
+    def test_shared_array(self):
+        """Test passing a shared NumPy array to tasks"""
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest("no numpy module")
+        m = _util.Manager(output='sharedarr%d.out')
+        m.add_slave(IMP.parallel.LocalSlave())
+        shared = m.share(numpy.arange(100.))
+        c = m.get_context()
+        for i in range(0, 100, 50):
+            c.add_task(_tasks.SharedTask(shared, i, i + 50))
+        results = sorted(c.get_results_unordered())
+        self.assertEqual(results, [(0, 1225.), (50, 3725.)])
+        _util.unlink("sharedarr0.out")
+
+    def test_task_generator(self):
+        """Test taking tasks from a generator"""
+        m = _util.Manager(output='taskgen%d.out')
+        m.add_slave(IMP.parallel.LocalSlave())
+        m.add_slave(IMP.parallel.LocalSlave())
+        c = m.get_context()
+        c.add_task(_tasks.SimpleTask(-1))
+        pulled = []
+
+        def get_tasks():
+            for i in range(10):
+                pulled.append(i)
+                yield _tasks.SimpleTask(i)
+        results = c.get_results_unordered(get_tasks())
+        first = next(results)
+        # Tasks should only be taken from the generator as slaves
+        # become free
+        self.assertLessEqual(len(pulled), 3)
+        self.assertEqual(sorted([first] + list(results)), list(range(-1, 10)))
+        _util.unlink("taskgen0.out")
+        _util.unlink("taskgen1.out")
+
+    def test_batch_prefetch(self):
+        """Test sending tasks in batches and queuing them on slaves"""
+        m = _util.Manager(output='batch%d.out', batch_size=3, prefetch=2)
+        m.add_slave(IMP.parallel.LocalSlave())
+        m.add_slave(IMP.parallel.LocalSlave())
+        c = m.get_context()
+        for i in range(20):
+            c.add_task(_tasks.SimpleTask(i))
+        results = sorted(c.get_results_unordered())
+        self.assertEqual(results, list(range(20)))
+        _util.unlink("batch0.out")
+        _util.unlink("batch1.out")
+
+    def test_context_switch(self):
+        """Test that slaves cache the startup state of each context"""
+        m = _util.Manager(output='ctxswitch%d.out')
+        m.add_slave(IMP.parallel.LocalSlave())
+        c1 = m.get_context(startup=_tasks.counting_startup)
+        c2 = m.get_context(startup=_tasks.counting_startup)
+        for c, expected in ((c1, 1), (c2, 2), (c1, 1)):
+            c.add_task(_tasks.simple_func)
+            self.assertEqual(list(c.get_results_unordered()), [(expected,)])
+        _util.unlink("ctxswitch0.out")
 
 if __name__ == '__main__':
     IMP.test.main()
@@ -8,6 +8,7 @@
 import IMP
 import IMP.pmi
 import operator
+import numpy as np
 
 class _CrossLinkDataBaseStandardKeys(object):
     '''
@@ -119,6 +120,10 @@ class _ProteinsResiduesArray(tuple):
         outstr+=" "+self.cldbsk.residue2_key+" "+str(self[3])
         return outstr
 
+# comparisons which numpy can apply to a whole column at once
+_vectorized_comparisons = frozenset([operator.eq, operator.ne, operator.lt,
+                                     operator.le, operator.gt, operator.ge])
+
 class FilterOperator(object):
     '''
     This class allows to create filter functions that can be passed to the CrossLinkDataBase
@@ -163,6 +168,28 @@ class FilterOperator(object):
 
         return op(FilterOperator1.evaluate(xl_item), FilterOperator2.evaluate(xl_item))
 
+    def get_mask(self, columns):
+        '''
+        Evaluate the filter on all the cross-links of a _CrossLinkColumns
+        instance at once, and return a numpy array of booleans.
+        Comparisons other than those in the operator module (e.g. custom
+        functions) fall back to evaluate() on each cross-link.
+        '''
+        if len(self.operations) == 0:
+            keyword, op, value = self.values
+            if op in _vectorized_comparisons and np.ndim(value) == 0:
+                try:
+                    mask = op(columns.get_column(keyword), value)
+                except TypeError:
+                    mask = None
+                if np.shape(mask) == (len(columns),):
+                    return np.asarray(mask, dtype=bool)
+            return np.array([self.evaluate(xl) for xl in columns.xls],
+                            dtype=bool)
+        FilterOperator1, op, FilterOperator2 = self.operations
+        return np.asarray(op(FilterOperator1.get_mask(columns),
+                             FilterOperator2.get_mask(columns)), dtype=bool)
+
 '''
 def filter_factory(xl_):
 
@@ -176,6 +203,52 @@ def filter_factory(xl_):
     return FilterOperator
 '''
 
+class _CrossLinkColumns(object):
+    '''
+    This class holds the values of each key of a list of cross-links as a
+    numpy array (column), so that FilterOperator expressions can be
+    evaluated on all the cross-links at once. Each column is read from the
+    cross-link dicts when first needed, so an instance should only be used
+    while the cross-links are not changed.
+    '''
+
+    def __init__(self, xlids, xls):
+        '''
+        @param xlids the unique id of each cross-link
+        @param xls the cross-link dicts
+        '''
+        self.xlids = xlids
+        self.xls = xls
+        self._columns = {}
+
+    def __len__(self):
+        return len(self.xls)
+
+    def get_column(self, key):
+        '''
+        Return the values of key as a numpy array, with a numeric or string
+        type when all the values have the same type and an object array
+        otherwise
+        '''
+        if key not in self._columns:
+            values = [xl[key] for xl in self.xls]
+            column = None
+            # numpy would convert mixed values to a common type (e.g. ints
+            # to strings), and comparisons would then disagree with evaluate()
+            if len(set(type(v) for v in values)) == 1:
+                try:
+                    column = np.array(values)
+                except ValueError:
+                    pass
+            if column is None or column.shape != (len(values),) \
+               or column.dtype.kind not in 'biufU':
+                column = np.empty(len(values), dtype=object)
+                for n, v in enumerate(values):
+                    column[n] = v
+            self._columns[key] = column
+        return self._columns[key]
+
+
 class CrossLinkDataBaseKeywordsConverter(_CrossLinkDataBaseStandardKeys):
     '''
     This class is needed to convert the keywords from a generic database
@@ -417,7 +490,7 @@ class CrossLinkDataBase(_CrossLinkDataBaseStandardKeys):
         return self.data_base[xlid]
 
     def __len__(self):
-        return len([xl for xl in self])
+        return sum(len(xls) for xls in self.data_base.values())
 
     def get_name(self):
         return self.name
@@ -542,17 +615,21 @@ class CrossLinkDataBase(_CrossLinkDataBaseStandardKeys):
                 xl[self.unique_sub_id_key]=k+"."+str(n+1)
 
     def update_cross_link_redundancy(self):
+        # plain (p1,p2,r1,r2) tuples hash like _ProteinsResiduesArray,
+        # but are much cheaper to make
         redundancy_data_base={}
-        for xl in self:
-            pra=_ProteinsResiduesArray(xl)
+        xls=list(self)
+        pras=[(xl[self.protein1_key],xl[self.protein2_key],
+               xl[self.residue1_key],xl[self.residue2_key]) for xl in xls]
+        for xl,pra in zip(xls,pras):
+            inverted=(pra[1],pra[0],pra[3],pra[2])
             if pra not in redundancy_data_base:
                 redundancy_data_base[pra]=[xl[self.unique_sub_id_key]]
-                redundancy_data_base[pra.get_inverted()]=[xl[self.unique_sub_id_key]]
+                redundancy_data_base[inverted]=[xl[self.unique_sub_id_key]]
             else:
                 redundancy_data_base[pra].append(xl[self.unique_sub_id_key])
-                redundancy_data_base[pra.get_inverted()].append(xl[self.unique_sub_id_key])
-        for xl in self:
-            pra=_ProteinsResiduesArray(xl)
+                redundancy_data_base[inverted].append(xl[self.unique_sub_id_key])
+        for xl,pra in zip(xls,pras):
             xl[self.redundancy_key]=len(redundancy_data_base[pra])
             xl[self.redundancy_list_key]=redundancy_data_base[pra]
 
@@ -590,15 +667,31 @@ class CrossLinkDataBase(_CrossLinkDataBaseStandardKeys):
 
         return string
 
+    def get_columns(self):
+        '''
+        Return a _CrossLinkColumns instance holding the current cross-links,
+        to evaluate FilterOperator expressions on all of them at once.
+        The cross-link dicts can be changed from outside the database (and
+        are shared with filtered databases), so the columns are built anew
+        for each call.
+        '''
+        xlids=[]
+        xls=[]
+        for xlid in self.xlid_iterator():
+            for xl in self.data_base[xlid]:
+                xlids.append(xlid)
+                xls.append(xl)
+        return _CrossLinkColumns(xlids,xls)
+
     def filter(self,FilterOperator):
+        columns=self.get_columns()
         new_xl_dict={}
-        for id in self.data_base.keys():
-            for xl in self.data_base[id]:
-                if FilterOperator.evaluate(xl):
-                    if id not in new_xl_dict:
-                        new_xl_dict[id]=[xl]
-                    else:
-                        new_xl_dict[id].append(xl)
+        for n in np.flatnonzero(FilterOperator.get_mask(columns)):
+            xlid=columns.xlids[n]
+            if xlid not in new_xl_dict:
+                new_xl_dict[xlid]=[columns.xls[n]]
+            else:
+                new_xl_dict[xlid].append(columns.xls[n])
         return CrossLinkDataBase(self.cldbkc,new_xl_dict)
 
 
@@ -642,12 +735,14 @@ class CrossLinkDataBase(_CrossLinkDataBaseStandardKeys):
         example: `cldb1.set_value(cldb1.protein1_key,'FFF',FO(cldb.protein1_key,operator.eq,"AAA"))`
         '''
 
-        for xl in self:
-            if FilterOperator is not None:
-                if FilterOperator.evaluate(xl):
-                    xl[key]=new_value
-            else:
-                xl[key]=new_value
+        if FilterOperator is not None:
+            columns=self.get_columns()
+            xls=[columns.xls[n]
+                 for n in np.flatnonzero(FilterOperator.get_mask(columns))]
+        else:
+            xls=self
+        for xl in xls:
+            xl[key]=new_value
         self.__update()
 
     def get_values(self,key):
@@ -655,6 +750,10 @@ class CrossLinkDataBase(_CrossLinkDataBaseStandardKeys):
         this function returns the list of values for a given key in the database
         alphanumerically sorted
         '''
+        column=self.get_columns().get_column(key)
+        if column.dtype != object:
+            # tolist() gives back Python ints, floats and strs
+            return np.unique(column).tolist()
         values=set()
         for xl in self:
             values.add(xl[key])
@@ -46,6 +46,7 @@ class ReplicaExchange0(object):
                  num_sample_rounds=1,
                  number_of_best_scoring_models=500,
                  monte_carlo_steps=10,
+                 monte_carlo_number_of_tries=1,
                  molecular_dynamics_steps=10,
                  molecular_dynamics_max_time_step=1.0,
                  number_of_frames=1000,
@@ -98,6 +99,8 @@ class ReplicaExchange0(object):
            @param number_of_best_scoring_models Number of top-scoring PDB models
                   to keep around for analysis
            @param monte_carlo_steps        Number of MC steps per round
+           @param monte_carlo_number_of_tries Number of moves to try at each
+                  MC step (see IMP::core::MonteCarloWithMultipleTries)
            @param molecular_dynamics_steps  Number of MD steps per round
            @param molecular_dynamics_max_time_step Max time step for MD
            @param number_of_frames         Number of REX frames to run
@@ -148,6 +151,7 @@ class ReplicaExchange0(object):
         self.replica_exchange_object = replica_exchange_object
         self.molecular_dynamics_max_time_step = molecular_dynamics_max_time_step
         self.vars["monte_carlo_temperature"] = monte_carlo_temperature
+        self.vars["monte_carlo_number_of_tries"] = monte_carlo_number_of_tries
         self.vars[
             "replica_exchange_minimum_temperature"] = replica_exchange_minimum_temperature
         self.vars[
@@ -213,7 +217,8 @@ class ReplicaExchange0(object):
             print("Setting up MonteCarlo")
             sampler_mc = IMP.pmi.samplers.MonteCarlo(self.model,
                                                      self.monte_carlo_sample_objects,
-                                                     self.vars["monte_carlo_temperature"])
+                                                     self.vars["monte_carlo_temperature"],
+                                                     number_of_tries=self.vars["monte_carlo_number_of_tries"])
             if self.vars["simulated_annealing"]:
                 tmin=self.vars["simulated_annealing_minimum_temperature"]
                 tmax=self.vars["simulated_annealing_maximum_temperature"]
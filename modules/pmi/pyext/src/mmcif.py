@@ -9,9 +9,12 @@ import IMP.pmi.tools
 from IMP.pmi.tools import OrderedDict
 import IMP.pmi.output
 import IMP.pmi.metadata
+import numpy as np
 import re
 import sys
 import os
+import shutil
+import tempfile
 import textwrap
 import weakref
 
@@ -60,17 +63,74 @@ class CifLoopWriter(object):
         self.category = category
         self.keys = keys
         self._empty_loop = True
-    def write(self, **kwargs):
+    def _write_header(self):
         if self._empty_loop:
             f = self.writer.fh
             f.write("#\nloop_\n")
             for k in self.keys:
                 f.write("%s.%s\n" % (self.category, k))
             self._empty_loop = False
+    def write(self, **kwargs):
+        self._write_header()
         l = _LineWriter(self.writer)
         for k in self.keys:
             l.write(kwargs.get(k, self.writer.omitted))
         self.writer.fh.write("\n")
+    def write_chunk(self, **kwargs):
+        """Write many rows at once.
+           Each keyword gives the values of that key for every row, as a
+           list or numpy array, or a single value to use for all rows.
+           The output is the same as calling write() for each row, but rows
+           that fit on a single line are formatted a column at a time."""
+        columns = []
+        num_rows = 0
+        for k in self.keys:
+            v = kwargs.get(k, self.writer.omitted)
+            if isinstance(v, np.ndarray):
+                v = v if v.dtype.kind in 'fiu' else v.tolist()
+            if isinstance(v, (list, tuple, np.ndarray)):
+                num_rows = len(v)
+            columns.append(v)
+        if num_rows == 0:
+            return
+        self._write_header()
+        lw = _LineWriter(self.writer)
+        formatted = []
+        multi_line = False
+        for v in columns:
+            if isinstance(v, np.ndarray):
+                fmt = '%.3f' if v.dtype.kind == 'f' else '%d'
+                formatted.append(np.char.mod(fmt, v).tolist())
+            elif isinstance(v, (list, tuple)):
+                multi_line |= any(isinstance(x, str)
+                                  and len(x) > lw.multi_line_len for x in v)
+                formatted.append([self.writer._repr(x) for x in v])
+            else:
+                multi_line |= isinstance(v, str) and len(v) > lw.multi_line_len
+                formatted.append([self.writer._repr(v)] * num_rows)
+        lines = []
+        for row, vals in enumerate(zip(*formatted)):
+            line = " ".join(vals)
+            # rows that write() would wrap are passed to it
+            if multi_line or len(line) > lw.line_len:
+                self._flush_lines(lines)
+                self._write_row(columns, row)
+            else:
+                lines.append(line)
+        self._flush_lines(lines)
+    def _flush_lines(self, lines):
+        if lines:
+            self.writer.fh.write("\n".join(lines) + "\n")
+            del lines[:]
+    def _write_row(self, columns, row):
+        kwargs = {}
+        for k, v in zip(self.keys, columns):
+            if isinstance(v, np.ndarray):
+                v = v[row].item()
+            elif isinstance(v, (list, tuple)):
+                v = v[row]
+            kwargs[k] = v
+        self.write(**kwargs)
     def __enter__(self):
         return self
     def __exit__(self, exc_type, exc_value, traceback):
@@ -877,20 +937,49 @@ class Model(object):
         self.atoms = [t for t in particle_infos_for_pdb if t[1] is not None]
 
 class ModelDumper(Dumper):
+    _atom_keys = ["id", "label_atom_id", "label_comp_id", "label_seq_id",
+                  "label_asym_id", "Cartn_x", "Cartn_y", "Cartn_z",
+                  "label_entity_id", "model_id"]
+    _sphere_keys = ["ordinal_id", "entity_id", "seq_id_begin", "seq_id_end",
+                    "asym_id", "Cartn_x", "Cartn_y", "Cartn_z",
+                    "object_radius", "model_id"]
+
     def __init__(self, simo):
         super(ModelDumper, self).__init__(simo)
         self.models = []
+        # Coordinates of models that have not been written yet
+        self._unwritten = []
+        self._atom_loop = self._sphere_loop = None
 
     def add(self, prot, protocol, assembly, group):
         m = Model(prot, self.simo, protocol, assembly, group)
         self.models.append(m)
+        self._unwritten.append(m)
         m.id = len(self.models)
         return m
 
+    def write_models(self):
+        """Write out the coordinates of all models added so far.
+           They are kept in temporary files, which dump() copies into the
+           output, so the models themselves no longer need to be held in
+           memory."""
+        if self._atom_loop is None:
+            self._atom_loop = CifLoopWriter(
+                     CifWriter(tempfile.TemporaryFile(mode='w+')),
+                     "_atom_site", self._atom_keys)
+            self._sphere_loop = CifLoopWriter(
+                     CifWriter(tempfile.TemporaryFile(mode='w+')),
+                     "_ihm_sphere_obj_site", self._sphere_keys)
+            self._num_atoms = self._num_spheres = 0
+        for model in self._unwritten:
+            self.write_atoms(model)
+            self.write_spheres(model)
+            del model.atoms, model.spheres
+        self._unwritten = []
+
     def dump(self, writer):
+        self.write_models()
         self.dump_model_list(writer)
-        num_atoms = sum(len(m.atoms) for m in self.models)
-        num_spheres = sum(len(m.spheres) for m in self.models)
         self.dump_atoms(writer)
         self.dump_spheres(writer)
 
@@ -908,52 +997,67 @@ class ModelDumper(Dumper):
                         protocol_id=model.protocol.id)
                 ordinal += 1
 
+    def _get_coordinates(self, model, infos):
+        """Get the centered coordinates of the given particles as arrays"""
+        xyz = np.array([list(t[0]) for t in infos],
+                       dtype=float).reshape(-1, 3)
+        xyz -= np.asarray(model.geometric_center, dtype=float)
+        return xyz[:,0], xyz[:,1], xyz[:,2]
+
+    def write_atoms(self, model):
+        if not model.atoms:
+            return
+        n = len(model.atoms)
+        x, y, z = self._get_coordinates(model, model.atoms)
+        self._atom_loop.write_chunk(
+                id=np.arange(self._num_atoms + 1, self._num_atoms + n + 1),
+                label_atom_id=[t[1].get_string() for t in model.atoms],
+                label_comp_id=[t[2].get_string() for t in model.atoms],
+                label_asym_id=[t[3] for t in model.atoms],
+                label_entity_id=[model.entity_for_chain[t[3]].id
+                                 for t in model.atoms],
+                label_seq_id=[t[4] for t in model.atoms],
+                Cartn_x=x, Cartn_y=y, Cartn_z=z, model_id=model.id)
+        self._num_atoms += n
+
+    def write_spheres(self, model):
+        if not model.spheres:
+            return
+        n = len(model.spheres)
+        x, y, z = self._get_coordinates(model, model.spheres)
+        # (xyz, atom_type, residue_type, chain_id, residue_index,
+        #  all_indexes, radius)
+        all_indexes = [t[5] if t[5] is not None else (t[4],)
+                       for t in model.spheres]
+        self._sphere_loop.write_chunk(
+                ordinal_id=np.arange(self._num_spheres + 1,
+                                     self._num_spheres + n + 1),
+                entity_id=[model.entity_for_chain[t[3]].id
+                           for t in model.spheres],
+                seq_id_begin=[i[0] for i in all_indexes],
+                seq_id_end=[i[-1] for i in all_indexes],
+                asym_id=[t[3] for t in model.spheres],
+                Cartn_x=x, Cartn_y=y, Cartn_z=z,
+                object_radius=np.array([t[6] for t in model.spheres],
+                                       dtype=float),
+                model_id=model.id)
+        self._num_spheres += n
+
+    def _copy_loop(self, loop, writer):
+        # The spool is kept open, so that a later dump() writes all models,
+        # including any added since
+        fh = loop.writer.fh
+        fh.seek(0)
+        shutil.copyfileobj(fh, writer.fh)
+        fh.seek(0, os.SEEK_END)
+        if not loop._empty_loop:
+            writer.fh.write("#\n")
+
     def dump_atoms(self, writer):
-        ordinal = 1
-        with writer.loop("_atom_site",
-                         ["id", "label_atom_id", "label_comp_id",
-                          "label_seq_id",
-                          "label_asym_id", "Cartn_x",
-                          "Cartn_y", "Cartn_z", "label_entity_id",
-                          "model_id"]) as l:
-            for model in self.models:
-                for atom in model.atoms:
-                    (xyz, atom_type, residue_type, chain_id, residue_index,
-                     all_indexes, radius) = atom
-                    l.write(id=ordinal, label_atom_id=atom_type.get_string(),
-                            label_comp_id=residue_type.get_string(),
-                            label_asym_id=chain_id,
-                            label_entity_id=model.entity_for_chain[chain_id].id,
-                            label_seq_id=residue_index,
-                            Cartn_x=xyz[0] - model.geometric_center[0],
-                            Cartn_y=xyz[1] - model.geometric_center[1],
-                            Cartn_z=xyz[2] - model.geometric_center[2],
-                            model_id=model.id)
-                    ordinal += 1
+        self._copy_loop(self._atom_loop, writer)
 
     def dump_spheres(self, writer):
-        ordinal = 1
-        with writer.loop("_ihm_sphere_obj_site",
-                         ["ordinal_id", "entity_id", "seq_id_begin",
-                          "seq_id_end", "asym_id", "Cartn_x",
-                          "Cartn_y", "Cartn_z", "object_radius",
-                          "model_id"]) as l:
-            for model in self.models:
-                for sphere in model.spheres:
-                    (xyz, atom_type, residue_type, chain_id, residue_index,
-                     all_indexes, radius) = sphere
-                    if all_indexes is None:
-                        all_indexes = (residue_index,)
-                    l.write(ordinal_id=ordinal,
-                            entity_id=model.entity_for_chain[chain_id].id,
-                            seq_id_begin = all_indexes[0],
-                            seq_id_end = all_indexes[-1],
-                            asym_id=chain_id,
-                            Cartn_x=xyz[0] - model.geometric_center[0],
-                            Cartn_y=xyz[1] - model.geometric_center[1],
-                            Cartn_z=xyz[2] - model.geometric_center[2],
-                            object_radius=radius, model_id=model.id)
-                    ordinal += 1
+        self._copy_loop(self._sphere_loop, writer)
 
 
 class ModelProtocolDumper(Dumper):
@@ -1164,36 +1268,44 @@ modeling. These may need to be added manually below.""")
                       "seq_id", "Cartn_x",
                       "Cartn_y", "Cartn_z", "B_iso_or_equiv",
                       "ordinal_id"]) as l:
+            element_table = IMP.atom.get_element_table()
             for model in self.all_models():
                 for f in model.fragments:
                     sel = IMP.atom.Selection(f.starting_hier,
                                residue_indexes=list(range(f.start, f.end + 1)))
-                    for a in sel.get_selected_particles():
-                        coord = IMP.core.XYZ(a).get_coordinates()
-                        atom = IMP.atom.Atom(a)
-                        element = atom.get_element()
-                        element = IMP.atom.get_element_table().get_name(element)
-                        atom_name = atom.get_atom_type().get_string()
-                        group_pdb = 'ATOM'
-                        if atom_name.startswith('HET:'):
-                            group_pdb = 'HETATM'
-                            atom_name = atom_name[4:]
-                        res = IMP.atom.get_residue(atom)
-                        res_name = res.get_residue_type().get_string()
-                        chain_id = self.simo.get_chain_for_component(
+                    atoms = [IMP.atom.Atom(a)
+                             for a in sel.get_selected_particles()]
+                    if not atoms:
+                        continue
+                    xyz = np.array([list(IMP.core.XYZ(a).get_coordinates())
+                                    for a in atoms], dtype=float)
+                    atom_names = [a.get_atom_type().get_string()
+                                  for a in atoms]
+                    residues = [IMP.atom.get_residue(a) for a in atoms]
+                    chain_id = self.simo.get_chain_for_component(
                                             f.component, self.output)
-                        entity = self.simo.entities[f.component]
-                        l.write(starting_model_id=model.name,
-                                group_PDB=group_pdb,
-                                id=atom.get_input_index(), type_symbol=element,
-                                atom_id=atom_name, comp_id=res_name,
-                                entity_id=entity.id,
-                                asym_id=chain_id,
-                                seq_id=res.get_index(), Cartn_x=coord[0],
-                                Cartn_y=coord[1], Cartn_z=coord[2],
-                                B_iso_or_equiv=atom.get_temperature_factor(),
-                                ordinal_id=ordinal)
-                        ordinal += 1
+                    entity = self.simo.entities[f.component]
+                    l.write_chunk(starting_model_id=model.name,
+                            group_PDB=['HETATM' if n.startswith('HET:')
+                                       else 'ATOM' for n in atom_names],
+                            id=[a.get_input_index() for a in atoms],
+                            type_symbol=[element_table.get_name(
+                                              a.get_element()) for a in atoms],
+                            atom_id=[n[4:] if n.startswith('HET:') else n
+                                     for n in atom_names],
+                            comp_id=[r.get_residue_type().get_string()
+                                     for r in residues],
+                            entity_id=entity.id,
+                            asym_id=chain_id,
+                            seq_id=[r.get_index() for r in residues],
+                            Cartn_x=xyz[:,0], Cartn_y=xyz[:,1],
+                            Cartn_z=xyz[:,2],
+                            B_iso_or_equiv=np.array(
+                                   [a.get_temperature_factor() for a in atoms],
+                                   dtype=float),
+                            ordinal_id=np.arange(ordinal,
+                                                 ordinal + len(atoms)))
+                    ordinal += len(atoms)
 
 class StructConfDumper(Dumper):
     def all_rigid_fragments(self):
@@ -1550,6 +1662,8 @@ class ProtocolOutput(IMP.pmi.output.ProtocolOutput):
                 m = self.add_model(group)
                 # Don't alter original RMF coordinates
                 m.geometric_center = [0,0,0]
+            # Write out this cluster's models before loading the next
+            self.model_dump.write_models()
 
     def add_em2d_restraint(self, images, resolution, pixel_size,
                            image_resolution, projection_number, micrographs):
@@ -97,6 +97,9 @@ class CrossLinkingMassSpectrometryRestraint(object):
         self.outputlevel = "low"
 
         restraints = []
+        # position of each cross-link's restraint in restraints
+        self._xl_restraint_indexes = []
+        self._output_keys = None
 
         # if PMI2, first add all the molecule copies as clones to the database
         if use_pmi2:
@@ -280,6 +283,7 @@ class CrossLinkingMassSpectrometryRestraint(object):
                         self.rslin.add_restraint(pr)
 
                     self.xl_list.append(xl)
+                    self._xl_restraint_indexes.append(len(restraints) - 1)
 
                     indb.write(str(xl) + "\n")
 
@@ -288,6 +292,7 @@ class CrossLinkingMassSpectrometryRestraint(object):
 
         lw = IMP.isd.LogWrapper(restraints,1.0)
         self.rs.add_restraint(lw)
+        self.xl_restraints = restraints
 
     def add_to_model(self):
         """ Add the restraint to the model so that it is evaluated """
@@ -402,6 +407,7 @@ class CrossLinkingMassSpectrometryRestraint(object):
     def set_label(self, s):
         """ Set the restraint output label """
         self.label=s
+        self._output_keys = None
 
     def get_output(self):
         """ Get the output of the restraint to be used by the IMP.pmi.output object"""
@@ -417,32 +423,40 @@ class CrossLinkingMassSpectrometryRestraint(object):
                    self.label] = self.rspsi.unprotected_evaluate(None)
         output["CrossLinkingMassSpectrometryRestraint_Linear_Score_" +
                self.label] = self.rslin.unprotected_evaluate(None)
-        for xl in self.xl_list:
-
-            xl_label=xl["ShortLabel"]
-            ln = xl["Restraint"]
-            p0 = xl["Particle1"]
-            p1 = xl["Particle2"]
-            output["CrossLinkingMassSpectrometryRestraint_Score_" +
-                   xl_label] = str(-log(ln.unprotected_evaluate(None)))
-
-            d0 = IMP.core.XYZ(p0)
-            d1 = IMP.core.XYZ(p1)
-            output["CrossLinkingMassSpectrometryRestraint_Distance_" +
-                   xl_label] = str(IMP.core.get_distance(d0, d1))
-
-
-        for psiname in self.psi_dictionary:
-            output["CrossLinkingMassSpectrometryRestraint_Psi_" +
-                    str(psiname) + "_" + self.label] = str(self.psi_dictionary[psiname][0].get_scale())
-
-        for sigmaname in self.sigma_dictionary:
-            output["CrossLinkingMassSpectrometryRestraint_Sigma_" +
-                   str(sigmaname) + "_" + self.label] = str(self.sigma_dictionary[sigmaname][0].get_scale())
-
+        if self._output_keys is None:
+            self._output_keys = self._get_output_keys()
+        score_keys, distance_keys, psi_keys, sigma_keys = self._output_keys
+
+        # each cross-link is one contribution of one restraint
+        scores = IMP.isd.get_cross_link_ms_scores(self.xl_restraints)
+        distances = IMP.isd.get_cross_link_ms_distances(self.xl_restraints)
+        for score_key, distance_key, ri, distance in zip(
+                score_keys, distance_keys, self._xl_restraint_indexes,
+                distances):
+            output[score_key] = str(scores[ri])
+            output[distance_key] = str(distance)
+
+        for key, psiname in psi_keys:
+            output[key] = str(self.psi_dictionary[psiname][0].get_scale())
+        for key, sigmaname in sigma_keys:
+            output[key] = str(self.sigma_dictionary[sigmaname][0].get_scale())
 
         return output
 
+    def _get_output_keys(self):
+        """ Build the output keys once, so each frame only fills in numbers"""
+        score_keys = ["CrossLinkingMassSpectrometryRestraint_Score_" +
+                      xl["ShortLabel"] for xl in self.xl_list]
+        distance_keys = ["CrossLinkingMassSpectrometryRestraint_Distance_" +
+                         xl["ShortLabel"] for xl in self.xl_list]
+        psi_keys = [("CrossLinkingMassSpectrometryRestraint_Psi_" +
+                     str(psiname) + "_" + self.label, psiname)
+                    for psiname in self.psi_dictionary]
+        sigma_keys = [("CrossLinkingMassSpectrometryRestraint_Sigma_" +
+                       str(sigmaname) + "_" + self.label, sigmaname)
+                      for sigmaname in self.sigma_dictionary]
+        return score_keys, distance_keys, psi_keys, sigma_keys
+
     def get_particles_to_sample(self):
         """ Get the particles to be sampled by the IMP.pmi.sampler object """
         ps = {}
@@ -43,13 +43,16 @@ class MonteCarlo(object):
     except ImportError:
         isd_available = False
 
-    def __init__(self, m, objects=None, temp=1.0, filterbyname=None):
+    def __init__(self, m, objects=None, temp=1.0, filterbyname=None,
+                 number_of_tries=1):
         """Setup Monte Carlo sampling
         @param m             The IMP Model
         @param objects       What to sample. Use flat list of particles or
                (deprecated) 'MC Sample Objects' from PMI1
         @param temp The MC temperature
         @param filterbyname Not used
+        @param number_of_tries If greater than 1, try this many moves at each
+               step (see IMP::core::MonteCarloWithMultipleTries)
         """
         self.losp = [
             "Rigid_Bodies",
@@ -130,7 +133,11 @@ class MonteCarlo(object):
         # SerialMover
         self.smv = IMP.core.SerialMover(self.mvs)
 
-        self.mc = IMP.core.MonteCarlo(self.m)
+        if number_of_tries > 1:
+            self.mc = IMP.core.MonteCarloWithMultipleTries(self.m,
+                                                           number_of_tries)
+        else:
+            self.mc = IMP.core.MonteCarlo(self.m)
         self.mc.set_scoring_function(get_restraint_set(self.m))
         self.mc.set_return_best(False)
         self.mc.set_kt(self.temp)
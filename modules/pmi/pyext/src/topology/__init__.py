@@ -107,6 +107,8 @@ class System(_SystemBase):
         self._number_of_states = 0
         self.states = []
         self.built=False
+        # structures read from PDB files, shared by all molecules and copies
+        self._structure_cache = {}
 
         # the root hierarchy node
         self.hier=self._create_hierarchy()
@@ -137,6 +139,8 @@ class System(_SystemBase):
         if not self.built:
             for state in self.states:
                 state.build(**kwargs)
+            # the molecules only use copies of the cached structures
+            system_tools.clear_structure_cache(self._structure_cache)
             self.built=True
         return self.hier
 
@@ -257,6 +261,9 @@ class Molecule(_SystemBase):
         self.hier.set_name(name)
         IMP.atom.Copy.setup_particle(self.hier,copy_num)
         IMP.atom.Chain.setup_particle(self.hier,chain_id)
+        # the same for all residues, so only look them up once
+        self._copy_index = copy_num
+        self._state_index = IMP.atom.State(self.state.hier).get_state_index()
         # create TempResidues from the sequence (if passed)
         self.residues=[]
         for ns,s in enumerate(sequence):
@@ -372,7 +379,8 @@ class Molecule(_SystemBase):
         self.pdb_fn = pdb_fn
 
         # get IMP.atom.Residues from the pdb file
-        rhs = system_tools.get_structure(self.mdl,pdb_fn,chain_id,res_range,offset,ca_only=ca_only)
+        rhs = system_tools.get_structure(self.mdl,pdb_fn,chain_id,res_range,offset,ca_only=ca_only,
+                                         cache=self.state.system._structure_cache)
         self.coord_finder.add_residues(rhs)
 
         if len(self.residues)==0:
@@ -605,16 +613,18 @@ class Molecule(_SystemBase):
                 br.update_parents()
             self.built = True
 
-            for res in self.residues:
-                idx = res.get_index()
-
-                # first off, store the highest resolution available in residue.hier
-                new_ps = IMP.atom.Selection(
+            # first off, store the highest resolution available in residue.hier
+            # (one selection for the whole molecule rather than one per residue)
+            highest = {}
+            for new_p in IMP.atom.Selection(
                     self.hier,
-                    residue_index=res.get_index(),
-                    resolution=1).get_selected_particles()
-                if len(new_ps)>0:
-                    new_p = new_ps[0]
+                    resolution=1).get_selected_particles():
+                for idx in IMP.atom.get_residue_indexes(IMP.atom.Hierarchy(new_p)):
+                    if idx not in highest:
+                        highest[idx] = new_p
+            for res in self.residues:
+                new_p = highest.get(res.get_index())
+                if new_p is not None:
                     if IMP.atom.Atom.get_is_setup(new_p):
                         # if only found atomic, store the residue
                         new_hier = IMP.atom.get_residue(IMP.atom.Atom(new_p))
@@ -871,6 +881,15 @@ def fasta_pdb_alignments(fasta_sequences,pdb_sequences,show=False):
 #------------------------
 
 
+_residue_types = {}
+
+def _get_residue_type(code):
+    """Get the ResidueType for a one-letter code, making each one only once"""
+    if code not in _residue_types:
+        _residue_types[code] = \
+            IMP.pmi.tools.get_residue_type_from_one_letter_code(code)
+    return _residue_types[code]
+
 class TempResidue(object):
     """Temporarily stores residue information, even without structure available."""
     # Consider implementing __hash__ so you can select.
@@ -883,11 +902,11 @@ class TempResidue(object):
         """
         #these attributes should be immutable
         self.molecule = molecule
-        self.rtype = IMP.pmi.tools.get_residue_type_from_one_letter_code(code)
+        self.rtype = _get_residue_type(code)
         self.pdb_index = index
         self.internal_index = internal_index
-        self.copy_index = IMP.atom.Copy(self.molecule.hier).get_copy_index()
-        self.state_index = IMP.atom.State(self.molecule.state.hier).get_state_index()
+        self.copy_index = molecule._copy_index
+        self.state_index = molecule._state_index
         #these are expected to change
         self._structured = False
         self.hier = IMP.atom.Residue.setup_particle(IMP.Particle(molecule.mdl),
@@ -29,7 +29,7 @@ def resnums2str(res):
             ret+=', '
     return ret
 
-def get_structure(mdl,pdb_fn,chain_id,res_range=None,offset=0,model_num=None,ca_only=False):
+def get_structure(mdl,pdb_fn,chain_id,res_range=None,offset=0,model_num=None,ca_only=False,cache=None):
     """read a structure from a PDB file and return a list of residues
     @param mdl The IMP model
     @param pdb_fn    The file to read
@@ -38,20 +38,20 @@ def get_structure(mdl,pdb_fn,chain_id,res_range=None,offset=0,model_num=None,ca_
     @param offset    Apply an offset to the residue indexes of the PDB file
     @param model_num Read multi-model PDB and return that model
     @param ca_only Read only CA atoms (by default, all non-waters are read)
+    @param cache     Optional dict in which to keep each structure read,
+                     keyed by (pdb_fn, chain_id, model_num, ca_only). If the
+                     structure is already there the file is not read again.
+                     Copies of its residues are returned, so that the cached
+                     structure stays unchanged; remove it from the model
+                     with clear_structure_cache() once it is no longer needed.
     """
-    sel = IMP.atom.get_default_pdb_selector()
-    if ca_only:
-        sel = IMP.atom.CAlphaPDBSelector()
-    if model_num is None:
-        mh = IMP.atom.read_pdb(pdb_fn,mdl,
-                               IMP.atom.AndPDBSelector(IMP.atom.ChainPDBSelector(chain_id), sel))
-
+    key = (pdb_fn, chain_id, model_num, ca_only)
+    if cache is not None and key in cache:
+        mh = cache[key][0]
     else:
-        mhs = IMP.atom.read_multimodel_pdb(pdb_fn,mdl,sel)
-        if model_num>=len(mhs):
-            raise Exception("you requested model num "+str(model_num)+\
-                            " but the PDB file only contains "+str(len(mhs))+" models")
-        mh = IMP.atom.Selection(mhs[model_num],chain=chain_id,with_representation=True)
+        mh, roots = _read_structure(mdl,pdb_fn,chain_id,model_num,ca_only)
+        if cache is not None:
+            cache[key] = (mh, roots)
 
     if res_range==[] or res_range is None:
         sel = IMP.atom.Selection(mh,chain=chain_id,atom_type=IMP.atom.AtomType('CA'))
@@ -63,14 +63,49 @@ def get_structure(mdl,pdb_fn,chain_id,res_range=None,offset=0,model_num=None,ca_
         sel = IMP.atom.Selection(mh,chain=chain_id,residue_indexes=range(start,end+1),
                                  atom_type=IMP.atom.AtomType('CA'))
     ret=[]
+    chain=None
 
     # return final and apply offset
     for p in sel.get_selected_particles():
         res = IMP.atom.Residue(IMP.atom.Atom(p).get_parent())
+        if cache is not None:
+            # leave the cached residues untouched for the next caller, but
+            # put the copies in a chain like the residues read from the file
+            if chain is None:
+                chain = IMP.atom.Chain.setup_particle(IMP.Particle(mdl),chain_id)
+            res = IMP.atom.Residue(IMP.atom.create_clone(res))
+            chain.add_child(res)
         res.set_index(res.get_index() + offset)
         ret.append(res)
     return ret
 
+def clear_structure_cache(cache):
+    """remove the structures kept in a get_structure() cache from the model
+    and empty the cache"""
+    for mh, roots in cache.values():
+        for root in roots:
+            IMP.atom.destroy(root)
+    cache.clear()
+
+def _read_structure(mdl,pdb_fn,chain_id,model_num,ca_only):
+    """read the hierarchy for get_structure(); also return the hierarchies
+    read from the file"""
+    sel = IMP.atom.get_default_pdb_selector()
+    if ca_only:
+        sel = IMP.atom.CAlphaPDBSelector()
+    if model_num is None:
+        mh = IMP.atom.read_pdb(pdb_fn,mdl,
+                               IMP.atom.AndPDBSelector(IMP.atom.ChainPDBSelector(chain_id), sel))
+        mhs = [mh]
+
+    else:
+        mhs = IMP.atom.read_multimodel_pdb(pdb_fn,mdl,sel)
+        if model_num>=len(mhs):
+            raise Exception("you requested model num "+str(model_num)+\
+                            " but the PDB file only contains "+str(len(mhs))+" models")
+        mh = IMP.atom.Selection(mhs[model_num],chain=chain_id,with_representation=True)
+    return mh, mhs
+
 def build_bead(mdl,residues,input_coord=None):
     """Generates a single bead"""
 
@@ -453,6 +453,53 @@ class Tests(IMP.test.TestCase):
                          for i in (0, 1, 4, 5, 6, 7, 8)]))
         self.assertEqual(res2, set([m2.residues[i] for i in range(0, 13)]))
 
+    def test_add_structure_cached(self):
+        """Test adding the same structure to several molecules"""
+        s = IMP.pmi.topology.System()
+        st1 = s.create_state()
+        seqs = IMP.pmi.topology.Sequences(
+            self.get_input_file_name('seqs.fasta'),
+            name_map={'Protein_1': 'Prot1',
+                      'Protein_2': 'Prot2',
+                      'Protein_3': 'Prot3'})
+        m1 = st1.create_molecule("Prot1", sequence=seqs["Prot1"])
+        m2 = m1.create_copy(chain_id='B')
+        res1 = m1.add_structure(self.get_input_file_name('prot.pdb'),
+                                chain_id='A', res_range=(55, 63), offset=-54)
+        res2 = m2.add_structure(self.get_input_file_name('prot.pdb'),
+                                chain_id='A', res_range=(55, 63), offset=-54)
+        # the file was only read once
+        self.assertEqual(len(s._structure_cache), 1)
+        self.assertEqual(get_atomic_residue_list(m1.residues),
+                         get_atomic_residue_list(m2.residues))
+        # but each molecule has its own atoms
+        for r1, r2 in zip(res1, res2):
+            self.assertEqual(r1.get_index(), r2.get_index())
+            a1 = IMP.atom.get_leaves(r1.get_hierarchy())
+            a2 = IMP.atom.get_leaves(r2.get_hierarchy())
+            self.assertEqual(len(a1), len(a2))
+            for p1, p2 in zip(a1, a2):
+                self.assertNotEqual(p1.get_particle_index(),
+                                    p2.get_particle_index())
+                self.assertLess(IMP.core.get_distance(IMP.core.XYZ(p1),
+                                                      IMP.core.XYZ(p2)), 1e-6)
+        # the copies are in a chain, like residues read from the file
+        mdl = s.get_hierarchy().get_model()
+        rhs = IMP.pmi.topology.system_tools.get_structure(
+            mdl, self.get_input_file_name('prot.pdb'), 'A', (55, 63),
+            cache=s._structure_cache)
+        self.assertEqual(len(s._structure_cache), 1)
+        for rh in rhs:
+            self.assertTrue(IMP.atom.Chain.get_is_setup(rh.get_parent()))
+        # the cached structure is removed from the model once it is built
+        cached = [IMP.atom.get_leaves(roots[0])
+                  for mh, roots in s._structure_cache.values()][0]
+        cached = [a.get_particle_index() for a in cached]
+        s.build()
+        self.assertEqual(len(s._structure_cache), 0)
+        pis = set(mdl.get_particle_indexes())
+        self.assertFalse(any(pi in pis for pi in cached))
+
     def test_get_atomic_non_atomic_residues(self):
         """test if, adding a structure, you get the atomic and non atomic residues sets
         correctly"""
@@ -0,0 +1,83 @@
+from __future__ import print_function
+import IMP
+import IMP.core
+import IMP.test
+import IMP.pmi
+import IMP.pmi.topology
+import IMP.pmi.dof
+import IMP.pmi.tools
+import IMP.pmi.io.crosslink
+import IMP.pmi.restraints.crosslinking
+from math import log
+
+
+class Tests(IMP.test.TestCase):
+
+    def setup_restraint(self):
+        # ambiguous cross-links, as each protein has two copies
+        tname = self.get_tmp_file_name("xl_output.csv")
+        with open(tname, "w") as fh:
+            fh.write("id,prot1,res1,prot2,res2\n1,ProtA,1,ProtB,1\n"
+                     "1,ProtA,1,ProtA,11\n2,ProtB,1,ProtA,11\n"
+                     "3,ProtA,11,ProtB,1\n")
+        cldbkc = IMP.pmi.io.crosslink.CrossLinkDataBaseKeywordsConverter()
+        cldbkc.set_unique_id_key("id")
+        cldbkc.set_protein1_key("prot1")
+        cldbkc.set_protein2_key("prot2")
+        cldbkc.set_residue1_key("res1")
+        cldbkc.set_residue2_key("res2")
+        cldb = IMP.pmi.io.crosslink.CrossLinkDataBase(cldbkc)
+        cldb.create_set_from_file(tname)
+
+        m = IMP.Model()
+        s = IMP.pmi.topology.System(m)
+        st = s.create_state()
+        mols = []
+        for name, chain, clone_chain in (("ProtA", "A", "C"),
+                                         ("ProtB", "B", "D")):
+            mol = st.create_molecule(name, sequence='A' * 20, chain_id=chain)
+            mol.add_representation(mol[0:10], resolutions=[1],
+                                   bead_default_coord=[0, 0, 0])
+            mol.add_representation(mol[10:20], resolutions=[1],
+                                   bead_default_coord=[10, 0, 0])
+            mols.extend([mol, mol.create_clone(clone_chain)])
+        hier = s.build()
+        dof = IMP.pmi.dof.DegreesOfFreedom(m)
+        dof.create_flexible_beads(mols)
+        xl = IMP.pmi.restraints.crosslinking.CrossLinkingMassSpectrometryRestraint(
+            root_hier=hier, CrossLinkDataBase=cldb, length=21.0,
+            resolution=1, slope=0.01, label="XL")
+        xl.add_to_model()
+        return hier, xl
+
+    def test_get_output(self):
+        """Test per cross-link output of CrossLinkingMassSpectrometryRestraint"""
+        d = IMP.test.RunInTempDir()
+        hier, xl = self.setup_restraint()
+        self.assertGreater(len(xl.xl_list), len(xl.xl_restraints))
+        for i in range(3):
+            IMP.pmi.tools.shuffle_configuration(hier, max_translation=10)
+            output = xl.get_output()
+            for x in xl.xl_list:
+                label = x["ShortLabel"]
+                score = -log(x["Restraint"].unprotected_evaluate(None))
+                self.assertAlmostEqual(
+                    float(output["CrossLinkingMassSpectrometryRestraint_"
+                                 "Score_" + label]), score, delta=1e-6)
+                dist = IMP.core.get_distance(IMP.core.XYZ(x["Particle1"]),
+                                             IMP.core.XYZ(x["Particle2"]))
+                self.assertAlmostEqual(
+                    float(output["CrossLinkingMassSpectrometryRestraint_"
+                                 "Distance_" + label]), dist, delta=1e-6)
+        self.assertIn("CrossLinkingMassSpectrometryRestraint_Psi_PSI_XL",
+                      output)
+        xl.set_label("XL2")
+        output = xl.get_output()
+        self.assertIn("CrossLinkingMassSpectrometryRestraint_Psi_PSI_XL2",
+                      output)
+        self.assertNotIn("CrossLinkingMassSpectrometryRestraint_Psi_PSI_XL",
+                         output)
+
+
+if __name__ == '__main__':
+    IMP.test.main()
@@ -298,6 +298,59 @@ class TestIOCrosslink(IMP.test.TestCase):
             self.assertEqual(fo.evaluate(xl),((xl[cldb.residue1_key]>30)|(xl[cldb.protein2_key]=="BBB") ))
 
 
+    def test_FilterOperator_mask(self):
+        import operator
+        from IMP.pmi.io.crosslink import FilterOperator as FO
+        cldb=self.setup_cldb("xl_dataset_test.dat")
+        columns=cldb.get_columns()
+        fos=[FO(cldb.protein1_key,operator.eq,"AAA"),
+             (FO(cldb.protein1_key,operator.eq,"AAA")|FO(cldb.protein2_key,operator.eq,"BBB"))&FO("sample",operator.eq,"human"),
+             FO(cldb.residue1_key,operator.gt,30)|FO(cldb.id_score_key,operator.le,10.0),
+             # not vectorized
+             FO(cldb.protein2_key,lambda a,b: a.startswith(b),"B")]
+        for fo in fos:
+            self.assertEqual(list(fo.get_mask(columns)),
+                             [fo.evaluate(xl) for xl in cldb])
+        self.assertEqual(cldb.get_values(cldb.residue1_key),
+                         sorted(set(xl[cldb.residue1_key] for xl in cldb)))
+
+    def test_columns_after_edits(self):
+        import operator
+        from IMP.pmi.io.crosslink import FilterOperator as FO
+        cldb=self.setup_cldb("xl_dataset_test.dat")
+        fo=FO(cldb.id_score_key,operator.gt,10.0)
+        nhigh=len([xl for xl in cldb if xl[cldb.id_score_key]>10.0])
+        self.assertEqual(len(list(cldb.filter(fo))),nhigh)
+        # filtered databases share the cross-link dicts with their parent
+        sub=cldb.filter(fo)
+        sub.set_value(cldb.id_score_key,0.0)
+        self.assertEqual(len(list(cldb.filter(fo))),0)
+        # so can any caller, without telling the database
+        for xl in cldb:
+            xl[cldb.id_score_key]=20.0
+        self.assertEqual(len(list(cldb.filter(fo))),len(list(cldb)))
+        cldb['1'][0][cldb.protein1_key]='GGG'
+        self.assertIn('GGG',cldb.get_values(cldb.protein1_key))
+
+    def test_columns_mixed_types(self):
+        import operator
+        from IMP.pmi.io.crosslink import FilterOperator as FO
+        cldb=self.setup_cldb("xl_dataset_test.dat")
+        xls=list(cldb)
+        xls[0][cldb.residue1_key]="10"
+        xls[1][cldb.id_score_key]=1
+        columns=cldb.get_columns()
+        self.assertEqual(columns.get_column(cldb.residue1_key).dtype,object)
+        self.assertEqual(columns.get_column(cldb.id_score_key).dtype,object)
+        for fo in (FO(cldb.residue1_key,operator.eq,"10"),
+                   FO(cldb.residue1_key,operator.eq,10),
+                   FO(cldb.id_score_key,operator.eq,1)):
+            self.assertEqual(list(fo.get_mask(columns)),
+                             [fo.evaluate(xl) for xl in cldb])
+        values=cldb.get_values(cldb.id_score_key)
+        self.assertIn(1,values)
+        self.assertIs(type(values[values.index(1)]),int)
+
     def test_filter_cldbkc(self):
         import operator
         from IMP.pmi.io.crosslink import FilterOperator as FO
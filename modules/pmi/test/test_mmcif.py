@@ -16,6 +16,30 @@ class EmptyObject(object):
 
 class Tests(IMP.test.TestCase):
 
+    def test_loop_write_chunk(self):
+        """Test CifLoopWriter.write_chunk"""
+        import numpy
+        def get_output(chunk):
+            fh = StringIO()
+            w = IMP.pmi.mmcif.CifWriter(fh)
+            with w.loop("foo", ["bar", "baz", "x", "long", "y"]) as l:
+                if chunk:
+                    # the first row is too long for one line
+                    l.write_chunk(bar=numpy.array([1, 2]),
+                                  baz=['ok', 'has space'],
+                                  x=numpy.array([1.0, -2.5]),
+                                  long=['y' * 70, 'z'], y=True)
+                    # multi-line value
+                    l.write_chunk(bar=[3], baz=['x' * 75], x=[1e5],
+                                  long='z', y=True)
+                else:
+                    l.write(bar=1, baz='ok', x=1.0, long='y' * 70, y=True)
+                    l.write(bar=2, baz='has space', x=-2.5, long='z',
+                            y=True)
+                    l.write(bar=3, baz='x' * 75, x=1e5, long='z', y=True)
+            return fh.getvalue()
+        self.assertEqual(get_output(True), get_output(False))
+
     def test_software(self):
         """Test SoftwareDumper"""
         s = IMP.pmi.metadata.Software(name='test', classification='test code',
@@ -393,6 +417,46 @@ _ihm_sphere_obj_site.model_id
 #
 """)
 
+    def test_model_dumper_dump_twice(self):
+        """Test that ModelDumper writes all models on every dump"""
+        class DummyPO(IMP.pmi.mmcif.ProtocolOutput):
+            def flush(self):
+                pass
+
+        m = IMP.Model()
+        simo = IMP.pmi.representation.Representation(m)
+        po = DummyPO(None)
+        simo.add_protocol_output(po)
+        simo.create_component("Nup84", True)
+        simo.add_component_sequence("Nup84",
+                                    self.get_input_file_name("test.fasta"))
+        nup84 = simo.autobuild_model("Nup84",
+                                     self.get_input_file_name("test.nup84.pdb"),
+                                     "A")
+
+        d = IMP.pmi.mmcif.ModelDumper(po)
+        assembly = IMP.pmi.mmcif.Assembly()
+        assembly.id = 42
+        protocol = IMP.pmi.mmcif.Protocol()
+        protocol.id = 93
+        group = IMP.pmi.mmcif.ModelGroup("all models")
+        group.id = 7
+        d.add(simo.prot, protocol, assembly, group)
+        outs = []
+        for i in range(2):
+            fh = StringIO()
+            d.dump(IMP.pmi.mmcif.CifWriter(fh))
+            outs.append(fh.getvalue())
+        self.assertEqual(outs[0], outs[1])
+        self.assertEqual(outs[0].count(" A 0.000 0.000 0.000 "), 3)
+        # models added after a dump are written along with the earlier ones
+        d.add(simo.prot, protocol, assembly, group)
+        fh = StringIO()
+        d.dump(IMP.pmi.mmcif.CifWriter(fh))
+        out = fh.getvalue()
+        self.assertEqual(out.count(" A 0.000 0.000 0.000 "), 6)
+        self.assertIn("\n6 1 3 4 A 0.000 0.000 0.000 3.504 2\n#\n", out)
+
     def test_chem_comp_dumper(self):
         """Test ChemCompDumper"""
         class DummyPO(IMP.pmi.mmcif.ProtocolOutput):
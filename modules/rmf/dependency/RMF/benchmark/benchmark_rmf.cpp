@@ -268,6 +268,20 @@ int main(int, char**) {
       }
       benchmark_size(name, "rmfz");
     }
+    {
+      const std::string name = name_base + "_quantized.rmfz";
+      {
+        RMF::FileHandle fh = RMF::create_rmf_file(name);
+        fh.set_coordinate_precision(0.001);
+        benchmark_create(fh, "rmfz quantized");
+      }
+      {
+        RMF::FileConstHandle fh = benchmark_open(name, "rmfz quantized");
+        benchmark_traverse(fh, "rmfz quantized");
+        benchmark_load(fh, "rmfz quantized");
+      }
+      benchmark_size(name, "rmfz quantized");
+    }
     {
       RMF::BufferHandle buffer;
       {
@@ -2,6 +2,7 @@ set(cpp_bins
 ${PROJECT_SOURCE_DIR}/bin/rmf_avro_dump.cpp
 ${PROJECT_SOURCE_DIR}/bin/rmf_cat.cpp
 ${PROJECT_SOURCE_DIR}/bin/rmf_frames.cpp
+${PROJECT_SOURCE_DIR}/bin/rmf_index.cpp
 ${PROJECT_SOURCE_DIR}/bin/rmf_info.cpp
 ${PROJECT_SOURCE_DIR}/bin/rmf_interpolate.cpp
 ${PROJECT_SOURCE_DIR}/bin/rmf_pdb.cpp
@@ -2,11 +2,23 @@
  * Copyright 2007-2016 IMP Inventors. All rights reserved.
  */
 
+#include <boost/algorithm/string/predicate.hpp>
+#include <boost/thread/condition_variable.hpp>
+#include <boost/thread/mutex.hpp>
+#include <boost/thread/thread.hpp>
+#include <algorithm>
+#include <deque>
 #include <exception>
+#include <fstream>
 #include <iostream>
+#include <map>
+#include <sstream>
+#include <stdexcept>
 #include <string>
 #include <vector>
 
+#include "RMF/BufferConstHandle.h"
+#include "RMF/BufferHandle.h"
 #include "RMF/FileConstHandle.h"
 #include "RMF/FileHandle.h"
 #include "RMF/ID.h"
@@ -16,41 +28,339 @@
 
 namespace {
 std::vector<std::string> inputs;
-std::string description("Combine two or more rmf files.");
+std::string description(
+    "Combine two or more rmf files, or selected frames from many rmf files.");
 std::string output;
+std::string frame_list;
+std::vector<std::string> categories;
+unsigned int threads = 1;
+
+// Worker threads copy frames to small in-memory buffers of this many
+// frames. Each task keeps at most max_queued_chunks buffers waiting to be
+// written, and workers only start tasks up to max_tasks_ahead past the one
+// being written, so memory use does not grow with the size of the inputs.
+const unsigned int chunk_frames = 64;
+const unsigned int max_queued_chunks = 2;
+unsigned int max_tasks_ahead = 1;
+
+// A run of consecutive output frames taken from one input file
+struct Task {
+  unsigned int input;
+  bool all_frames;
+  std::vector<RMF::FrameID> frames;
+  // Whether a worker thread reads the frames into chunks; otherwise they
+  // are copied straight from the input file by the main thread
+  bool parallel;
+  std::deque<RMF::BufferHandle> chunks;
+  bool finished;
+  std::string error;
+  Task(unsigned int input)
+      : input(input), all_frames(true), parallel(false), finished(false) {}
+};
+
+std::vector<Task> tasks;
+unsigned int next_task = 0;
+// The task being written to the output
+unsigned int current_task = 0;
+bool stop = false;
+boost::mutex tasks_mutex;
+boost::condition_variable tasks_changed;
+
+// Read lines of "file frame" (frames are numbered from 0); the output
+// frames are in the same order as the lines
+void read_frame_list() {
+  std::ifstream in(frame_list.c_str());
+  if (!in) throw std::runtime_error("Unable to open " + frame_list);
+  std::map<std::string, unsigned int> input_index;
+  std::string line;
+  while (std::getline(in, line)) {
+    std::istringstream iss(line);
+    std::string path;
+    int frame;
+    if (!(iss >> path) || path[0] == '#') continue;
+    if (!(iss >> frame) || frame < 0) {
+      throw std::runtime_error("Bad line in frame list: " + line);
+    }
+    std::map<std::string, unsigned int>::iterator it = input_index.find(path);
+    if (it == input_index.end()) {
+      it = input_index.insert(std::make_pair(path, inputs.size())).first;
+      inputs.push_back(path);
+    }
+    if (tasks.empty() || tasks.back().input != it->second) {
+      tasks.push_back(Task(it->second));
+      tasks.back().all_frames = false;
+    }
+    tasks.back().frames.push_back(RMF::FrameID(frame));
+  }
+}
+
+// Only RMF3 files are read by worker threads, since the HDF5 library used
+// by older files is not thread safe. Old HDF5 files can also have a .rmf
+// suffix, so check for the avro container magic too.
+bool get_is_rmf3(const std::string& path) {
+  if (!boost::algorithm::ends_with(path, ".rmf") &&
+      !boost::algorithm::ends_with(path, ".rmfz") &&
+      !boost::algorithm::ends_with(path, ".rmf3")) {
+    return false;
+  }
+  std::ifstream in(path.c_str(), std::ios::binary);
+  char magic[4];
+  in.read(magic, 4);
+  return in && std::string(magic, 4) == std::string("Obj\x01", 4);
+}
+
+RMF::Categories get_selected_categories(RMF::FileConstHandle fh) {
+  RMF::Categories ret;
+  RMF_FOREACH(std::string name, categories) {
+    ret.push_back(fh.get_category(name));
+  }
+  return ret;
+}
+
+std::vector<RMF::FrameID> get_all_frames(RMF::FileConstHandle rh) {
+  std::vector<RMF::FrameID> ret;
+  RMF_FOREACH(RMF::FrameID f, rh.get_frames()) { ret.push_back(f); }
+  return ret;
+}
+
+std::vector<RMF::FrameID> get_task_frames(RMF::FileConstHandle rh,
+                                          const Task& task) {
+  if (task.all_frames) return get_all_frames(rh);
+  RMF_FOREACH(RMF::FrameID f, task.frames) {
+    if (f.get_index() >= rh.get_number_of_frames()) {
+      std::ostringstream oss;
+      oss << inputs[task.input] << " has no frame " << f.get_index();
+      throw std::runtime_error(oss.str());
+    }
+  }
+  return task.frames;
+}
+
+// Copy the file-wide data, restricted to the selected categories
+void clone_static(RMF::FileConstHandle rh, RMF::FileHandle oh) {
+  if (categories.empty()) {
+    RMF::clone_file_info(rh, oh);
+    RMF::clone_hierarchy(rh, oh);
+    RMF::clone_static_frame(rh, oh);
+  } else {
+    oh.set_description(rh.get_description());
+    RMF::clone_hierarchy(rh, oh);
+    RMF::clone_static_frame(rh, oh, get_selected_categories(rh));
+  }
+}
+
+// same_keys is true if oh has the same keys as rh, in the same order, and
+// same_static if oh has the static data of rh
+void clone_frame(RMF::FileConstHandle rh, RMF::FrameID f, bool same_keys,
+                 bool same_static, RMF::FileHandle oh) {
+  rh.set_current_frame(f);
+  oh.add_frame(rh.get_name(f), rh.get_type(f));
+  if (same_keys) {
+    RMF::clone_loaded_frame(rh, oh);
+  } else if (categories.empty()) {
+    RMF::clone_loaded_frame(rh, oh, rh.get_categories());
+  } else {
+    RMF::clone_loaded_frame(rh, oh, get_selected_categories(rh));
+  }
+  if (same_static) return;
+  // Values that rh only has in its static data would otherwise take the
+  // static values of the file oh's static data came from
+  if (categories.empty()) {
+    RMF::clone_static_to_loaded_frame(rh, oh);
+  } else {
+    RMF::clone_static_to_loaded_frame(rh, oh, get_selected_categories(rh));
+  }
+}
+
+bool push_chunk(Task& task, RMF::BufferHandle chunk) {
+  boost::mutex::scoped_lock lock(tasks_mutex);
+  while (!stop && task.chunks.size() >= max_queued_chunks) {
+    tasks_changed.wait(lock);
+  }
+  if (stop) return false;
+  task.chunks.push_back(chunk);
+  tasks_changed.notify_all();
+  return true;
+}
+
+// Return false once all of the task's chunks have been taken
+bool pop_chunk(Task& task, RMF::BufferHandle& chunk) {
+  boost::mutex::scoped_lock lock(tasks_mutex);
+  while (task.chunks.empty() && !task.finished) tasks_changed.wait(lock);
+  if (!task.error.empty()) throw std::runtime_error(task.error);
+  if (task.chunks.empty()) return false;
+  chunk = task.chunks.front();
+  task.chunks.pop_front();
+  tasks_changed.notify_all();
+  return true;
+}
+
+void read_task(RMF::FileConstHandle rh, Task& task) {
+  std::vector<RMF::FrameID> frames = get_task_frames(rh, task);
+  for (unsigned int i = 0; i < frames.size(); i += chunk_frames) {
+    RMF::BufferHandle chunk;
+    {
+      RMF::FileHandle bh = RMF::create_rmf_buffer(chunk);
+      clone_static(rh, bh);
+      unsigned int end = std::min<unsigned int>(i + chunk_frames,
+                                                frames.size());
+      for (unsigned int j = i; j < end; ++j) {
+        clone_frame(rh, frames[j], categories.empty(), true, bh);
+      }
+    }
+    if (!push_chunk(task, chunk)) return;
+  }
 }
+
+void read_tasks() {
+  // Consecutive tasks often come from the same file, so keep it open
+  RMF::FileConstHandle rh;
+  unsigned int rh_input = inputs.size();
+  while (true) {
+    Task* task;
+    {
+      boost::mutex::scoped_lock lock(tasks_mutex);
+      while (next_task < tasks.size() && !tasks[next_task].parallel) {
+        ++next_task;
+      }
+      while (!stop && next_task < tasks.size() &&
+             next_task >= current_task + max_tasks_ahead) {
+        tasks_changed.wait(lock);
+      }
+      if (stop || next_task == tasks.size()) return;
+      task = &tasks[next_task++];
+    }
+    std::string error;
+    try {
+      if (rh_input != task->input) {
+        rh = RMF::open_rmf_file_read_only(inputs[task->input]);
+        rh_input = task->input;
+      }
+      read_task(rh, *task);
+    }
+    catch (const std::exception& e) {
+      error = e.what();
+    }
+    boost::mutex::scoped_lock lock(tasks_mutex);
+    task->error = error;
+    task->finished = true;
+    tasks_changed.notify_all();
+  }
+}
+
+// The input whose keys the output file has, and which inputs' descriptions
+// have been added to the output
+unsigned int first_input;
+std::vector<bool> described;
+
+void write_frames(RMF::FileConstHandle rh, unsigned int input,
+                  const std::vector<RMF::FrameID>& frames,
+                  RMF::FileHandle orh) {
+  if (first_input == inputs.size()) {
+    first_input = input;
+    clone_static(rh, orh);
+    orh.set_producer("rmf_cat");
+  } else if (!described[input]) {
+    orh.set_description(orh.get_description() + "\n" + rh.get_description());
+  }
+  described[input] = true;
+  bool same_static = input == first_input;
+  bool same_keys = categories.empty() && same_static;
+  RMF_FOREACH(RMF::FrameID f, frames) {
+    clone_frame(rh, f, same_keys, same_static, orh);
+  }
+}
+
+// Make sure the workers exit, even if writing the output fails
+struct Workers : public boost::thread_group {
+  ~Workers() {
+    {
+      boost::mutex::scoped_lock lock(tasks_mutex);
+      stop = true;
+      tasks_changed.notify_all();
+    }
+    join_all();
+  }
+};
+}
+
 int main(int argc, char** argv) {
   try {
     positional_options.add_options()(
         "input-files,i",
         boost::program_options::value<std::vector<std::string> >(&inputs),
         "input rmf file");
+    options.add_options()(
+        "frame-list,l", boost::program_options::value<std::string>(&frame_list),
+        "File listing the frames to copy, one \"input.rmf frame\" pair per "
+        "line. If given, only the output file is passed on the command line.");
+    options.add_options()(
+        "categories,c",
+        boost::program_options::value<std::vector<std::string> >(&categories)
+            ->multitoken(),
+        "Only copy data in these categories.");
+    options.add_options()(
+        "threads,j", boost::program_options::value<unsigned int>(&threads),
+        "Number of threads reading RMF3 input files ahead of the output. "
+        "Other inputs are always read one at a time.");
     positional_names.push_back("input_1.rmf input_2.rmf ... output.rmf");
     positional_options_description.add("input-files", -1);
     process_options(argc, argv);
-    if (inputs.size() < 3) {
+    if (frame_list.empty() ? inputs.size() < 3 : inputs.size() != 1) {
       print_help_and_exit(argv);
     }
 
     output = inputs.back();
     inputs.pop_back();
-    RMF::FileHandle orh = RMF::create_rmf_file(output);
-    orh.set_producer("rmf_cat");
-    for (unsigned int i = 0; i < inputs.size(); ++i) {
-      RMF::FileConstHandle rh = RMF::open_rmf_file_read_only(inputs[i]);
-      if (i == 0) {
-        RMF::clone_hierarchy(rh, orh);
+    if (frame_list.empty()) {
+      for (unsigned int i = 0; i < inputs.size(); ++i) {
+        tasks.push_back(Task(i));
+      }
+    } else {
+      read_frame_list();
+    }
+
+    Workers workers;
+    if (threads > 1) {
+      std::vector<bool> is_rmf3(inputs.size());
+      for (unsigned int i = 0; i < inputs.size(); ++i) {
+        is_rmf3[i] = get_is_rmf3(inputs[i]);
       }
-      orh.set_description(orh.get_description() + "\n" + rh.get_description());
-      RMF_FOREACH(RMF::FrameID ni, rh.get_frames()) {
-        rh.set_current_frame(ni);
-        orh.add_frame(rh.get_name(ni), rh.get_type(ni));
-        RMF::clone_loaded_frame(rh, orh);
+      RMF_FOREACH(Task & task, tasks) { task.parallel = is_rmf3[task.input]; }
+      max_tasks_ahead = 2 * threads;
+      for (unsigned int i = 0; i < threads; ++i) {
+        workers.create_thread(read_tasks);
+      }
+    }
+
+    RMF::FileHandle orh = RMF::create_rmf_file(output);
+    described.resize(inputs.size(), false);
+    first_input = inputs.size();
+    RMF::FileConstHandle rh;
+    unsigned int rh_input = inputs.size();
+    RMF_FOREACH(Task & task, tasks) {
+      if (task.parallel) {
+        RMF::BufferHandle chunk;
+        while (pop_chunk(task, chunk)) {
+          RMF::FileConstHandle bh = RMF::open_rmf_buffer_read_only(chunk);
+          write_frames(bh, task.input, get_all_frames(bh), orh);
+        }
+      } else {
+        // Stream the frames straight from the file
+        if (rh_input != task.input) {
+          rh = RMF::open_rmf_file_read_only(inputs[task.input]);
+          rh_input = task.input;
+        }
+        write_frames(rh, task.input, get_task_frames(rh, task), orh);
       }
+      boost::mutex::scoped_lock lock(tasks_mutex);
+      ++current_task;
+      tasks_changed.notify_all();
     }
     return 0;
   }
   catch (const std::exception& e) {
     std::cerr << "Error: " << e.what() << std::endl;
+    return 1;
   }
 }
@@ -0,0 +1,29 @@
+/**
+ * Copyright 2007-2016 IMP Inventors. All rights reserved.
+ */
+
+#include <exception>
+#include <iostream>
+#include <string>
+
+#include "RMF/utility.h"
+#include "common.h"
+
+namespace {
+std::string description(
+    "Write an index for an RMF3 file, so that it can be opened without "
+    "scanning the whole file.");
+}
+int main(int argc, char** argv) {
+  try {
+    RMF_ADD_INPUT_FILE("rmf");
+
+    process_options(argc, argv);
+    RMF::add_frame_index(input);
+    return 0;
+  }
+  catch (const std::exception& e) {
+    std::cerr << "Error: " << e.what() << std::endl;
+    return 1;
+  }
+}
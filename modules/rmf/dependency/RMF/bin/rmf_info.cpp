@@ -3,12 +3,14 @@
  */
 
 #include <exception>
+#include <fstream>
 #include <iostream>
 #include <sstream>
 #include <string>
 
 #include "RMF/FileConstHandle.h"
 #include "RMF/ID.h"
+#include "RMF/NodeConstHandle.h"
 #include "RMF/info.h"
 #include "RMF/decorator/alternatives.h"
 #include "common.h"
@@ -17,6 +19,27 @@ namespace {
 std::string description("Print out information about categories and keys.");
 
 unsigned int frame = 0;
+
+// Compare the size of the file with that of the coordinates at full
+// precision, for files that store coordinates quantized
+void show_coordinate_compression(RMF::FileConstHandle rh, std::string path) {
+  std::cout << "coordinate precision: " << rh.get_coordinate_precision()
+            << std::endl;
+  RMF::Vector3Key ck = rh.get_key<RMF::Vector3Tag>(
+      rh.get_category("physics"), "coordinates");
+  if (ck == RMF::Vector3Key()) return;
+  unsigned int n = 0;
+  RMF_FOREACH(RMF::NodeID nid, rh.get_node_ids()) {
+    if (rh.get_node(nid).get_has_value(ck)) ++n;
+  }
+  double raw_size = 3.0 * sizeof(float) * n * rh.get_number_of_frames();
+  std::ifstream in(path.c_str(), std::ios::binary | std::ios::ate);
+  double file_size = static_cast<double>(in.tellg());
+  if (raw_size > 0 && file_size > 0) {
+    std::cout << "coordinate compression ratio: " << raw_size / file_size
+              << std::endl;
+  }
+}
 }
 
 int main(int argc, char** argv) {
@@ -36,6 +59,9 @@ int main(int argc, char** argv) {
     }
     rh.set_current_frame(RMF::FrameID(frame));
     std::cout << "frames: " << rh.get_number_of_frames() << std::endl;
+    if (rh.get_coordinate_precision() > 0) {
+      show_coordinate_compression(rh, input);
+    }
     RMF::show_info(rh, std::cout);
     RMF::decorator::AlternativesFactory af(rh);
     using RMF::operator<<;
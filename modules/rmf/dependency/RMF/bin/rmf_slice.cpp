@@ -3,8 +3,12 @@
  */
 
 #include <exception>
+#include <fstream>
 #include <iostream>
+#include <sstream>
+#include <stdexcept>
 #include <string>
+#include <vector>
 
 #include "RMF/FileConstHandle.h"
 #include "RMF/FileHandle.h"
@@ -15,6 +19,27 @@
 
 namespace {
 std::string description("Grab frames from an rmf file");
+std::string frame_list;
+std::vector<std::string> categories;
+
+// One frame index per line
+std::vector<RMF::FrameID> read_frame_list(RMF::FileConstHandle rh) {
+  std::ifstream in(frame_list.c_str());
+  if (!in) throw std::runtime_error("Unable to open " + frame_list);
+  std::vector<RMF::FrameID> ret;
+  int frame;
+  while (in >> frame) {
+    if (frame < 0 ||
+        static_cast<unsigned int>(frame) >= rh.get_number_of_frames()) {
+      std::ostringstream oss;
+      oss << "No frame " << frame << " in input file (it has "
+          << rh.get_number_of_frames() << " frames)";
+      throw std::runtime_error(oss.str());
+    }
+    ret.push_back(RMF::FrameID(frame));
+  }
+  return ret;
+}
 }
 
 int main(int argc, char** argv) {
@@ -22,21 +47,54 @@ int main(int argc, char** argv) {
     RMF_ADD_INPUT_FILE("input_rmf");
     RMF_ADD_OUTPUT_FILE("output_rmf");
     RMF_ADD_FRAMES;
+    options.add_options()(
+        "frame-list,l", boost::program_options::value<std::string>(&frame_list),
+        "File listing the frames to copy, one per line, instead of using "
+        "--frame and --frame_step.");
+    options.add_options()(
+        "categories,c",
+        boost::program_options::value<std::vector<std::string> >(&categories)
+            ->multitoken(),
+        "Only copy data in these categories.");
     process_options(argc, argv);
 
     RMF::FileConstHandle rh = RMF::open_rmf_file_read_only(input);
     RMF::FileHandle orh = RMF::create_rmf_file(output);
-    RMF::clone_file_info(rh, orh);
+    RMF::Categories selected;
+    RMF_FOREACH(std::string name, categories) {
+      selected.push_back(rh.get_category(name));
+    }
+    if (selected.empty()) {
+      RMF::clone_file_info(rh, orh);
+    } else {
+      orh.set_description(rh.get_description());
+    }
     orh.set_producer("rmf_slice");
     RMF::clone_hierarchy(rh, orh);
-    RMF::clone_static_frame(rh, orh);
+    if (selected.empty()) {
+      RMF::clone_static_frame(rh, orh);
+    } else {
+      RMF::clone_static_frame(rh, orh, selected);
+    }
+    std::vector<RMF::FrameID> frames;
+    if (!frame_list.empty()) {
+      frames = read_frame_list(rh);
+    } else {
+      RMF_FOREACH(RMF::FrameID f, rh.get_frames()) {
+        if (f.get_index() < static_cast<unsigned int>(start_frame)) continue;
+        if ((f.get_index() - start_frame) % step_frame != 0) continue;
+        frames.push_back(f);
+      }
+    }
     std::cout << "Copying frames";
-    RMF_FOREACH(RMF::FrameID f, rh.get_frames()) {
-      if (f.get_index() < static_cast<unsigned int>(start_frame)) continue;
-      if ((f.get_index() - start_frame) % step_frame != 0) continue;
+    RMF_FOREACH(RMF::FrameID f, frames) {
       rh.set_current_frame(f);
       orh.add_frame(rh.get_name(f), rh.get_type(f));
-      RMF::clone_loaded_frame(rh, orh);
+      if (selected.empty()) {
+        RMF::clone_loaded_frame(rh, orh);
+      } else {
+        RMF::clone_loaded_frame(rh, orh, selected);
+      }
       if (orh.get_number_of_frames() % 10 == 0) std::cout << "." << std::flush;
     }
     std::cout << std::endl;
@@ -84,6 +84,15 @@ class RMFEXPORT FileConstHandle {
   friend RMFEXPORT void clone_hierarchy(FileConstHandle, FileHandle);
   friend RMFEXPORT void clone_static_frame(FileConstHandle, FileHandle);
   friend RMFEXPORT void clone_loaded_frame(FileConstHandle, FileHandle);
+  friend RMFEXPORT void clone_static_frame(FileConstHandle, FileHandle,
+                                           const Categories&);
+  friend RMFEXPORT void clone_loaded_frame(FileConstHandle, FileHandle,
+                                           const Categories&);
+  friend RMFEXPORT void clone_static_to_loaded_frame(FileConstHandle,
+                                                     FileHandle);
+  friend RMFEXPORT void clone_static_to_loaded_frame(FileConstHandle,
+                                                     FileHandle,
+                                                     const Categories&);
   friend RMFEXPORT bool get_equal_current_values(FileConstHandle,
                                                  FileConstHandle);
   friend RMFEXPORT bool get_equal_static_values(FileConstHandle,
@@ -241,6 +250,13 @@ class RMFEXPORT FileConstHandle {
   */
   std::string get_file_type() const { return shared_->get_file_type(); }
 
+  /** Return the precision that coordinates are stored to, or 0 if they
+      are stored in full. See FileHandle::set_coordinate_precision().
+  */
+  double get_coordinate_precision() const {
+    return shared_->get_coordinate_precision();
+  }
+
   /** Get all the frames that are roots (aren't subframes). */
   FrameIDs get_root_frames() const;
 
@@ -112,6 +112,19 @@ class RMFEXPORT FileHandle : public FileConstHandle {
    */
   void set_producer(std::string) const;
 
+  //! Store coordinates to a fixed precision to make the file smaller.
+  /** The "coordinates" and "translation" values in each frame are rounded
+      to the nearest multiple of precision and stored as integers, as the
+      difference from the previous keyframe; every keyframe_interval
+      frames the full values are stored. This works best with \c .rmfz
+      files, since the small differences compress well.
+
+      This must be called before any frames are added, and is only
+      supported by the RMF3 formats; it is ignored by the others.
+   */
+  void set_coordinate_precision(double precision,
+                                unsigned int keyframe_interval = 10) const;
+
   //! Make sure all data gets written to disk.
   /** Once flush is called, it should be safe to open the file in
       another process for reading.
@@ -21,10 +21,13 @@ class SharedDataFile {
   std::string producer_;
   std::string description_;
   std::string type_;
+  double coordinate_precision_;
+  unsigned int keyframe_interval_;
   bool dirty_;
 
  public:
-  SharedDataFile() : dirty_(false) {}
+  SharedDataFile()
+      : coordinate_precision_(0), keyframe_interval_(0), dirty_(false) {}
   std::string get_file_type() const { return type_; }
   void set_file_type(std::string type) {
     type_ = type;
@@ -40,6 +43,14 @@ class SharedDataFile {
     producer_ = str;
     dirty_ = true;
   }
+  double get_coordinate_precision() const { return coordinate_precision_; }
+  unsigned int get_keyframe_interval() const { return keyframe_interval_; }
+  // only used when writing frames, so doesn't need the file data saved
+  void set_coordinate_precision(double precision,
+                                unsigned int keyframe_interval) {
+    coordinate_precision_ = precision;
+    keyframe_interval_ = keyframe_interval;
+  }
   bool get_is_dirty() const { return dirty_; }
   void set_is_dirty(bool tf) { dirty_ = tf; }
 };
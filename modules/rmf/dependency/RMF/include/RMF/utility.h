@@ -45,6 +45,31 @@ RMFEXPORT void clone_loaded_frame(FileConstHandle input, FileHandle output);
 /** Copy the data of a single frame from between two files. Parts missing
     in the output file will be skipped.*/
 RMFEXPORT void clone_static_frame(FileConstHandle input, FileHandle output);
+
+/** Copy only the data in the given categories (of the input file) for the
+    current frame. Keys are matched by name, so the files may have been
+    created independently.*/
+RMFEXPORT void clone_loaded_frame(FileConstHandle input, FileHandle output,
+                                  const Categories& categories);
+
+/** Copy only the static data in the given categories (of the input
+    file).*/
+RMFEXPORT void clone_static_frame(FileConstHandle input, FileHandle output,
+                                  const Categories& categories);
+
+/** Copy the static data of the input file to the current frame of the
+    output, for the values that the current frame of the output does not
+    already have and that differ from the static data of the output. Use it
+    after clone_loaded_frame() when the output's static data came from
+    another file, e.g. when concatenating files, so that values the input
+    only stores in its static data are kept.*/
+RMFEXPORT void clone_static_to_loaded_frame(FileConstHandle input,
+                                            FileHandle output);
+
+/** As above, but only for the given categories (of the input file).*/
+RMFEXPORT void clone_static_to_loaded_frame(FileConstHandle input,
+                                            FileHandle output,
+                                            const Categories& categories);
 /** @} */
 
 /** Return true of the two have the same structure.*/
@@ -59,6 +84,16 @@ RMFEXPORT bool get_equal_current_values(FileConstHandle input,
 RMFEXPORT bool get_equal_static_values(FileConstHandle input,
                                        FileConstHandle out);
 
+/** Write an index for an existing RMF3 file (`.rmf`, `.rmfz` or `.rmf3`)
+    next to it, with an extra `.idx` suffix. Subsequent opens use the
+    index instead of scanning the whole file, as long as the file has not
+    changed since. The file must not be open for writing.
+
+    \exception IOException if the file cannot be read or the index
+    cannot be written.
+*/
+RMFEXPORT void add_frame_index(std::string path);
+
 /** This function simply throws an exception. It is here for testing.*/
 RMFEXPORT void test_throw_exception();
 
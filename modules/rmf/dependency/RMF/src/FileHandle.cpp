@@ -45,6 +45,15 @@ void FileHandle::set_producer(std::string descr) const {
   shared_->set_producer(descr);
 }
 
+void FileHandle::set_coordinate_precision(
+    double precision, unsigned int keyframe_interval) const {
+  RMF_USAGE_CHECK(get_number_of_frames() == 0,
+                  "Coordinate precision must be set before adding frames.");
+  RMF_USAGE_CHECK(keyframe_interval > 0,
+                  "The keyframe interval must be positive.");
+  shared_->set_coordinate_precision(precision, keyframe_interval);
+}
+
 FrameID FileHandle::add_frame(std::string name, FrameType t) const {
   FrameID ret = shared_->add_frame(name, t);
   return ret;
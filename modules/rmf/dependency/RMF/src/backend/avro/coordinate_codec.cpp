@@ -0,0 +1,202 @@
+/**
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ *
+ */
+
+#include <algorithm>
+#include <cmath>
+#include <iomanip>
+#include <sstream>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "RMF/exceptions.h"
+#include "RMF/infrastructure_macros.h"
+#include "RMF/log.h"
+#include "coordinate_codec.h"
+
+RMF_ENABLE_WARNINGS
+
+namespace RMF {
+namespace avro2 {
+
+namespace {
+const unsigned int companion_key_base = 1U << 30;
+const std::string companion_key_prefix = "rmf quantized coordinates:";
+
+bool get_is_coordinate_key(const std::string &name) {
+  return name == "coordinates" || name == "translation";
+}
+
+int quantize(float v, double precision) {
+  return static_cast<int>(std::floor(v / precision + 0.5));
+}
+
+std::string get_companion_key_name(double precision,
+                                   unsigned int keyframe_interval,
+                                   const std::string &key_name) {
+  std::ostringstream oss;
+  oss << companion_key_prefix << std::setprecision(17) << precision << ":"
+      << keyframe_interval << ":" << key_name;
+  return oss.str();
+}
+}
+
+ID<IntsTraits> CoordinateCodec::get_companion_key(ID<Vector3Traits> k) {
+  return ID<IntsTraits>(companion_key_base + k.get_index());
+}
+
+bool CoordinateCodec::get_is_keyframe(FrameID id) const {
+  return id.get_index() % keyframe_interval_ == 0;
+}
+
+FrameID CoordinateCodec::get_keyframe(FrameID id) const {
+  return FrameID(id.get_index() - id.get_index() % keyframe_interval_);
+}
+
+bool CoordinateCodec::encode(FrameID id, double precision,
+                             unsigned int keyframe_interval,
+                             FileData &file_data,
+                             FileDataChanges &file_data_changes,
+                             DataTypes &data) {
+  if (precision <= 0) return false;
+  precision_ = precision;
+  keyframe_interval_ = std::max(keyframe_interval, 1U);
+  bool keyframe = get_is_keyframe(id);
+  if (keyframe) {
+    keyframe_ = id;
+    keyframe_values_.clear();
+  }
+  // The differences can only be decoded against the keyframe this writer
+  // quantized itself, so frames can't be added after a gap (e.g. when
+  // appending to an existing file)
+  if (!keyframe && keyframe_ != get_keyframe(id)) {
+    std::ostringstream oss;
+    oss << "Can't write frame " << id.get_index()
+        << " with quantized coordinates as its keyframe "
+        << get_keyframe(id).get_index()
+        << " was not written; frames must be added in order to a new file";
+    RMF_THROW(Message(oss.str()), IOException);
+  }
+
+  bool changed = false;
+  std::vector<ID<Vector3Traits> > encoded;
+  RMF_FOREACH(internal::TypeData<Vector3Traits>::const_reference kp,
+              data.vector3_data) {
+    ID<Vector3Traits> k = kp.first;
+    if (!get_is_coordinate_key(file_data.keys.vector3_keys.name[k])) continue;
+    ID<IntsTraits> ck = get_companion_key(k);
+    if (file_data.keys.ints_keys.category.find(ck) ==
+        file_data.keys.ints_keys.category.end()) {
+      KeyInfo ki;
+      ki.name = get_companion_key_name(precision_, keyframe_interval_,
+                                       file_data.keys.vector3_keys.name[k]);
+      ki.category = file_data.keys.vector3_keys.category[k];
+      ki.id = ck.get_index();
+      ki.type = INTS;
+      file_data.keys.ints_keys.category[ck] = ki.category;
+      file_data.keys.ints_keys.name[ck] = ki.name;
+      file_data_changes.keys.push_back(ki);
+      changed = true;
+    }
+    const internal::KeyData<IntsTraits> *base = NULL;
+    if (!keyframe && keyframe_values_.find(ck) != keyframe_values_.end()) {
+      base = &keyframe_values_.find(ck)->second;
+    }
+    internal::KeyData<IntsTraits> &out = data.ints_data[ck];
+    RMF_FOREACH(internal::KeyData<Vector3Traits>::const_reference nv,
+                kp.second) {
+      Ints q(3);
+      for (unsigned int i = 0; i < 3; ++i) {
+        q[i] = quantize(nv.second[i], precision_);
+      }
+      if (keyframe) {
+        keyframe_values_[ck][nv.first] = q;
+      } else if (base) {
+        internal::KeyData<IntsTraits>::const_iterator it =
+            base->find(nv.first);
+        if (it != base->end()) {
+          for (unsigned int i = 0; i < 3; ++i) q[i] -= it->second[i];
+        }
+      }
+      out[nv.first] = q;
+    }
+    encoded.push_back(k);
+  }
+  RMF_FOREACH(ID<Vector3Traits> k, encoded) { data.vector3_data.erase(k); }
+  return changed;
+}
+
+void CoordinateCodec::load_keys(FileData &file_data) {
+  std::vector<ID<IntsTraits> > companions;
+  typedef std::pair<ID<IntsTraits>, std::string> KNP;
+  RMF_FOREACH(KNP kn, file_data.keys.ints_keys.name) {
+    if (kn.first.get_index() < companion_key_base ||
+        kn.second.compare(0, companion_key_prefix.size(),
+                          companion_key_prefix) != 0) {
+      continue;
+    }
+    std::istringstream iss(kn.second.substr(companion_key_prefix.size()));
+    char sep;
+    iss >> precision_ >> sep >> keyframe_interval_;
+    RMF_INFO("Found quantized coordinates with precision " << precision_);
+    companions.push_back(kn.first);
+  }
+  RMF_FOREACH(ID<IntsTraits> k, companions) {
+    file_data.keys.ints_keys.name.erase(k);
+    file_data.keys.ints_keys.category.erase(k);
+  }
+}
+
+FrameID CoordinateCodec::get_keyframe_to_load(FrameID id) const {
+  if (precision_ <= 0 || get_is_keyframe(id)) return FrameID();
+  FrameID keyframe = get_keyframe(id);
+  if (keyframe == keyframe_) return FrameID();
+  return keyframe;
+}
+
+void CoordinateCodec::decode(FrameID id, DataTypes &data) {
+  if (precision_ <= 0) return;
+  bool keyframe = get_is_keyframe(id);
+  if (keyframe) {
+    keyframe_ = id;
+    keyframe_values_.clear();
+  }
+  bool have_keyframe = keyframe_ == get_keyframe(id);
+
+  std::vector<ID<IntsTraits> > decoded;
+  RMF_FOREACH(internal::TypeData<IntsTraits>::const_reference kp,
+              data.ints_data) {
+    if (kp.first.get_index() < companion_key_base) continue;
+    ID<Vector3Traits> k(kp.first.get_index() - companion_key_base);
+    const internal::KeyData<IntsTraits> *base = NULL;
+    if (!keyframe && have_keyframe &&
+        keyframe_values_.find(kp.first) != keyframe_values_.end()) {
+      base = &keyframe_values_.find(kp.first)->second;
+    }
+    internal::KeyData<Vector3Traits> &out = data.vector3_data[k];
+    RMF_FOREACH(internal::KeyData<IntsTraits>::const_reference nv,
+                kp.second) {
+      Ints q = nv.second;
+      if (keyframe) {
+        keyframe_values_[kp.first][nv.first] = q;
+      } else if (base) {
+        internal::KeyData<IntsTraits>::const_iterator it =
+            base->find(nv.first);
+        if (it != base->end()) {
+          for (unsigned int i = 0; i < 3; ++i) q[i] += it->second[i];
+        }
+      }
+      out[nv.first] = Vector3(q[0] * precision_, q[1] * precision_,
+                              q[2] * precision_);
+    }
+    decoded.push_back(kp.first);
+  }
+  RMF_FOREACH(ID<IntsTraits> k, decoded) { data.ints_data.erase(k); }
+}
+}
+}
+
+RMF_DISABLE_WARNINGS
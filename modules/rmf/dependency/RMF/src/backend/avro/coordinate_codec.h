@@ -0,0 +1,77 @@
+/**
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ *
+ */
+
+#ifndef RMF_AVRO2_COORDINATE_CODEC_H
+#define RMF_AVRO2_COORDINATE_CODEC_H
+
+#include "RMF/config.h"
+#include "RMF/ID.h"
+#include "RMF/traits.h"
+#include "types.h"
+
+RMF_ENABLE_WARNINGS
+
+namespace RMF {
+namespace avro2 {
+
+/* Optional lossy storage of per-frame coordinates.
+
+   When a coordinate precision is set, the values of the "coordinates" and
+   "translation" Vector3 keys in each frame are rounded to a multiple of the
+   precision and stored as integers instead of floats. Every
+   keyframe_interval frames (by frame index) there is a keyframe that stores
+   them in full; other frames store the difference from the keyframe, which
+   is usually small and so encodes in few bytes, and compresses well in
+   .rmfz files. Any node not in the keyframe is stored in full.
+
+   On disk, the integers are stored with Ints keys whose index is
+   companion_key_base plus that of the Vector3 key, and whose name records
+   the precision, keyframe interval and the name of the Vector3 key. These
+   keys are removed from the file data on reading, so they are never visible
+   to users.
+
+   Since the differences are from the keyframe that the writer quantized
+   itself, frames must be written in order from the start of a new file;
+   writing a frame whose keyframe was not written is an IOException.
+*/
+class RMFEXPORT CoordinateCodec {
+  double precision_;
+  unsigned int keyframe_interval_;
+  FrameID keyframe_;
+  internal::TypeData<IntsTraits> keyframe_values_;
+
+  static ID<IntsTraits> get_companion_key(ID<Vector3Traits> k);
+  bool get_is_keyframe(FrameID id) const;
+  FrameID get_keyframe(FrameID id) const;
+
+ public:
+  CoordinateCodec() : precision_(0), keyframe_interval_(0) {}
+
+  double get_precision() const { return precision_; }
+  unsigned int get_keyframe_interval() const { return keyframe_interval_; }
+
+  //! Quantize the coordinates in a frame that is about to be written.
+  /** Any new companion keys are added to file_data and file_data_changes.
+      \return true if file_data_changes was modified. */
+  bool encode(FrameID id, double precision, unsigned int keyframe_interval,
+              FileData &file_data, FileDataChanges &file_data_changes,
+              DataTypes &data);
+
+  //! Find and remove companion keys from file data that was just read.
+  void load_keys(FileData &file_data);
+
+  //! Return the keyframe that needs to be decoded before frame id.
+  /** Returns FrameID() if there is none, or it has already been decoded. */
+  FrameID get_keyframe_to_load(FrameID id) const;
+
+  //! Restore the coordinates in a frame that was just read.
+  void decode(FrameID id, DataTypes &data);
+};
+}
+}
+
+RMF_DISABLE_WARNINGS
+#endif /* RMF_AVRO2_COORDINATE_CODEC_H */
@@ -0,0 +1,244 @@
+/**
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ *
+ */
+
+#include <boost/crc.hpp>
+#include <boost/filesystem/operations.hpp>
+#include <boost/shared_ptr.hpp>
+#include <algorithm>
+#include <exception>
+#include <fstream>
+#include <utility>
+#include <vector>
+
+#include "avrocpp/api/Compiler.hh"
+#include "avrocpp/api/DataFile.hh"
+#include "avrocpp/api/Decoder.hh"
+#include "avrocpp/api/Encoder.hh"
+#include "avrocpp/api/Specific.hh"
+#include "avrocpp/api/Stream.hh"
+#include "generated/embed_jsons.h"
+#include "RMF/log.h"
+#include "data_file.h"
+#include "encode_decode.h"  // IWYU pragma: keep
+#include "frame_index.h"
+
+RMF_ENABLE_WARNINGS
+
+namespace RMF {
+namespace avro2 {
+
+namespace {
+const std::string index_magic = "RMF3 frame index";
+const int32_t index_version = 2;
+// Number of bytes at each end of the file that go into the checksum
+const int64_t checksum_bytes = 64 * 1024;
+
+// Identify the file an index was made from, so stale indexes are ignored
+struct FileStamp {
+  int64_t size, mtime, checksum;
+  bool operator!=(const FileStamp &o) const {
+    return size != o.size || mtime != o.mtime || checksum != o.checksum;
+  }
+};
+
+// Checksum the start of the file (the header, including the avro sync
+// marker, which is random for each file) and its end (the last block), so
+// that a rewrite which keeps the size and modification time (mtime has only
+// a one second resolution) is still noticed
+int64_t get_file_checksum(const std::string &path, int64_t size) {
+  boost::crc_32_type crc;
+  std::ifstream in(path.c_str(), std::ios::binary);
+  std::vector<char> buf(
+      static_cast<std::size_t>(std::min(size, checksum_bytes)));
+  in.read(&buf[0], buf.size());
+  crc.process_bytes(&buf[0], static_cast<std::size_t>(in.gcount()));
+  if (size > checksum_bytes) {
+    buf.resize(static_cast<std::size_t>(std::min(size - checksum_bytes,
+                                                 checksum_bytes)));
+    in.seekg(size - static_cast<int64_t>(buf.size()));
+    in.read(&buf[0], buf.size());
+    crc.process_bytes(&buf[0], static_cast<std::size_t>(in.gcount()));
+  }
+  return crc.checksum();
+}
+
+FileStamp get_file_stamp(const std::string &path) {
+  FileStamp ret;
+  ret.size = static_cast<int64_t>(boost::filesystem::file_size(path));
+  ret.mtime = static_cast<int64_t>(boost::filesystem::last_write_time(path));
+  ret.checksum = ret.size > 0 ? get_file_checksum(path, ret.size) : 0;
+  return ret;
+}
+
+template <class Traits>
+void add_key_infos(const KeyMaps<Traits> &keys, KeyType type,
+                   std::vector<KeyInfo> &out) {
+  typedef std::pair<ID<Traits>, Category> KP;
+  RMF_FOREACH(KP kp, keys.category) {
+    KeyInfo ki;
+    ki.name = keys.name.find(kp.first)->second;
+    ki.category = kp.second;
+    ki.id = kp.first.get_index();
+    ki.type = type;
+    out.push_back(ki);
+  }
+}
+
+std::vector<KeyInfo> get_key_infos(const KeyData &keys) {
+  std::vector<KeyInfo> ret;
+  add_key_infos(keys.float_keys, FLOAT, ret);
+  add_key_infos(keys.int_keys, INT, ret);
+  add_key_infos(keys.string_keys, STRING, ret);
+  add_key_infos(keys.floats_keys, FLOATS, ret);
+  add_key_infos(keys.ints_keys, INTS, ret);
+  add_key_infos(keys.strings_keys, STRINGS, ret);
+  add_key_infos(keys.vector3_keys, VECTOR3, ret);
+  add_key_infos(keys.vector4_keys, VECTOR4, ret);
+  add_key_infos(keys.vector3s_keys, VECTOR3S, ret);
+  return ret;
+}
+
+void write_index(const std::string &index_path, const FileStamp &stamp,
+                 const FileData &fd) {
+  boost::shared_ptr<internal_avro::OutputStream> stream =
+      internal_avro::fileOutputStream(index_path.c_str());
+  internal_avro::EncoderPtr e = internal_avro::binaryEncoder();
+  e->init(*stream);
+  internal_avro::encode(*e, index_magic);
+  internal_avro::encode(*e, index_version);
+  internal_avro::encode(*e, stamp.size);
+  internal_avro::encode(*e, stamp.mtime);
+  internal_avro::encode(*e, stamp.checksum);
+
+  internal_avro::encode(*e, fd.description);
+  internal_avro::encode(*e, fd.producer);
+  internal_avro::encode(*e, fd.categories);
+  internal_avro::encode(*e, fd.extra_node_types);
+  internal_avro::encode(*e, fd.extra_frame_types);
+  internal_avro::encode(*e, fd.node_sets);
+  internal_avro::encode(*e, fd.nodes);
+  internal_avro::encode(*e, get_key_infos(fd.keys));
+  internal_avro::encode(*e, fd.data);
+
+  internal_avro::encode(*e, fd.max_id);
+  internal_avro::encode(*e, static_cast<int64_t>(fd.frames.size()));
+  typedef std::pair<FrameID, internal::FrameData> FDP;
+  RMF_FOREACH(const FDP & fdp, fd.frames) {
+    internal_avro::encode(*e, fdp.first);
+    internal_avro::encode(*e, fdp.second.name);
+    internal_avro::encode(*e, fdp.second.type);
+    internal_avro::encode(*e, fdp.second.parents);
+  }
+  internal_avro::encode(*e, fd.frame_block_offsets);
+  e->flush();
+}
+
+bool read_index(const std::string &index_path, const FileStamp &stamp,
+                FileData &fd) {
+  boost::shared_ptr<internal_avro::InputStream> stream =
+      internal_avro::fileInputStream(index_path.c_str());
+  internal_avro::DecoderPtr d = internal_avro::binaryDecoder();
+  d->init(*stream);
+  std::string magic;
+  internal_avro::decode(*d, magic);
+  int32_t version;
+  internal_avro::decode(*d, version);
+  if (magic != index_magic || version != index_version) return false;
+  FileStamp index_stamp;
+  internal_avro::decode(*d, index_stamp.size);
+  internal_avro::decode(*d, index_stamp.mtime);
+  internal_avro::decode(*d, index_stamp.checksum);
+  if (index_stamp != stamp) {
+    RMF_INFO("Frame index " << index_path << " is out of date");
+    return false;
+  }
+
+  clear(fd);
+  internal_avro::decode(*d, fd.description);
+  internal_avro::decode(*d, fd.producer);
+  internal_avro::decode(*d, fd.categories);
+  internal_avro::decode(*d, fd.extra_node_types);
+  internal_avro::decode(*d, fd.extra_frame_types);
+  internal_avro::decode(*d, fd.node_sets);
+  internal_avro::decode(*d, fd.nodes);
+  std::vector<KeyInfo> keys;
+  internal_avro::decode(*d, keys);
+  sort_keys(keys, fd.keys);
+  internal_avro::decode(*d, fd.data);
+
+  internal_avro::decode(*d, fd.max_id);
+  int64_t num_frames;
+  internal_avro::decode(*d, num_frames);
+  for (int64_t i = 0; i < num_frames; ++i) {
+    FrameID id;
+    internal_avro::decode(*d, id);
+    internal::FrameData &frame = fd.frames[id];
+    internal_avro::decode(*d, frame.name);
+    internal_avro::decode(*d, frame.type);
+    internal_avro::decode(*d, frame.parents);
+  }
+  internal_avro::decode(*d, fd.frame_block_offsets);
+  fd.cur_id = FrameID();
+  return true;
+}
+}
+
+std::string get_frame_index_path(const std::string &path) {
+  return path + ".idx";
+}
+
+void remove_frame_index(const std::string &path) {
+  boost::system::error_code ec;
+  boost::filesystem::remove(get_frame_index_path(path), ec);
+}
+
+void write_frame_index(const std::string &path) {
+  std::string index_path = get_frame_index_path(path);
+  std::string tmp_path = index_path + ".tmp";
+  try {
+    FileData fd;
+    {
+      internal_avro::DataFileReader<FileData> reader(
+          path.c_str(), internal_avro::compileJsonSchemaFromString(
+                            RMF::data_avro::frame_json));
+      load_file_data(reader, fd);
+    }
+    // Write to a temporary file first, so that readers never see a
+    // partially written index
+    write_index(tmp_path, get_file_stamp(path), fd);
+    boost::filesystem::rename(tmp_path, index_path);
+    RMF_INFO("Wrote frame index " << index_path);
+  }
+  catch (const std::exception &e) {
+    RMF_INFO("Unable to write frame index " << index_path << ": "
+                                            << e.what());
+    boost::system::error_code ec;
+    boost::filesystem::remove(tmp_path, ec);
+    throw;
+  }
+}
+
+bool load_frame_index(const std::string &path, FileData &fd) {
+  std::string index_path = get_frame_index_path(path);
+  try {
+    if (!boost::filesystem::exists(index_path)) return false;
+    if (read_index(index_path, get_file_stamp(path), fd)) {
+      RMF_INFO("Loaded file data from frame index " << index_path);
+      return true;
+    }
+  }
+  catch (const std::exception &e) {
+    RMF_INFO("Unable to read frame index " << index_path << ": "
+                                           << e.what());
+  }
+  clear(fd);
+  fd.max_id = FrameID();
+  return false;
+}
+}
+}
+
+RMF_DISABLE_WARNINGS
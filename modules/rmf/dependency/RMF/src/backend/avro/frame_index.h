@@ -0,0 +1,46 @@
+/**
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ *
+ */
+
+#ifndef RMF_AVRO2_FRAME_INDEX_H
+#define RMF_AVRO2_FRAME_INDEX_H
+
+#include <string>
+
+#include "RMF/config.h"
+#include "types.h"
+
+RMF_ENABLE_WARNINGS
+
+namespace RMF {
+namespace avro2 {
+
+/* An RMF3 file can have a sidecar index file (with a .idx suffix) holding
+   all of its file data (hierarchy, keys, static data, frame names and
+   types) plus the block offset of every frame, so that the file can be
+   opened without reading every record in it. Indexes are only written on
+   request (see RMF::add_frame_index()). The index records the size,
+   modification time and a checksum of the start and end of the file it was
+   made from, and is ignored if these no longer match. */
+
+//! Get the name of the index file for the given RMF file.
+RMFEXPORT std::string get_frame_index_path(const std::string &path);
+
+//! Remove any existing index for the given RMF file.
+RMFEXPORT void remove_frame_index(const std::string &path);
+
+//! Write an index for the given (closed) RMF file.
+/** Any partially written index is removed and the exception rethrown
+    on failure. */
+RMFEXPORT void write_frame_index(const std::string &path);
+
+//! Fill in the file data from the index, if there is a valid one.
+/** \return false if there is no index, or it is out of date. */
+RMFEXPORT bool load_frame_index(const std::string &path, FileData &fd);
+}
+}
+
+RMF_DISABLE_WARNINGS
+#endif /* RMF_AVRO2_FRAME_INDEX_H */
@@ -11,6 +11,7 @@
 
 #include "RMF/config.h"
 #include "backend/IO.h"
+#include "coordinate_codec.h"
 #include "data_file.h"
 #include "internal/shared_data_maps.h"
 #include "traits.h"
@@ -34,6 +35,7 @@ struct Avro2IO : public backends::IO {
   bool file_data_dirty_;
   avro2::FileDataChanges file_data_changes_;
   avro2::Frame frame_;
+  CoordinateCodec coordinate_codec_;
   void commit();
   unsigned int get_number_of_frames() const;
 
@@ -233,12 +235,24 @@ void Avro2IO<RW>::save_loaded_frame(internal::SharedData *shared_data) {
   frame_.name = fd.name;
   save_all(file_data_, file_data_changes_, shared_data, frame_.data, NULL,
            internal::LoadedValues());
+  if (coordinate_codec_.encode(id, shared_data->get_coordinate_precision(),
+                               shared_data->get_keyframe_interval(),
+                               file_data_, file_data_changes_, frame_.data)) {
+    file_data_dirty_ = true;
+  }
 }
 
 template <class RW>
 void Avro2IO<RW>::load_loaded_frame(internal::SharedData *shared_data) {
   FrameID id = shared_data->get_loaded_frame();
+  // Delta-encoded coordinates need their keyframe decoded first
+  FrameID keyframe = coordinate_codec_.get_keyframe_to_load(id);
+  if (keyframe != FrameID()) {
+    rw_.load_frame(file_data_, frame_.id, keyframe, frame_);
+    coordinate_codec_.decode(keyframe, frame_.data);
+  }
   rw_.load_frame(file_data_, frame_.id, id, frame_);
+  coordinate_codec_.decode(id, frame_.data);
   load_all(file_data_.categories, shared_data, file_data_.keys, frame_.data,
            internal::LoadedValues());
 }
@@ -262,6 +276,10 @@ void Avro2IO<RW>::load_file(internal::SharedData *shared_data) {
   // set producer and description
   // for some weird reason, mac os 10.8 clang needs this two step thing
   rw_.load_file_data(file_data_);
+  coordinate_codec_.load_keys(file_data_);
+  shared_data->set_coordinate_precision(
+      coordinate_codec_.get_precision(),
+      coordinate_codec_.get_keyframe_interval());
   RMF_INFO("Found " << get_number_of_frames() << " frames");
   shared_data->set_description(file_data_.description);
   shared_data->set_producer(file_data_.producer);
@@ -15,6 +15,7 @@
 #include "RMF/log.h"
 #include "avrocpp/api/Compiler.hh"
 #include "data_file.h"
+#include "frame_index.h"
 #include "generated/embed_jsons.h"
 #include <boost/make_shared.hpp>
 #include <boost/shared_ptr.hpp>
@@ -35,7 +36,9 @@ internal_avro::ValidSchema get_schema() {
 struct FileWriterTraitsBase {
   boost::shared_ptr<internal_avro::DataFileWriterBase> writer_;
   std::string path_;
-  FileWriterTraitsBase(std::string path) : path_(path) {}
+  FileWriterTraitsBase(std::string path) : path_(path) {
+    remove_frame_index(path_);
+  }
   template <class T>
   void write(const T &t) {
     RMF_INFO("Writing to file");
@@ -93,6 +96,7 @@ struct ReaderTraits {
     avro2::load_frame(id, *reader_, frame);
   }
   void load_file_data(FileData &fd) {
+    if (base_file_data_.load_frame_index(fd)) return;
     RMF_INFO("Loading file data");
     boost::shared_ptr<internal_avro::DataFileReader<FileData> > reader =
         base_file_data_.template get_reader<FileData>();
@@ -116,6 +120,9 @@ struct FileReaderBase {
   std::string path_;
 
   FileReaderBase(std::string path) : path_(path) { get_reader<Frame>(); }
+  bool load_frame_index(FileData &fd) {
+    return avro2::load_frame_index(path_, fd);
+  }
   template <class T>
   boost::shared_ptr<internal_avro::DataFileReader<T> > get_reader() {
     return boost::make_shared<internal_avro::DataFileReader<T> >(path_.c_str(),
@@ -164,6 +171,8 @@ struct BufferReaderBase {
       buffer_ = try_convert(buffer_, e.what());
     }
   }
+  // buffers are never indexed
+  bool load_frame_index(FileData &) { return false; }
   template <class T>
   boost::shared_ptr<internal_avro::DataFileReader<T> > get_reader() {
     boost::shared_ptr<internal_avro::InputStream> stream =
@@ -6,6 +6,7 @@
  *
  */
 
+#include <boost/thread/mutex.hpp>
 #include <algorithm>
 #include <exception>
 #include <functional>
@@ -30,7 +31,11 @@ namespace RMF {
 namespace internal {
 
 namespace {
+// Files can be opened from several threads, so guard the set. Buffers are
+// all called "buffer" and are independent of each other, so skip them.
 RMF_LARGE_UNORDERED_SET<std::string> open_for_writing;
+boost::mutex open_for_writing_mutex;
+bool get_is_buffer(std::string path) { return path == "buffer"; }
 }
 SharedData::SharedData(boost::shared_ptr<backends::IO> io, std::string name,
                        bool write, bool created)
@@ -38,6 +43,8 @@ SharedData::SharedData(boost::shared_ptr<backends::IO> io, std::string name,
   if (!created) {
     reload();
   }
+  if (get_is_buffer(get_file_path())) return;
+  boost::mutex::scoped_lock lock(open_for_writing_mutex);
   RMF_USAGE_CHECK(
       open_for_writing.find(get_file_path()) == open_for_writing.end(),
       "Opening a file that is still being written is asking for trouble.");
@@ -146,7 +153,10 @@ SharedData::~SharedData() {
       std::cerr << "Exception caught in shared data destructor " << e.what()
                 << std::endl;
     }
-    open_for_writing.erase(get_file_path());
+    if (!get_is_buffer(get_file_path())) {
+      boost::mutex::scoped_lock lock(open_for_writing_mutex);
+      open_for_writing.erase(get_file_path());
+    }
   }
 }
 
@@ -168,6 +168,49 @@ void clone_loaded_data(SDA* sda, SDB* sdb) {
   }
 }
 
+template <class SDA, class SDB>
+void clone_static_data(SDA* sda, SDB* sdb, const Categories& categories) {
+  RMF_FOREACH(Category cata, categories) {
+    Category catb = sdb->get_category(sda->get_name(cata));
+    clone_values_category(sda, cata, sdb, catb, StaticValues());
+  }
+}
+
+template <class SDA, class SDB>
+void clone_loaded_data(SDA* sda, SDB* sdb, const Categories& categories) {
+  RMF_FOREACH(Category cata, categories) {
+    Category catb = sdb->get_category(sda->get_name(cata));
+    clone_values_category(sda, cata, sdb, catb, LoadedValues());
+  }
+}
+
+// Read static values and set them as loaded values, unless there already
+// is a loaded value or the static value is the same
+struct StaticToLoadedValues {
+  template <class Traits, class SD>
+  static typename Traits::Type get(SD* sd, NodeID n, ID<Traits> k) {
+    return sd->get_static_value(n, k);
+  }
+  template <class Traits, class SD>
+  static void set(SD* sd, NodeID n, ID<Traits> k, typename Traits::Type v) {
+    if (!Traits::get_is_null_value(sd->get_loaded_value(n, k))) return;
+    typename Traits::ReturnType sv = sd->get_static_value(n, k);
+    if (!Traits::get_is_null_value(sv) && Traits::get_are_equal(sv, v)) {
+      return;
+    }
+    sd->set_loaded_value(n, k, v);
+  }
+};
+
+template <class SDA, class SDB>
+void clone_static_data_to_loaded(SDA* sda, SDB* sdb,
+                                 const Categories& categories) {
+  RMF_FOREACH(Category cata, categories) {
+    Category catb = sdb->get_category(sda->get_name(cata));
+    clone_values_category(sda, cata, sdb, catb, StaticToLoadedValues());
+  }
+}
+
 #define RMF_CLONE_DATA(Traits, UCName) \
   H::access_data(sdb, Traits()) = H::get_data(sda, Traits());
 
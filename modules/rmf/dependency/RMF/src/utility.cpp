@@ -25,6 +25,7 @@
 #include "RMF/exceptions.h"
 #include "RMF/infrastructure_macros.h"
 #include "RMF/utility.h"
+#include "backend/avro/frame_index.h"
 #include "internal/clone_shared_data.h"
 #include "internal/shared_data_equality.h"
 #include <limits>
@@ -49,6 +50,30 @@ void clone_static_frame(FileConstHandle input, FileHandle output) {
   internal::clone_static_data(input.shared_.get(), output.shared_.get());
 }
 
+void clone_loaded_frame(FileConstHandle input, FileHandle output,
+                        const Categories& categories) {
+  internal::clone_loaded_data(input.shared_.get(), output.shared_.get(),
+                              categories);
+}
+
+void clone_static_frame(FileConstHandle input, FileHandle output,
+                        const Categories& categories) {
+  internal::clone_static_data(input.shared_.get(), output.shared_.get(),
+                              categories);
+}
+
+void clone_static_to_loaded_frame(FileConstHandle input, FileHandle output) {
+  internal::clone_static_data_to_loaded(input.shared_.get(),
+                                        output.shared_.get(),
+                                        input.shared_->get_categories());
+}
+
+void clone_static_to_loaded_frame(FileConstHandle input, FileHandle output,
+                                  const Categories& categories) {
+  internal::clone_static_data_to_loaded(input.shared_.get(),
+                                        output.shared_.get(), categories);
+}
+
 namespace {
 bool get_equal_node_structure(NodeConstHandle in, NodeConstHandle out,
                               bool print_diff) {
@@ -99,6 +124,15 @@ bool get_equal_static_values(FileConstHandle in, FileConstHandle out) {
   return internal::get_equal_static_values(in.shared_.get(), out.shared_.get());
 }
 
+void add_frame_index(std::string path) {
+  try {
+    avro2::write_frame_index(path);
+  }
+  catch (const std::exception &e) {
+    RMF_THROW(Message(e.what()) << File(path), IOException);
+  }
+}
+
 void test_throw_exception() {
   RMF_THROW(Message("Test exception"), UsageException);
 }
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import unittest
+import RMF
+import os
+import subprocess
+
+
+def _get_application(name):
+    """Find an RMF command line tool in the build directory or the PATH"""
+    dirs = [os.path.join(os.getcwd(), os.pardir, "bin")] \
+        + os.environ.get("PATH", "").split(os.pathsep)
+    for d in dirs:
+        path = os.path.join(d, name)
+        if os.path.exists(path):
+            return path
+
+
+class Tests(unittest.TestCase):
+
+    def _run(self, name, args):
+        app = _get_application(name)
+        if app is None:
+            self.skipTest("%s not found" % name)
+        p = subprocess.Popen([app] + args, stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE, universal_newlines=True)
+        out, err = p.communicate()
+        print(out, err)
+        return p.returncode, err
+
+    def _make_file(self, name, values):
+        """Make a file with one frame per value; keys in categories a and b
+           have the value and the value + 0.5 respectively"""
+        path = RMF._get_temporary_file_path(name)
+        f = RMF.create_rmf_file(path)
+        n = f.get_root_node().add_child("n", RMF.REPRESENTATION)
+        ka = f.get_key(f.get_category("a"), "ka", RMF.float_tag)
+        kb = f.get_key(f.get_category("b"), "kb", RMF.float_tag)
+        for v in values:
+            f.add_frame(str(v), RMF.FRAME)
+            n.set_value(ka, v)
+            n.set_value(kb, v + 0.5)
+        return path
+
+    def _make_list(self, name, lines):
+        path = RMF._get_temporary_file_path(name)
+        with open(path, "w") as fh:
+            fh.write("\n".join(lines) + "\n")
+        return path
+
+    def _get_values(self, path, category="a"):
+        f = RMF.open_rmf_file_read_only(path)
+        k = f.get_key(f.get_category(category), "k" + category,
+                      RMF.float_tag)
+        n = f.get_root_node().get_children()[0]
+        ret = []
+        for fr in f.get_frames():
+            f.set_current_frame(fr)
+            ret.append(n.get_value(k))
+        return ret
+
+    def _get_categories(self, path):
+        f = RMF.open_rmf_file_read_only(path)
+        return sorted(f.get_name(c) for c in f.get_categories())
+
+    def test_cat(self):
+        """Test rmf_cat"""
+        a = self._make_file("cat_a.rmf", range(3))
+        b = self._make_file("cat_b.rmf", [10, 11])
+        out = RMF._get_temporary_file_path("cat_out.rmf")
+        self.assertEqual(self._run("rmf_cat", [a, b, out])[0], 0)
+        self.assertEqual(self._get_values(out), [0, 1, 2, 10, 11])
+        self.assertEqual(self._get_values(out, "b"),
+                         [0.5, 1.5, 2.5, 10.5, 11.5])
+
+    def test_cat_threads(self):
+        """Test rmf_cat with several threads"""
+        # enough frames for each input to be read in several chunks
+        values = [list(range(i * 1000, i * 1000 + 150)) for i in range(3)]
+        inputs = [self._make_file("threads_%d.rmf" % i, v)
+                  for i, v in enumerate(values)]
+        expected = sum(values, [])
+        for threads in (1, 2, 4):
+            out = RMF._get_temporary_file_path("threads_out_%d.rmf" % threads)
+            self.assertEqual(self._run("rmf_cat", inputs + [out,
+                                       "-j", str(threads)])[0], 0)
+            self.assertEqual(self._get_values(out), expected)
+            self.assertEqual(self._get_values(out, "b"),
+                             [v + 0.5 for v in expected])
+
+    def test_cat_frame_list(self):
+        """Test rmf_cat with a list of frames"""
+        a = self._make_file("list_a.rmf", range(3))
+        b = self._make_file("list_b.rmf", [10, 11])
+        lst = self._make_list("cat_frames", ["%s 2" % a, "%s 0" % b,
+                                             "# comment", "%s 1" % a,
+                                             "%s 1" % a])
+        for threads in (1, 2):
+            out = RMF._get_temporary_file_path("list_out_%d.rmf" % threads)
+            self.assertEqual(self._run("rmf_cat", ["-l", lst, out,
+                                       "-j", str(threads)])[0], 0)
+            self.assertEqual(self._get_values(out), [2, 10, 1, 1])
+
+    def test_cat_bad_frame(self):
+        """Test rmf_cat with a frame not in the input"""
+        a = self._make_file("bad_a.rmf", range(3))
+        lst = self._make_list("bad_frames", ["%s 0" % a, "%s 5" % a])
+        out = RMF._get_temporary_file_path("bad_out.rmf")
+        ret, err = self._run("rmf_cat", ["-l", lst, out])
+        self.assertEqual(ret, 1)
+        self.assertIn("has no frame 5", err)
+
+    def test_cat_categories(self):
+        """Test rmf_cat copying only some categories"""
+        a = self._make_file("cats_a.rmf", range(3))
+        b = self._make_file("cats_b.rmf", [10, 11])
+        out = RMF._get_temporary_file_path("cats_out.rmf")
+        self.assertEqual(self._run("rmf_cat", [a, b, out, "-c", "b"])[0], 0)
+        self.assertEqual(self._get_categories(out), ["b"])
+        self.assertEqual(self._get_values(out, "b"),
+                         [0.5, 1.5, 2.5, 10.5, 11.5])
+
+    def test_slice_frame_list(self):
+        """Test rmf_slice with a list of frames"""
+        a = self._make_file("slice_a.rmf", range(5))
+        lst = self._make_list("slice_frames", ["3", "1", "4"])
+        out = RMF._get_temporary_file_path("slice_out.rmf")
+        self.assertEqual(self._run("rmf_slice", [a, out, "-l", lst])[0], 0)
+        self.assertEqual(self._get_values(out), [3, 1, 4])
+
+    def test_slice_bad_frame(self):
+        """Test rmf_slice with a frame not in the input"""
+        a = self._make_file("slice_bad.rmf", range(5))
+        lst = self._make_list("slice_bad_frames", ["3", "7"])
+        out = RMF._get_temporary_file_path("slice_bad_out.rmf")
+        ret, err = self._run("rmf_slice", [a, out, "-l", lst])
+        self.assertEqual(ret, 1)
+        self.assertIn("No frame 7", err)
+
+    def test_slice_categories(self):
+        """Test rmf_slice copying only some categories"""
+        a = self._make_file("slice_cats.rmf", range(5))
+        out = RMF._get_temporary_file_path("slice_cats_out.rmf")
+        self.assertEqual(self._run("rmf_slice", [a, out, "-f", "1", "-s", "2",
+                                                 "-c", "a"])[0], 0)
+        self.assertEqual(self._get_categories(out), ["a"])
+        self.assertEqual(self._get_values(out), [1, 3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import unittest
+import RMF
+
+
+def get_coordinates(frame, node):
+    return RMF.Vector3(0.1234 * frame + node, -0.5 * frame * frame, 7.0 - node)
+
+
+class Tests(unittest.TestCase):
+
+    def _write(self, path, nframes, nnodes):
+        f = RMF.create_rmf_file(path)
+        f.set_coordinate_precision(0.01, 4)
+        pc = f.get_category("physics")
+        ck = f.get_key(pc, "coordinates", RMF.vector3_tag)
+        nodes = [f.get_root_node().add_child(str(i), RMF.REPRESENTATION)
+                 for i in range(nnodes)]
+        for i in range(nframes):
+            f.add_frame(str(i), RMF.FRAME)
+            # nodes appear part way through a keyframe interval
+            for j, n in enumerate(nodes[:i + 1]):
+                n.set_value(ck, get_coordinates(i, j))
+
+    def test_quantized(self):
+        """Test that coordinates can be stored to a fixed precision"""
+        for suffix in ["rmf", "rmfz", "rmf3"]:
+            path = RMF._get_temporary_file_path("test_codec." + suffix)
+            self._write(path, 10, 6)
+            f = RMF.open_rmf_file_read_only(path)
+            self.assertAlmostEqual(f.get_coordinate_precision(), 0.01,
+                                   delta=1e-9)
+            pc = f.get_category("physics")
+            ck = f.get_key(pc, "coordinates", RMF.vector3_tag)
+            self.assertEqual(f.get_keys(pc), [ck])
+            nodes = f.get_root_node().get_children()
+            # Access frames out of order, to exercise keyframe loading
+            for i in [9, 0, 5, 3, 4, 8, 1]:
+                f.set_current_frame(RMF.FrameID(i))
+                for j, n in enumerate(nodes):
+                    if j > i:
+                        self.assertFalse(n.get_has_value(ck))
+                        continue
+                    v = n.get_value(ck)
+                    expected = get_coordinates(i, j)
+                    for k in range(3):
+                        self.assertAlmostEqual(v[k], expected[k], delta=0.006)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -61,5 +61,30 @@ class GenericTest(unittest.TestCase):
             print(suffix)
             self._copy_to(suffix)
 
+    def test_copy_categories(self):
+        """Test copying only some categories of an rmf file"""
+        nm = RMF._get_temporary_file_path("categories_in.rmf")
+        onm = RMF._get_temporary_file_path("categories_out.rmf")
+        f = RMF.create_rmf_file(nm)
+        n = f.get_root_node().add_child("n", RMF.REPRESENTATION)
+        ka = f.get_key(f.get_category("a"), "ka", RMF.float_tag)
+        kb = f.get_key(f.get_category("b"), "kb", RMF.float_tag)
+        f.add_frame("0", RMF.FRAME)
+        n.set_value(ka, 1.0)
+        n.set_value(kb, 2.0)
+        of = RMF.create_rmf_file(onm)
+        RMF.clone_hierarchy(f, of)
+        of.add_frame("0", RMF.FRAME)
+        RMF.clone_loaded_frame(f, of, [f.get_category("a")])
+        del f, of
+        of = RMF.open_rmf_file_read_only(onm)
+        of.set_current_frame(RMF.FrameID(0))
+        on = of.get_root_node().get_children()[0]
+        self.assertAlmostEqual(
+            on.get_value(of.get_key(of.get_category("a"), "ka",
+                                    RMF.float_tag)), 1.0, delta=1e-6)
+        self.assertEqual([of.get_name(c) for c in of.get_categories()],
+                         ["a"])
+
 if __name__ == '__main__':
     unittest.main()
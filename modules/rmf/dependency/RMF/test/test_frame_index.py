@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+from __future__ import print_function
+import unittest
+import RMF
+import os
+import shutil
+
+
+class Tests(unittest.TestCase):
+
+    def _write(self, path, nframes, description="index test"):
+        f = RMF.create_rmf_file(path)
+        f.set_description(description)
+        r = f.get_root_node()
+        ch = r.add_child("child", RMF.REPRESENTATION)
+        sc = f.get_category("sequence")
+        ik = f.get_key(sc, "ik0", RMF.int_tag)
+        ch.set_static_value(ik, 42)
+        fk = f.get_key(sc, "fk0", RMF.float_tag)
+        for i in range(nframes):
+            f.add_frame(str(i), RMF.FRAME)
+            ch.set_value(fk, float(i))
+
+    def _check(self, path, nframes, description="index test"):
+        f = RMF.open_rmf_file_read_only(path)
+        self.assertEqual(f.get_description(), description)
+        self.assertEqual(f.get_number_of_frames(), nframes)
+        ch = f.get_root_node().get_children()[0]
+        self.assertEqual(ch.get_name(), "child")
+        sc = f.get_category("sequence")
+        ik = f.get_key(sc, "ik0", RMF.int_tag)
+        fk = f.get_key(sc, "fk0", RMF.float_tag)
+        # Access frames out of order
+        for i in reversed(range(nframes)):
+            fr = RMF.FrameID(i)
+            f.set_current_frame(fr)
+            self.assertEqual(f.get_name(fr), str(i))
+            self.assertEqual(ch.get_value(ik), 42)
+            self.assertAlmostEqual(ch.get_value(fk), float(i), delta=1e-6)
+
+    def test_index(self):
+        """Test that RMF3 files are indexed only on request"""
+        for suffix in ["rmf", "rmfz", "rmf3"]:
+            path = RMF._get_temporary_file_path("test_frame_index." + suffix)
+            self._write(path, 100)
+            self.assertFalse(os.path.exists(path + ".idx"))
+            RMF.add_frame_index(path)
+            self.assertTrue(os.path.exists(path + ".idx"))
+            self._check(path, 100)
+            # Recreating the file removes the index
+            self._write(path, 10)
+            self.assertFalse(os.path.exists(path + ".idx"))
+
+    def test_stale_index(self):
+        """Test that an out of date index is ignored"""
+        for suffix in ["rmf", "rmfz", "rmf3"]:
+            path = RMF._get_temporary_file_path("test_stale_index." + suffix)
+            self._write(path, 5)
+            RMF.add_frame_index(path)
+            shutil.copy(path + ".idx", path + ".old")
+            self._write(path, 10)
+            shutil.copy(path + ".old", path + ".idx")
+            self._check(path, 10)
+
+    def test_same_size_index(self):
+        """Test that an index for a same-sized rewrite is ignored"""
+        for suffix in ["rmf", "rmfz", "rmf3"]:
+            path = RMF._get_temporary_file_path("test_same_size." + suffix)
+            self._write(path, 5, "first")
+            RMF.add_frame_index(path)
+            shutil.copy(path + ".idx", path + ".old")
+            # Same size, and most likely the same modification time
+            self._write(path, 5, "other")
+            shutil.copy(path + ".old", path + ".idx")
+            self._check(path, 5, "other")
+
+    def test_index_bad_file(self):
+        """Test indexing a file that is not RMF3"""
+        path = RMF._get_temporary_file_path("test_bad_index.rmf")
+        with open(path, "w") as fh:
+            fh.write("garbage")
+        self.assertRaises(IOError, RMF.add_frame_index, path)
+        self.assertFalse(os.path.exists(path + ".idx"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,3 @@
+set(pyfiles "test_check_standards.py;test_cleanup_pycs.py;test_header.py;test_replace.py;utils.py")
+set(cppfiles "")
+set(cudafiles "")
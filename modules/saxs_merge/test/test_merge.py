@@ -4,6 +4,8 @@ import sys
 import os
 import tempfile
 import copy
+import time
+import multiprocessing
 
 import IMP.test
 import IMP.isd
@@ -312,5 +314,80 @@ class SAXSProfileTestTwo(IMP.test.ApplicationTestCase):
         self.assertEqual(set(zip(test['q'], test['eorigin'])),
                          set([(0, 0), (0, 1), (1, 0), (1, 1), (2, 0), (3, 1)]))
 
+    def test_fit_checkpoint(self):
+        """Test reuse of checkpointed fits"""
+        calls = []
+
+        def find_fit(data, verbose, model_comp=None, mean_function=None,
+                     model_comp_maxpoints=None):
+            calls.append(mean_function)
+            return mean_function, {'sigma': data['I'][0]}, {}
+        self.merge.find_fit = find_fit
+        data = {'q': [0, 1, 2], 'I': [1, 10, 1], 'err': [1, 1, 1], 'N': 10}
+        tmpdir = tempfile.mkdtemp()
+        try:
+            ret = self.merge.find_fit_checkpointed(data, 0, True, -1,
+                                                   'Simple', tmpdir)
+            self.assertEqual(ret, ('Simple', {'sigma': 1}, {}))
+            ret = self.merge.find_fit_checkpointed(data, 0, True, -1,
+                                                   'Simple', tmpdir)
+            self.assertEqual(ret, ('Simple', {'sigma': 1}, {}))
+            self.assertEqual(calls, ['Simple'])
+            # other options or data need a new fit
+            self.merge.find_fit_checkpointed(data, 0, True, -1,
+                                             'Full', tmpdir)
+            data['I'][1] = 5
+            self.merge.find_fit_checkpointed(data, 0, True, -1,
+                                             'Simple', tmpdir)
+            self.assertEqual(calls, ['Simple', 'Full', 'Simple'])
+            self.assertEqual(len(os.listdir(tmpdir)), 3)
+        finally:
+            for f in os.listdir(tmpdir):
+                os.unlink(os.path.join(tmpdir, f))
+            os.rmdir(tmpdir)
+
+    def test_fitting_jobs(self):
+        """Test fitting with a pool of workers"""
+        if hasattr(multiprocessing, 'get_start_method') \
+           and multiprocessing.get_start_method() != 'fork':
+            self.skipTest("workers need to inherit the mock find_fit")
+
+        def find_fit(data, verbose, model_comp=None, mean_function=None,
+                     model_comp_maxpoints=None):
+            if data['I'][0] < 0:
+                raise ValueError("bad fit")
+            # later profiles finish first
+            time.sleep(0.05 * (5 - data['I'][0]))
+            return 'test', {'sigma': float(data['I'][0])}, None
+        self.merge.find_fit = find_fit
+
+        def setup_process(data, n):
+            m = IMP.Model()
+            s = IMP.isd.Scale.setup_particle(IMP.Particle(m), 3.0)
+            functions = {'mean': MockFunction(), 'covariance': MockFunction()}
+            return m, {'sigma': s}, [], functions, MockGP(1, 10)
+        self.merge.setup_process = setup_process
+
+        def make_profiles(first):
+            profiles = []
+            for i in range(first, 5):
+                p = self.SAXSProfile()
+                p.new_flag('agood', bool)
+                p.add_data([[0, i, 1, True], [1, 10, 1, True]])
+                profiles.append(p)
+            return profiles
+
+        def fit(profiles, jobs):
+            args = MockArgs(verbose=0, blimit_fitting=-1, blimit_hessian=-1,
+                            bmean='Flat', bnocomp=True, jobs=jobs,
+                            checkpoint=None)
+            self.merge.fitting(profiles, args)
+            return [p.get_params()['sigma'] for p in profiles]
+        serial = fit(make_profiles(1), 1)
+        self.assertEqual(serial, [1., 2., 3., 4.])
+        self.assertEqual(fit(make_profiles(1), 3), serial)
+        # errors in the workers are passed on
+        self.assertRaises(ValueError, fit, make_profiles(-1), 3)
+
 if __name__ == "__main__":
     IMP.test.main()
@@ -14,17 +14,26 @@
 
 IMPSCOREFUNCTOR_BEGIN_INTERNAL_NAMESPACE
 
+//! A cubic spline with the value and second derivative of each bin together
+/** Each evaluation reads the values and second derivatives of two adjacent
+    bins; they are stored interleaved in one array so that a lookup touches
+    a single short run of memory, rather than two separate arrays. This
+    matters when many splines in a table are looked up in turn.
+*/
 class IMPSCOREFUNCTOREXPORT RawOpenCubicSpline {
-  Floats values_, second_derivs_;
+  // value, second derivative for each bin
+  Floats data_;
+  size_t get_number_of_bins() const { return data_.size() / 2; }
   size_t get_start_bin(double v, double, double inverse_spacing) const {
     return static_cast<size_t>(v * inverse_spacing);
   }
   template <bool derivative>
   double compute_it(double feature, double spacing,
                     double inverse_spacing) const {
-    unsigned int lowbin = std::min(
-        get_start_bin(feature, spacing, inverse_spacing), values_.size() - 2);
-    size_t highbin = lowbin + 1;
+    unsigned int lowbin =
+        std::min(get_start_bin(feature, spacing, inverse_spacing),
+                 get_number_of_bins() - 2);
+    const double *low = &data_[2 * lowbin];
     const double lowfeature = lowbin * spacing;
 
     const double b = (feature - lowfeature) * inverse_spacing;
@@ -32,14 +41,13 @@ class IMPSCOREFUNCTOREXPORT RawOpenCubicSpline {
     const double sixthspacing = spacing / 6.0;
     double v;
     if (!derivative) {
-      v = a * values_[lowbin] + b * values_[highbin] +
-          (a * (a * a - 1.) * second_derivs_[lowbin] +
-           b * (b * b - 1.) * second_derivs_[highbin]) *
-              spacing * sixthspacing;
+      v = a * low[0] + b * low[2] +
+          (a * (a * a - 1.) * low[1] + b * (b * b - 1.) * low[3]) * spacing *
+              sixthspacing;
     } else {
-      v = (values_[highbin] - values_[lowbin]) * inverse_spacing -
-          (3. * a * a - 1.) * sixthspacing * second_derivs_[lowbin] +
-          (3. * b * b - 1.) * sixthspacing * second_derivs_[highbin];
+      v = (low[2] - low[0]) * inverse_spacing -
+          (3. * a * a - 1.) * sixthspacing * low[1] +
+          (3. * b * b - 1.) * sixthspacing * low[3];
     }
     return v;
   }
@@ -60,11 +68,11 @@ class IMPSCOREFUNCTOREXPORT RawOpenCubicSpline {
                           compute_it<true>(feature, spacing, inverse_spacing));
   }
   double get_bin(double feature, double spacing, double inverse_spacing) const {
-    return values_[std::min(get_start_bin(feature, spacing, inverse_spacing),
-                            values_.size() - 1)];
+    return data_[2 * std::min(get_start_bin(feature, spacing, inverse_spacing),
+                              get_number_of_bins() - 1)];
   }
-  double get_last() const { return values_.back(); }
-  double get_first() const { return values_.front(); }
+  double get_last() const { return data_[data_.size() - 2]; }
+  double get_first() const { return data_.front(); }
 };
 
 IMPSCOREFUNCTOR_END_INTERNAL_NAMESPACE
@@ -0,0 +1,98 @@
+/**
+ *  \file test_batched_distance_pair_score.cpp
+ *  \brief Check that scoring a block of pairs matches scoring each pair.
+ *
+ *  Copyright 2007-2016 IMP Inventors. All rights reserved.
+ *
+ */
+#include <IMP/score_functor/DistancePairScore.h>
+#include <IMP/score_functor/HarmonicLowerBound.h>
+#include <IMP/score_functor/OpenCubicSpline.h>
+#include <IMP/algebra/vector_generators.h>
+#include <IMP/Model.h>
+#include <IMP/flags.h>
+#include <IMP/exception.h>
+#include <cmath>
+
+namespace {
+
+template <class PS>
+void check(IMP::Model *m, PS *ps, const IMP::ParticleIndexes &pis,
+           const IMP::ParticleIndexPairs &pairs) {
+  IMP::DerivativeAccumulator da;
+  m->zero_derivatives();
+  double single = 0;
+  for (unsigned int i = 0; i < pairs.size(); ++i) {
+    single += ps->evaluate_index(m, pairs[i], &da);
+  }
+  IMP::Floats single_derivs;
+  for (unsigned int i = 0; i < pis.size(); ++i) {
+    for (unsigned int j = 0; j < 3; ++j) {
+      single_derivs.push_back(m->get_derivative(IMP::FloatKey(j), pis[i]));
+    }
+  }
+  m->zero_derivatives();
+  double batched = ps->evaluate_indexes(m, pairs, &da, 0, pairs.size());
+  if (std::abs(single - batched) > .001 * (1 + std::abs(single))) {
+    IMP_THROW("Scores do not match: " << single << " " << batched,
+              IMP::ValueException);
+  }
+  for (unsigned int i = 0; i < pis.size(); ++i) {
+    for (unsigned int j = 0; j < 3; ++j) {
+      double d = m->get_derivative(IMP::FloatKey(j), pis[i]);
+      if (std::abs(d - single_derivs[3 * i + j]) > .001) {
+        IMP_THROW("Derivatives do not match: " << d << " "
+                                               << single_derivs[3 * i + j],
+                  IMP::ValueException);
+      }
+    }
+  }
+  double no_derivs = ps->evaluate_indexes(m, pairs, nullptr, 0, pairs.size());
+  if (std::abs(single - no_derivs) > .001 * (1 + std::abs(single))) {
+    IMP_THROW("Scores without derivatives do not match: " << single << " "
+                                                          << no_derivs,
+              IMP::ValueException);
+  }
+}
+}
+
+int main(int argc, char *argv[]) {
+  IMP::setup_from_argv(argc, argv,
+                       "Test scoring blocks of pairs with functor scores.");
+  IMP_NEW(IMP::Model, m, ());
+  IMP::algebra::BoundingBox3D bb(IMP::algebra::Vector3D(0, 0, 0),
+                                 IMP::algebra::Vector3D(10, 10, 10));
+  IMP::ParticleIndexes pis;
+  // more than one block of pairs
+  IMP::algebra::Vector3D v;
+  for (unsigned int i = 0; i < 30; ++i) {
+    IMP::ParticleIndex pi = m->add_particle("p");
+    // include a pair with both particles at the same point
+    if (i != 1) v = IMP::algebra::get_random_vector_in(bb);
+    for (unsigned int j = 0; j < 3; ++j) {
+      m->add_attribute(IMP::FloatKey(j), pi, v[j]);
+    }
+    m->add_attribute(IMP::FloatKey(3), pi, 1.0);
+    pis.push_back(pi);
+  }
+  IMP::ParticleIndexPairs pairs;
+  for (unsigned int i = 0; i < pis.size(); ++i) {
+    for (unsigned int j = 0; j < i; ++j) {
+      pairs.push_back(IMP::ParticleIndexPair(pis[i], pis[j]));
+    }
+  }
+
+  using namespace IMP::score_functor;
+  typedef DistancePairScore<HarmonicLowerBound> HPS;
+  IMP_NEW(HPS, hps, (HarmonicLowerBound(1)));
+  check(m.get(), hps.get(), pis, pairs);
+
+  IMP::Floats values;
+  for (unsigned int i = 0; i < 20; ++i) {
+    values.push_back(std::cos(.5 * i));
+  }
+  typedef DistancePairScore<OpenCubicSpline> SPS;
+  IMP_NEW(SPS, sps, (OpenCubicSpline(values, 0, 1, true)));
+  check(m.get(), sps.get(), pis, pairs);
+  return 0;
+}